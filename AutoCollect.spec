@@ -45,14 +45,44 @@ hiddenimports = [
     'auto_collect.main',
     'auto_collect.ui',
     'auto_collect.ui.main_window',
+    'auto_collect.ui.models',
+    'auto_collect.ui.log_console',
     'auto_collect.crawler',
     'auto_collect.crawler.manager',
     'auto_collect.crawler.storage',
     'auto_collect.crawler.DatabaseManager',
     'auto_collect.crawler.TwitterAPIClient',
+    'auto_collect.crawler.scheduler',
+    'auto_collect.crawler.author_frontier',
+    'auto_collect.crawler.canonical',
+    'auto_collect.crawler.events',
     'auto_collect.crawler.layer1_requests',
     'auto_collect.crawler.layer2_playwright',
     'auto_collect.crawler.layer3_selenium',
+    'auto_collect.crawler.link_validator',
+    'auto_collect.crawler.stream_ingest',
+    'auto_collect.storage',
+    'auto_collect.storage.connection',
+    'auto_collect.storage.migrations',
+    'auto_collect.storage.status',
+    'auto_collect.storage.fts',
+    'auto_collect.storage.queries',
+    'auto_collect.storage.sightings',
+    'auto_collect.storage.repository',
+    'auto_collect.storage.sqlite_repository',
+    'auto_collect.storage.memory_repository',
+    'auto_collect.storage.parquet_repository',
+    'auto_collect.storage.writer',
+    'auto_collect.storage.export',
+    'auto_collect.storage.merge',
+    'auto_collect.storage.mutations',
+    'auto_collect.storage.archive',
+    'auto_collect.storage.dedupe',
+    'auto_collect.storage.tweet_archive',
+    'auto_collect.storage.lookups',
+    'auto_collect.storage.stats',
+    'auto_collect.storage.snapshot',
+    'auto_collect.crawler.watchlist',
 ]
 
 # 需要排除的模块
@@ -1,35 +1,44 @@
 import tweepy
+import requests
 import json
-import re
 import sys
 from pathlib import Path
 
-TG_LINK_RE = re.compile(r"((?:https?://)?t\.me/[A-Za-z0-9_+/?=-]+)", re.I)
+# 添加项目根目录到sys.path以确保可以导入（子进程以脚本方式运行）
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from auto_collect.crawler.canonical import extract_tg_links
+
+# Twitter API v2 地址，测试时可替换为本地的模拟服务
+DEFAULT_API_BASE = "https://api.twitter.com"
 
 def extract_tg_links_from_text(text):
-    matches = set(m.group(0) for m in TG_LINK_RE.finditer(text))
-    # 标准化链接，确保都有 https:// 前缀
-    normalized_links = set()
-    for match in matches:
-        if not match.startswith('http'):
-            normalized_links.add('https://' + match)
-        else:
-            normalized_links.add(match)
-    return normalized_links
+    # 提取并规范化链接（统一 https://t.me/ 前缀、用户名小写等）
+    return extract_tg_links(text)
 
 class TwitterAPIClient:
-    def __init__(self, api_key, api_secret, access_token, access_token_secret):
+    def __init__(self, api_key=None, api_secret=None, access_token=None, access_token_secret=None,
+                 bearer_token=None, api_base=DEFAULT_API_BASE):
         self.api_key = api_key
         self.api_secret = api_secret
         self.access_token = access_token
         self.access_token_secret = access_token_secret
+        # 过滤流(filtered stream)只支持 App-only 认证，需要 Bearer Token
+        self.bearer_token = bearer_token
+        self.api_base = api_base.rstrip("/")
 
-        # 设置认证
-        auth = tweepy.OAuthHandler(api_key, api_secret)
-        auth.set_access_token(access_token, access_token_secret)
+        self.api = None
+        if api_key and api_secret:
+            # 设置认证
+            auth = tweepy.OAuthHandler(api_key, api_secret)
+            auth.set_access_token(access_token, access_token_secret)
 
-        # 创建API对象
-        self.api = tweepy.API(auth, wait_on_rate_limit=True)
+            # 创建API对象
+            self.api = tweepy.API(auth, wait_on_rate_limit=True)
+
+        self.session = requests.Session()
+        if bearer_token:
+            self.session.headers.update({"Authorization": f"Bearer {bearer_token}"})
 
     def search_telegram_links(self, keyword, count=100):
         """
@@ -76,6 +85,43 @@ class TwitterAPIClient:
 
         return [{"link": link, "source": url} for link in results]
 
+    # ---------------- 过滤流 (filtered stream) ----------------
+    def get_stream_rules(self):
+        """获取当前过滤流上的规则列表"""
+        resp = self.session.get(f"{self.api_base}/2/tweets/search/stream/rules", timeout=15)
+        resp.raise_for_status()
+        return resp.json().get("data", [])
+
+    def add_stream_rules(self, rules):
+        """添加过滤流规则，rules: [{'value': ..., 'tag': ...}, ...]"""
+        if not rules:
+            return []
+        resp = self.session.post(f"{self.api_base}/2/tweets/search/stream/rules",
+                                 json={"add": rules}, timeout=15)
+        resp.raise_for_status()
+        return resp.json().get("data", [])
+
+    def delete_stream_rules(self, rule_ids):
+        """按ID删除过滤流规则"""
+        if not rule_ids:
+            return
+        resp = self.session.post(f"{self.api_base}/2/tweets/search/stream/rules",
+                                 json={"delete": {"ids": list(rule_ids)}}, timeout=15)
+        resp.raise_for_status()
+
+    def open_filtered_stream(self, read_timeout=90):
+        """
+        打开过滤流长连接，返回 requests 的流式响应
+        服务端约每20秒发送一次空行保活，read_timeout 超过该间隔即视为连接已僵死
+        """
+        params = {
+            "tweet.fields": "author_id,created_at,entities",
+        }
+        resp = self.session.get(f"{self.api_base}/2/tweets/search/stream",
+                                params=params, stream=True, timeout=(10, read_timeout))
+        resp.raise_for_status()
+        return resp
+
 def load_api_keys():
     """
     从文件加载API密钥
@@ -0,0 +1,109 @@
+# auto_collect/crawler/author_frontier.py
+"""
+作者扩展抓取的优先队列
+
+发过 t.me 链接的作者，其简介、置顶推文里往往还有更多链接。
+搜索时把这些作者记入 author_frontier 表，按历史产出打分，
+扩展阶段优先访问得分高的作者主页。
+"""
+import re
+from datetime import datetime, timedelta, timezone
+
+from auto_collect.storage import get_connection, get_writer, migrate_database
+
+HANDLE_RE = re.compile(r"^/?([A-Za-z0-9_]{1,15})/?$")
+# 这些路径不是用户主页
+RESERVED_HANDLES = {"home", "explore", "search", "notifications", "messages", "i", "settings", "compose", "hashtag"}
+
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# 优先级 = (已发现新链接数 + 含链接推文数 + 1) / (访问次数 + 1)
+# 含链接推文数作为先验，访问后产出为零的作者优先级会逐步下降
+PRIORITY_SQL = "(links_found + link_tweets + 1.0) / (visits + 1)"
+
+
+def create_frontier_schema(conn):
+    """建立作者队列表（迁移中调用）"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS author_frontier (
+            handle TEXT PRIMARY KEY,
+            link_tweets INTEGER DEFAULT 0,
+            links_found INTEGER DEFAULT 0,
+            visits INTEGER DEFAULT 0,
+            priority REAL DEFAULT 0,
+            discovered_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            last_visited_at TIMESTAMP
+        )
+    ''')
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_author_frontier_priority ON author_frontier(priority DESC)")
+
+
+def parse_handle(href):
+    """从推文中的作者链接(/handle)解析出用户名，无法识别时返回 None"""
+    if not href:
+        return None
+    match = HANDLE_RE.match(href)
+    if not match or match.group(1).lower() in RESERVED_HANDLES:
+        return None
+    return match.group(1).lower()
+
+
+class AuthorFrontier:
+    def __init__(self, db_path: str = "telegram_links.db", revisit_after: timedelta = timedelta(days=7)):
+        self.db_path = db_path
+        self.revisit_after = revisit_after
+        # 搜索过程中先在内存中累计，flush() 时一次写入
+        self._pending = {}
+        # author_frontier 表由迁移建立
+        migrate_database(self.db_path)
+
+    def push(self, handle: str):
+        """记录一条来自该作者的含链接推文"""
+        if handle:
+            self._pending[handle] = self._pending.get(handle, 0) + 1
+
+    def flush(self):
+        """把内存中累计的作者写入队列表"""
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, {}
+
+        def write(conn):
+            conn.executemany('''
+                INSERT INTO author_frontier (handle, link_tweets)
+                VALUES (?, ?)
+                ON CONFLICT(handle) DO UPDATE SET
+                    link_tweets = link_tweets + excluded.link_tweets
+            ''', list(pending.items()))
+            conn.executemany(f"UPDATE author_frontier SET priority = {PRIORITY_SQL} WHERE handle = ?",
+                             [(h,) for h in pending])
+
+        get_writer(self.db_path).execute(write, rows=len(pending)).result()
+
+    def pop_batch(self, limit: int) -> list:
+        """取出优先级最高、且近期未访问过的作者"""
+        self.flush()
+        cutoff = (datetime.now(timezone.utc) - self.revisit_after).strftime(TIME_FORMAT)
+        cursor = get_connection(self.db_path).execute('''
+            SELECT handle FROM author_frontier
+            WHERE last_visited_at IS NULL OR last_visited_at <= ?
+            ORDER BY priority DESC
+            LIMIT ?
+        ''', (cutoff, limit))
+        return [row[0] for row in cursor.fetchall()]
+
+    def record_visit(self, handle: str, new_links: int):
+        """记录一次主页访问及其产出的新链接数"""
+        now = datetime.now(timezone.utc).strftime(TIME_FORMAT)
+
+        def write(conn):
+            conn.execute('''
+                UPDATE author_frontier
+                SET visits = visits + 1,
+                    links_found = links_found + ?,
+                    last_visited_at = ?
+                WHERE handle = ?
+            ''', (new_links, now, handle))
+            conn.execute(f"UPDATE author_frontier SET priority = {PRIORITY_SQL} WHERE handle = ?", (handle,))
+
+        get_writer(self.db_path).execute(write).result()
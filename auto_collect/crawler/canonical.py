@@ -0,0 +1,151 @@
+# auto_collect/crawler/canonical.py
+"""
+Telegram 链接规范化
+
+同一个频道的链接有很多写法，例如 https://t.me/Foo、http://t.me/foo/、
+t.me/foo?start=x、https://t.me/s/foo、https://telegram.me/foo，
+入库前统一转换成 https://t.me/foo，避免 UNIQUE 约束下出现重复记录。
+"""
+import re
+import sys
+from urllib.parse import urlsplit, parse_qsl, urlencode
+
+TG_LINK_RE = re.compile(r"((?:https?://)?(?:www\.)?(?:t\.me|telegram\.me|telegram\.dog)/[A-Za-z0-9_+/?=-]+)", re.I)
+
+CANONICAL_PREFIX = "https://t.me/"
+TG_HOSTS = {"t.me", "telegram.me", "telegram.dog"}
+
+# 第二段是区分大小写的标识(贴纸包名、邀请哈希等)，第一段统一小写
+PREFIXED_PATHS = {"joinchat", "addstickers", "addemoji", "addlist", "addtheme", "setlanguage", "bg", "invoice"}
+# 由查询参数决定身份的链接，只去掉跟踪参数
+QUERY_PATHS = {"share", "proxy", "socks", "iv", "msg"}
+TRACKING_PARAMS = {"ref", "fbclid", "gclid", "s", "t"}
+
+USERNAME_RE = re.compile(r"^[A-Za-z0-9_]{3,64}$")
+
+
+def _clean_query(query: str) -> str:
+    params = [(k, v) for k, v in parse_qsl(query, keep_blank_values=True)
+              if not k.lower().startswith("utm_") and k.lower() not in TRACKING_PARAMS]
+    return urlencode(sorted(params))
+
+
+def canonicalize_link(link: str):
+    """
+    把 Telegram 链接转换为规范形式，无法识别时返回 None
+      - 统一为 https://t.me/ 前缀，telegram.me / telegram.dog / www. 都折叠到 t.me
+      - 用户名统一小写，去掉 s/ 预览前缀、帖子编号等尾部路径和查询参数
+      - 邀请链接 joinchat/HASH 统一为 +HASH，哈希保持原始大小写
+    """
+    if not link:
+        return None
+    link = link.strip()
+    if "://" not in link:
+        link = "https://" + link
+    try:
+        parts = urlsplit(link)
+    except ValueError:
+        return None
+
+    host = (parts.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    segments = [s for s in parts.path.split("/") if s]
+
+    if host not in TG_HOSTS:
+        # 用户名子域名形式: foo.t.me
+        sub, _, parent = host.partition(".")
+        if parent in TG_HOSTS and sub:
+            segments = [sub] + segments
+        else:
+            return None
+
+    if segments and segments[0].lower() == "s":
+        segments = segments[1:]
+    if not segments:
+        return None
+
+    first = segments[0]
+    lowered = first.lower()
+
+    if first.startswith("+"):
+        return CANONICAL_PREFIX + first if len(first) > 1 else None
+    if lowered == "joinchat":
+        return CANONICAL_PREFIX + "+" + segments[1] if len(segments) > 1 else None
+    if lowered in PREFIXED_PATHS:
+        return f"{CANONICAL_PREFIX}{lowered}/{segments[1]}" if len(segments) > 1 else None
+    if lowered == "c":
+        # 私有频道的消息链接: t.me/c/<频道ID>/<消息ID>
+        if len(segments) > 1 and segments[1].isdigit():
+            return f"{CANONICAL_PREFIX}c/{segments[1]}"
+        return None
+    if lowered in QUERY_PATHS:
+        query = _clean_query(parts.query)
+        path = "/".join(seg.lower() for seg in segments)
+        return f"{CANONICAL_PREFIX}{path}" + (f"?{query}" if query else "")
+
+    if not USERNAME_RE.match(first):
+        return None
+    return CANONICAL_PREFIX + lowered
+
+
+def extract_tg_links(text: str) -> set:
+    """从文本中提取 Telegram 链接，返回规范化后的链接集合"""
+    links = set()
+    for m in TG_LINK_RE.finditer(text):
+        canonical = canonicalize_link(m.group(0))
+        if canonical:
+            links.add(canonical)
+    return links
+
+
+def merge_duplicate_links(conn) -> dict:
+    """
+    一次性迁移：把 telegram_links 中已存在的重复链接合并为规范形式
+    每组重复记录保留 ID 最小的一条（创建时间取整组最早的），其余删除
+    无法识别的链接保持原样
+    """
+    rows = conn.execute("SELECT id, link, created_at FROM telegram_links ORDER BY id").fetchall()
+
+    groups = {}
+    invalid = 0
+    for link_id, link, created_at in rows:
+        canonical = canonicalize_link(link)
+        if canonical is None:
+            invalid += 1
+            continue
+        groups.setdefault(canonical, []).append((link_id, link, created_at))
+
+    delete_ids = []
+    updates = []
+    for canonical, members in groups.items():
+        keep_id, keep_link, _ = members[0]
+        earliest = min((m[2] for m in members if m[2]), default=None)
+        delete_ids.extend(m[0] for m in members[1:])
+        if keep_link != canonical or len(members) > 1:
+            updates.append((canonical, earliest, keep_id))
+
+    # 先删除重复记录，再改写保留记录，避免改写时触发 UNIQUE 冲突
+    conn.executemany("DELETE FROM telegram_links WHERE id = ?", [(i,) for i in delete_ids])
+    has_status = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'link_status'").fetchone()
+    if has_status:
+        conn.executemany("DELETE FROM link_status WHERE link_id = ?", [(i,) for i in delete_ids])
+    conn.executemany('''
+        UPDATE telegram_links
+        SET link = ?, created_at = COALESCE(?, created_at), updated_at = CURRENT_TIMESTAMP
+        WHERE id = ?
+    ''', updates)
+
+    return {"scanned": len(rows), "merged": len(delete_ids), "rewritten": len(updates), "invalid": invalid}
+
+
+# ---------------- CLI 调用 ----------------
+if __name__ == "__main__":
+    from auto_collect.storage import get_connection, transaction
+
+    db_path = sys.argv[1] if len(sys.argv) > 1 else "telegram_links.db"
+    with transaction(get_connection(db_path)) as conn:
+        summary = merge_duplicate_links(conn)
+    print(f"[Canonical] 迁移完成: 扫描 {summary['scanned']} 条，合并重复 {summary['merged']} 条，"
+          f"改写 {summary['rewritten']} 条，无法识别 {summary['invalid']} 条", flush=True)
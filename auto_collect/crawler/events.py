@@ -0,0 +1,45 @@
+# auto_collect/crawler/events.py
+"""
+爬虫子进程向 UI 报告进度的结构化事件
+
+爬虫的标准输出既是给人看的日志，也是 UI 的数据来源。新链接一保存就输出一行事件：
+    @@event {"type": "link", "link": "https://t.me/...", "source": "...", "keyword": "..."}
+UI 的 Worker 逐行读取输出，识别出事件行后攒批交给界面，不必等子进程退出再解析最后一行 JSON。
+事件行有固定前缀，普通日志不会被误认为事件，事件行也不会被当作日志显示。
+"""
+import json
+
+EVENT_PREFIX = "@@event "
+LINK_EVENT = "link"
+
+
+def format_event(event_type: str, **fields) -> str:
+    return EVENT_PREFIX + json.dumps(dict(fields, type=event_type), ensure_ascii=False)
+
+
+def emit_event(event_type: str, **fields):
+    print(format_event(event_type, **fields), flush=True)
+
+
+def emit_new_links(batch: list, new_links: list):
+    """
+    为刚保存的新链接各输出一行 link 事件
+    batch: 传给 save_links 的 [{'link', 'source', 'keyword', ...}]，new_links: save_links 的返回值
+    """
+    if not new_links:
+        return
+    by_link = {item["link"]: item for item in batch}
+    for link in new_links:
+        item = by_link.get(link, {})
+        emit_event(LINK_EVENT, link=link, source=item.get("source", ""), keyword=item.get("keyword", ""))
+
+
+def parse_event(line: str):
+    """事件行解析为字典（含 'type'），普通日志行或格式错误时返回 None"""
+    if not line.startswith(EVENT_PREFIX):
+        return None
+    try:
+        event = json.loads(line[len(EVENT_PREFIX):])
+    except json.JSONDecodeError:
+        return None
+    return event if isinstance(event, dict) and "type" in event else None
@@ -1,10 +1,9 @@
 import requests
-import re
 
-TG_LINK_RE = re.compile(r"(https?://t\.me/[A-Za-z0-9_/?=-]+)", re.I)
+from auto_collect.crawler.canonical import extract_tg_links
 
 def extract_tg_links_from_text(text: str):
-    return list(set(m.group(0) for m in TG_LINK_RE.finditer(text)))
+    return list(extract_tg_links(text))
 
 def search_web(keyword: str, max_pages: int = 1, proxy: dict = None, log_callback=None):
     if log_callback:
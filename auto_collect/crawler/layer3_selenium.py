@@ -8,80 +8,21 @@ import sys
 import json
 import time
 import random
-import sqlite3
 
-# 导入数据库管理模块
-TG_LINK_RE = re.compile(r"((?:https?://)?t\.me/[A-Za-z0-9_+/?=-]+)", re.I)
+# 添加项目根目录到sys.path以确保可以导入（子进程以脚本方式运行）
+sys.path.append(str(Path(__file__).parent.parent.parent))
 
-class DatabaseManager:
-    def __init__(self, db_path: str = "telegram_links.db"):
-        self.db_path = db_path
-        self.init_database()
-    
-    def init_database(self):
-        """初始化数据库和表"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS telegram_links (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    link TEXT UNIQUE NOT NULL,
-                    source TEXT,
-                    keyword TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-            
-            # 创建索引提高查询性能
-            cursor.execute('''
-                CREATE INDEX IF NOT EXISTS idx_link ON telegram_links(link)
-            ''')
-            cursor.execute('''
-                CREATE INDEX IF NOT EXISTS idx_keyword ON telegram_links(keyword)
-            ''')
-            
-            conn.commit()
-    
-    def save_link(self, link_info: dict, keyword: str) -> bool:
-        """
-        保存单个链接到数据库
-        返回是否成功保存（True表示新保存，False表示已存在）
-        """
-        try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
-                    INSERT OR IGNORE INTO telegram_links (link, source, keyword)
-                    VALUES (?, ?, ?)
-                ''', (link_info['link'], link_info.get('source', ''), keyword))
-                
-                conn.commit()
-                return cursor.rowcount > 0  # 如果插入成功返回True
-        except Exception as e:
-            print(f"[DB] 保存链接 {link_info['link']} 时出错: {e}", flush=True)
-            return False
-    
-    def link_exists(self, link: str) -> bool:
-        """检查链接是否已存在"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                SELECT 1 FROM telegram_links WHERE link = ? LIMIT 1
-            ''', (link,))
-            
-            return cursor.fetchone() is not None
+from auto_collect.crawler.canonical import extract_tg_links
+from auto_collect.crawler.events import emit_new_links
+from auto_collect.crawler.author_frontier import AuthorFrontier, parse_handle
+from auto_collect.storage import open_repository
+from auto_collect.storage.tweet_archive import TweetArchive, DEFAULT_ARCHIVE_DIR
+
+STATUS_ID_RE = re.compile(r"/status/(\d+)")
 
 def extract_tg_links_from_text(text):
-    matches = set(m.group(0) for m in TG_LINK_RE.finditer(text))
-    # 标准化链接，确保都有 https:// 前缀
-    normalized_links = set()
-    for match in matches:
-        if not match.startswith('http'):
-            normalized_links.add('https://' + match)
-        else:
-            normalized_links.add(match)
-    return normalized_links
+    # 提取并规范化链接（统一 https://t.me/ 前缀、用户名小写等）
+    return extract_tg_links(text)
 
 # ---------------- 启动浏览器让用户登录（使用Playwright统一管理） ----------------
 def launch_browser_for_login(storage_state="storage_state.json"):
@@ -139,8 +80,98 @@ def attach_and_save_login(storage_state="storage_state.json"):
     else:
         print(f"[Worker] 未找到登录状态文件 {storage_state}，请先执行登录操作", flush=True)
 
+# ---------------- 作者扩展抓取 ----------------
+def tweet_author(tweet):
+    """获取推文作者的用户名"""
+    try:
+        anchor = tweet.query_selector("[data-testid='User-Name'] a[href^='/']")
+        return parse_handle(anchor.get_attribute("href")) if anchor else None
+    except Exception:
+        return None
+
+
+def tweet_status_id(tweet):
+    """获取推文 ID（推文时间戳链接 /<handle>/status/<id>）"""
+    try:
+        # 带时间戳的链接指向推文本身，引用推文的链接排在后面
+        anchor = (tweet.query_selector("a[href*='/status/']:has(time)")
+                  or tweet.query_selector("a[href*='/status/']"))
+        match = STATUS_ID_RE.search(anchor.get_attribute("href") or "") if anchor else None
+        return match.group(1) if match else None
+    except Exception:
+        return None
+
+
+def tweet_time(tweet):
+    """获取推文发布时间（<time datetime="...">）"""
+    try:
+        element = tweet.query_selector("time")
+        return element.get_attribute("datetime") if element else None
+    except Exception:
+        return None
+
+
+def expand_authors(page, frontier, db_manager, keyword, links_found, max_profiles=20, max_seconds=300):
+    """
+    按优先级访问发过链接的作者主页，从简介、主页链接和置顶/最新推文中提取链接
+    在 max_profiles 个主页或 max_seconds 秒的预算内完成，返回新保存的链接数
+    """
+    started = time.time()
+    saved_count = 0
+    handles = frontier.pop_batch(max_profiles)
+    print(f"[Expand] 开始作者扩展抓取，候选作者 {len(handles)} 个", flush=True)
+
+    for index, handle in enumerate(handles):
+        if time.time() - started > max_seconds:
+            print(f"[Expand] 已用完 {max_seconds} 秒预算，停止扩展", flush=True)
+            break
+
+        url = f"https://x.com/{handle}"
+        print(f"[Expand] 访问作者主页 {index + 1}/{len(handles)}: {url}", flush=True)
+        try:
+            page.goto(url, wait_until="load", timeout=30000)
+            page.wait_for_selector("[data-testid='tweet']", timeout=10000)
+        except Exception as e:
+            print(f"[Expand] 主页加载失败: {e}", flush=True)
+            frontier.record_visit(handle, 0)
+            continue
+        time.sleep(random.uniform(2, 4))
+
+        html_parts = []
+        for selector in ("[data-testid='UserDescription']", "[data-testid='UserUrl']",
+                         "[data-testid='UserProfileHeader_Items']"):
+            element = page.query_selector(selector)
+            if element:
+                html_parts.append(element.inner_html())
+        # 置顶推文排在最前面，只看前几条
+        for tweet in page.query_selector_all("[data-testid='tweet']")[:5]:
+            try:
+                html_parts.append(tweet.inner_html())
+            except Exception:
+                continue
+
+        batch = [{"link": link, "source": url, "keyword": keyword}
+                 for link in extract_tg_links_from_text(" ".join(html_parts)) if link not in links_found]
+        links_found.update(item["link"] for item in batch)
+        new_links = db_manager.save_links(batch)
+        for link in new_links:
+            print(f"[DB] 成功保存新链接: {link}", flush=True)
+        emit_new_links(batch, new_links)
+        new_count = len(new_links)
+        frontier.record_visit(handle, new_count)
+        saved_count += new_count
+        print(f"[Expand] 作者 @{handle} 新增 {new_count} 个链接", flush=True)
+
+    elapsed = max(time.time() - started, 1)
+    print(f"[Expand] 扩展完成，新增 {saved_count} 个链接，"
+          f"每分钟 {saved_count * 60 / elapsed:.1f} 个", flush=True)
+    return saved_count
+
+
 # ---------------- 抓取 t.me 链接（新策略） ----------------
-def search_keyword(keyword, storage_state="storage_state.json", keep_browser_open=False):
+def search_keyword(keyword, storage_state="storage_state.json", keep_browser_open=False,
+                   expand=False, expand_profiles=20, expand_seconds=300, time_budget=None,
+                   db_path="telegram_links.db", archive_dir=None):
     """
     使用新策略搜索Telegram链接
     
@@ -148,12 +179,21 @@ def search_keyword(keyword, storage_state="storage_state.json", keep_browser_ope
         keyword: 搜索关键词
         storage_state: 登录状态文件路径
         keep_browser_open: 是否在搜索完成后保持浏览器打开
+        expand: 是否在搜索后访问发过链接的作者主页（作者扩展模式）
+        expand_profiles: 扩展模式最多访问的作者主页数
+        expand_seconds: 扩展模式的时间预算（秒）
+        time_budget: 本次抓取的总时间预算（秒），用完后停止滚动，None 表示不限制
+        db_path: 数据库文件路径
+        archive_dir: 推文归档目录，指定时把看到的推文原文压缩归档，供以后离线重新提取
     """
-    # 初始化数据库
-    db_manager = DatabaseManager()
-    
+    if not Path(storage_state).exists():
+        print("[Worker] 登录态不存在，请先登录", flush=True)
+        return []
+
     # 用于跟踪本轮已发现的链接，避免重复处理
     本轮_links_found = set()
+    # 已记录过的 (链接, 推文ID)，避免重复滚动时把同一次出现记多次
+    seen_sightings = set()
     
     # 使用不同的搜索参数和时间参数来获取更多结果
     base_urls = [
@@ -172,12 +212,15 @@ def search_keyword(keyword, storage_state="storage_state.json", keep_browser_ope
         for time_filter in time_filters:
             urls.append(base_url + time_filter)
     
-    if not Path(storage_state).exists():
-        print("[Worker] 登录态不存在，请先登录", flush=True)
-        return []
-
+    # 初始化数据库，之后的资源都在 finally 中关闭
+    db_manager = open_repository(db_path)
+    frontier = None
+    archive = None
     browser = None
+    crawl_started = time.time()
     try:
+        frontier = AuthorFrontier(db_path) if expand else None
+        archive = TweetArchive(archive_dir) if archive_dir else None
         with sync_playwright() as p:
             browser = p.chromium.launch(
                 headless=False,
@@ -203,9 +246,16 @@ def search_keyword(keyword, storage_state="storage_state.json", keep_browser_ope
             page.set_viewport_size({"width": 1920, "height": 1080})
             
             total_saved_count = 0  # 总共保存到数据库的链接数
+            deadline = time.time() + time_budget if time_budget else None
+
+            def out_of_time():
+                return deadline is not None and time.time() >= deadline
             
             # 尝试多个搜索URL
             for url_index, url in enumerate(urls):
+                if out_of_time():
+                    print(f"[Worker] 已用完 {time_budget:.0f} 秒时间预算，停止抓取", flush=True)
+                    break
                 print(f"[Worker] 正在打开搜索页面 {url_index+1}/{len(urls)}: {url}", flush=True)
                 try:
                     page.goto(url, wait_until="load", timeout=30000)
@@ -230,12 +280,16 @@ def search_keyword(keyword, storage_state="storage_state.json", keep_browser_ope
                 scrolls_per_round = 30  # 每轮30次滚动
                 
                 for round_num in range(rounds):
+                    if out_of_time():
+                        break
                     print(f"[Worker] 开始第 {round_num + 1} 轮滚动 (每轮30次)", flush=True)
                     
                     last_height = 0
                     same_height_count = 0
                     
                     for scroll_count in range(scrolls_per_round):
+                        if out_of_time():
+                            break
                         print(f"[Worker] 第 {round_num + 1} 轮, 第 {scroll_count + 1} 次滚动", flush=True)
                         
                         # 获取当前页面高度
@@ -270,41 +324,47 @@ def search_keyword(keyword, storage_state="storage_state.json", keep_browser_ope
                         tweet_elements = page.query_selector_all("[data-testid='tweet']")
                         print(f"[Worker] 当前找到 {len(tweet_elements)} 个推文元素", flush=True)
                         
-                        # 分析所有推文
+                        # 分析所有推文，本次滚动的出现记录整批写入
+                        batch = []
                         for i, tweet in enumerate(tweet_elements):
                             try:
                                 tweet_html = tweet.inner_html()
+                                if archive is not None:
+                                    # 归档所有推文（不只是含 t.me 的），提取规则扩展新域名后也能找回
+                                    archive.append(tweet_status_id(tweet), tweet_html, author=tweet_author(tweet),
+                                                   created_at=tweet_time(tweet), keyword=keyword, source=url)
                                 if "t.me" in tweet_html:
-                                    print(f"[Worker] 在推文 {i+1} 中发现 t.me", flush=True)
                                     links = extract_tg_links_from_text(tweet_html)
-                                    # 处理每个发现的链接
+                                    if not links:
+                                        continue
+                                    tweet_id = tweet_status_id(tweet)
                                     for link in links:
-                                        # 检查本轮是否已处理过
-                                        if link in 本轮_links_found:
-                                            continue
-                                            
-                                        # 检查数据库中是否已存在
-                                        if db_manager.link_exists(link):
-                                            print(f"[Worker] 链接 {link} 已存在于数据库中", flush=True)
-                                            本轮_links_found.add(link)
+                                        # 同一推文在多次滚动中反复出现，只记一次
+                                        if (link, tweet_id) in seen_sightings:
                                             continue
-                                        
-                                        # 保存新链接到数据库
-                                        link_info = {"link": link, "source": url}
-                                        if db_manager.save_link(link_info, keyword):
-                                            本轮_links_found.add(link)
-                                            total_saved_count += 1
-                                            print(f"[DB] 成功保存新链接: {link}", flush=True)
-                                        else:
-                                            本轮_links_found.add(link)
-                                            print(f"[DB] 链接已存在或保存失败: {link}", flush=True)
+                                        seen_sightings.add((link, tweet_id))
+                                        batch.append({"link": link, "source": url, "keyword": keyword,
+                                                      "tweet_id": tweet_id})
+                                    if frontier is not None:
+                                        frontier.push(tweet_author(tweet))
                             except Exception as e:
                                 continue
                         
+                        new_links = db_manager.save_links(batch)
+                        本轮_links_found.update(item["link"] for item in batch)
+                        total_saved_count += len(new_links)
+                        for link in new_links:
+                            print(f"[DB] 成功保存新链接: {link}", flush=True)
+                        emit_new_links(batch, new_links)
+                        if batch:
+                            print(f"[Worker] 本次滚动记录 {len(batch)} 次链接出现，其中新链接 {len(new_links)} 个", flush=True)
+                        
+                        if frontier is not None:
+                            frontier.flush()
                         print(f"[Worker] 当前本轮已发现 {len(本轮_links_found)} 个链接，总共保存 {total_saved_count} 个到数据库", flush=True)
                     
                     # 每轮结束后，如果还有下一轮，刷新页面
-                    if round_num < rounds - 1:
+                    if round_num < rounds - 1 and not out_of_time():
                         print(f"[Worker] 第 {round_num + 1} 轮滚动完成，刷新页面继续...", flush=True)
                         try:
                             page.reload(wait_until="load", timeout=30000)
@@ -314,7 +374,7 @@ def search_keyword(keyword, storage_state="storage_state.json", keep_browser_ope
                             print(f"[Worker] 页面刷新失败: {e}", flush=True)
                 
                 # 每个URL之间暂停更长时间
-                if url_index < len(urls) - 1:
+                if url_index < len(urls) - 1 and not out_of_time():
                     pause_time = random.uniform(15, 20)
                     print(f"[Worker] 切换到下一个搜索URL前暂停 {pause_time:.1f} 秒...", flush=True)
                     time.sleep(pause_time)
@@ -324,28 +384,22 @@ def search_keyword(keyword, storage_state="storage_state.json", keep_browser_ope
             page_content = page.content()
             page_links = extract_tg_links_from_text(page_content)
             
-            # 处理页面中找到的链接
-            for link in page_links:
-                # 检查本轮是否已处理过
-                if link in 本轮_links_found:
-                    continue
-                    
-                # 检查数据库中是否已存在
-                if db_manager.link_exists(link):
-                    print(f"[Worker] 链接 {link} 已存在于数据库中", flush=True)
-                    本轮_links_found.add(link)
-                    continue
-                
-                # 保存新链接到数据库
-                link_info = {"link": link, "source": "page_content"}
-                if db_manager.save_link(link_info, keyword):
-                    本轮_links_found.add(link)
-                    total_saved_count += 1
-                    print(f"[DB] 成功保存新链接: {link}", flush=True)
-                else:
-                    本轮_links_found.add(link)
-                    print(f"[DB] 链接已存在或保存失败: {link}", flush=True)
+            # 处理页面中找到、滚动过程中未记录过的链接
+            batch = [{"link": link, "source": "page_content", "keyword": keyword}
+                     for link in page_links if link not in 本轮_links_found]
+            new_links = db_manager.save_links(batch)
+            本轮_links_found.update(page_links)
+            total_saved_count += len(new_links)
+            for link in new_links:
+                print(f"[DB] 成功保存新链接: {link}", flush=True)
+            emit_new_links(batch, new_links)
             
+            if frontier is not None:
+                if deadline is not None:
+                    expand_seconds = min(expand_seconds, max(deadline - time.time(), 0))
+                total_saved_count += expand_authors(page, frontier, db_manager, keyword, 本轮_links_found,
+                                                    expand_profiles, expand_seconds)
+
             print(f"[Worker] 搜索完成，本轮总共保存 {total_saved_count} 个新链接到数据库", flush=True)
             print(f"[Worker] 本轮总共发现 {len(本轮_links_found)} 个链接", flush=True)
                 
@@ -368,6 +422,12 @@ def search_keyword(keyword, storage_state="storage_state.json", keep_browser_ope
         # 出错时确保关闭浏览器
         if browser:
             browser.close()
+    finally:
+        if archive is not None:
+            archive.close()
+        # 抓取耗时计入当天的发现统计（UI 和调度器都经过这里）
+        db_manager.record_crawl_time(keyword, time.time() - crawl_started)
+        db_manager.close()
 
     # 返回本轮发现的所有链接
     return [{"link": link, "source": "unknown"} for link in 本轮_links_found]
@@ -381,7 +441,20 @@ if __name__ == "__main__":
         attach_and_save_login()
     elif cmd == "search":
         keyword = sys.argv[2]
+        options = sys.argv[3:]
         # 检查是否有keep_browser_open参数
-        keep_open = len(sys.argv) > 3 and sys.argv[3] == "--keep-open"
-        results = search_keyword(keyword, keep_browser_open=keep_open)
+        keep_open = "--keep-open" in options
+        # 作者扩展模式: --expand-authors 或 --expand-authors=<最多访问的主页数>
+        expand_opts = [o for o in options if o.startswith("--expand-authors")]
+        expand_profiles = 20
+        if expand_opts and "=" in expand_opts[0]:
+            expand_profiles = int(expand_opts[0].split("=", 1)[1])
+        # 推文归档: --archive-tweets 或 --archive-tweets=<归档目录>
+        archive_opts = [o for o in options if o.startswith("--archive-tweets")]
+        archive_dir = None
+        if archive_opts:
+            archive_dir = archive_opts[0].split("=", 1)[1] if "=" in archive_opts[0] else DEFAULT_ARCHIVE_DIR
+        results = search_keyword(keyword, keep_browser_open=keep_open,
+                                 expand=bool(expand_opts), expand_profiles=expand_profiles,
+                                 archive_dir=archive_dir)
         print(json.dumps(results, ensure_ascii=False), flush=True)
@@ -0,0 +1,274 @@
+# auto_collect/crawler/link_validator.py
+"""
+Telegram 链接存活检测
+
+分批取出需要(重新)检测的链接，用 asyncio 并发请求 t.me 预览页，
+全局限速，结果(状态、检测时间、预览信息)写入 link_status 表。
+每条记录按状态设置下次检测时间(TTL)，每次运行只检测过期的记录。
+"""
+import argparse
+import asyncio
+import re
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from urllib.parse import urlsplit
+
+import requests
+from bs4 import BeautifulSoup
+
+# 添加项目根目录到sys.path以确保可以导入（子进程以脚本方式运行）
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from auto_collect.storage import get_connection, get_writer, migrate_database
+from auto_collect.storage.status import STATUS_ALIVE, STATUS_DEAD, STATUS_ERROR
+
+# 各状态的重新检测间隔
+ALIVE_TTL = timedelta(days=7)
+DEAD_TTL = timedelta(days=30)
+ERROR_RETRY_BASE = timedelta(hours=1)
+ERROR_RETRY_MAX = timedelta(days=1)
+
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"  # 与 SQLite CURRENT_TIMESTAMP 格式一致(UTC)
+
+MEMBERS_RE = re.compile(r"([\d][\d\s,.]*)\s*(subscribers?|members?)", re.I)
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120 Safari/537.36"
+
+
+def utcnow() -> datetime:
+    """当前 UTC 时间（不带时区信息，便于与数据库中的时间字符串比较）"""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def parse_preview(html):
+    """
+    解析 t.me 预览页
+    存在 tgme_page_title 说明频道/群组/用户存在，否则为失效链接
+    """
+    soup = BeautifulSoup(html, "html.parser")
+    title_el = soup.select_one(".tgme_page_title")
+    if title_el is None:
+        return {"status": STATUS_DEAD, "title": None, "description": None, "members": None, "kind": None}
+
+    description_el = soup.select_one(".tgme_page_description")
+    extra_el = soup.select_one(".tgme_page_extra")
+    extra = extra_el.get_text(" ", strip=True) if extra_el else ""
+
+    members = None
+    kind = "user"
+    match = MEMBERS_RE.search(extra)
+    if match:
+        digits = re.sub(r"\D", "", match.group(1))
+        members = int(digits) if digits else None
+        kind = "channel" if match.group(2).lower().startswith("subscriber") else "group"
+
+    return {
+        "status": STATUS_ALIVE,
+        "title": title_el.get_text(" ", strip=True),
+        "description": description_el.get_text(" ", strip=True) if description_el else None,
+        "members": members,
+        "kind": kind,
+    }
+
+
+def parse_retry_after(value):
+    """Retry-After 头（秒数或 HTTP 日期）转换为秒数，没有或无法解析时返回 None"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return int(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0, int((retry_at - datetime.now(timezone.utc)).total_seconds()))
+
+
+class RateLimiter:
+    """异步令牌桶，所有并发任务共享，保证全局请求速率不超过 rate 次/秒"""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class LinkValidator:
+    def __init__(self, db_path: str = "telegram_links.db", base_url: str = "https://t.me",
+                 concurrency: int = 10, rate: float = 5.0, batch_size: int = 200, timeout: float = 15):
+        self.db_path = db_path
+        # 预览页地址，测试时可指向本地模拟服务
+        self.base_url = base_url.rstrip("/")
+        self.concurrency = concurrency
+        self.rate = rate
+        self.batch_size = batch_size
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers.update({"User-Agent": USER_AGENT})
+        self._limiter = None
+
+        # link_status 表由迁移建立
+        migrate_database(self.db_path)
+
+    # ---------------- 数据库读写 ----------------
+    def fetch_stale_batch(self, now: datetime) -> list:
+        """取出一批从未检测过或已过期的链接，从未检测过的优先"""
+        cursor = get_connection(self.db_path).execute('''
+            SELECT l.id, l.link, COALESCE(s.fail_count, 0)
+            FROM telegram_links l
+            LEFT JOIN link_status s ON s.link_id = l.id
+            WHERE s.next_check_at IS NULL OR s.next_check_at <= ?
+            ORDER BY s.next_check_at IS NOT NULL, s.next_check_at
+            LIMIT ?
+        ''', (now.strftime(TIME_FORMAT), self.batch_size))
+        return cursor.fetchall()
+
+    def save_results(self, results: list):
+        """整批检测结果交给写线程，在同一事务内提交"""
+        def write(conn):
+            conn.executemany('''
+                INSERT INTO link_status (link_id, status, http_status, title, description, members, kind,
+                                         fail_count, checked_at, next_check_at)
+                VALUES (:link_id, :status, :http_status, :title, :description, :members, :kind,
+                        :fail_count, :checked_at, :next_check_at)
+                ON CONFLICT(link_id) DO UPDATE SET
+                    status = excluded.status,
+                    http_status = excluded.http_status,
+                    title = COALESCE(excluded.title, link_status.title),
+                    description = COALESCE(excluded.description, link_status.description),
+                    members = COALESCE(excluded.members, link_status.members),
+                    kind = COALESCE(excluded.kind, link_status.kind),
+                    fail_count = excluded.fail_count,
+                    checked_at = excluded.checked_at,
+                    next_check_at = excluded.next_check_at
+            ''', results)
+
+        get_writer(self.db_path, use_filter=False).execute(write, rows=len(results)).result()
+
+    # ---------------- 检测 ----------------
+    def preview_url(self, link: str) -> str:
+        """把 t.me 链接转换为预览页地址"""
+        parts = urlsplit(link if "://" in link else "https://" + link)
+        path = parts.path or "/"
+        if parts.query:
+            path += "?" + parts.query
+        return self.base_url + path
+
+    def check_link(self, link: str) -> dict:
+        """同步检测单个链接（在线程池中执行）"""
+        try:
+            resp = self.session.get(self.preview_url(link), timeout=self.timeout)
+        except requests.RequestException as e:
+            return {"status": STATUS_ERROR, "http_status": None, "error": str(e)}
+
+        if resp.status_code == 404:
+            return {"status": STATUS_DEAD, "http_status": 404}
+        if resp.status_code != 200:
+            # 429/5xx 等属于临时错误，稍后重试；服务端给了 Retry-After 时至少等这么久
+            return {"status": STATUS_ERROR, "http_status": resp.status_code,
+                    "retry_after": parse_retry_after(resp.headers.get("Retry-After"))}
+
+        result = parse_preview(resp.text)
+        result["http_status"] = resp.status_code
+        return result
+
+    def _schedule(self, result: dict, fail_count: int, now: datetime) -> dict:
+        """根据检测结果计算下次检测时间"""
+        if result["status"] == STATUS_ERROR:
+            fail_count += 1
+            ttl = min(ERROR_RETRY_BASE * 2 ** (fail_count - 1), ERROR_RETRY_MAX)
+            if result.get("retry_after"):
+                ttl = max(ttl, timedelta(seconds=result["retry_after"]))
+        else:
+            fail_count = 0
+            ttl = ALIVE_TTL if result["status"] == STATUS_ALIVE else DEAD_TTL
+        return {
+            "status": result["status"],
+            "http_status": result.get("http_status"),
+            "title": result.get("title"),
+            "description": result.get("description"),
+            "members": result.get("members"),
+            "kind": result.get("kind"),
+            "fail_count": fail_count,
+            "checked_at": now.strftime(TIME_FORMAT),
+            "next_check_at": (now + ttl).strftime(TIME_FORMAT),
+        }
+
+    async def _check_batch(self, rows: list) -> list:
+        semaphore = asyncio.Semaphore(self.concurrency)
+        limiter = self._limiter
+
+        async def check(row):
+            link_id, link, fail_count = row
+            async with semaphore:
+                await limiter.acquire()
+                result = await asyncio.to_thread(self.check_link, link)
+            entry = self._schedule(result, fail_count, utcnow())
+            entry["link_id"] = link_id
+            if result["status"] != STATUS_ALIVE:
+                print(f"[Validator] {link} -> {result['status']} ({result.get('http_status')})", flush=True)
+            return entry
+
+        return await asyncio.gather(*(check(row) for row in rows))
+
+    async def run_async(self, max_batches=None) -> dict:
+        """逐批检测过期链接，返回各状态的数量统计"""
+        self._limiter = RateLimiter(self.rate, burst=self.concurrency)
+        counts = {STATUS_ALIVE: 0, STATUS_DEAD: 0, STATUS_ERROR: 0}
+        started = utcnow()
+        batches = 0
+        while max_batches is None or batches < max_batches:
+            # 只取本次运行开始前已过期的记录，本次刚写入的不会被重复检测
+            rows = self.fetch_stale_batch(started)
+            if not rows:
+                break
+            results = await self._check_batch(rows)
+            self.save_results(results)
+            for entry in results:
+                counts[entry["status"]] += 1
+            batches += 1
+            print(f"[Validator] 第 {batches} 批完成: {len(rows)} 个链接, 累计 {counts}", flush=True)
+        return counts
+
+    def run(self, max_batches=None) -> dict:
+        return asyncio.run(self.run_async(max_batches))
+
+
+# ---------------- CLI 调用 ----------------
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="检测已保存 Telegram 链接的存活状态")
+    parser.add_argument("--db", default="telegram_links.db", help="数据库文件路径")
+    parser.add_argument("--base-url", default="https://t.me", help="预览页地址，测试时可指向本地模拟服务")
+    parser.add_argument("--concurrency", type=int, default=10, help="最大并发请求数")
+    parser.add_argument("--rate", type=float, default=5.0, help="全局请求速率上限(次/秒)")
+    parser.add_argument("--batch-size", type=int, default=200)
+    parser.add_argument("--max-batches", type=int, default=None)
+    args = parser.parse_args()
+
+    if not Path(args.db).exists():
+        print(f"[Validator] 数据库 {args.db} 不存在", flush=True)
+        sys.exit(1)
+
+    validator = LinkValidator(args.db, base_url=args.base_url, concurrency=args.concurrency,
+                              rate=args.rate, batch_size=args.batch_size)
+    summary = validator.run(args.max_batches)
+    print(f"[Validator] 检测完成: {summary}", flush=True)
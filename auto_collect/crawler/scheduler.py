@@ -0,0 +1,180 @@
+# auto_collect/crawler/scheduler.py
+"""
+关键词抓取时间调度（多臂老虎机）
+
+大批量关键词的历史产出相差几个数量级，平均分配抓取时间很浪费。
+每个关键词视为一个臂，收益为"每分钟新链接数"，
+用 Thompson 采样(Gamma-Poisson)或 UCB 在探索与利用之间分配本轮的总时间，
+并为每轮运行生成分配报告。
+新链接数和抓取耗时都读 keyword_daily_stats（写入链接和抓取结束时已累加），不扫描链接表。
+"""
+import argparse
+import json
+import math
+import random
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+# 添加项目根目录到sys.path以确保可以导入（子进程以脚本方式运行）
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from auto_collect.crawler.watchlist import load_watchlist, DEFAULT_WATCHLIST
+from auto_collect.storage import get_connection, migrate_database
+from auto_collect.storage.stats import STATS_TABLE
+
+POLICIES = ("thompson", "ucb")
+
+# 没有运行记录的历史数据：按每个有产出的日期记一次标准抓取时长估算
+NOMINAL_RUN_MINUTES = 30
+# Gamma 先验：相当于"1分钟内发现1个链接"，对新关键词偏乐观，保证它们会被尝试
+PRIOR_LINKS = 1.0
+PRIOR_MINUTES = 1.0
+
+REPORT_DIR = "reports"
+
+
+def load_keyword_stats(db_path: str, keywords) -> dict:
+    """
+    统计每个关键词的历史产出: {keyword: {'links': 新链接数, 'minutes': 抓取分钟数}}
+    来自 keyword_daily_stats；没有耗时记录的关键词按有新链接的天数估算
+    """
+    migrate_database(db_path)
+    conn = get_connection(db_path)
+    stats = {}
+    for keyword in keywords:
+        links, active_days, seconds = conn.execute(f'''
+            SELECT COALESCE(SUM(new_links), 0), COALESCE(SUM(new_links > 0), 0), COALESCE(SUM(crawl_seconds), 0)
+            FROM {STATS_TABLE} WHERE keyword = ?
+        ''', (keyword,)).fetchone()
+        minutes = seconds / 60.0
+        if not seconds and links:
+            minutes = active_days * NOMINAL_RUN_MINUTES
+        stats[keyword] = {"links": links, "minutes": minutes}
+    return stats
+
+
+def score_keywords(stats: dict, policy: str = "thompson", rng=random) -> dict:
+    """按策略为每个关键词打分，分数即估计(或采样)的每分钟新链接数"""
+    scores = {}
+    if policy == "thompson":
+        for keyword, s in stats.items():
+            shape = PRIOR_LINKS + s["links"]
+            rate = PRIOR_MINUTES + s["minutes"]
+            scores[keyword] = rng.gammavariate(shape, 1.0 / rate)
+    elif policy == "ucb":
+        total_minutes = sum(s["minutes"] for s in stats.values()) + 1
+        total_links = sum(s["links"] for s in stats.values())
+        # 探索项的量级与整体平均产出一致
+        scale = max(total_links / total_minutes, 0.1)
+        for keyword, s in stats.items():
+            mean = (s["links"] + PRIOR_LINKS) / (s["minutes"] + PRIOR_MINUTES)
+            bonus = scale * math.sqrt(2 * math.log(total_minutes + 1) / (s["minutes"] + PRIOR_MINUTES))
+            scores[keyword] = mean + bonus
+    else:
+        raise ValueError(f"未知的调度策略: {policy}")
+    return scores
+
+
+def allocate(scores: dict, budget_minutes: float, min_minutes: float = 2.0) -> dict:
+    """
+    按分数分配总时间：每个入选关键词保底 min_minutes，剩余时间按分数比例分配
+    预算不足以覆盖所有关键词时，只保留分数最高的那些
+    """
+    ranked = sorted(scores, key=scores.get, reverse=True)
+    slots = min(len(ranked), int(budget_minutes // min_minutes)) if min_minutes > 0 else len(ranked)
+    chosen = ranked[:slots]
+    if not chosen:
+        return {}
+    remaining = budget_minutes - min_minutes * len(chosen)
+    total_score = sum(scores[k] for k in chosen) or 1.0
+    return {k: min_minutes + remaining * scores[k] / total_score for k in chosen}
+
+
+def plan(keywords, db_path="telegram_links.db", budget_minutes=60, policy="thompson", min_minutes=2.0):
+    """生成本轮分配方案，返回报告字典"""
+    stats = load_keyword_stats(db_path, keywords)
+    scores = score_keywords(stats, policy)
+    allocation = allocate(scores, budget_minutes, min_minutes)
+    entries = []
+    for keyword in sorted(keywords, key=lambda k: allocation.get(k, 0), reverse=True):
+        s = stats[keyword]
+        entries.append({
+            "keyword": keyword,
+            "history_links": s["links"],
+            "history_minutes": round(s["minutes"], 2),
+            "history_rate": round(s["links"] / s["minutes"], 4) if s["minutes"] else None,
+            "score": round(scores[keyword], 4),
+            "allocated_minutes": round(allocation.get(keyword, 0), 2),
+        })
+    return {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "policy": policy,
+        "budget_minutes": budget_minutes,
+        "min_minutes": min_minutes,
+        "keywords": entries,
+    }
+
+
+def count_keyword_links(db_path: str, keyword: str) -> int:
+    """该关键词累计发现的新链接数"""
+    return get_connection(db_path).execute(
+        f"SELECT COALESCE(SUM(new_links), 0) FROM {STATS_TABLE} WHERE keyword = ?", (keyword,)).fetchone()[0]
+
+
+def write_report(report: dict, report_dir: str = REPORT_DIR) -> Path:
+    path = Path(report_dir)
+    path.mkdir(parents=True, exist_ok=True)
+    report_file = path / f"allocation_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    with open(report_file, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    return report_file
+
+
+def run_schedule(report: dict, db_path="telegram_links.db", storage_state="storage_state.json"):
+    """按分配方案依次抓取各关键词，把实际耗时和新链接数写回报告（耗时由 search_keyword 计入发现统计）"""
+    from auto_collect.crawler.layer3_selenium import search_keyword
+
+    for entry in report["keywords"]:
+        minutes = entry["allocated_minutes"]
+        if minutes <= 0:
+            continue
+        keyword = entry["keyword"]
+        print(f"[Scheduler] 开始抓取关键词 '{keyword}'，分配 {minutes:.1f} 分钟", flush=True)
+        before = count_keyword_links(db_path, keyword)
+        started = time.time()
+        search_keyword(keyword, storage_state, time_budget=minutes * 60, db_path=db_path)
+        elapsed = time.time() - started
+        new_links = count_keyword_links(db_path, keyword) - before
+
+        entry["actual_minutes"] = round(elapsed / 60, 2)
+        entry["new_links"] = new_links
+        print(f"[Scheduler] 关键词 '{keyword}' 完成: {elapsed / 60:.1f} 分钟，新链接 {new_links} 个", flush=True)
+    return report
+
+
+# ---------------- CLI 调用 ----------------
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="按历史产出为关键词列表分配抓取时间")
+    parser.add_argument("--watchlist", default=DEFAULT_WATCHLIST, help="关键词列表文件，每行一个关键词")
+    parser.add_argument("--minutes", type=float, default=60, help="本轮总抓取时间（分钟）")
+    parser.add_argument("--policy", choices=POLICIES, default="thompson")
+    parser.add_argument("--min-minutes", type=float, default=2.0, help="每个入选关键词的保底时间（分钟）")
+    parser.add_argument("--db", default="telegram_links.db")
+    parser.add_argument("--plan-only", action="store_true", help="只生成分配报告，不实际抓取")
+    args = parser.parse_args()
+
+    keywords = load_watchlist(args.watchlist)
+    if not keywords:
+        print("[Scheduler] 关键词列表为空，退出", flush=True)
+        sys.exit(1)
+
+    report = plan(keywords, args.db, args.minutes, args.policy, args.min_minutes)
+    for entry in report["keywords"]:
+        print(f"[Scheduler] {entry['keyword']}: 分数 {entry['score']}, 分配 {entry['allocated_minutes']} 分钟",
+              flush=True)
+    if not args.plan_only:
+        run_schedule(report, args.db)
+    report_file = write_report(report)
+    print(f"[Scheduler] 分配报告已保存到 {report_file}", flush=True)
@@ -1,35 +1,15 @@
 # auto_collect/crawler/storage.py
-import sqlite3
+# 兼容旧接口：原来单独写入 results.db 的 links 表，现在统一写入 telegram_links
+from auto_collect.storage import open_repository
 
-DB_FILE = "results.db"
+DB_FILE = "telegram_links.db"
 
-def init_db():
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    c.execute("""
-    CREATE TABLE IF NOT EXISTS links (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        keyword TEXT,
-        link TEXT UNIQUE,
-        source TEXT,
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-    )
-    """)
-    conn.commit()
-    return conn
+def init_db(db_path=DB_FILE):
+    # 返回的存储对象由调用方持有，后续 save_link / fetch_all 都复用它
+    return open_repository(db_path)
 
-def save_link(conn, keyword, link, source):
-    try:
-        conn.execute(
-            "INSERT INTO links (keyword, link, source) VALUES (?, ?, ?)",
-            (keyword, link, source)
-        )
-        conn.commit()
-    except sqlite3.IntegrityError:
-        # 已存在就跳过
-        pass
+def save_link(repo, keyword, link, source):
+    repo.save_link({"link": link, "source": source}, keyword)
 
-def fetch_all(conn):
-    c = conn.cursor()
-    c.execute("SELECT keyword, link, source, created_at FROM links ORDER BY created_at DESC")
-    return c.fetchall()
\ No newline at end of file
+def fetch_all(repo):
+    return [(r["keyword"], r["link"], r["source"], r["created_at"]) for r in repo.iter_links()]
@@ -0,0 +1,310 @@
+# auto_collect/crawler/stream_ingest.py
+"""
+过滤流实时采集模式
+
+为高优先级关键词维持一条 Twitter 过滤流长连接：
+关键词列表 -> 过滤流规则 -> 推文 -> 提取 t.me 链接 -> 批量写入数据库
+连接断开时按官方建议的退避策略自动重连
+"""
+import argparse
+import json
+import sys
+import threading
+import time
+from pathlib import Path
+
+import requests
+
+# 添加项目根目录到sys.path以确保可以导入（子进程以脚本方式运行）
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from auto_collect.storage import open_repository
+from auto_collect.crawler.TwitterAPIClient import (TwitterAPIClient, extract_tg_links_from_text,
+                                                   DEFAULT_API_BASE)
+from auto_collect.crawler.watchlist import load_watchlist, DEFAULT_WATCHLIST
+from auto_collect.storage.tweet_archive import TweetArchive
+
+# 本工具创建的规则都带这个标签前缀，同步规则时不会误删别人的规则
+RULE_TAG_PREFIX = "auto_collect:"
+# 只匹配带 Telegram 链接的推文
+RULE_LINK_FILTER = '(url:"t.me" OR url:"telegram.me")'
+# Essential 级别的限制：最多25条规则，每条最长512字符
+MAX_RULES = 25
+MAX_RULE_LENGTH = 512
+
+# 重连退避参数（秒），与 Twitter 文档建议一致
+NETWORK_BACKOFF_STEP = 0.25
+NETWORK_BACKOFF_MAX = 16
+HTTP_BACKOFF_START = 5
+HTTP_BACKOFF_MAX = 320
+RATE_LIMIT_BACKOFF_START = 60
+
+
+def _quote_keyword(keyword):
+    """把关键词转成规则语法中的词组"""
+    keyword = keyword.replace('"', '')
+    if " " in keyword:
+        return f'"{keyword}"'
+    return keyword
+
+
+def build_stream_rules(keywords, max_rules=MAX_RULES, max_length=MAX_RULE_LENGTH):
+    """
+    根据关键词列表生成过滤流规则
+    尽量把多个关键词用 OR 合并进一条规则，以节省规则数量
+    返回 (rules, tag_keywords)，tag_keywords 记录每个规则标签对应的关键词
+    """
+    rules = []
+    tag_keywords = {}
+    suffix = f") {RULE_LINK_FILTER}"
+    group = []
+
+    def close_group():
+        tag = f"{RULE_TAG_PREFIX}{len(rules)}"
+        value = "(" + " OR ".join(_quote_keyword(k) for k in group) + suffix
+        rules.append({"value": value, "tag": tag})
+        tag_keywords[tag] = list(group)
+
+    for keyword in keywords:
+        candidate = group + [keyword]
+        length = len("(" + " OR ".join(_quote_keyword(k) for k in candidate) + suffix)
+        if length > max_length:
+            if not group:
+                print(f"[Stream] 关键词过长，已跳过: {keyword}", flush=True)
+                continue
+            close_group()
+            group = [keyword]
+        else:
+            group = candidate
+    if group:
+        close_group()
+
+    if len(rules) > max_rules:
+        print(f"[Stream] 规则数 {len(rules)} 超过上限 {max_rules}，多出的关键词将被忽略", flush=True)
+        for rule in rules[max_rules:]:
+            tag_keywords.pop(rule["tag"], None)
+        rules = rules[:max_rules]
+    return rules, tag_keywords
+
+
+class StreamIngest:
+    """过滤流采集器：维持一条长连接，把命中推文中的链接批量写入数据库"""
+
+    def __init__(self, client: TwitterAPIClient, keywords, db_manager=None,
+                 batch_size=50, flush_interval=5.0, max_reconnects=None, archive_dir=None):
+        self.client = client
+        self.keywords = keywords
+        self.db_manager = db_manager or open_repository()
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_reconnects = max_reconnects
+        # 指定归档目录时保存推文原文，供提取规则升级后离线重新提取
+        self.archive = TweetArchive(archive_dir) if archive_dir else None
+
+        self.rules, self.tag_keywords = build_stream_rules(keywords)
+        self._stop_event = threading.Event()
+        self._response = None
+        self._pending = []
+        self._last_flush = time.monotonic()
+
+        self.tweets_seen = 0
+        self.links_seen = 0
+        self.links_saved = 0
+
+    # ---------------- 规则同步 ----------------
+    def sync_rules(self):
+        """让服务端规则与关键词列表保持一致，只改动本工具创建的规则"""
+        existing = self.client.get_stream_rules()
+        wanted = {(r["value"], r["tag"]) for r in self.rules}
+
+        stale_ids = []
+        present = set()
+        for rule in existing:
+            if not rule.get("tag", "").startswith(RULE_TAG_PREFIX):
+                continue
+            key = (rule.get("value"), rule.get("tag"))
+            if key in wanted:
+                present.add(key)
+            else:
+                stale_ids.append(rule["id"])
+
+        missing = [r for r in self.rules if (r["value"], r["tag"]) not in present]
+        self.client.delete_stream_rules(stale_ids)
+        self.client.add_stream_rules(missing)
+        print(f"[Stream] 规则同步完成: 保留 {len(present)} 条，新增 {len(missing)} 条，删除 {len(stale_ids)} 条",
+              flush=True)
+
+    # ---------------- 推文处理 ----------------
+    def _keyword_for(self, text, matching_rules):
+        """找出推文命中的关键词，优先取正文中真实出现的那个"""
+        lowered = text.lower()
+        candidates = []
+        for rule in matching_rules:
+            candidates.extend(self.tag_keywords.get(rule.get("tag"), []))
+        for keyword in candidates:
+            if keyword.lower() in lowered:
+                return keyword
+        return candidates[0] if candidates else ""
+
+    def handle_payload(self, payload):
+        """处理流上的一条推文消息"""
+        tweet = payload.get("data")
+        if not tweet:
+            if "errors" in payload:
+                print(f"[Stream] 流上收到错误消息: {payload['errors']}", flush=True)
+            return
+        self.tweets_seen += 1
+
+        text = tweet.get("text", "")
+        # 正文中的链接都被缩短为 t.co，真实地址在 entities.urls 中
+        urls = [u.get("expanded_url") or "" for u in tweet.get("entities", {}).get("urls", [])]
+        keyword = self._keyword_for(text, payload.get("matching_rules", []))
+        tweet_id = tweet.get("id")
+        source = f"https://x.com/i/web/status/{tweet_id or ''}"
+        if self.archive is not None:
+            self.archive.append(tweet_id, text, author=tweet.get("author_id"), created_at=tweet.get("created_at"),
+                                keyword=keyword, source=source, content_type="text", urls=urls)
+
+        links = extract_tg_links_from_text(text + " " + " ".join(urls))
+        if not links:
+            return
+
+        for link in links:
+            self._pending.append({"link": link, "source": source, "keyword": keyword, "tweet_id": tweet_id})
+        self.links_seen += len(links)
+
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """把缓冲区中的链接批量写入数据库"""
+        self._last_flush = time.monotonic()
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, []
+        new_links = self.db_manager.save_links(batch)
+        self.links_saved += len(new_links)
+        for link in new_links:
+            print(f"[DB] 成功保存新链接: {link}", flush=True)
+        print(f"[Stream] 批量写入 {len(batch)} 个链接，其中新链接 {len(new_links)} 个", flush=True)
+
+    def _maybe_flush(self):
+        if time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    # ---------------- 连接与重连 ----------------
+    def _consume(self, response):
+        """逐行读取流数据，空行是服务端的保活信号"""
+        for line in response.iter_lines(chunk_size=None):
+            if self._stop_event.is_set():
+                return
+            if line:
+                try:
+                    self.handle_payload(json.loads(line))
+                except json.JSONDecodeError:
+                    print(f"[Stream] 无法解析的数据: {line[:200]!r}", flush=True)
+                except Exception as e:
+                    # 单条消息格式异常或写入失败不能断掉整条流
+                    print(f"[Stream] 处理消息失败: {e!r}，数据: {line[:200]!r}", flush=True)
+            self._maybe_flush()
+
+    def run(self):
+        """运行采集循环，直到 stop() 被调用或重连次数用尽"""
+        try:
+            self._run_loop()
+        finally:
+            # Ctrl+C 等异常退出时也要把缓冲的推文写入归档
+            if self.archive is not None:
+                self.archive.close()
+        print(f"[Stream] 采集结束: 推文 {self.tweets_seen} 条，链接 {self.links_seen} 个，新保存 {self.links_saved} 个",
+              flush=True)
+
+    def _run_loop(self):
+        self.sync_rules()
+        reconnects = 0
+        network_errors = 0
+        http_errors = 0
+        # 429 单独计数：限流与服务端错误各自从自己的起点开始退避
+        rate_limit_errors = 0
+
+        while not self._stop_event.is_set():
+            delay = 0
+            try:
+                print("[Stream] 正在连接过滤流...", flush=True)
+                self._response = self.client.open_filtered_stream()
+                print("[Stream] 过滤流已连接", flush=True)
+                network_errors = 0
+                http_errors = 0
+                rate_limit_errors = 0
+                self._consume(self._response)
+                if not self._stop_event.is_set():
+                    print("[Stream] 服务端关闭了连接", flush=True)
+                    network_errors += 1
+                    delay = min(NETWORK_BACKOFF_STEP * network_errors, NETWORK_BACKOFF_MAX)
+            except requests.HTTPError as e:
+                status = e.response.status_code if e.response is not None else 0
+                if status == 429:
+                    rate_limit_errors += 1
+                    delay = min(RATE_LIMIT_BACKOFF_START * 2 ** (rate_limit_errors - 1), HTTP_BACKOFF_MAX)
+                else:
+                    http_errors += 1
+                    delay = min(HTTP_BACKOFF_START * 2 ** (http_errors - 1), HTTP_BACKOFF_MAX)
+                print(f"[Stream] HTTP 错误 {status}", flush=True)
+            except (requests.ConnectionError, requests.Timeout,
+                    requests.exceptions.ChunkedEncodingError) as e:
+                if self._stop_event.is_set():
+                    break
+                network_errors += 1
+                delay = min(NETWORK_BACKOFF_STEP * network_errors, NETWORK_BACKOFF_MAX)
+                print(f"[Stream] 网络错误: {e}", flush=True)
+            finally:
+                if self._response is not None:
+                    self._response.close()
+                    self._response = None
+                # 断线前缓冲的链接不能丢
+                self.flush()
+
+            if self._stop_event.is_set():
+                break
+            reconnects += 1
+            if self.max_reconnects is not None and reconnects > self.max_reconnects:
+                print(f"[Stream] 已达到最大重连次数 {self.max_reconnects}，停止采集", flush=True)
+                break
+            print(f"[Stream] {delay:.2f} 秒后重连 (第 {reconnects} 次)", flush=True)
+            self._stop_event.wait(delay)
+
+    def stop(self):
+        """停止采集，可从其他线程调用"""
+        self._stop_event.set()
+        response = self._response
+        if response is not None:
+            response.close()
+
+
+# ---------------- CLI 调用 ----------------
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="过滤流实时采集 t.me 链接")
+    parser.add_argument("bearer_token", help="Twitter API Bearer Token")
+    parser.add_argument("--watchlist", default=DEFAULT_WATCHLIST, help="关键词列表文件，每行一个关键词")
+    parser.add_argument("--api-base", default=DEFAULT_API_BASE, help="API 地址，测试时可指向本地模拟服务")
+    parser.add_argument("--db", default="telegram_links.db", help="数据库文件路径")
+    parser.add_argument("--batch-size", type=int, default=50)
+    parser.add_argument("--flush-interval", type=float, default=5.0)
+    parser.add_argument("--max-reconnects", type=int, default=None)
+    parser.add_argument("--archive-dir", default=None, help="推文归档目录，指定时保存推文原文供离线重新提取")
+    args = parser.parse_args()
+
+    keywords = load_watchlist(args.watchlist)
+    if not keywords:
+        print("[Stream] 关键词列表为空，退出", flush=True)
+        sys.exit(1)
+
+    client = TwitterAPIClient(bearer_token=args.bearer_token, api_base=args.api_base)
+    ingest = StreamIngest(client, keywords, db_manager=open_repository(args.db),
+                          batch_size=args.batch_size, flush_interval=args.flush_interval,
+                          max_reconnects=args.max_reconnects, archive_dir=args.archive_dir)
+    try:
+        ingest.run()
+    except KeyboardInterrupt:
+        ingest.stop()
+        ingest.flush()
@@ -0,0 +1,29 @@
+# auto_collect/crawler/watchlist.py
+from pathlib import Path
+
+DEFAULT_WATCHLIST = "watchlist.txt"
+
+
+def load_watchlist(path=DEFAULT_WATCHLIST):
+    """
+    加载关键词监控列表
+    文件格式: 每行一个关键词，# 开头的行为注释，空行忽略
+    返回去重后的关键词列表（保持文件中的顺序）
+    """
+    watchlist_file = Path(path)
+    if not watchlist_file.exists():
+        print(f"[Watchlist] 关键词列表文件 {path} 不存在", flush=True)
+        return []
+
+    keywords = []
+    seen = set()
+    with open(watchlist_file, "r", encoding="utf-8") as f:
+        for line in f:
+            keyword = line.strip()
+            if not keyword or keyword.startswith("#"):
+                continue
+            if keyword.lower() in seen:
+                continue
+            seen.add(keyword.lower())
+            keywords.append(keyword)
+    return keywords
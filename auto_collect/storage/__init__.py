@@ -0,0 +1,36 @@
+from auto_collect.storage.connection import (connect, get_connection, close_connection, close_all,
+                                            transaction)
+from auto_collect.storage.fts import search_links
+from auto_collect.storage.sightings import record_sightings
+from auto_collect.storage.queries import get_links_page, iter_links, count_links, DEFAULT_PAGE_SIZE
+from auto_collect.storage.migrations import migrate, migrate_database, schema_version, check_query_plans
+from auto_collect.storage.writer import LinkWriter, get_writer, stop_all_writers
+from auto_collect.storage.repository import LinkRepository, open_repository, BACKENDS
+from auto_collect.storage.sqlite_repository import SQLiteRepository
+from auto_collect.storage.memory_repository import MemoryRepository
+
+__all__ = [
+    "connect",
+    "get_connection",
+    "close_connection",
+    "close_all",
+    "transaction",
+    "migrate",
+    "migrate_database",
+    "schema_version",
+    "check_query_plans",
+    "search_links",
+    "get_links_page",
+    "iter_links",
+    "count_links",
+    "DEFAULT_PAGE_SIZE",
+    "record_sightings",
+    "LinkRepository",
+    "SQLiteRepository",
+    "MemoryRepository",
+    "open_repository",
+    "BACKENDS",
+    "LinkWriter",
+    "get_writer",
+    "stop_all_writers",
+]
@@ -0,0 +1,371 @@
+# auto_collect/storage/archive.py
+"""
+按月归档与增量回收空间
+
+telegram_links 只增不减，DELETE 也不会把空间还给文件系统。
+这里把长期不活跃(last_seen 早于保留期)的链接按创建月份搬到归档库：
+    <主库名>_archive/links-2024-01.db
+归档库与主库对外的列一致（telegram_links、link_sightings、link_keyword_stats、link_status），
+source / keyword 直接存文本，不依赖主库的查找表，单独打开也能查询；
+需要时 ATTACH 查询，或用 search_archives 逐个文件搜索。
+每个月份的挑选、复制和删除作为一步交给写线程独占执行(run_exclusive)，不另开写连接：
+先在归档库中提交复制，再在主库的事务里重新确认仍不活跃、且与归档副本完全一致的链接后删除，
+复制之后被其他进程写入过的链接留在主库，中途中断只会留下可重复执行的复制。
+创建时间为空的链接归入 links-unknown.db。
+
+主库使用 auto_vacuum=INCREMENTAL：删除后的空闲页由后台线程分小步 incremental_vacuum 归还，
+每一步都很短，不会长时间占用写锁。
+
+python auto_collect/storage/archive.py telegram_links.db --days 90
+python auto_collect/storage/archive.py telegram_links.db --search 空投
+"""
+import argparse
+import re
+import sqlite3
+import sys
+import threading
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+# 添加项目根目录到sys.path以确保可以导入（以脚本方式运行时）
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from auto_collect.storage.connection import close_connection, connect, get_connection, transaction
+from auto_collect.storage.mutations import delete_links_by_ids
+from auto_collect.storage.writer import get_writer
+
+DEFAULT_RETENTION_DAYS = 90
+ARCHIVE_ALIAS = "arc"
+UNKNOWN_MONTH = "unknown"
+ARCHIVE_NAME_RE = re.compile(rf"^links-(\d{{4}}-\d{{2}}|{UNKNOWN_MONTH})\.db$")
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# 随链接一起归档的附表及其关联列
+LINKED_TABLES = (("link_sightings", "link_id"), ("link_keyword_stats", "link_id"), ("link_status", "link_id"))
+
+VACUUM_STEP_PAGES = 256        # 每次回收的页数（默认页大小下约 1MB）
+VACUUM_INTERVAL = 30.0         # 秒，后台检查空闲页的间隔
+VACUUM_MIN_FREE_PAGES = 64     # 空闲页少于这个数时不回收
+
+
+def archive_dir_for(db_path: str) -> Path:
+    path = Path(db_path)
+    return path.with_name(f"{path.stem}_archive")
+
+
+def archive_files(archive_dir) -> dict:
+    """返回 {'YYYY-MM' 或 'unknown': 路径}，按月份排序，'unknown' 排在最前"""
+    archive_dir = Path(archive_dir)
+    if not archive_dir.is_dir():
+        return {}
+    files = {}
+    for path in archive_dir.iterdir():
+        match = ARCHIVE_NAME_RE.match(path.name)
+        if match:
+            files[match.group(1)] = path
+    return dict(sorted(files.items(), key=lambda item: (item[0] != UNKNOWN_MONTH, item[0])))
+
+
+def _table_exists(conn, schema: str, table: str) -> bool:
+    # 主库的 telegram_links / link_sightings 是关联查找表的视图(见 lookups)，归档库里是普通表
+    return conn.execute(f"SELECT 1 FROM {schema}.sqlite_master WHERE type IN ('table', 'view') AND name = ?",
+                        (table,)).fetchone() is not None
+
+
+def _columns(conn, schema: str, table: str) -> list:
+    return [row[1] for row in conn.execute(f"PRAGMA {schema}.table_info({table})")]
+
+
+def _ensure_archive_schema(conn):
+    """
+    在已挂载的归档库中按主库的列建表
+    主库后来通过迁移增加的列，在归档库里补上，保证按列名复制不会失败
+    """
+    for table, _ in (("telegram_links", "id"),) + LINKED_TABLES:
+        if not _table_exists(conn, "main", table):
+            continue
+        if not _table_exists(conn, ARCHIVE_ALIAS, table):
+            conn.execute(f"CREATE TABLE {ARCHIVE_ALIAS}.{table} AS SELECT * FROM main.{table} WHERE 0")
+            continue
+        existing = set(_columns(conn, ARCHIVE_ALIAS, table))
+        for column in _columns(conn, "main", table):
+            if column not in existing:
+                conn.execute(f"ALTER TABLE {ARCHIVE_ALIAS}.{table} ADD COLUMN {column}")
+    conn.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS {ARCHIVE_ALIAS}.idx_archive_id ON telegram_links(id)")
+    conn.execute(f"CREATE INDEX IF NOT EXISTS {ARCHIVE_ALIAS}.idx_archive_link ON telegram_links(link)")
+    conn.execute(f"CREATE INDEX IF NOT EXISTS {ARCHIVE_ALIAS}.idx_archive_created ON telegram_links(created_at, id)")
+
+
+def _copy_rows(conn, table: str, column: str):
+    columns = ", ".join(_columns(conn, "main", table))
+    conn.execute(f"DELETE FROM {ARCHIVE_ALIAS}.{table} WHERE {column} IN (SELECT id FROM temp.archive_ids)")
+    conn.execute(f"INSERT INTO {ARCHIVE_ALIAS}.{table} ({columns}) "
+                 f"SELECT {columns} FROM main.{table} WHERE {column} IN (SELECT id FROM temp.archive_ids)")
+
+
+def _month_expr() -> str:
+    return f"COALESCE(substr(created_at, 1, 7), '{UNKNOWN_MONTH}')"
+
+
+def _drop_changed(conn, table: str, column: str):
+    """从 temp.archive_ids 中去掉主库记录与归档副本不一致的链接（复制之后又被写入过）"""
+    columns = ", ".join(_columns(conn, "main", table))
+    conn.execute(f'''
+        DELETE FROM temp.archive_ids WHERE id IN (
+            SELECT {column} FROM (
+                SELECT {columns} FROM main.{table} WHERE {column} IN (SELECT id FROM temp.archive_ids)
+                EXCEPT
+                SELECT {columns} FROM {ARCHIVE_ALIAS}.{table} WHERE {column} IN (SELECT id FROM temp.archive_ids)
+            )
+        )
+    ''')
+
+
+def _archive_month(conn, archive_path: Path, month: str, cutoff: str) -> int:
+    """
+    在写线程上（事务之外）归档一个月份，返回从主库删除的条数
+    1. 事务内重新挑选仍不活跃的链接，把它们及附表记录复制到归档库并提交（重复执行会覆盖为相同内容）
+    2. 再开一个事务，只删除仍不活跃、且主库记录与归档副本完全一致的链接
+    两步分开提交：WAL 模式下跨库事务不是原子的，不能让删除先于复制落盘
+    """
+    conn.execute(f"ATTACH DATABASE ? AS {ARCHIVE_ALIAS}", (str(archive_path),))
+    try:
+        _ensure_archive_schema(conn)
+        conn.execute("CREATE TEMP TABLE IF NOT EXISTS archive_ids (id INTEGER PRIMARY KEY)")
+        # BEGIN IMMEDIATE 同时锁住主库，挑选与复制之间其他进程不能写入
+        with transaction(conn):
+            conn.execute("DELETE FROM temp.archive_ids")
+            conn.execute(f'''
+                INSERT INTO temp.archive_ids (id)
+                SELECT id FROM main.telegram_links
+                WHERE COALESCE(last_seen, created_at) < ? AND {_month_expr()} = ?
+            ''', (cutoff, month))
+            # 先删除旧副本再复制，中断后重跑不会产生重复
+            _copy_rows(conn, "telegram_links", "id")
+            for table, column in LINKED_TABLES:
+                if _table_exists(conn, "main", table):
+                    _copy_rows(conn, table, column)
+
+        with transaction(conn):
+            # 两次提交之间其他进程可能又记录了出现或检测结果：重新确认，只删除确实已完整复制的链接
+            conn.execute('''
+                DELETE FROM temp.archive_ids WHERE id NOT IN (
+                    SELECT id FROM main.telegram_links WHERE COALESCE(last_seen, created_at) < ?
+                )
+            ''', (cutoff,))
+            for table, column in (("telegram_links", "id"),) + LINKED_TABLES:
+                if _table_exists(conn, "main", table):
+                    _drop_changed(conn, table, column)
+            ids = [row[0] for row in conn.execute("SELECT id FROM temp.archive_ids")]
+            conn.execute("DELETE FROM temp.archive_ids")
+            # 附表由触发器和 delete_links_by_ids 清理
+            return len(delete_links_by_ids(conn, ids))
+    finally:
+        conn.execute(f"DETACH DATABASE {ARCHIVE_ALIAS}")
+
+
+def archive_old_links(db_path: str, older_than_days: int = DEFAULT_RETENTION_DAYS, archive_dir=None) -> dict:
+    """
+    把 last_seen（没有时为 created_at）早于 older_than_days 天的链接按创建月份归档
+    返回 {'YYYY-MM': 归档条数}
+    """
+    archive_dir = Path(archive_dir) if archive_dir else archive_dir_for(db_path)
+    archive_dir.mkdir(parents=True, exist_ok=True)
+    cutoff = (datetime.now(timezone.utc) - timedelta(days=older_than_days)).strftime(TIME_FORMAT)
+
+    # 只读连接上列出待归档的月份，每个月份的挑选、复制与删除在写线程上重新执行
+    conn = connect(db_path, readonly=True)
+    try:
+        months = [row[0] for row in conn.execute(f'''
+            SELECT DISTINCT {_month_expr()} FROM telegram_links WHERE COALESCE(last_seen, created_at) < ?
+        ''', (cutoff,))]
+    finally:
+        conn.close()
+
+    writer = get_writer(db_path, use_filter=False)
+    summary = {}
+    for month in sorted(months):
+        path = archive_dir / f"links-{month}.db"
+        deleted = writer.run_exclusive(lambda c, path=path, month=month: _archive_month(c, path, month, cutoff))
+        summary[month] = deleted.result()
+        print(f"[Archive] {month}: 归档 {summary[month]} 条到 {path}", flush=True)
+    return summary
+
+
+def attach_archives(conn, archive_dir, months=None) -> list:
+    """
+    把归档库挂载到 conn 上（别名 arc_YYYY_MM），并创建临时视图 all_telegram_links 合并主库与归档
+    months 为要挂载的月份列表，默认全部；SQLite 默认最多同时挂载 10 个库，超出时抛出 ValueError
+    返回挂载的别名列表
+    """
+    files = archive_files(archive_dir)
+    if months is not None:
+        files = {m: p for m, p in files.items() if m in set(months)}
+    attached = {row[1] for row in conn.execute("PRAGMA database_list")}
+    limit = conn.getlimit(sqlite3.SQLITE_LIMIT_ATTACHED)
+    wanted = [m for m in files if f"arc_{m.replace('-', '_')}" not in attached]
+    if len(attached) - 2 + len(wanted) > limit:
+        raise ValueError(f"最多同时挂载 {limit} 个数据库，请通过 months 选择月份，或使用 search_archives")
+
+    for month in wanted:
+        conn.execute(f"ATTACH DATABASE ? AS arc_{month.replace('-', '_')}", (str(files[month]),))
+    aliases = [f"arc_{m.replace('-', '_')}" for m in files]
+    columns = "id, link, source, keyword, created_at"
+    union = " UNION ALL ".join([f"SELECT {columns} FROM main.telegram_links"] +
+                               [f"SELECT {columns} FROM {alias}.telegram_links" for alias in aliases])
+    conn.execute("DROP VIEW IF EXISTS temp.all_telegram_links")
+    conn.execute(f"CREATE TEMP VIEW all_telegram_links AS {union}")
+    return aliases
+
+
+def search_archives(archive_dir, keyword=None, link_contains=None, limit=1000) -> list:
+    """
+    逐个归档库搜索（不受挂载数量限制），从最新的月份开始
+    返回 [(月份, id, link, source, keyword, created_at)]
+    """
+    where, params = [], []
+    for column, value in (("keyword", keyword), ("link", link_contains)):
+        if value:
+            where.append(f"{column} LIKE ?")
+            params.append(f"%{value}%")
+    sql = "SELECT id, link, source, keyword, created_at FROM telegram_links"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += " ORDER BY created_at DESC, id DESC LIMIT ?"
+
+    results = []
+    for month, path in reversed(list(archive_files(archive_dir).items())):
+        conn = connect(str(path), readonly=True)
+        try:
+            rows = conn.execute(sql, params + [limit - len(results)]).fetchall()
+        finally:
+            conn.close()
+        results.extend((month,) + tuple(row) for row in rows)
+        if len(results) >= limit:
+            break
+    return results
+
+
+# ---------------- 增量回收 ----------------
+def auto_vacuum_mode(conn) -> int:
+    """0 = NONE，1 = FULL，2 = INCREMENTAL"""
+    return conn.execute("PRAGMA auto_vacuum").fetchone()[0]
+
+
+def enable_incremental_vacuum(conn) -> bool:
+    """
+    已有数据库切换为 auto_vacuum=INCREMENTAL，需要一次完整 VACUUM（耗时与库大小成正比，且不能在事务内）
+    新建的数据库在迁移时已直接启用；返回是否执行了切换
+    """
+    if auto_vacuum_mode(conn) == 2:
+        return False
+    conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+    conn.execute("VACUUM")
+    return True
+
+
+def incremental_vacuum(conn, pages: int = VACUUM_STEP_PAGES) -> int:
+    """回收最多 pages 个空闲页，返回回收的页数"""
+    before = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    if before == 0:
+        return 0
+    # incremental_vacuum 每回收一页返回一行，必须把结果取完才会执行完
+    conn.execute(f"PRAGMA incremental_vacuum({int(pages)})").fetchall()
+    return before - conn.execute("PRAGMA freelist_count").fetchone()[0]
+
+
+class BackgroundVacuum:
+    """
+    后台定期回收空闲页：空闲页超过阈值时，通过写线程每次回收一小步，
+    与爬虫写入在同一个队列里排队，不会与它们争抢写锁
+    """
+
+    def __init__(self, db_path: str, interval: float = VACUUM_INTERVAL, step_pages: int = VACUUM_STEP_PAGES,
+                 min_free_pages: int = VACUUM_MIN_FREE_PAGES):
+        self.db_path = db_path
+        self.interval = interval
+        self.step_pages = step_pages
+        self.min_free_pages = min_free_pages
+        self.pages_reclaimed = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name=f"BackgroundVacuum:{self.db_path}", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def run_once(self) -> int:
+        """空闲页足够多时回收到不足阈值为止，返回本次回收的页数"""
+        # 空闲页数在只读连接上查看，不需要回收时不占用写线程，也不开写事务
+        conn = get_connection(self.db_path, readonly=True)
+        reclaimed = 0
+        while not self._stop.is_set():
+            free = conn.execute("PRAGMA freelist_count").fetchone()[0]
+            if free < self.min_free_pages:
+                break
+            writer = get_writer(self.db_path, use_filter=False)
+            step = writer.execute(lambda c: incremental_vacuum(c, self.step_pages)).result()
+            if step == 0:
+                break
+            reclaimed += step
+        self.pages_reclaimed += reclaimed
+        return reclaimed
+
+    def _run(self):
+        conn = connect(self.db_path, readonly=True)
+        try:
+            if auto_vacuum_mode(conn) != 2:
+                print("[Vacuum] 数据库未启用 auto_vacuum=INCREMENTAL，后台回收不可用，"
+                      "可执行 archive.py --enable-incremental-vacuum", flush=True)
+                return
+        finally:
+            conn.close()
+        try:
+            while not self._stop.wait(self.interval):
+                try:
+                    reclaimed = self.run_once()
+                    if reclaimed:
+                        print(f"[Vacuum] 回收 {reclaimed} 个空闲页", flush=True)
+                except Exception as e:
+                    print(f"[Vacuum] 回收空闲页时出错: {e}", flush=True)
+        finally:
+            close_connection(self.db_path, readonly=True)
+
+
+# ---------------- CLI 调用 ----------------
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="按月归档不活跃的链接并回收主库空间")
+    parser.add_argument("db", nargs="?", default="telegram_links.db")
+    parser.add_argument("--days", type=int, default=DEFAULT_RETENTION_DAYS, help="保留最近多少天内活跃的链接")
+    parser.add_argument("--archive-dir", help="归档目录，默认 <主库名>_archive")
+    parser.add_argument("--enable-incremental-vacuum", action="store_true",
+                        help="把已有数据库切换为 auto_vacuum=INCREMENTAL（执行一次完整 VACUUM）")
+    parser.add_argument("--search", help="在归档库中按关键词搜索，不执行归档")
+    args = parser.parse_args()
+
+    archive_dir = args.archive_dir or archive_dir_for(args.db)
+    if args.search:
+        for row in search_archives(archive_dir, keyword=args.search):
+            print(*row, sep="\t")
+        sys.exit(0)
+
+    if args.enable_incremental_vacuum:
+        conn = connect(args.db)
+        try:
+            if enable_incremental_vacuum(conn):
+                print("[Vacuum] 已切换为 auto_vacuum=INCREMENTAL", flush=True)
+        finally:
+            conn.close()
+
+    summary = archive_old_links(args.db, args.days, archive_dir)
+    print(f"[Archive] 共归档 {sum(summary.values())} 条，涉及 {len(summary)} 个月份", flush=True)
+    reclaimed = BackgroundVacuum(args.db, min_free_pages=1).run_once()
+    print(f"[Vacuum] 回收 {reclaimed} 个空闲页", flush=True)
@@ -0,0 +1,119 @@
+# auto_collect/storage/connection.py
+"""
+SQLite 连接层
+
+所有数据库访问共用这里的长连接（每个线程每个数据库文件一个），
+以 WAL 模式打开并统一设置 PRAGMA：爬虫子进程写入时 UI 仍可并发读取，
+也不再为每次操作重新打开文件、重新编译 SQL。
+"""
+import atexit
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+# 每个连接打开后执行的 PRAGMA
+PRAGMAS = (
+    # 必须在 journal_mode 之前：新建的库在第一次写入文件头前设置才会生效；
+    # 已有的 NONE 库只记录期望值，执行一次 VACUUM 后生效（见 archive.enable_incremental_vacuum）
+    ("auto_vacuum", "INCREMENTAL"),  # 删除后的空闲页可由后台 incremental_vacuum 逐步归还
+    ("journal_mode", "WAL"),         # 读写互不阻塞，UI 与爬虫可同时访问
+    ("synchronous", "NORMAL"),       # WAL 下 NORMAL 已能保证数据库不损坏，提交时少一次 fsync
+    ("cache_size", -64000),          # 页缓存约 64MB（负数单位为 KB）
+    ("mmap_size", 268435456),        # 256MB 内存映射读
+    ("busy_timeout", 5000),          # 遇到锁时最多等待 5 秒而不是立即报错
+    ("temp_store", "MEMORY"),
+)
+
+# 每个连接缓存的已编译语句数，热点 INSERT/SELECT 只编译一次
+STATEMENT_CACHE_SIZE = 256
+
+_local = threading.local()
+_registry_lock = threading.Lock()
+_registry = set()
+
+
+def connect(db_path: str, readonly: bool = False, check_same_thread: bool = True) -> sqlite3.Connection:
+    """
+    打开一个新的调优连接，由调用方负责关闭
+    连接处于自动提交模式，需要事务时使用 transaction()
+    """
+    if readonly:
+        uri = f"file:{os.path.abspath(db_path)}?mode=ro"
+        conn = sqlite3.connect(uri, uri=True, isolation_level=None,
+                               check_same_thread=check_same_thread, cached_statements=STATEMENT_CACHE_SIZE)
+    else:
+        conn = sqlite3.connect(db_path, isolation_level=None,
+                               check_same_thread=check_same_thread, cached_statements=STATEMENT_CACHE_SIZE)
+    for name, value in PRAGMAS:
+        if readonly and name in ("auto_vacuum", "journal_mode"):
+            continue
+        conn.execute(f"PRAGMA {name} = {value}")
+    return conn
+
+
+def _key(db_path: str, readonly: bool):
+    path = db_path if db_path == ":memory:" else os.path.abspath(db_path)
+    return path, readonly
+
+
+def get_connection(db_path: str, readonly: bool = False) -> sqlite3.Connection:
+    """获取当前线程对该数据库文件的长连接，不存在时创建"""
+    connections = getattr(_local, "connections", None)
+    if connections is None:
+        connections = _local.connections = {}
+    key = _key(db_path, readonly)
+    conn = connections.get(key)
+    if conn is None:
+        # 允许退出时由主线程统一关闭，使用上仍然只在所属线程内访问
+        conn = connect(db_path, readonly=readonly, check_same_thread=False)
+        connections[key] = conn
+        with _registry_lock:
+            _registry.add(conn)
+    return conn
+
+
+def close_connection(db_path: str, readonly: bool = False):
+    """关闭当前线程对该数据库文件的长连接"""
+    connections = getattr(_local, "connections", None) or {}
+    conn = connections.pop(_key(db_path, readonly), None)
+    if conn is not None:
+        with _registry_lock:
+            _registry.discard(conn)
+        conn.close()
+
+
+def close_all():
+    """关闭所有线程打开的长连接（程序退出时调用）"""
+    with _registry_lock:
+        connections = list(_registry)
+        _registry.clear()
+    for conn in connections:
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+    _local.connections = {}
+
+
+atexit.register(close_all)
+
+
+@contextmanager
+def transaction(conn: sqlite3.Connection, immediate: bool = True):
+    """
+    显式事务：正常结束时提交，出错时回滚
+    默认 BEGIN IMMEDIATE，一开始就拿到写锁，避免读事务升级为写事务时的死锁
+    已处于事务中时直接并入外层事务
+    """
+    if conn.in_transaction:
+        yield conn
+        return
+    conn.execute("BEGIN IMMEDIATE" if immediate else "BEGIN")
+    try:
+        yield conn
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    else:
+        conn.execute("COMMIT")
@@ -0,0 +1,310 @@
+# auto_collect/storage/dedupe.py
+"""
+已知链接的布隆过滤器
+
+抓取时绝大多数链接都是重复出现的，逐个去数据库确认是否存在很浪费。
+启动时把所有已知的规范化链接装进布隆过滤器（千万级链接约 18MB）：
+    过滤器说"不存在"  一定是新链接，直接插入，不查询
+    过滤器说"可能存在" 才去数据库确认（误判率默认 0.1%）
+过滤器保存在数据库旁的 <库名>.bloom 文件中，记录已装入的最大链接 ID(水位)，
+下次启动直接读文件，再补上水位之后新增的行，启动几乎不需要时间。
+只按水位补齐发现不了原地改写的链接和换掉的数据库文件，所以旁路文件还记录：
+    库里的写入代次(link_generation 表，每个库随机初值，触发器在链接被原地改写时加一)
+    水位处那条链接的摘要(从备份恢复后同一 ID 会分给别的链接)
+任一项与数据库对不上就从数据库重建。
+过滤器不支持删除，删除的链接只会变成误判，不影响正确性。
+其他进程写入、尚未补进来的链接由调用方的 ON CONFLICT 兜底。
+"""
+import atexit
+import math
+import os
+import random
+import sqlite3
+import struct
+import threading
+import time
+from hashlib import blake2b
+from pathlib import Path
+
+from auto_collect.storage.lookups import LINKS_TABLE
+
+SIDECAR_SUFFIX = ".bloom"
+SIDECAR_MAGIC = b"TGBLOOM2"
+# magic, 位数, 哈希函数个数, 已装入数, 设计容量, 水位, 写入代次, 水位处链接的摘要
+SIDECAR_HEADER = struct.Struct("<8sQIQQQq16s")
+GENERATION_TABLE = "link_generation"
+
+DEFAULT_CAPACITY = 1_000_000
+DEFAULT_ERROR_RATE = 0.001
+LOAD_BATCH = 50000
+MASK64 = (1 << 64) - 1
+
+
+def create_generation_schema(conn):
+    """建立写入代次表及改写链接时加一的触发器（迁移中调用）"""
+    conn.execute(f'''
+        CREATE TABLE IF NOT EXISTS {GENERATION_TABLE} (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            generation INTEGER NOT NULL
+        )
+    ''')
+    # 随机初值：换成另一个库的文件时代次几乎不可能相同
+    conn.execute(f"INSERT OR IGNORE INTO {GENERATION_TABLE} (id, generation) VALUES (1, ?)",
+                 (random.getrandbits(62),))
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS link_generation_on_rewrite
+        AFTER UPDATE OF link ON {LINKS_TABLE}
+        WHEN old.link IS NOT new.link
+        BEGIN
+            UPDATE {GENERATION_TABLE} SET generation = generation + 1 WHERE id = 1;
+        END
+    ''')
+
+
+def read_generation(conn) -> int:
+    """数据库当前的写入代次，迁移之前的库为 0"""
+    try:
+        row = conn.execute(f"SELECT generation FROM {GENERATION_TABLE} WHERE id = 1").fetchone()
+    except sqlite3.OperationalError:
+        return 0
+    return row[0] if row else 0
+
+
+def _link_digest(link) -> bytes:
+    return blake2b(link.encode("utf-8"), digest_size=16).digest() if link else bytes(16)
+
+
+class BloomFilter:
+    """bytearray 位图 + blake2b 双重哈希 (h1 + i*h2)"""
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY, error_rate: float = DEFAULT_ERROR_RATE,
+                 num_bits: int = None, num_hashes: int = None):
+        self.capacity = max(int(capacity), 1)
+        if num_bits is None:
+            num_bits = math.ceil(-self.capacity * math.log(error_rate) / (math.log(2) ** 2))
+        if num_hashes is None:
+            num_hashes = max(1, round(num_bits / self.capacity * math.log(2)))
+        self.num_bits = num_bits
+        self.num_hashes = num_hashes
+        self.bits = bytearray((num_bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key: str):
+        # 先把两个哈希值对位数取模，之后只做小整数加法
+        value = int.from_bytes(blake2b(key.encode("utf-8"), digest_size=16).digest(), "little")
+        m = self.num_bits
+        p = (value & MASK64) % m
+        step = ((value >> 64) | 1) % m
+        positions = []
+        for _ in range(self.num_hashes):
+            positions.append(p)
+            p += step
+            if p >= m:
+                p -= m
+        return positions
+
+    def add(self, key: str):
+        bits = self.bits
+        for p in self._positions(key):
+            bits[p >> 3] |= 1 << (p & 7)
+        self.count += 1
+
+    def add_many(self, keys):
+        """批量装入，热循环里只用局部变量"""
+        bits = self.bits
+        m = self.num_bits
+        k = self.num_hashes
+        added = 0
+        for key in keys:
+            value = int.from_bytes(blake2b(key.encode("utf-8"), digest_size=16).digest(), "little")
+            p = (value & MASK64) % m
+            step = ((value >> 64) | 1) % m
+            for _ in range(k):
+                bits[p >> 3] |= 1 << (p & 7)
+                p += step
+                if p >= m:
+                    p -= m
+            added += 1
+        self.count += added
+
+    def __contains__(self, key: str) -> bool:
+        bits = self.bits
+        for p in self._positions(key):
+            if not bits[p >> 3] & (1 << (p & 7)):
+                return False
+        return True
+
+    @property
+    def memory_bytes(self) -> int:
+        return len(self.bits)
+
+    def expected_error_rate(self) -> float:
+        """按当前装入数估算的误判率"""
+        return (1 - math.exp(-self.num_hashes * self.count / self.num_bits)) ** self.num_hashes
+
+
+class LinkFilter:
+    """
+    某个数据库的已知链接过滤器，负责装载、按水位补齐与落盘
+    写线程在 record_sightings 中使用，读线程在 link_exists 中使用，内部加锁
+    """
+
+    def __init__(self, db_path: str, error_rate: float = DEFAULT_ERROR_RATE):
+        self.db_path = db_path
+        self.path = Path(str(db_path) + SIDECAR_SUFFIX)
+        self.error_rate = error_rate
+        self.bloom = None
+        self.watermark = 0          # id 不大于水位的链接都已装入
+        self.watermark_digest = _link_digest(None)  # 水位处那条链接的摘要
+        self.generation = 0         # 装载时数据库的写入代次
+        self.dirty = False
+        self._lock = threading.Lock()
+        # 统计
+        self.checks = 0
+        self.negatives = 0          # 判定为新链接、省掉查询的次数
+
+    # ---------------- 装载 ----------------
+    def load(self, conn):
+        """读取旁路文件并补齐新增的行；文件不存在、损坏或容量不足时从数据库重建"""
+        started = time.time()
+        source = "旁路文件"
+        with self._lock:
+            total, max_id = conn.execute("SELECT COUNT(*), COALESCE(MAX(id), 0) FROM telegram_links").fetchone()
+            generation = read_generation(conn)
+            self.bloom, self.watermark, stored_generation, self.watermark_digest = self._read_sidecar()
+            # 库被重建过(水位超过现有最大 ID)、链接被原地改写或换了库文件(代次不同)、
+            # 从备份恢复(水位处的链接变了)，以及链接数超过设计容量时，按两倍余量重建
+            if (self.bloom is None or self.watermark > max_id or total > self.bloom.capacity
+                    or stored_generation != generation or not self._watermark_matches(conn)):
+                source = "数据库"
+                self._reset(total)
+            self.generation = generation
+            added = self._catch_up(conn)
+        print(f"[Dedupe] 从{source}装载过滤器: {self.bloom.count} 个链接，补齐 {added} 个，"
+              f"{self.bloom.memory_bytes / 1024 / 1024:.1f} MB，耗时 {time.time() - started:.2f} 秒", flush=True)
+        return self
+
+    def _read_sidecar(self):
+        """返回 (过滤器, 水位, 写入代次, 水位处链接的摘要)，文件不存在或无法识别时过滤器为 None"""
+        missing = None, 0, 0, _link_digest(None)
+        try:
+            with open(self.path, "rb") as f:
+                header = f.read(SIDECAR_HEADER.size)
+                (magic, num_bits, num_hashes, count, capacity, watermark, generation,
+                 digest) = SIDECAR_HEADER.unpack(header)
+                if magic != SIDECAR_MAGIC:
+                    return missing
+                bloom = BloomFilter(capacity, num_bits=num_bits, num_hashes=num_hashes)
+                data = f.read()
+        except (OSError, struct.error):
+            return missing
+        if len(data) != len(bloom.bits):
+            return missing
+        bloom.bits = bytearray(data)
+        bloom.count = count
+        return bloom, watermark, generation, digest
+
+    def _watermark_matches(self, conn) -> bool:
+        """水位处的链接与装入时相同；那一行已被删除时无法判断，删除不影响正确性，视为相同"""
+        row = conn.execute("SELECT link FROM telegram_links WHERE id = ?", (self.watermark,)).fetchone()
+        return row is None or _link_digest(row[0]) == self.watermark_digest
+
+    def _reset(self, total: int):
+        """丢弃已装入的内容，之后由 _catch_up 从头装载（调用方持有锁）"""
+        self.bloom = BloomFilter(max(DEFAULT_CAPACITY, total * 2), self.error_rate)
+        self.watermark = 0
+        self.watermark_digest = _link_digest(None)
+        self.dirty = True
+
+    def _catch_up(self, conn) -> int:
+        """装入 id 大于水位的链接（调用方持有锁）"""
+        added = 0
+        while True:
+            rows = conn.execute("SELECT id, link FROM telegram_links WHERE id > ? ORDER BY id LIMIT ?",
+                                (self.watermark, LOAD_BATCH)).fetchall()
+            if not rows:
+                return added
+            self.bloom.add_many(link for _, link in rows)
+            self.watermark = rows[-1][0]
+            self.watermark_digest = _link_digest(rows[-1][1])
+            added += len(rows)
+            self.dirty = True
+
+    def catch_up(self, conn) -> int:
+        """补齐其他连接/进程新写入的链接；期间有链接被原地改写时整个重建"""
+        with self._lock:
+            generation = read_generation(conn)
+            if generation != self.generation:
+                total = conn.execute("SELECT COUNT(*) FROM telegram_links").fetchone()[0]
+                print("[Dedupe] 数据库中的链接被改写过，重建过滤器", flush=True)
+                self._reset(total)
+                self.generation = generation
+            return self._catch_up(conn)
+
+    # ---------------- 查询与写入 ----------------
+    def might_contain(self, link: str) -> bool:
+        with self._lock:
+            self.checks += 1
+            found = link in self.bloom
+            if not found:
+                self.negatives += 1
+            return found
+
+    def add(self, link: str):
+        """本进程新插入的链接；不推进水位，水位只由 _catch_up 按 ID 顺序推进"""
+        with self._lock:
+            self.bloom.add(link)
+            self.dirty = True
+
+    def save(self):
+        """写入旁路文件（先写临时文件再替换，中途退出不会留下损坏的文件）"""
+        with self._lock:
+            if self.bloom is None or not self.dirty:
+                return
+            tmp = self.path.with_name(self.path.name + ".tmp")
+            with open(tmp, "wb") as f:
+                f.write(SIDECAR_HEADER.pack(SIDECAR_MAGIC, self.bloom.num_bits, self.bloom.num_hashes,
+                                            self.bloom.count, self.bloom.capacity, self.watermark,
+                                            self.generation, self.watermark_digest))
+                f.write(self.bloom.bits)
+            os.replace(tmp, self.path)
+            self.dirty = False
+
+    def metrics(self) -> dict:
+        return {
+            "links": self.bloom.count if self.bloom else 0,
+            "memory_bytes": self.bloom.memory_bytes if self.bloom else 0,
+            "checks": self.checks,
+            "queries_skipped": self.negatives,
+            "expected_error_rate": self.bloom.expected_error_rate() if self.bloom else 0.0,
+        }
+
+
+_filters = {}
+_filters_lock = threading.Lock()
+
+
+def get_link_filter(db_path: str, conn):
+    """获取该数据库文件在本进程内的过滤器，首次调用时用 conn 装载；内存数据库不使用过滤器"""
+    if db_path == ":memory:":
+        return None
+    key = os.path.abspath(db_path)
+    with _filters_lock:
+        link_filter = _filters.get(key)
+        if link_filter is None:
+            link_filter = _filters[key] = LinkFilter(db_path).load(conn)
+    return link_filter
+
+
+def save_all_filters():
+    """把所有过滤器写入旁路文件（程序退出时调用）"""
+    with _filters_lock:
+        filters = list(_filters.values())
+    for link_filter in filters:
+        try:
+            link_filter.save()
+        except OSError as e:
+            print(f"[Dedupe] 保存过滤器失败: {e}", flush=True)
+
+
+atexit.register(save_all_filters)
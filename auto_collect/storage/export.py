@@ -0,0 +1,227 @@
+# auto_collect/storage/export.py
+"""
+流式导出链接到 CSV / JSONL / Parquet
+
+在只读连接上执行一条查询，用 fetchmany 分块读取、逐块写出，
+内存占用只取决于块大小，与导出的行数无关。
+支持按关键词、链接子串、创建时间范围、检测状态过滤，支持 gzip/bz2/xz 压缩。
+
+python auto_collect/storage/export.py links.csv.gz --keyword 空投 --since 2024-01-01 --status alive
+"""
+import argparse
+import bz2
+import csv
+import gzip
+import json
+import lzma
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+# 添加项目根目录到sys.path以确保可以导入（以脚本方式运行时）
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from auto_collect.storage.connection import connect
+from auto_collect.storage.fts import FTS_TABLE, build_filter, has_fts
+from auto_collect.storage.status import STATUS_UNCHECKED
+
+FORMATS = ("csv", "jsonl", "parquet")
+COMPRESSIONS = {"gz": "gzip", "gzip": "gzip", "bz2": "bz2", "xz": "xz"}
+# Parquet 的列压缩算法及其常见简写
+PARQUET_COMPRESSIONS = {"zstd": "zstd", "zst": "zstd", "snappy": "snappy", "gzip": "gzip", "gz": "gzip"}
+
+COLUMNS = ("id", "link", "source", "keyword", "created_at", "first_seen", "last_seen", "sighting_count",
+           "status", "checked_at", "title", "members")
+DEFAULT_CHUNK_SIZE = 5000
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def infer_format(path: str):
+    """根据文件名推断 (格式, 压缩方式)，如 links.jsonl.gz -> ('jsonl', 'gzip')"""
+    suffixes = [s.lstrip(".").lower() for s in Path(path).suffixes]
+    compression = COMPRESSIONS.get(suffixes[-1]) if suffixes else None
+    if compression:
+        suffixes = suffixes[:-1]
+    fmt = suffixes[-1] if suffixes and suffixes[-1] in FORMATS else None
+    return fmt, compression
+
+
+def normalize_compression(fmt: str, compression):
+    """把 gz / zst 等简写统一为压缩算法名，None 表示不指定；该格式不支持的写法抛出 ValueError"""
+    if not compression:
+        return None
+    names = PARQUET_COMPRESSIONS if fmt == "parquet" else COMPRESSIONS
+    name = names.get(compression.lower())
+    if name is None:
+        raise ValueError(f"{fmt} 不支持的压缩方式: {compression}（可选 {'/'.join(names)}）")
+    return name
+
+
+def normalize_time(value: str) -> str:
+    """
+    把 2024-01-01 / 2024-01-01T08:00 等写法统一为库中的 'YYYY-MM-DD HH:MM:SS'
+    created_at 列是 NUMERIC 亲和性，'2024' 这样的纯数字会被当成整数比较，必须先规范化
+    """
+    try:
+        return datetime.fromisoformat(value).strftime(TIME_FORMAT)
+    except ValueError:
+        raise ValueError(f"无法识别的时间: {value}，请使用 YYYY-MM-DD 或 YYYY-MM-DD HH:MM:SS")
+
+
+def build_export_query(conn, keyword=None, link_contains=None, since=None, until=None, status=None):
+    """生成导出查询，返回 (sql, params)；按创建时间顺序，按关键词/链接过滤走三元组索引时按链接 ID 顺序"""
+    from_sql, where, params = build_filter(keyword, link_contains, has_fts(conn))
+    has_status = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'link_status'").fetchone() is not None
+    if has_status:
+        from_sql += " LEFT JOIN link_status s ON s.link_id = l.id"
+        status_columns = "s.status, s.checked_at, s.title, s.members"
+    else:
+        status_columns = "NULL, NULL, NULL, NULL"
+
+    if since:
+        where.append("l.created_at >= ?")
+        params.append(normalize_time(since))
+    if until:
+        where.append("l.created_at < ?")
+        params.append(normalize_time(until))
+    if status == STATUS_UNCHECKED:
+        if has_status:
+            where.append("s.link_id IS NULL")
+    elif status:
+        where.append("s.status = ?" if has_status else "0")
+        if has_status:
+            params.append(status)
+
+    sql = (f"SELECT l.id, l.link, l.source, l.keyword, l.created_at, l.first_seen, l.last_seen, "
+           f"l.sighting_count, {status_columns} FROM {from_sql}")
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    # 直接查主表时沿 idx_created_at 按创建时间顺序读出；从三元组索引出发时按 FTS 的 rowid（即链接 ID）
+    # 顺序读出，ID 随写入递增，与创建时间基本一致。按 created_at 排序会让 SQLite 先把全部命中行
+    # 放进临时 B 树排好，才返回第一行
+    if from_sql.startswith(FTS_TABLE):
+        sql += " ORDER BY f.rowid"
+    else:
+        sql += " ORDER BY l.created_at, l.id"
+    return sql, params
+
+
+def iter_chunks(conn, sql, params, chunk_size=DEFAULT_CHUNK_SIZE):
+    """逐块读取查询结果"""
+    cursor = conn.execute(sql, params)
+    while True:
+        rows = cursor.fetchmany(chunk_size)
+        if not rows:
+            return
+        yield rows
+
+
+def _open_text(path, compression):
+    if compression == "gzip":
+        return gzip.open(path, "wt", encoding="utf-8", newline="")
+    if compression == "bz2":
+        return bz2.open(path, "wt", encoding="utf-8", newline="")
+    if compression == "xz":
+        return lzma.open(path, "wt", encoding="utf-8", newline="")
+    # 未压缩的 CSV 带 BOM，Excel 直接打开不会乱码
+    return open(path, "w", encoding="utf-8-sig", newline="")
+
+
+def _write_csv(chunks, path, compression):
+    count = 0
+    with _open_text(path, compression) as f:
+        writer = csv.writer(f)
+        writer.writerow(COLUMNS)
+        for rows in chunks:
+            writer.writerows(rows)
+            count += len(rows)
+    return count
+
+
+def _write_jsonl(chunks, path, compression):
+    count = 0
+    with _open_text(path, compression) as f:
+        for rows in chunks:
+            f.write("".join(json.dumps(dict(zip(COLUMNS, row)), ensure_ascii=False) + "\n" for row in rows))
+            count += len(rows)
+    return count
+
+
+def _write_parquet(chunks, path, compression):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("导出 Parquet 需要 pyarrow，请先执行 pip install pyarrow")
+    schema = pa.schema([
+        ("id", pa.int64()), ("link", pa.string()), ("source", pa.string()), ("keyword", pa.string()),
+        ("created_at", pa.string()), ("first_seen", pa.string()), ("last_seen", pa.string()),
+        ("sighting_count", pa.int64()), ("status", pa.string()), ("checked_at", pa.string()),
+        ("title", pa.string()), ("members", pa.int64()),
+    ])
+    count = 0
+    # 每块写成一个 row group，Parquet 自带列压缩，默认 zstd
+    with pq.ParquetWriter(path, schema, compression=compression or "zstd") as writer:
+        for rows in chunks:
+            columns = list(zip(*rows))
+            writer.write_table(pa.table({name: list(values) for name, values in zip(COLUMNS, columns)},
+                                        schema=schema))
+            count += len(rows)
+    return count
+
+
+def export_links(db_path: str, out_path: str, fmt=None, compression=None, keyword=None, link_contains=None,
+                 since=None, until=None, status=None, chunk_size=DEFAULT_CHUNK_SIZE) -> int:
+    """
+    把匹配条件的链接流式导出到文件，返回导出的行数
+    fmt / compression 未指定时根据文件名推断；Parquet 的 compression 为列压缩算法(zstd/snappy/gzip)
+    since / until 为创建时间范围 [since, until)，status 为检测状态(alive/dead/error/unchecked)
+    """
+    inferred_fmt, inferred_compression = infer_format(out_path)
+    fmt = fmt or inferred_fmt or "csv"
+    if fmt not in FORMATS:
+        raise ValueError(f"不支持的导出格式: {fmt}")
+    if fmt != "parquet":
+        compression = compression or inferred_compression
+    compression = normalize_compression(fmt, compression)
+
+    # 只读连接读取 WAL 快照，导出期间不阻塞爬虫写入
+    conn = connect(db_path, readonly=True)
+    try:
+        sql, params = build_export_query(conn, keyword, link_contains, since, until, status)
+        chunks = iter_chunks(conn, sql, params, chunk_size)
+        if fmt == "csv":
+            return _write_csv(chunks, out_path, compression)
+        if fmt == "jsonl":
+            return _write_jsonl(chunks, out_path, compression)
+        return _write_parquet(chunks, out_path, compression)
+    finally:
+        conn.close()
+
+
+# ---------------- CLI 调用 ----------------
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="流式导出 telegram_links")
+    parser.add_argument("output", help="输出文件，格式和压缩方式根据扩展名推断，如 links.csv / links.jsonl.gz")
+    parser.add_argument("--db", default="telegram_links.db")
+    parser.add_argument("--format", choices=FORMATS, help="覆盖按扩展名推断的格式")
+    parser.add_argument("--compression", help="gzip(gz)/bz2/xz；Parquet 为 zstd(zst)/snappy/gzip(gz)")
+    parser.add_argument("--keyword", help="关键词包含")
+    parser.add_argument("--link", help="链接包含")
+    parser.add_argument("--since", help="创建时间不早于，如 2024-01-01")
+    parser.add_argument("--until", help="创建时间早于")
+    parser.add_argument("--status", help="检测状态: alive/dead/error/unchecked")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    started = time.time()
+    try:
+        count = export_links(args.db, args.output, args.format, args.compression, args.keyword, args.link,
+                             args.since, args.until, args.status, args.chunk_size)
+    except ValueError as e:
+        parser.error(str(e))
+    elapsed = max(time.time() - started, 1e-6)
+    print(f"[Export] 已导出 {count} 行到 {args.output}，耗时 {elapsed:.1f} 秒（{count / elapsed:,.0f} 行/秒）",
+          flush=True)
@@ -0,0 +1,111 @@
+# auto_collect/storage/fts.py
+"""
+telegram_links 的 FTS5 三元组(trigram)全文索引
+
+'%x%' 形式的 LIKE 无法使用 B 树索引，每次搜索都要扫全表。
+telegram_links_fts 以外部内容表的方式为 link、keyword、source 建立三元组索引，
+由触发器与主表保持同步；子串搜索改为 MATCH，只读取命中的行。
+三元组索引只能匹配不少于 3 个字符的子串，更短的条件以及不支持 FTS5 的 SQLite 仍使用 LIKE。
+版本 6 起索引只包含 link、keyword，触发器挂在数据表 telegram_links_data 上（见 lookups）。
+"""
+import sqlite3
+
+FTS_TABLE = "telegram_links_fts"
+FTS_COLUMNS = ("link", "keyword", "source")
+MIN_TRIGRAM_LENGTH = 3
+
+SELECT_COLUMNS = "l.id, l.link, l.source, l.keyword, l.created_at"
+
+
+def fts5_supported(conn) -> bool:
+    """当前 SQLite 是否带有 FTS5 及 trigram 分词器(3.34+)"""
+    try:
+        conn.execute("CREATE VIRTUAL TABLE temp._fts5_probe USING fts5(x, tokenize='trigram')")
+        conn.execute("DROP TABLE temp._fts5_probe")
+        return True
+    except sqlite3.OperationalError:
+        return False
+
+
+def has_fts(conn) -> bool:
+    return conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (FTS_TABLE,)).fetchone() is not None
+
+
+def create_fts(conn):
+    """
+    建立三元组索引及同步触发器，并用主表现有数据填充（迁移中调用）
+    不支持 FTS5 时什么也不做，搜索自动退回 LIKE
+    """
+    if not fts5_supported(conn):
+        print("[FTS] 当前 SQLite 不支持 FTS5 trigram，搜索将使用 LIKE", flush=True)
+        return
+    columns = ", ".join(FTS_COLUMNS)
+    new_values = ", ".join(f"new.{c}" for c in FTS_COLUMNS)
+    old_values = ", ".join(f"old.{c}" for c in FTS_COLUMNS)
+    conn.execute(f'''
+        CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+            {columns}, content='telegram_links', content_rowid='id', tokenize='trigram'
+        )
+    ''')
+    # 外部内容表的删除需要带上旧值，FTS5 据此移除对应的三元组
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS telegram_links_fts_ai AFTER INSERT ON telegram_links BEGIN
+            INSERT INTO {FTS_TABLE}(rowid, {columns}) VALUES (new.id, {new_values});
+        END
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS telegram_links_fts_ad AFTER DELETE ON telegram_links BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {columns}) VALUES ('delete', old.id, {old_values});
+        END
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS telegram_links_fts_au AFTER UPDATE OF {columns} ON telegram_links BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {columns}) VALUES ('delete', old.id, {old_values});
+            INSERT INTO {FTS_TABLE}(rowid, {columns}) VALUES (new.id, {new_values});
+        END
+    ''')
+    conn.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+
+def _phrase(text: str) -> str:
+    """把用户输入转成 FTS5 短语，双引号按 FTS5 语法转义"""
+    return '"' + text.replace('"', '""') + '"'
+
+
+def build_filter(keyword=None, link_contains=None, use_fts=True):
+    """
+    把搜索条件转换为 (FROM 子句, WHERE 条件列表, 参数)，主表别名为 l
+    有可用的三元组条件时从 FTS 表出发再关联主表，否则直接查主表
+    """
+    match_terms = []
+    where = []
+    like_params = []
+    for column, value in (("keyword", keyword), ("link", link_contains)):
+        if not value:
+            continue
+        if use_fts and len(value) >= MIN_TRIGRAM_LENGTH:
+            match_terms.append(f"{column} : {_phrase(value)}")
+        else:
+            where.append(f"l.{column} LIKE ?")
+            like_params.append(f"%{value}%")
+
+    if match_terms:
+        from_sql = f"{FTS_TABLE} f JOIN telegram_links l ON l.id = f.rowid"
+        return from_sql, [f"{FTS_TABLE} MATCH ?"] + where, [" AND ".join(match_terms)] + like_params
+    return "telegram_links l", where, like_params
+
+
+def search_links(conn, keyword=None, link_contains=None, use_fts=None) -> list:
+    """
+    按关键词/链接子串搜索（大小写不敏感，与原 LIKE 语义一致），按创建时间倒序
+    返回 [(id, link, source, keyword, created_at)]
+    """
+    if use_fts is None:
+        use_fts = has_fts(conn)
+    from_sql, where, params = build_filter(keyword, link_contains, use_fts)
+    query = f"SELECT {SELECT_COLUMNS} FROM {from_sql}"
+    if where:
+        query += " WHERE " + " AND ".join(where)
+    query += " ORDER BY l.created_at DESC"
+    return conn.execute(query, params).fetchall()
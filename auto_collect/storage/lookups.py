@@ -0,0 +1,334 @@
+# auto_collect/storage/lookups.py
+"""
+source / keyword 查找表
+
+source 是完整的搜索页 URL，keyword 是搜索词，几百万行里反复出现的只是少数几个字符串。
+迁移后它们分别存放在 link_sources / link_keywords 中，数据行只保存整数 ID：
+    telegram_links_data       链接主表(source_id, keyword_id)
+    link_sightings_data       出现记录(source_id, keyword_id)
+    link_keyword_stats_data   链接按关键词的聚合(keyword_id，版本 10 起)
+原来的 telegram_links / link_sightings / link_keyword_stats 变成关联查找表的同名视图，列与迁移前完全一致，
+所有读取方不需要修改。视图上有 INSTEAD OF 触发器，旧代码对视图的 INSERT/UPDATE/DELETE 仍然有效，
+但 rowcount、lastrowid 与 UPSERT 只对数据表有效，热路径的写入直接写数据表，
+字符串通过进程内的 LookupCache 换成 ID。
+查找表中的行从不删除，ID 一经提交就不会变。
+"""
+from auto_collect.storage.fts import FTS_TABLE, fts5_supported, has_fts
+
+LINKS_TABLE = "telegram_links_data"
+SIGHTINGS_TABLE = "link_sightings_data"
+KEYWORD_STATS_TABLE = "link_keyword_stats_data"
+SOURCES_TABLE = "link_sources"
+KEYWORDS_TABLE = "link_keywords"
+
+# 查找表 -> 值列
+LOOKUP_COLUMNS = {SOURCES_TABLE: "source", KEYWORDS_TABLE: "keyword"}
+# 版本 6 起三元组索引只覆盖实际会被搜索的列(build_filter 只匹配 link / keyword)，
+# source 是重复的长 URL，原来占了索引的很大一部分
+INDEXED_COLUMNS = ("link", "keyword")
+
+# keyword 用 LEFT JOIN，WHERE keyword = ? 能先查查找表再走 (keyword_id, created_at) 索引；
+# source 只用于显示、从不按等值过滤，用标量子查询，没被选中时完全不求值
+# （聚合查询里 SQLite 不会省掉未使用的 LEFT JOIN，会让按关键词统计无法只读索引）
+LINKS_VIEW_SQL = f'''
+    CREATE VIEW telegram_links AS
+    SELECT l.id, l.link, (SELECT source FROM {SOURCES_TABLE} WHERE id = l.source_id) AS source, k.keyword,
+           l.created_at, l.updated_at, l.first_seen, l.last_seen, l.sighting_count
+    FROM {LINKS_TABLE} l
+    LEFT JOIN {KEYWORDS_TABLE} k ON k.id = l.keyword_id
+'''
+SIGHTINGS_VIEW_SQL = f'''
+    CREATE VIEW link_sightings AS
+    SELECT t.id, t.link_id, k.keyword, (SELECT source FROM {SOURCES_TABLE} WHERE id = t.source_id) AS source,
+           t.tweet_id, t.seen_at
+    FROM {SIGHTINGS_TABLE} t
+    LEFT JOIN {KEYWORDS_TABLE} k ON k.id = t.keyword_id
+'''
+# 聚合行总有关键词，用内连接，WHERE keyword = ? 先查查找表再走 keyword_id 索引
+KEYWORD_STATS_VIEW_SQL = f'''
+    CREATE VIEW link_keyword_stats AS
+    SELECT s.link_id, k.keyword, s.sighting_count, s.first_seen, s.last_seen
+    FROM {KEYWORD_STATS_TABLE} s
+    JOIN {KEYWORDS_TABLE} k ON k.id = s.keyword_id
+'''
+
+
+class LookupCache:
+    """
+    字符串 -> 查找表 ID 的进程内缓存，写线程持有一份
+    新值在调用方的事务内插入查找表；事务或 SAVEPOINT 回滚后缓存里可能留下不存在的 ID，
+    调用方在回滚后必须 clear()
+    """
+
+    def __init__(self):
+        self._ids = {table: {} for table in LOOKUP_COLUMNS}
+        self.hits = 0
+        self.misses = 0
+
+    def intern(self, conn, table: str, value):
+        """返回 value 在查找表中的 ID，不存在时插入；None 对应 NULL"""
+        if value is None:
+            return None
+        ids = self._ids[table]
+        lookup_id = ids.get(value)
+        if lookup_id is not None:
+            self.hits += 1
+            return lookup_id
+        self.misses += 1
+        column = LOOKUP_COLUMNS[table]
+        conn.execute(f"INSERT OR IGNORE INTO {table} ({column}) VALUES (?)", (value,))
+        lookup_id = ids[value] = conn.execute(f"SELECT id FROM {table} WHERE {column} = ?", (value,)).fetchone()[0]
+        return lookup_id
+
+    def source_id(self, conn, source):
+        return self.intern(conn, SOURCES_TABLE, source)
+
+    def keyword_id(self, conn, keyword):
+        return self.intern(conn, KEYWORDS_TABLE, keyword)
+
+    def clear(self):
+        for ids in self._ids.values():
+            ids.clear()
+
+
+def _intern_in_trigger(table: str, value: str) -> str:
+    column = LOOKUP_COLUMNS[table]
+    return f"INSERT OR IGNORE INTO {table} ({column}) SELECT {value} WHERE {value} IS NOT NULL;"
+
+
+def _lookup_id(table: str, value: str) -> str:
+    return f"(SELECT id FROM {table} WHERE {LOOKUP_COLUMNS[table]} = {value})"
+
+
+def _lookup_value(table: str, lookup_id: str) -> str:
+    return f"(SELECT {LOOKUP_COLUMNS[table]} FROM {table} WHERE id = {lookup_id})"
+
+
+def _create_fts(conn):
+    """重建三元组索引（内容表为 telegram_links 视图），同步触发器挂到数据表上，文本从查找表取"""
+    columns = ", ".join(INDEXED_COLUMNS)
+
+    def values(row):
+        text = {"link": f"{row}.link", "keyword": _lookup_value(KEYWORDS_TABLE, f"{row}.keyword_id")}
+        return ", ".join(text[c] for c in INDEXED_COLUMNS)
+
+    conn.execute(f'''
+        CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(
+            {columns}, content='telegram_links', content_rowid='id', tokenize='trigram'
+        )
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER telegram_links_fts_ai AFTER INSERT ON {LINKS_TABLE} BEGIN
+            INSERT INTO {FTS_TABLE}(rowid, {columns}) VALUES (new.id, {values("new")});
+        END
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER telegram_links_fts_ad AFTER DELETE ON {LINKS_TABLE} BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {columns}) VALUES ('delete', old.id, {values("old")});
+        END
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER telegram_links_fts_au AFTER UPDATE OF link, keyword_id ON {LINKS_TABLE} BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {columns}) VALUES ('delete', old.id, {values("old")});
+            INSERT INTO {FTS_TABLE}(rowid, {columns}) VALUES (new.id, {values("new")});
+        END
+    ''')
+    conn.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+
+def _create_view_triggers(conn):
+    """视图上的 INSTEAD OF 触发器，兼容直接写 telegram_links / link_sightings 的旧代码"""
+    source_id = _lookup_id(SOURCES_TABLE, "new.source")
+    keyword_id = _lookup_id(KEYWORDS_TABLE, "new.keyword")
+    conn.execute(f'''
+        CREATE TRIGGER telegram_links_ii INSTEAD OF INSERT ON telegram_links BEGIN
+            {_intern_in_trigger(SOURCES_TABLE, "new.source")}
+            {_intern_in_trigger(KEYWORDS_TABLE, "new.keyword")}
+            INSERT INTO {LINKS_TABLE} (id, link, source_id, keyword_id, created_at, updated_at,
+                                      first_seen, last_seen, sighting_count)
+            VALUES (new.id, new.link, {source_id}, {keyword_id},
+                    COALESCE(new.created_at, CURRENT_TIMESTAMP), COALESCE(new.updated_at, CURRENT_TIMESTAMP),
+                    new.first_seen, new.last_seen, COALESCE(new.sighting_count, 0));
+        END
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER telegram_links_iu INSTEAD OF UPDATE ON telegram_links BEGIN
+            {_intern_in_trigger(SOURCES_TABLE, "new.source")}
+            {_intern_in_trigger(KEYWORDS_TABLE, "new.keyword")}
+            UPDATE {LINKS_TABLE}
+            SET id = new.id, link = new.link, source_id = {source_id}, keyword_id = {keyword_id},
+                created_at = new.created_at, updated_at = new.updated_at, first_seen = new.first_seen,
+                last_seen = new.last_seen, sighting_count = new.sighting_count
+            WHERE id = old.id;
+        END
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER telegram_links_id INSTEAD OF DELETE ON telegram_links BEGIN
+            DELETE FROM {LINKS_TABLE} WHERE id = old.id;
+        END
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER link_sightings_ii INSTEAD OF INSERT ON link_sightings BEGIN
+            {_intern_in_trigger(SOURCES_TABLE, "new.source")}
+            {_intern_in_trigger(KEYWORDS_TABLE, "new.keyword")}
+            INSERT OR IGNORE INTO {SIGHTINGS_TABLE} (id, link_id, keyword_id, source_id, tweet_id, seen_at)
+            VALUES (new.id, new.link_id, {keyword_id}, {source_id}, new.tweet_id, new.seen_at);
+        END
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER link_sightings_id INSTEAD OF DELETE ON link_sightings BEGIN
+            DELETE FROM {SIGHTINGS_TABLE} WHERE id = old.id;
+        END
+    ''')
+
+
+def normalize_lookups(conn):
+    """
+    把 telegram_links / link_sightings 的 source、keyword 拆到查找表（迁移中调用）
+    链接 ID 与 AUTOINCREMENT 序列原样保留；三元组索引去掉 source 列后重建
+    """
+    conn.execute(f"CREATE TABLE {SOURCES_TABLE} (id INTEGER PRIMARY KEY, source TEXT UNIQUE NOT NULL)")
+    conn.execute(f"CREATE TABLE {KEYWORDS_TABLE} (id INTEGER PRIMARY KEY, keyword TEXT UNIQUE NOT NULL)")
+    for table, column in LOOKUP_COLUMNS.items():
+        conn.execute(f'''
+            INSERT OR IGNORE INTO {table} ({column})
+            SELECT {column} FROM telegram_links WHERE {column} IS NOT NULL
+            UNION SELECT {column} FROM link_sightings WHERE {column} IS NOT NULL
+        ''')
+
+    conn.execute(f'''
+        CREATE TABLE {LINKS_TABLE} (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            link TEXT UNIQUE NOT NULL,
+            source_id INTEGER REFERENCES {SOURCES_TABLE}(id),
+            keyword_id INTEGER REFERENCES {KEYWORDS_TABLE}(id),
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            first_seen TIMESTAMP,
+            last_seen TIMESTAMP,
+            sighting_count INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+    conn.execute(f'''
+        INSERT INTO {LINKS_TABLE} (id, link, source_id, keyword_id, created_at, updated_at,
+                                  first_seen, last_seen, sighting_count)
+        SELECT l.id, l.link, s.id, k.id, l.created_at, l.updated_at, l.first_seen, l.last_seen, l.sighting_count
+        FROM telegram_links l
+        LEFT JOIN {SOURCES_TABLE} s ON s.source = l.source
+        LEFT JOIN {KEYWORDS_TABLE} k ON k.keyword = l.keyword
+        ORDER BY l.id
+    ''')
+    # 保留已删除链接占用过的 ID，不被新链接复用（过滤器水位和归档库都依赖 ID 不复用）
+    row = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'telegram_links'").fetchone()
+    if row is not None:
+        conn.execute("DELETE FROM sqlite_sequence WHERE name = ?", (LINKS_TABLE,))
+        conn.execute("INSERT INTO sqlite_sequence (name, seq) VALUES (?, ?)", (LINKS_TABLE, row[0]))
+
+    conn.execute(f'''
+        CREATE TABLE {SIGHTINGS_TABLE} (
+            id INTEGER PRIMARY KEY,
+            link_id INTEGER NOT NULL,
+            keyword_id INTEGER REFERENCES {KEYWORDS_TABLE}(id),
+            source_id INTEGER REFERENCES {SOURCES_TABLE}(id),
+            tweet_id TEXT,
+            seen_at TIMESTAMP NOT NULL
+        )
+    ''')
+    conn.execute(f'''
+        INSERT INTO {SIGHTINGS_TABLE} (id, link_id, keyword_id, source_id, tweet_id, seen_at)
+        SELECT t.id, t.link_id, k.id, s.id, t.tweet_id, t.seen_at
+        FROM link_sightings t
+        LEFT JOIN {SOURCES_TABLE} s ON s.source = t.source
+        LEFT JOIN {KEYWORDS_TABLE} k ON k.keyword = t.keyword
+        ORDER BY t.id
+    ''')
+
+    # 旧表连同它们的索引、触发器一起删除，三元组索引(外部内容表)随后指向同名视图
+    conn.execute("DROP TABLE telegram_links")
+    conn.execute("DROP TABLE link_sightings")
+    conn.execute(LINKS_VIEW_SQL)
+    conn.execute(SIGHTINGS_VIEW_SQL)
+
+    conn.execute(f"CREATE INDEX idx_created_at ON {LINKS_TABLE}(created_at, id)")
+    conn.execute(f"CREATE INDEX idx_keyword_created ON {LINKS_TABLE}(keyword_id, created_at)")
+    # 不带 WHERE 的唯一索引语义不变(NULL 之间互不冲突)，同时能按 link_id 查找，删除链接时不用扫表
+    conn.execute(f"CREATE UNIQUE INDEX idx_sightings_link_tweet ON {SIGHTINGS_TABLE}(link_id, tweet_id)")
+
+    conn.execute(f'''
+        CREATE TRIGGER telegram_links_sightings_ad AFTER DELETE ON {LINKS_TABLE} BEGIN
+            DELETE FROM {SIGHTINGS_TABLE} WHERE link_id = old.id;
+            DELETE FROM link_keyword_stats WHERE link_id = old.id;
+        END
+    ''')
+    # 按新的列重建三元组索引；版本 4 时不支持 FTS5 的库保持不变，继续用 LIKE
+    if has_fts(conn):
+        conn.execute(f"DROP TABLE {FTS_TABLE}")
+        if fts5_supported(conn):
+            _create_fts(conn)
+    _create_view_triggers(conn)
+
+
+def _create_keyword_stats_triggers(conn):
+    """link_keyword_stats 视图上的 INSTEAD OF 触发器，(link_id, keyword) 仍是主键"""
+    keyword_id = _lookup_id(KEYWORDS_TABLE, "new.keyword")
+    old_keyword_id = _lookup_id(KEYWORDS_TABLE, "old.keyword")
+    conn.execute(f'''
+        CREATE TRIGGER link_keyword_stats_ii INSTEAD OF INSERT ON link_keyword_stats BEGIN
+            {_intern_in_trigger(KEYWORDS_TABLE, "new.keyword")}
+            INSERT INTO {KEYWORD_STATS_TABLE} (link_id, keyword_id, sighting_count, first_seen, last_seen)
+            VALUES (new.link_id, {keyword_id}, new.sighting_count, new.first_seen, new.last_seen);
+        END
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER link_keyword_stats_iu INSTEAD OF UPDATE ON link_keyword_stats BEGIN
+            {_intern_in_trigger(KEYWORDS_TABLE, "new.keyword")}
+            UPDATE {KEYWORD_STATS_TABLE}
+            SET link_id = new.link_id, keyword_id = {keyword_id}, sighting_count = new.sighting_count,
+                first_seen = new.first_seen, last_seen = new.last_seen
+            WHERE link_id = old.link_id AND keyword_id = {old_keyword_id};
+        END
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER link_keyword_stats_id INSTEAD OF DELETE ON link_keyword_stats BEGIN
+            DELETE FROM {KEYWORD_STATS_TABLE} WHERE link_id = old.link_id AND keyword_id = {old_keyword_id};
+        END
+    ''')
+
+
+def normalize_keyword_stats(conn):
+    """把 link_keyword_stats 的 keyword 也换成查找表 ID（迁移中调用），原表变成同名视图"""
+    conn.execute(f'''
+        INSERT OR IGNORE INTO {KEYWORDS_TABLE} (keyword)
+        SELECT DISTINCT keyword FROM link_keyword_stats WHERE keyword IS NOT NULL
+    ''')
+    conn.execute(f'''
+        CREATE TABLE {KEYWORD_STATS_TABLE} (
+            link_id INTEGER NOT NULL,
+            keyword_id INTEGER NOT NULL REFERENCES {KEYWORDS_TABLE}(id),
+            sighting_count INTEGER NOT NULL,
+            first_seen TIMESTAMP NOT NULL,
+            last_seen TIMESTAMP NOT NULL,
+            PRIMARY KEY (link_id, keyword_id)
+        ) WITHOUT ROWID
+    ''')
+    conn.execute(f'''
+        INSERT INTO {KEYWORD_STATS_TABLE} (link_id, keyword_id, sighting_count, first_seen, last_seen)
+        SELECT s.link_id, k.id, s.sighting_count, s.first_seen, s.last_seen
+        FROM link_keyword_stats s
+        JOIN {KEYWORDS_TABLE} k ON k.keyword = s.keyword
+        ORDER BY s.link_id, k.id
+    ''')
+    # 旧表的 keyword 索引随表一起删除
+    conn.execute("DROP TABLE link_keyword_stats")
+    conn.execute(KEYWORD_STATS_VIEW_SQL)
+    conn.execute(f"CREATE INDEX idx_keyword_stats_keyword ON {KEYWORD_STATS_TABLE}(keyword_id)")
+
+    # 删除链接时的清理触发器改为直接删数据表
+    conn.execute("DROP TRIGGER telegram_links_sightings_ad")
+    conn.execute(f'''
+        CREATE TRIGGER telegram_links_sightings_ad AFTER DELETE ON {LINKS_TABLE} BEGIN
+            DELETE FROM {SIGHTINGS_TABLE} WHERE link_id = old.id;
+            DELETE FROM {KEYWORD_STATS_TABLE} WHERE link_id = old.id;
+        END
+    ''')
+    _create_keyword_stats_triggers(conn)
@@ -0,0 +1,130 @@
+# auto_collect/storage/memory_repository.py
+"""内存后端：行为与 SQLite 后端一致（去重、出现记录、分页），不落盘，用于测试和基准测试"""
+from datetime import datetime, timezone
+
+from auto_collect.crawler.canonical import canonicalize_link
+from auto_collect.storage.queries import DEFAULT_ORDER_BY, DEFAULT_PAGE_SIZE, sort_keys
+from auto_collect.storage.repository import LinkRepository
+from auto_collect.storage.stats import daily_stats_rows, day_of, keyword_totals_rows
+from auto_collect.storage.status import STATUS_UNCHECKED
+
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def _matches(record: dict, keyword, link_contains) -> bool:
+    # 与 LIKE '%x%' 一致：子串匹配，大小写不敏感
+    if keyword and keyword.lower() not in (record["keyword"] or "").lower():
+        return False
+    if link_contains and link_contains.lower() not in record["link"].lower():
+        return False
+    return True
+
+
+class MemoryRepository(LinkRepository):
+    def __init__(self):
+        self._links = {}           # link -> 记录
+        self._next_id = 1
+        self.sightings = []        # (link_id, keyword, source, tweet_id, seen_at)
+        self.keyword_stats = {}    # (link_id, keyword) -> [次数, 首次, 末次]
+        self._seen_tweets = set()  # (link_id, tweet_id)
+        self.daily_stats = {}      # (day, keyword) -> [新链接数, 重复次数, 抓取秒数]
+
+    def save_links(self, items: list) -> list:
+        now = datetime.now(timezone.utc).strftime(TIME_FORMAT)
+        new_links = []
+        for item in self.canonical_items(items):
+            link = item["link"]
+            keyword = item.get("keyword", "")
+            seen_at = item.get("seen_at") or now
+            record = self._links.get(link)
+            first = record is None
+            if first:
+                record = {"id": self._next_id, "link": link, "source": item.get("source", ""),
+                          "keyword": keyword, "created_at": seen_at, "updated_at": seen_at,
+                          "first_seen": seen_at, "last_seen": seen_at, "sighting_count": 0}
+                self._links[link] = record
+                self._next_id += 1
+                new_links.append(link)
+
+            tweet_id = item.get("tweet_id")
+            if tweet_id is not None:
+                if (record["id"], tweet_id) in self._seen_tweets:
+                    continue
+                self._seen_tweets.add((record["id"], tweet_id))
+            self.sightings.append((record["id"], keyword, item.get("source", ""), tweet_id, seen_at))
+            self._daily(day_of(seen_at), keyword)[0 if first else 1] += 1
+            record["sighting_count"] += 1
+            record["first_seen"] = min(record["first_seen"], seen_at)
+            record["last_seen"] = max(record["last_seen"], seen_at)
+            record["updated_at"] = now
+            if keyword:
+                stats = self.keyword_stats.setdefault((record["id"], keyword), [0, seen_at, seen_at])
+                stats[0] += 1
+                stats[1] = min(stats[1], seen_at)
+                stats[2] = max(stats[2], seen_at)
+        return new_links
+
+    def _daily(self, day, keyword) -> list:
+        return self.daily_stats.setdefault((day, keyword or ""), [0, 0, 0.0])
+
+    def link_exists(self, link: str) -> bool:
+        return (canonicalize_link(link) or link) in self._links
+
+    def get_links_page(self, cursor=None, page_size=DEFAULT_PAGE_SIZE, keyword=None, link_contains=None,
+                       order_by=DEFAULT_ORDER_BY, descending=True):
+        keys = sort_keys(order_by)
+
+        def key(r):
+            return tuple(r[k] for k in keys)
+
+        def after_cursor(r):
+            return key(r) < tuple(cursor) if descending else key(r) > tuple(cursor)
+
+        records = [r for r in self._links.values() if _matches(r, keyword, link_contains)
+                   and (cursor is None or after_cursor(r))]
+        records.sort(key=key, reverse=descending)
+        page = records[:page_size]
+        links = [{k: r[k] for k in ("id", "link", "source", "keyword", "created_at")} for r in page]
+        next_cursor = key(page[-1]) if len(records) > page_size else None
+        return links, next_cursor
+
+    def count_links(self, keyword=None, link_contains=None) -> int:
+        return sum(1 for r in self._links.values() if _matches(r, keyword, link_contains))
+
+    def _delete(self, predicate) -> list:
+        doomed = [link for link, r in self._links.items() if predicate(r)]
+        ids = [self._links[link]["id"] for link in doomed]
+        for link in doomed:
+            del self._links[link]
+        if ids:
+            id_set = set(ids)
+            self.sightings = [s for s in self.sightings if s[0] not in id_set]
+            self.keyword_stats = {k: v for k, v in self.keyword_stats.items() if k[0] not in id_set}
+            self._seen_tweets = {k for k in self._seen_tweets if k[0] not in id_set}
+        return ids
+
+    def delete_links(self, ids) -> list:
+        id_set = set(ids)
+        return self._delete(lambda r: r["id"] in id_set)
+
+    def delete_links_where(self, keyword=None, link_contains=None, status=None, exact_keyword=False) -> list:
+        if not (keyword or link_contains or status):
+            raise ValueError("批量删除至少需要一个条件")
+        # 内存后端不做链接检测，所有链接都处于 unchecked 状态
+        if status and status != STATUS_UNCHECKED:
+            return []
+        if exact_keyword:
+            return self._delete(lambda r: r["keyword"] == keyword and _matches(r, None, link_contains))
+        return self._delete(lambda r: _matches(r, keyword, link_contains))
+
+    def clear_database(self) -> int:
+        return len(self._delete(lambda r: True))
+
+    def record_crawl_time(self, keyword: str, seconds: float):
+        self._daily(datetime.now(timezone.utc).strftime("%Y-%m-%d"), keyword)[2] += seconds
+
+    def get_daily_stats(self, keyword=None, since=None, until=None) -> list:
+        return daily_stats_rows(self.daily_stats, keyword, since, until)
+
+    def get_keyword_totals(self, since=None, until=None) -> list:
+        return keyword_totals_rows(self.daily_stats, since, until)
@@ -0,0 +1,217 @@
+# auto_collect/storage/merge.py
+"""
+批量合并其他采集端的数据库
+
+每个操作员各自运行一份程序，会积累很多 telegram_links.db / results.db。
+这里用 ATTACH 挂载源库，整表 INSERT ... SELECT ... ON CONFLICT 按集合搬运，
+不再逐条 save_link：
+    1. 源库的链接经 SQL 函数 canonical_link() 规范化后写入临时表，
+       同一源库内规范化后重复的链接在临时表里合并，无法识别的链接计为拒绝
+    2. 临时表中的 source / keyword 补进查找表，再一次性 UPSERT 到链接数据表：新链接插入，已有链接只合并
+       first_seen / last_seen / sighting_count，重复合并同一个文件不会让计数膨胀
+    3. 补充 link_keyword_stats 中缺少的 (链接, 关键词)，新增链接按首次发现日期计入 keyword_daily_stats
+支持的源表：telegram_links（任意版本）以及旧 storage.py 的 links 表(results.db)
+合并由本进程的写线程(writer.run_exclusive)执行，不另开写连接：写线程的已知链接过滤器在合并后补齐，
+之后抓取到的合并进来的链接不会被误判为新链接。
+
+python auto_collect/storage/merge.py telegram_links.db other1.db other2/results.db
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# 添加项目根目录到sys.path以确保可以导入（以脚本方式运行时）
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from auto_collect.crawler.canonical import canonicalize_link
+from auto_collect.storage.connection import transaction
+from auto_collect.storage.fts import FTS_TABLE, has_fts
+from auto_collect.storage.lookups import (KEYWORD_STATS_TABLE, KEYWORDS_TABLE, LINKS_TABLE, LOOKUP_COLUMNS,
+                                          SOURCES_TABLE)
+from auto_collect.storage.migrations import migrate
+from auto_collect.storage.stats import STATS_TABLE
+from auto_collect.storage.writer import get_writer
+
+SOURCE_ALIAS = "merge_src"
+STAGE_TABLE = "temp.merge_stage"
+# 可以作为合并来源的表，按优先级排列
+SOURCE_TABLES = ("telegram_links", "links")
+# FTS5 默认的 automerge 值
+FTS_AUTOMERGE = 4
+
+
+def _canonical_or_none(link):
+    # 源库里可能混入非文本值，UDF 抛异常会让整条语句失败，统一按无法识别处理
+    return canonicalize_link(link) if isinstance(link, str) else None
+
+
+def _source_table(conn):
+    """返回源库中可合并的表名及其列集合"""
+    for table in SOURCE_TABLES:
+        columns = {row[1] for row in conn.execute(f"PRAGMA {SOURCE_ALIAS}.table_info({table})")}
+        if "link" in columns:
+            return table, columns
+    return None, set()
+
+
+def _source_select(table: str, columns: set) -> str:
+    """
+    把源表映射为统一的列：link, source, keyword, created_at, first_seen, last_seen, sighting_count
+    旧 links 表和早期版本的 telegram_links 没有聚合列，用 created_at 和 1 代替
+    LIMIT -1 阻止外层查询把子查询展开，否则外层的 link IS NOT NULL 会让 canonical_link 每行调用两次
+    """
+    def column(name, fallback):
+        return name if name in columns else fallback
+
+    created_at = column("created_at", "CURRENT_TIMESTAMP")
+    return (f"SELECT canonical_link(link) AS link, {column('source', 'NULL')} AS source, "
+            f"{column('keyword', 'NULL')} AS keyword, "
+            f"COALESCE({created_at}, CURRENT_TIMESTAMP) AS created_at, "
+            f"COALESCE({column('first_seen', 'NULL')}, {created_at}, CURRENT_TIMESTAMP) AS first_seen, "
+            f"COALESCE({column('last_seen', 'NULL')}, {created_at}, CURRENT_TIMESTAMP) AS last_seen, "
+            f"MAX(COALESCE({column('sighting_count', 'NULL')}, 1), 1) AS sighting_count "
+            f"FROM {SOURCE_ALIAS}.{table} LIMIT -1")
+
+
+def _merge_attached(conn, table: str, columns: set) -> dict:
+    """在事务内把已挂载的源表合并进主库，返回统计"""
+    scanned = conn.execute(f"SELECT COUNT(*) FROM {SOURCE_ALIAS}.{table}").fetchone()[0]
+
+    conn.execute(f"DROP TABLE IF EXISTS {STAGE_TABLE}")
+    conn.execute(f'''
+        CREATE TABLE {STAGE_TABLE} (
+            link TEXT PRIMARY KEY,
+            source TEXT,
+            keyword TEXT,
+            created_at TIMESTAMP,
+            first_seen TIMESTAMP,
+            last_seen TIMESTAMP,
+            sighting_count INTEGER
+        ) WITHOUT ROWID
+    ''')
+    # 临时表按 link 组织(WITHOUT ROWID)，随后按 link 顺序写入主表，UNIQUE 索引的写入是顺序的；
+    # INSERT ... SELECT ... ON CONFLICT 要求 SELECT 带 WHERE，否则语法有歧义
+    cursor = conn.execute(f'''
+        INSERT INTO {STAGE_TABLE} (link, source, keyword, created_at, first_seen, last_seen, sighting_count)
+        SELECT * FROM ({_source_select(table, columns)}) WHERE link IS NOT NULL
+        ON CONFLICT(link) DO UPDATE SET
+            created_at = MIN(created_at, excluded.created_at),
+            first_seen = MIN(first_seen, excluded.first_seen),
+            last_seen = MAX(last_seen, excluded.last_seen),
+            sighting_count = sighting_count + excluded.sighting_count
+    ''')
+    # 插入和 DO UPDATE 合并的行都计入 rowcount，其余就是 canonical_link 返回 NULL 被过滤掉的行
+    rejected = scanned - cursor.rowcount
+
+    # 源库里出现的 source / keyword 先整体补进查找表，UPSERT 时按文本关联出 ID
+    for lookup, column in LOOKUP_COLUMNS.items():
+        conn.execute(f"INSERT OR IGNORE INTO main.{lookup} ({column}) "
+                     f"SELECT DISTINCT {column} FROM {STAGE_TABLE} WHERE {column} IS NOT NULL")
+
+    before = conn.execute(f"SELECT COALESCE(MAX(id), 0) FROM main.{LINKS_TABLE}").fetchone()[0]
+    # 新链接经触发器逐行写入三元组索引，这是合并的主要耗时；
+    # 期间关闭 automerge，避免每写满一段就合并一次，结束后恢复默认值，由后续写入逐步合并
+    fts = has_fts(conn)
+    if fts:
+        conn.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rank) VALUES ('automerge', 0)")
+    conn.execute(f'''
+        INSERT INTO main.{LINKS_TABLE} (link, source_id, keyword_id, created_at, first_seen, last_seen,
+                                       sighting_count)
+        SELECT st.link, s.id, k.id, st.created_at, st.first_seen, st.last_seen, st.sighting_count
+        FROM {STAGE_TABLE} st
+        LEFT JOIN main.{SOURCES_TABLE} s ON s.source = st.source
+        LEFT JOIN main.{KEYWORDS_TABLE} k ON k.keyword = st.keyword
+        WHERE true
+        ON CONFLICT(link) DO UPDATE SET
+            first_seen = MIN(COALESCE(first_seen, excluded.first_seen), excluded.first_seen),
+            last_seen = MAX(COALESCE(last_seen, excluded.last_seen), excluded.last_seen),
+            sighting_count = MAX(sighting_count, excluded.sighting_count),
+            updated_at = CURRENT_TIMESTAMP
+    ''')
+    merged = conn.execute(f"SELECT COUNT(*) FROM main.{LINKS_TABLE} WHERE id > ?", (before,)).fetchone()[0]
+    if fts:
+        conn.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rank) VALUES ('automerge', {FTS_AUTOMERGE})")
+
+    conn.execute(f'''
+        INSERT OR IGNORE INTO main.{KEYWORD_STATS_TABLE} (link_id, keyword_id, sighting_count, first_seen, last_seen)
+        SELECT l.id, k.id, s.sighting_count, s.first_seen, s.last_seen
+        FROM {STAGE_TABLE} s
+        JOIN main.{LINKS_TABLE} l ON l.link = s.link
+        JOIN main.{KEYWORDS_TABLE} k ON k.keyword = s.keyword
+        WHERE s.keyword != ''
+    ''')
+    # 只计新增链接；合并进来的重复不是本机抓取到的，不计入重复次数
+    conn.execute(f'''
+        INSERT INTO main.{STATS_TABLE} (day, keyword, new_links)
+        SELECT date(l.first_seen), COALESCE(k.keyword, ''), COUNT(*)
+        FROM main.{LINKS_TABLE} l LEFT JOIN main.{KEYWORDS_TABLE} k ON k.id = l.keyword_id
+        WHERE l.id > ? AND l.first_seen IS NOT NULL
+        GROUP BY 1, 2
+        ON CONFLICT(day, keyword) DO UPDATE SET new_links = new_links + excluded.new_links
+    ''', (before,))
+    conn.execute(f"DROP TABLE {STAGE_TABLE}")
+
+    return {"scanned": scanned, "merged": merged, "duplicate": scanned - rejected - merged, "rejected": rejected}
+
+
+def merge_database(conn, source_path: str) -> dict:
+    """
+    把一个源数据库合并进 conn 所在的主库
+    conn 必须处于自动提交状态（ATTACH 不能在事务内执行）
+    返回 {'scanned', 'merged', 'duplicate', 'rejected'}：
+        merged 为新增链接数，duplicate 为主库已有或源库内规范化后重复的行数，rejected 为无法识别的链接数
+    """
+    if not Path(source_path).is_file():
+        raise FileNotFoundError(f"源数据库不存在: {source_path}")
+    conn.create_function("canonical_link", 1, _canonical_or_none, deterministic=True)
+    conn.execute(f"ATTACH DATABASE ? AS {SOURCE_ALIAS}", (source_path,))
+    try:
+        table, columns = _source_table(conn)
+        if table is None:
+            raise ValueError(f"{source_path} 中没有可合并的表（{' / '.join(SOURCE_TABLES)}）")
+        with transaction(conn):
+            return _merge_attached(conn, table, columns)
+    finally:
+        conn.execute(f"DETACH DATABASE {SOURCE_ALIAS}")
+
+
+def _merge_sources(conn, sources: list) -> dict:
+    # 临时表可能有数百万行，合并期间放到临时文件而不是内存里
+    temp_store = conn.execute("PRAGMA temp_store").fetchone()[0]
+    conn.execute("PRAGMA temp_store = FILE")
+    results = {}
+    try:
+        migrate(conn)
+        for source in sources:
+            started = time.time()
+            try:
+                summary = merge_database(conn, source)
+            except Exception as e:
+                results[source] = e
+                print(f"[Merge] {source} 合并失败: {e}", flush=True)
+                continue
+            results[source] = summary
+            print(f"[Merge] {source}: 扫描 {summary['scanned']} 行，新增 {summary['merged']} 条，"
+                  f"重复 {summary['duplicate']} 条，拒绝 {summary['rejected']} 条，"
+                  f"耗时 {time.time() - started:.1f} 秒", flush=True)
+    finally:
+        conn.execute(f"PRAGMA temp_store = {temp_store}")
+    return results
+
+
+def merge_databases(db_path: str, sources: list) -> dict:
+    """依次合并多个源数据库，返回 {源路径: 统计或异常}；单个源失败不影响其他源"""
+    return get_writer(db_path).run_exclusive(lambda conn: _merge_sources(conn, sources)).result()
+
+
+# ---------------- CLI 调用 ----------------
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="把其他采集端的 telegram_links.db / results.db 合并进主库")
+    parser.add_argument("db", help="主库，如 telegram_links.db")
+    parser.add_argument("sources", nargs="+", help="要合并的源数据库")
+    args = parser.parse_args()
+
+    results = merge_databases(args.db, args.sources)
+    if any(isinstance(r, Exception) for r in results.values()):
+        sys.exit(1)
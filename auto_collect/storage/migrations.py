@@ -0,0 +1,159 @@
+# auto_collect/storage/migrations.py
+"""
+telegram_links 的版本化迁移
+
+数据库当前版本记录在 PRAGMA user_version 中，打开数据库时按顺序执行
+所有更高版本的迁移，每个迁移及其版本号更新在同一个事务内提交，
+中途出错会整体回滚，下次启动时重试。
+新增迁移只需在 MIGRATIONS 末尾追加，不要修改已发布的迁移。
+
+手动升级并检查执行计划: python auto_collect/storage/migrations.py telegram_links.db --check
+"""
+import argparse
+import sys
+from pathlib import Path
+
+# 添加项目根目录到sys.path以确保可以导入（以脚本方式运行时）
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from auto_collect.storage.connection import get_connection, transaction
+from auto_collect.storage.dedupe import create_generation_schema
+from auto_collect.storage.fts import create_fts
+from auto_collect.storage.lookups import normalize_keyword_stats, normalize_lookups
+from auto_collect.storage.sightings import backfill_sightings, create_sightings_schema
+from auto_collect.storage.stats import create_stats_schema
+from auto_collect.storage.status import create_status_schema
+
+
+def _create_base_schema(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS telegram_links (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            link TEXT UNIQUE NOT NULL,
+            source TEXT,
+            keyword TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_keyword ON telegram_links(keyword)")
+
+
+def _index_for_query_patterns(conn):
+    # link 上的 UNIQUE 约束已自带索引，idx_link 只会让每次写入多维护一棵 B 树
+    conn.execute("DROP INDEX IF EXISTS idx_link")
+    # 列表与搜索都按 created_at 倒序，id 作为同一秒内的次序
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_created_at ON telegram_links(created_at, id)")
+    # 按关键词过滤再按时间排序/统计；前缀同样满足原 idx_keyword 的等值查询
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_keyword_created ON telegram_links(keyword, created_at)")
+    conn.execute("DROP INDEX IF EXISTS idx_keyword")
+
+
+def _merge_canonical_duplicates(conn):
+    from auto_collect.crawler.canonical import merge_duplicate_links
+
+    summary = merge_duplicate_links(conn)
+    if summary["merged"] or summary["rewritten"]:
+        print(f"[Migrate] 规范化链接: 合并重复 {summary['merged']} 条，改写 {summary['rewritten']} 条", flush=True)
+
+
+def _create_crawler_tables(conn):
+    # 检测状态表和作者队列表原先由各自的模块在自己的连接上建立
+    from auto_collect.crawler.author_frontier import create_frontier_schema
+
+    create_status_schema(conn)
+    create_frontier_schema(conn)
+
+
+# (版本号, 说明, 迁移函数)，版本号从 1 开始连续递增
+MIGRATIONS = [
+    (1, "创建 telegram_links 表", _create_base_schema),
+    (2, "按查询模式调整索引", _index_for_query_patterns),
+    (3, "合并规范化后重复的链接", _merge_canonical_duplicates),
+    (4, "建立 link/keyword/source 三元组全文索引", create_fts),
+    (5, "增加出现记录表与聚合列", create_sightings_schema),
+    (6, "source/keyword 改存查找表", normalize_lookups),
+    (7, "增加按关键词按天的发现统计表", create_stats_schema),
+    (8, "记录链接表的写入代次，供已知链接过滤器校验旁路文件", create_generation_schema),
+    (9, "增加链接检测状态表和作者扩展队列表", _create_crawler_tables),
+    (10, "链接按关键词的聚合改存关键词 ID", normalize_keyword_stats),
+    (11, "为没有出现记录的链接补一条出现记录", backfill_sightings),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+# 需要走索引的热点查询: (名称, SQL, 参数)
+HOT_QUERIES = [
+    ("link_exists", "SELECT 1 FROM telegram_links WHERE link = ? LIMIT 1", ("https://t.me/x",)),
+    ("get_all_links", "SELECT id, link, source, keyword, created_at FROM telegram_links "
+                      "ORDER BY created_at DESC", ()),
+    ("links_page", "SELECT id, link, source, keyword, created_at FROM telegram_links "
+                   "WHERE (created_at, id) < (?, ?) ORDER BY created_at DESC, id DESC LIMIT 201",
+     ("2024-01-01 00:00:00", 1)),
+    ("links_page_by_link", "SELECT id, link, source, keyword, created_at FROM telegram_links "
+                           "WHERE link > ? ORDER BY link LIMIT 201", ("https://t.me/x",)),
+    ("search_by_keyword", "SELECT id, link, source, keyword, created_at FROM telegram_links "
+                          "WHERE keyword = ? ORDER BY created_at DESC", ("x",)),
+    ("keyword_stats", "SELECT COUNT(*), COUNT(DISTINCT date(created_at)) FROM telegram_links "
+                      "WHERE keyword = ?", ("x",)),
+]
+
+
+def schema_version(conn) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn) -> int:
+    """把数据库升级到最新版本，返回升级后的版本号"""
+    current = schema_version(conn)
+    if current > LATEST_VERSION:
+        print(f"[Migrate] 数据库版本 {current} 高于程序支持的 {LATEST_VERSION}，跳过迁移", flush=True)
+        return current
+    for version, description, fn in MIGRATIONS:
+        if version <= current:
+            continue
+        with transaction(conn):
+            # 拿到写锁后再确认一次，其他进程可能已经完成了这一步
+            if schema_version(conn) >= version:
+                continue
+            fn(conn)
+            conn.execute(f"PRAGMA user_version = {version}")
+        print(f"[Migrate] 已升级到版本 {version}: {description}", flush=True)
+    return schema_version(conn)
+
+
+def migrate_database(db_path: str) -> int:
+    return migrate(get_connection(db_path))
+
+
+def check_query_plans(conn) -> list:
+    """
+    用 EXPLAIN QUERY PLAN 检查热点查询
+    返回 [(名称, 计划详情)]，出现全表扫描或为 ORDER BY 临时排序的查询会被列出，全部走索引时返回空列表
+    """
+    problems = []
+    for name, sql, params in HOT_QUERIES:
+        for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall():
+            detail = row[-1]
+            full_scan = detail.startswith("SCAN ") and " USING " not in detail
+            if full_scan or "TEMP B-TREE FOR ORDER BY" in detail:
+                problems.append((name, detail))
+    return problems
+
+
+# ---------------- CLI 调用 ----------------
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="升级 telegram_links 数据库并检查热点查询的执行计划")
+    parser.add_argument("db", nargs="?", default="telegram_links.db")
+    parser.add_argument("--check", action="store_true", help="升级后检查热点查询是否走索引")
+    args = parser.parse_args()
+
+    conn = get_connection(args.db)
+    print(f"[Migrate] 当前版本 {migrate(conn)}", flush=True)
+    if args.check:
+        problems = check_query_plans(conn)
+        for name, detail in problems:
+            print(f"[Migrate] {name} 未使用索引: {detail}", flush=True)
+        if problems:
+            sys.exit(1)
+        print(f"[Migrate] {len(HOT_QUERIES)} 条热点查询均使用索引", flush=True)
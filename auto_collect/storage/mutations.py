@@ -0,0 +1,79 @@
+# auto_collect/storage/mutations.py
+"""
+按集合批量删除链接
+
+待删除的 ID 先写入临时表，再用一条 DELETE ... WHERE id IN (SELECT id FROM 临时表) RETURNING id
+一次删除（直接删数据表，视图上不支持 RETURNING），
+附表(link_status，以及触发器维护的出现记录、全文索引)在同一事务内清理。
+返回实际删除的 ID 列表，界面据此就地移除行，不需要重新查询整张表。
+调用方负责事务（SQLite 后端通过写线程执行）。
+"""
+from auto_collect.storage.fts import build_filter, has_fts
+from auto_collect.storage.lookups import LINKS_TABLE
+from auto_collect.storage.status import STATUS_UNCHECKED
+
+IDS_TABLE = "temp.mutation_ids"
+
+
+def _has_status_table(conn) -> bool:
+    return conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'link_status'").fetchone() is not None
+
+
+def _prepare_ids_table(conn):
+    conn.execute("CREATE TEMP TABLE IF NOT EXISTS mutation_ids (id INTEGER PRIMARY KEY)")
+    conn.execute(f"DELETE FROM {IDS_TABLE}")
+
+
+def _delete_staged(conn) -> list:
+    """删除临时表中的 ID，返回实际删除的 ID"""
+    if _has_status_table(conn):
+        conn.execute(f"DELETE FROM link_status WHERE link_id IN (SELECT id FROM {IDS_TABLE})")
+    deleted = [row[0] for row in conn.execute(
+        f"DELETE FROM {LINKS_TABLE} WHERE id IN (SELECT id FROM {IDS_TABLE}) RETURNING id")]
+    conn.execute(f"DELETE FROM {IDS_TABLE}")
+    return deleted
+
+
+def delete_links_by_ids(conn, ids) -> list:
+    """按 ID 列表删除，返回实际删除的 ID（不存在的 ID 被忽略）"""
+    ids = list(ids)
+    if not ids:
+        return []
+    _prepare_ids_table(conn)
+    conn.executemany(f"INSERT OR IGNORE INTO {IDS_TABLE} (id) VALUES (?)", [(int(i),) for i in ids])
+    return _delete_staged(conn)
+
+
+def delete_links_where(conn, keyword=None, link_contains=None, status=None, exact_keyword=False) -> list:
+    """
+    按条件删除，返回删除的 ID
+    keyword / link_contains 与搜索面板一致为子串匹配；exact_keyword 为 True 时关键词按等值匹配
+    status 为检测状态(alive/dead/error/unchecked)
+    至少需要一个条件，清空全部请用 clear_database
+    """
+    if not (keyword or link_contains or status):
+        raise ValueError("批量删除至少需要一个条件")
+    from_sql, where, params = build_filter(None if exact_keyword else keyword, link_contains, has_fts(conn))
+    if exact_keyword and keyword:
+        where.append("l.keyword = ?")
+        params.append(keyword)
+    if status:
+        if _has_status_table(conn):
+            from_sql += " LEFT JOIN link_status s ON s.link_id = l.id"
+            if status == STATUS_UNCHECKED:
+                where.append("s.link_id IS NULL")
+            else:
+                where.append("s.status = ?")
+                params.append(status)
+        elif status != STATUS_UNCHECKED:
+            # 还没有检测过任何链接，只有 unchecked 能匹配
+            return []
+
+    # 没有 link_status 表时 unchecked 匹配所有链接，此时可能没有任何条件
+    query = f"INSERT OR IGNORE INTO {IDS_TABLE} (id) SELECT l.id FROM {from_sql}"
+    if where:
+        query += " WHERE " + " AND ".join(where)
+    _prepare_ids_table(conn)
+    conn.execute(query, params)
+    return _delete_staged(conn)
@@ -0,0 +1,269 @@
+# auto_collect/storage/parquet_repository.py
+"""
+列式后端：把链接和出现记录追加写成 Parquet 分片，供 pandas/DuckDB 等离线分析
+
+目录结构：
+    <目录>/links/part-00000.parquet       id, link, source, keyword, created_at
+    <目录>/sightings/part-00000.parquet   link_id, keyword, source, tweet_id, seen_at
+    <目录>/deleted/part-00000.parquet     link_id（删除标记）
+    <目录>/daily_stats.parquet            day, keyword, new_links, duplicates, crawl_seconds
+分片只追加不改写：删除链接时追加删除标记，读取时跳过被标记的 ID，
+compact() 把链接和出现记录重写为不含已删除行的单个分片并清掉删除标记。
+发现统计只有天数×关键词数行，整体放在内存里，落盘时整个文件重写。需要安装 pyarrow
+"""
+from datetime import datetime, timezone
+from pathlib import Path
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+from auto_collect.crawler.canonical import canonicalize_link
+from auto_collect.storage.queries import DEFAULT_ORDER_BY, DEFAULT_PAGE_SIZE, sort_keys
+from auto_collect.storage.repository import LinkRepository
+from auto_collect.storage.stats import STATS_FIELDS, daily_stats_rows, day_of, keyword_totals_rows
+from auto_collect.storage.status import STATUS_UNCHECKED
+
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+LINK_COLUMNS = ("id", "link", "source", "keyword", "created_at")
+SIGHTING_COLUMNS = ("link_id", "keyword", "source", "tweet_id", "seen_at")
+DELETED_COLUMNS = ("link_id",)
+PART_FOLDERS = ("links", "sightings", "deleted")
+PART_COLUMNS = {"links": LINK_COLUMNS, "sightings": SIGHTING_COLUMNS, "deleted": DELETED_COLUMNS}
+STATS_FILE = "daily_stats.parquet"
+
+
+def _part_schema(name: str):
+    """
+    分片的列类型：ID 为整数，其余为文本
+    不指定时整列为空的分片(如没有推文 ID 的出现记录)会被推断为 null 类型，与其他分片合并读取时报错
+    """
+    return pa.schema([(c, pa.int64() if c in ("id", "link_id") else pa.string()) for c in PART_COLUMNS[name]])
+
+
+class ParquetRepository(LinkRepository):
+    def __init__(self, directory: str, flush_rows: int = 10000, compression: str = "zstd"):
+        if pa is None:
+            raise RuntimeError("列式存储后端需要 pyarrow，请先执行 pip install pyarrow")
+        self.directory = Path(directory)
+        self.flush_rows = flush_rows
+        self.compression = compression
+        for name in PART_FOLDERS:
+            (self.directory / name).mkdir(parents=True, exist_ok=True)
+
+        deleted = self._dataset("deleted")
+        self._deleted = set(deleted.to_table().column("link_id").to_pylist()) if deleted is not None else set()
+        # 已有链接只加载 link/id 两列，用于去重和分配 ID；被删除的链接再次出现时按新链接处理
+        existing = self._dataset("links")
+        self._link_ids = {}
+        self._next_id = 1
+        if existing is not None:
+            table = existing.to_table(columns=["link", "id"])
+            ids = table.column("id").to_pylist()
+            self._next_id = max(ids, default=0) + 1
+            self._link_ids = {link: link_id for link, link_id in zip(table.column("link").to_pylist(), ids)
+                              if link_id not in self._deleted}
+        # 已记录过的 (链接 ID, 推文 ID)，重新打开后同一推文再次出现也不重复计数（与 SQLite 的唯一索引一致）
+        self._seen_tweets = self._load_seen_tweets()
+        self._pending_links = []
+        self._pending_sightings = []
+        self.daily_stats = self._load_stats()  # (day, keyword) -> [新链接数, 重复次数, 抓取秒数]
+        self._stats_dirty = False
+
+    def _dataset(self, name: str):
+        parts = sorted((self.directory / name).glob("part-*.parquet"))
+        if not parts:
+            return None
+        # 按固定的列类型读取，旧版本写出的 null 类型列也能与其他分片合并
+        return ds.dataset([str(p) for p in parts], schema=_part_schema(name), format="parquet")
+
+    def _write_part(self, name: str, rows: list):
+        folder = self.directory / name
+        parts = sorted(folder.glob("part-*.parquet"))
+        index = int(parts[-1].stem.split("-")[1]) + 1 if parts else 0
+        table = pa.table({c: [r[i] for r in rows] for i, c in enumerate(PART_COLUMNS[name])},
+                         schema=_part_schema(name))
+        pq.write_table(table, folder / f"part-{index:05d}.parquet", compression=self.compression)
+
+    def _remove_parts(self, name: str):
+        for part in (self.directory / name).glob("part-*.parquet"):
+            part.unlink()
+
+    def _load_seen_tweets(self) -> set:
+        sightings = self._dataset("sightings")
+        if sightings is None:
+            return set()
+        table = sightings.to_table(columns=["link_id", "tweet_id"], filter=pc.is_valid(pc.field("tweet_id")))
+        return {(link_id, tweet_id) for link_id, tweet_id in zip(table.column("link_id").to_pylist(),
+                                                                 table.column("tweet_id").to_pylist())
+                if link_id not in self._deleted}
+
+    def _load_stats(self) -> dict:
+        path = self.directory / STATS_FILE
+        if not path.exists():
+            return {}
+        rows = pq.read_table(path).to_pylist()
+        return {(r["day"], r["keyword"]): [r["new_links"], r["duplicates"], r["crawl_seconds"]] for r in rows}
+
+    def _daily(self, day, keyword) -> list:
+        self._stats_dirty = True
+        return self.daily_stats.setdefault((day, keyword or ""), [0, 0, 0.0])
+
+    def flush(self):
+        """把缓冲的行写成新的分片文件，发现统计有变化时重写统计文件"""
+        if self._pending_links:
+            self._write_part("links", self._pending_links)
+            self._pending_links = []
+        if self._pending_sightings:
+            self._write_part("sightings", self._pending_sightings)
+            self._pending_sightings = []
+        if self._stats_dirty:
+            rows = [(day, keyword, *values) for (day, keyword), values in self.daily_stats.items()]
+            table = pa.table({c: [r[i] for r in rows] for i, c in enumerate(STATS_FIELDS)})
+            pq.write_table(table, self.directory / STATS_FILE, compression=self.compression)
+            self._stats_dirty = False
+
+    def close(self):
+        self.flush()
+
+    def save_links(self, items: list) -> list:
+        now = datetime.now(timezone.utc).strftime(TIME_FORMAT)
+        new_links = []
+        for item in self.canonical_items(items):
+            link = item["link"]
+            seen_at = item.get("seen_at") or now
+            link_id = self._link_ids.get(link)
+            first = link_id is None
+            if first:
+                link_id = self._link_ids[link] = self._next_id
+                self._next_id += 1
+                self._pending_links.append((link_id, link, item.get("source", ""), item.get("keyword", ""), seen_at))
+                new_links.append(link)
+            tweet_id = item.get("tweet_id")
+            if tweet_id is not None:
+                tweet_id = str(tweet_id)
+                if (link_id, tweet_id) in self._seen_tweets:
+                    continue
+                self._seen_tweets.add((link_id, tweet_id))
+            self._pending_sightings.append((link_id, item.get("keyword", ""), item.get("source", ""),
+                                            tweet_id, seen_at))
+            self._daily(day_of(seen_at), item.get("keyword", ""))[0 if first else 1] += 1
+        if len(self._pending_links) + len(self._pending_sightings) >= self.flush_rows:
+            self.flush()
+        return new_links
+
+    def link_exists(self, link: str) -> bool:
+        return (canonicalize_link(link) or link) in self._link_ids
+
+    def to_table(self, name: str = "links"):
+        """读取整个数据集（含未落盘的缓冲行，不含已删除的链接及其出现记录）为 pyarrow.Table，用于分析"""
+        self.flush()
+        dataset = self._dataset(name)
+        if dataset is None:
+            return _part_schema(name).empty_table()
+        table = dataset.to_table()
+        if self._deleted:
+            id_column = "id" if name == "links" else "link_id"
+            deleted = pa.array(sorted(self._deleted), type=table.schema.field(id_column).type)
+            table = table.filter(pc.invert(pc.is_in(table.column(id_column), value_set=deleted)))
+        return table
+
+    def _filtered(self, keyword=None, link_contains=None, exact_keyword=False):
+        table = self.to_table("links")
+        mask = None
+        if exact_keyword and keyword:
+            mask = pc.equal(table.column("keyword"), keyword)
+            keyword = None
+        for column, value in (("keyword", keyword), ("link", link_contains)):
+            if value:
+                condition = pc.match_substring(table.column(column), value, ignore_case=True)
+                mask = condition if mask is None else pc.and_(mask, condition)
+        return table if mask is None else table.filter(pc.fill_null(mask, False))
+
+    def get_links_page(self, cursor=None, page_size=DEFAULT_PAGE_SIZE, keyword=None, link_contains=None,
+                       order_by=DEFAULT_ORDER_BY, descending=True):
+        keys = sort_keys(order_by)
+        table = self._filtered(keyword, link_contains)
+        if cursor is not None:
+            # 按排序键逐列比较：(a, b) < (x, y) 即 a < x 或 (a = x 且 b < y)
+            compare = pc.less if descending else pc.greater
+            after = None
+            for column, value in reversed(list(zip(keys, cursor))):
+                condition = compare(table.column(column), value)
+                if after is not None:
+                    condition = pc.or_(condition, pc.and_(pc.equal(table.column(column), value), after))
+                after = condition
+            table = table.filter(after)
+        order = "descending" if descending else "ascending"
+        table = table.sort_by([(k, order) for k in keys]).slice(0, page_size + 1)
+        rows = table.select(list(LINK_COLUMNS)).to_pylist()
+        if len(rows) <= page_size:
+            return rows, None
+        rows = rows[:page_size]
+        return rows, tuple(rows[-1][k] for k in keys)
+
+    def count_links(self, keyword=None, link_contains=None) -> int:
+        return self._filtered(keyword, link_contains).num_rows
+
+    def delete_links(self, ids) -> list:
+        """追加删除标记，返回实际删除的 ID"""
+        live = set(self._link_ids.values())
+        deleted = sorted({int(i) for i in ids} & live)
+        if not deleted:
+            return []
+        # 缓冲中的链接先落盘，删除标记只指向已写入分片的 ID
+        self.flush()
+        self._write_part("deleted", [(i,) for i in deleted])
+        doomed = set(deleted)
+        self._deleted |= doomed
+        self._link_ids = {link: i for link, i in self._link_ids.items() if i not in doomed}
+        self._seen_tweets = {k for k in self._seen_tweets if k[0] not in doomed}
+        return deleted
+
+    def delete_links_where(self, keyword=None, link_contains=None, status=None, exact_keyword=False) -> list:
+        if not (keyword or link_contains or status):
+            raise ValueError("批量删除至少需要一个条件")
+        # 列式后端不做链接检测，所有链接都处于 unchecked 状态
+        if status and status != STATUS_UNCHECKED:
+            return []
+        table = self._filtered(keyword, link_contains, exact_keyword)
+        return self.delete_links(table.column("id").to_pylist())
+
+    def clear_database(self) -> int:
+        """删除全部链接与出现记录（发现统计是历史数据，保留）"""
+        count = len(self._link_ids)
+        self._pending_links = []
+        self._pending_sightings = []
+        for name in PART_FOLDERS:
+            self._remove_parts(name)
+        self._link_ids = {}
+        self._deleted = set()
+        self._seen_tweets = set()
+        return count
+
+    def compact(self):
+        """把链接和出现记录各重写为一个不含已删除行的分片，并清掉删除标记"""
+        if not self._deleted:
+            return
+        for name in ("links", "sightings"):
+            table = self.to_table(name)
+            self._remove_parts(name)
+            if table.num_rows:
+                pq.write_table(table, self.directory / name / "part-00000.parquet", compression=self.compression)
+        self._remove_parts("deleted")
+        self._deleted = set()
+
+    def record_crawl_time(self, keyword: str, seconds: float):
+        self._daily(datetime.now(timezone.utc).strftime("%Y-%m-%d"), keyword)[2] += seconds
+        self.flush()
+
+    def get_daily_stats(self, keyword=None, since=None, until=None) -> list:
+        return daily_stats_rows(self.daily_stats, keyword, since, until)
+
+    def get_keyword_totals(self, since=None, until=None) -> list:
+        return keyword_totals_rows(self.daily_stats, since, until)
@@ -0,0 +1,102 @@
+# auto_collect/storage/queries.py
+"""
+链接列表的分页查询
+
+默认按 (created_at, id) 倒序做键集(keyset)分页：下一页从上一页最后一行之后继续，
+直接在 idx_created_at 上定位，不使用 OFFSET，翻到第几页耗时都一样。
+也可以按 id、link 正序或倒序分页（见 SORT_KEYS），同样只读一页。
+内存与耗时只取决于页大小，与表大小无关。
+"""
+from auto_collect.storage.fts import SELECT_COLUMNS, build_filter, has_fts
+
+DEFAULT_PAGE_SIZE = 200
+
+# 可排序的列 -> 键集分页的排序键；都走索引（idx_created_at、主键、link 唯一索引），翻到哪一页都只读一页。
+# source / keyword 没有可按文本排序的索引，每翻一页都要整表排序，不提供
+SORT_KEYS = {
+    "created_at": ("created_at", "id"),
+    "id": ("id",),
+    "link": ("link",),
+}
+DEFAULT_ORDER_BY = "created_at"
+# (id, link, source, keyword, created_at) 中各列的位置
+ROW_INDEX = {"id": 0, "link": 1, "source": 2, "keyword": 3, "created_at": 4}
+
+# 计数缓存: (连接id, 条件) -> (data_version, total_changes, count)
+_count_cache = {}
+
+
+def sort_keys(order_by: str) -> tuple:
+    """排序列对应的键集分页排序键，不支持的列抛 ValueError"""
+    try:
+        return SORT_KEYS[order_by]
+    except KeyError:
+        raise ValueError(f"不支持按 {order_by} 排序，可选: {', '.join(SORT_KEYS)}") from None
+
+
+def get_links_page(conn, cursor=None, page_size: int = DEFAULT_PAGE_SIZE, keyword=None, link_contains=None,
+                   order_by: str = DEFAULT_ORDER_BY, descending: bool = True):
+    """
+    取一页链接，默认按创建时间倒序
+    cursor: 上一页返回的游标，None 表示第一页
+    order_by / descending: 排序列（SORT_KEYS 之一）与方向，翻页时必须与取上一页时一致
+    返回 (rows, next_cursor)，rows 为 [(id, link, source, keyword, created_at)]，
+    没有更多数据时 next_cursor 为 None
+    """
+    keys = sort_keys(order_by)
+    from_sql, where, params = build_filter(keyword, link_contains, has_fts(conn))
+    key_columns = ", ".join(f"l.{k}" for k in keys)
+    if cursor is not None:
+        placeholders = ", ".join("?" for _ in keys)
+        where = where + [f"({key_columns}) {'<' if descending else '>'} ({placeholders})"]
+        params = params + list(cursor)
+    query = f"SELECT {SELECT_COLUMNS} FROM {from_sql}"
+    if where:
+        query += " WHERE " + " AND ".join(where)
+    # 多取一行用于判断是否还有下一页
+    direction = "DESC" if descending else "ASC"
+    query += " ORDER BY " + ", ".join(f"l.{k} {direction}" for k in keys) + " LIMIT ?"
+    rows = conn.execute(query, params + [page_size + 1]).fetchall()
+
+    if len(rows) <= page_size:
+        return rows, None
+    rows = rows[:page_size]
+    last = rows[-1]
+    return rows, tuple(last[ROW_INDEX[k]] for k in keys)
+
+
+def iter_links(conn, page_size: int = DEFAULT_PAGE_SIZE, keyword=None, link_contains=None):
+    """逐页遍历所有匹配的链接（导出等需要全量数据的场景）"""
+    cursor = None
+    while True:
+        rows, cursor = get_links_page(conn, cursor, page_size, keyword, link_contains)
+        yield from rows
+        if cursor is None:
+            return
+
+
+def count_links(conn, keyword=None, link_contains=None) -> int:
+    """
+    统计匹配的链接数
+    结果按条件缓存，只有数据库被修改后才重新计算：
+    data_version 反映其他连接的提交，total_changes 反映本连接的写入
+    """
+    version = (conn.execute("PRAGMA data_version").fetchone()[0], conn.total_changes)
+    key = (id(conn), keyword or None, link_contains or None)
+    cached = _count_cache.get(key)
+    if cached is not None and cached[:2] == version:
+        return cached[2]
+
+    from_sql, where, params = build_filter(keyword, link_contains, has_fts(conn))
+    query = f"SELECT COUNT(*) FROM {from_sql}"
+    if where:
+        query += " WHERE " + " AND ".join(where)
+    count = conn.execute(query, params).fetchone()[0]
+    _count_cache[key] = version + (count,)
+    return count
+
+
+def forget_counts(conn):
+    """关闭连接前清掉它的计数缓存，新连接复用同一个 id() 时不会读到旧结果"""
+    for key in [k for k in _count_cache if k[0] == id(conn)]:
+        del _count_cache[key]
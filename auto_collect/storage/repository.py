@@ -0,0 +1,139 @@
+# auto_collect/storage/repository.py
+"""
+链接存储接口
+
+爬虫、流式采集和 UI 都通过 LinkRepository 读写链接，具体存储由后端决定：
+    sqlite   SQLiteRepository   默认，调优过的 SQLite（WAL、FTS5、出现记录）
+    memory   MemoryRepository   纯内存，用于快速测试和基准测试
+    parquet  ParquetRepository  列式文件，用于离线分析（需要 pyarrow）
+链接在写入前统一规范化，各后端的去重语义一致。
+"""
+from auto_collect.crawler.canonical import canonicalize_link
+from auto_collect.storage.queries import DEFAULT_ORDER_BY, DEFAULT_PAGE_SIZE
+
+BACKENDS = ("sqlite", "memory", "parquet")
+
+ROW_FIELDS = ("id", "link", "source", "keyword", "created_at")
+
+
+def row_to_dict(row) -> dict:
+    """(id, link, source, keyword, created_at) 元组转为字典"""
+    return dict(zip(ROW_FIELDS, row))
+
+
+class LinkRepository:
+    """所有存储后端的公共接口"""
+
+    def save_links(self, items: list) -> list:
+        """
+        批量保存链接，每一项记为一次出现
+        items: [{'link': ..., 'source': ..., 'keyword': ..., 'tweet_id': ...}, ...]
+        返回本批次中新保存的链接列表
+        """
+        raise NotImplementedError
+
+    def save_link(self, link_info: dict, keyword: str) -> bool:
+        """保存单个链接，返回是否为新链接"""
+        return bool(self.save_links([dict(link_info, keyword=keyword)]))
+
+    def link_exists(self, link: str) -> bool:
+        raise NotImplementedError
+
+    def get_links_page(self, cursor=None, page_size=DEFAULT_PAGE_SIZE, keyword=None, link_contains=None,
+                       order_by=DEFAULT_ORDER_BY, descending=True):
+        """
+        取一页，默认按 (created_at, id) 倒序；order_by 可为 queries.SORT_KEYS 中的列
+        返回 (links, next_cursor)，links 为字典列表，next_cursor 为 None 表示没有更多数据
+        """
+        raise NotImplementedError
+
+    def iter_links(self, page_size=DEFAULT_PAGE_SIZE, keyword=None, link_contains=None):
+        """逐页遍历所有匹配的链接"""
+        cursor = None
+        while True:
+            links, cursor = self.get_links_page(cursor, page_size, keyword, link_contains)
+            yield from links
+            if cursor is None:
+                return
+
+    def count_links(self, keyword=None, link_contains=None) -> int:
+        raise NotImplementedError
+
+    def delete_links(self, ids) -> list:
+        """按 ID 列表批量删除（一个事务），返回实际删除的 ID"""
+        raise NotImplementedError
+
+    def delete_links_where(self, keyword=None, link_contains=None, status=None, exact_keyword=False) -> list:
+        """
+        按条件批量删除（一个事务），返回删除的 ID
+        keyword / link_contains 为子串匹配，exact_keyword 为 True 时关键词等值匹配；status 为检测状态
+        """
+        raise NotImplementedError
+
+    def delete_link(self, link_id: int) -> bool:
+        return bool(self.delete_links([link_id]))
+
+    def delete_links_by_keyword(self, keyword: str) -> int:
+        return len(self.delete_links_where(keyword=keyword, exact_keyword=True))
+
+    def delete_links_by_status(self, status: str) -> list:
+        """删除某一检测状态(alive/dead/error/unchecked)的链接，返回删除的 ID"""
+        return self.delete_links_where(status=status)
+
+    def clear_database(self) -> int:
+        raise NotImplementedError
+
+    def record_crawl_time(self, keyword: str, seconds: float):
+        """记入一次关键词抓取的耗时（秒），计入当天的发现统计"""
+        raise NotImplementedError
+
+    def get_daily_stats(self, keyword=None, since=None, until=None) -> list:
+        """
+        按关键词按天的发现统计，按日期倒序
+        since / until 为闭区间的 'YYYY-MM-DD'，每项为 {'day', 'keyword', 'new_links', 'duplicates', 'crawl_seconds'}
+        """
+        raise NotImplementedError
+
+    def get_keyword_totals(self, since=None, until=None) -> list:
+        """各关键词在日期范围内的合计与每分钟新链接数，按新链接数倒序"""
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    @staticmethod
+    def canonical_items(items: list) -> list:
+        """规范化待写入的链接，丢弃无法识别的"""
+        result = []
+        for item in items:
+            link = canonicalize_link(item['link'])
+            if link is None:
+                print(f"[DB] 无法识别的链接，已跳过: {item['link']}", flush=True)
+                continue
+            result.append(dict(item, link=link))
+        return result
+
+
+def open_repository(target: str = "telegram_links.db", backend: str = None) -> LinkRepository:
+    """
+    按后端名称打开存储，未指定时根据 target 推断：
+    ':memory:' 为内存后端，以 .parquet 结尾的目录为列式后端，其余为 SQLite 文件
+    """
+    if backend is None:
+        if target == ":memory:":
+            backend = "memory"
+        elif str(target).endswith(".parquet"):
+            backend = "parquet"
+        else:
+            backend = "sqlite"
+
+    if backend == "sqlite":
+        from auto_collect.storage.sqlite_repository import SQLiteRepository
+        return SQLiteRepository(target)
+    if backend == "memory":
+        from auto_collect.storage.memory_repository import MemoryRepository
+        return MemoryRepository()
+    if backend == "parquet":
+        from auto_collect.storage.parquet_repository import ParquetRepository
+        return ParquetRepository(target)
+    raise ValueError(f"未知的存储后端: {backend}")
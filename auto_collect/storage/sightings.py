@@ -0,0 +1,200 @@
+# auto_collect/storage/sightings.py
+"""
+链接出现记录(sightings)
+
+同一个链接往往在不同关键词、不同推文里反复出现。每次出现都追加一行到
+link_sightings（同一推文中的同一链接只记一次），并在同一事务内用批量
+ON CONFLICT DO UPDATE 维护聚合：
+    telegram_links      first_seen / last_seen / sighting_count / updated_at
+    link_keyword_stats  每个链接在每个关键词下的出现次数与首末时间
+    keyword_daily_stats 每个关键词每天的新链接数与重复次数(见 stats)
+排序和报表直接读聚合列，不需要重新扫描原始记录。
+写入直接写数据表(见 lookups)，source / keyword 经 LookupCache 换成查找表 ID。
+"""
+from datetime import datetime, timezone
+
+from auto_collect.storage.lookups import KEYWORD_STATS_TABLE, LINKS_TABLE, SIGHTINGS_TABLE, LookupCache
+from auto_collect.storage.stats import add_counts, day_of
+
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+INSERT_NEW_LINK_SQL = f'''
+    INSERT INTO {LINKS_TABLE} (link, source_id, keyword_id, first_seen, last_seen, sighting_count)
+    VALUES (?, ?, ?, ?, ?, 0)
+'''
+INSERT_UNSEEN_LINK_SQL = f'''
+    INSERT INTO {LINKS_TABLE} (link, source_id, keyword_id, first_seen, last_seen, sighting_count)
+    VALUES (?, ?, ?, ?, ?, 0)
+    ON CONFLICT(link) DO NOTHING
+'''
+LINK_ID_SQL = f"SELECT id FROM {LINKS_TABLE} WHERE link = ?"
+INSERT_SIGHTING_SQL = f'''
+    INSERT OR IGNORE INTO {SIGHTINGS_TABLE} (link_id, keyword_id, source_id, tweet_id, seen_at)
+    VALUES (?, ?, ?, ?, ?)
+'''
+UPDATE_LINK_AGGREGATE_SQL = f'''
+    UPDATE {LINKS_TABLE}
+    SET sighting_count = sighting_count + ?,
+        first_seen = MIN(COALESCE(first_seen, ?), ?),
+        last_seen = MAX(COALESCE(last_seen, ?), ?),
+        updated_at = CURRENT_TIMESTAMP
+    WHERE id = ?
+'''
+UPSERT_KEYWORD_STATS_SQL = f'''
+    INSERT INTO {KEYWORD_STATS_TABLE} (link_id, keyword_id, sighting_count, first_seen, last_seen)
+    VALUES (?, ?, ?, ?, ?)
+    ON CONFLICT(link_id, keyword_id) DO UPDATE SET
+        sighting_count = sighting_count + excluded.sighting_count,
+        first_seen = MIN(first_seen, excluded.first_seen),
+        last_seen = MAX(last_seen, excluded.last_seen)
+'''
+
+
+def utcnow_text() -> str:
+    return datetime.now(timezone.utc).strftime(TIME_FORMAT)
+
+
+def create_sightings_schema(conn):
+    """建表并用现有链接回填聚合列（迁移中调用）"""
+    for column in ("first_seen TIMESTAMP", "last_seen TIMESTAMP", "sighting_count INTEGER NOT NULL DEFAULT 0"):
+        conn.execute(f"ALTER TABLE telegram_links ADD COLUMN {column}")
+    conn.execute('''
+        UPDATE telegram_links
+        SET first_seen = created_at, last_seen = COALESCE(updated_at, created_at), sighting_count = 1
+    ''')
+
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS link_sightings (
+            id INTEGER PRIMARY KEY,
+            link_id INTEGER NOT NULL,
+            keyword TEXT,
+            source TEXT,
+            tweet_id TEXT,
+            seen_at TIMESTAMP NOT NULL
+        )
+    ''')
+    # 同一推文反复滚动出现时只记一次；没有推文 ID 的出现(主页、整页提取)不去重
+    conn.execute('''
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_sightings_link_tweet
+        ON link_sightings(link_id, tweet_id) WHERE tweet_id IS NOT NULL
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS link_keyword_stats (
+            link_id INTEGER NOT NULL,
+            keyword TEXT NOT NULL,
+            sighting_count INTEGER NOT NULL,
+            first_seen TIMESTAMP NOT NULL,
+            last_seen TIMESTAMP NOT NULL,
+            PRIMARY KEY (link_id, keyword)
+        ) WITHOUT ROWID
+    ''')
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_keyword_stats_keyword ON link_keyword_stats(keyword)")
+    conn.execute('''
+        INSERT OR IGNORE INTO link_keyword_stats (link_id, keyword, sighting_count, first_seen, last_seen)
+        SELECT id, keyword, 1, created_at, created_at FROM telegram_links
+        WHERE keyword IS NOT NULL AND keyword != ''
+    ''')
+    # 删除链接时一并清理它的出现记录
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS telegram_links_sightings_ad AFTER DELETE ON telegram_links BEGIN
+            DELETE FROM link_sightings WHERE link_id = old.id;
+            DELETE FROM link_keyword_stats WHERE link_id = old.id;
+        END
+    ''')
+
+
+def backfill_sightings(conn):
+    """
+    为没有任何出现记录的链接补一条（迁移中调用）
+    版本 5 把已有链接的 sighting_count 记为 1 却没有写出现记录，聚合列与原始记录对不上，
+    按原始记录重建聚合时这些链接会变成 0 次。补的记录没有推文 ID，时间取首次发现时间；
+    从其他库合并进来的链接计数沿用源库，补一条后仍可能多于本库的记录数
+    """
+    conn.execute(f'''
+        INSERT INTO {SIGHTINGS_TABLE} (link_id, keyword_id, source_id, tweet_id, seen_at)
+        SELECT l.id, l.keyword_id, l.source_id, NULL, COALESCE(l.first_seen, l.created_at, CURRENT_TIMESTAMP)
+        FROM {LINKS_TABLE} l
+        WHERE l.sighting_count > 0
+          AND NOT EXISTS (SELECT 1 FROM {SIGHTINGS_TABLE} s WHERE s.link_id = l.id)
+        ORDER BY l.id
+    ''')
+
+
+def record_sightings(conn, sightings: list, link_filter=None, lookups=None) -> list:
+    """
+    批量记录一批出现，调用方负责事务（在 transaction() 内调用）
+    sightings: [{'link': 规范化链接, 'keyword': ..., 'source': ..., 'tweet_id': ..., 'seen_at': ...}, ...]
+    tweet_id、seen_at 可省略，seen_at 默认当前 UTC 时间
+    link_filter: 已知链接过滤器(dedupe.LinkFilter)，过滤器判定为新的链接直接插入，不先查询
+    lookups: 跨批次复用的 LookupCache（写线程持有），不传时只在本批次内缓存
+    返回本批次中首次出现（新插入 telegram_links）的链接列表
+    """
+    if not sightings:
+        return []
+    now = utcnow_text()
+    if lookups is None:
+        lookups = LookupCache()
+
+    # 1. 解析链接 ID，不存在的先插入主表
+    link_ids = {}
+    new_links = []
+    for s in sightings:
+        link = s["link"]
+        if link in link_ids:
+            continue
+        seen_at = s.get("seen_at") or now
+        values = (link, lookups.source_id(conn, s.get("source", "")), lookups.keyword_id(conn, s.get("keyword", "")),
+                  seen_at, seen_at)
+        if link_filter is not None and not link_filter.might_contain(link):
+            # 过滤器没见过的一定不在本进程装载的数据里；其他进程刚写入的由 ON CONFLICT 兜底
+            cursor = conn.execute(INSERT_UNSEEN_LINK_SQL, values)
+            if cursor.rowcount:
+                link_ids[link] = cursor.lastrowid
+                new_links.append(link)
+                link_filter.add(link)
+                continue
+        row = conn.execute(LINK_ID_SQL, (link,)).fetchone()
+        if row is not None:
+            link_ids[link] = row[0]
+            continue
+        cursor = conn.execute(INSERT_NEW_LINK_SQL, values)
+        link_ids[link] = cursor.lastrowid
+        new_links.append(link)
+        if link_filter is not None:
+            link_filter.add(link)
+
+    # 2. 追加出现记录，被唯一索引忽略的重复出现不计入聚合
+    #    新链接的第一次出现记为当天的新链接，其余出现记为重复
+    per_link = {}
+    per_keyword = {}
+    per_day = {}
+    uncounted = {link_ids[link] for link in new_links}
+    for s in sightings:
+        link_id = link_ids[s["link"]]
+        keyword = s.get("keyword", "")
+        seen_at = s.get("seen_at") or now
+        cursor = conn.execute(INSERT_SIGHTING_SQL, (link_id, lookups.keyword_id(conn, keyword),
+                                                    lookups.source_id(conn, s.get("source", "")),
+                                                    s.get("tweet_id"), seen_at))
+        if cursor.rowcount == 0:
+            continue
+        counts = per_day.setdefault((day_of(seen_at), keyword), [0, 0])
+        if link_id in uncounted:
+            uncounted.discard(link_id)
+            counts[0] += 1
+        else:
+            counts[1] += 1
+        for key, bucket in ((link_id, per_link), ((link_id, keyword), per_keyword)):
+            count, first, last = bucket.get(key, (0, seen_at, seen_at))
+            bucket[key] = (count + 1, min(first, seen_at), max(last, seen_at))
+
+    # 3. 批量更新聚合
+    conn.executemany(UPDATE_LINK_AGGREGATE_SQL, [
+        (count, first, first, last, last, link_id) for link_id, (count, first, last) in per_link.items()
+    ])
+    conn.executemany(UPSERT_KEYWORD_STATS_SQL, [
+        (link_id, lookups.keyword_id(conn, keyword), count, first, last)
+        for (link_id, keyword), (count, first, last) in per_keyword.items() if keyword
+    ])
+    add_counts(conn, per_day)
+    return new_links
@@ -0,0 +1,244 @@
+# auto_collect/storage/snapshot.py
+"""
+UI 的只读快照
+
+爬虫写入时 UI 直接读主库，偶尔会在锁上等待。快照模式下 UI 的查询改读一份定期刷新的副本：
+    <主库名>_snapshot/a.db、b.db
+后台线程用 SQLite 在线备份 API 把主库整库复制到当前没人读的那一份，复制在主库上只是一个
+WAL 读事务，不阻塞爬虫写入，也不会被写入打断重来；复制完成后读取方在下一次查询时切换过去，
+旧的一份留给下一轮刷新。两份轮流使用，正在读的文件永远不会被覆盖。
+快照是独立的 DELETE 日志模式文件，UI 的查询与爬虫写入没有任何锁竞争，代价是数据最多落后一个刷新间隔。
+
+python auto_collect/storage/snapshot.py telegram_links.db snapshot.db   # 手动生成一次快照
+"""
+import argparse
+import sqlite3
+import sys
+import threading
+import time
+from pathlib import Path
+
+# 添加项目根目录到sys.path以确保可以导入（以脚本方式运行时）
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from auto_collect.storage.connection import connect
+from auto_collect.storage.queries import (DEFAULT_ORDER_BY, DEFAULT_PAGE_SIZE, count_links, forget_counts,
+                                          get_links_page)
+from auto_collect.storage.repository import LinkRepository, row_to_dict
+from auto_collect.storage.stats import get_daily_stats, get_keyword_totals
+
+DEFAULT_SNAPSHOT_INTERVAL = 30.0  # 秒
+SLOTS = ("a.db", "b.db")
+
+
+def snapshot_dir_for(db_path: str) -> Path:
+    path = Path(db_path)
+    return path.with_name(f"{path.stem}_snapshot")
+
+
+def take_snapshot(db_path: str, target) -> float:
+    """把主库整库复制到 target（覆盖），返回耗时秒数"""
+    started = time.time()
+    src = connect(db_path, readonly=True)
+    dst = sqlite3.connect(str(target), isolation_level=None)
+    try:
+        # 一步复制全部页面：整个过程只占一个读事务，期间其他连接的提交不会让备份重新开始
+        src.backup(dst)
+        # 主库是 WAL，副本改回 DELETE 日志，只读打开时不需要 -wal/-shm 文件
+        dst.execute("PRAGMA journal_mode = DELETE")
+    finally:
+        dst.close()
+        src.close()
+    return time.time() - started
+
+
+class SnapshotManager:
+    """
+    后台定期刷新 A/B 两份快照
+    刷新线程只写"当前没有被采用"的那一份；读取方通过 latest() 采用最新完成的一份
+    """
+
+    def __init__(self, db_path: str, interval: float = DEFAULT_SNAPSHOT_INTERVAL, snapshot_dir=None):
+        self.db_path = db_path
+        self.interval = interval
+        self.snapshot_dir = Path(snapshot_dir) if snapshot_dir else snapshot_dir_for(db_path)
+        self.generation = 0         # 已完成的快照数
+        self.refreshed_at = None    # 最新快照开始复制的时间
+        self.last_duration = None
+        self._lock = threading.Lock()
+        self._active = None         # 读取方正在使用的槽位
+        self._pending = None        # 已完成、尚未被采用的槽位
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self.snapshot_dir.mkdir(parents=True, exist_ok=True)
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name=f"SnapshotManager:{self.db_path}", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, remove_files: bool = True):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if remove_files:
+            for slot in SLOTS:
+                for suffix in ("", "-journal"):
+                    (self.snapshot_dir / f"{slot}{suffix}").unlink(missing_ok=True)
+            try:
+                self.snapshot_dir.rmdir()
+            except OSError:
+                pass
+
+    def request_refresh(self):
+        """尽快刷新一次（例如 UI 刚删除了链接），不等待完成"""
+        self._wake.set()
+
+    def refresh(self) -> int:
+        """同步生成一份新快照，返回它的代数"""
+        with self._lock:
+            target = SLOTS[1] if self._active == SLOTS[0] else SLOTS[0]
+            # 覆盖尚未被采用的旧快照没有关系，读取方只会采用完成后的那一份
+            if self._pending == target:
+                self._pending = None
+        started = time.time()
+        duration = take_snapshot(self.db_path, self.snapshot_dir / target)
+        with self._lock:
+            self._pending = target
+            self.generation += 1
+            self.refreshed_at = started
+            self.last_duration = duration
+            return self.generation
+
+    def latest(self):
+        """采用最新完成的快照，返回 (路径, 代数)；还没有快照时返回 (None, 0)"""
+        with self._lock:
+            if self._pending is not None:
+                self._active, self._pending = self._pending, None
+            if self._active is None:
+                return None, 0
+            return self.snapshot_dir / self._active, self.generation
+
+    def age(self):
+        """最新快照距今的秒数，还没有快照时为 None"""
+        return None if self.refreshed_at is None else time.time() - self.refreshed_at
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"[Snapshot] 刷新快照时出错: {e}", flush=True)
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+
+class SnapshotRepository(LinkRepository):
+    """
+    快照模式的存储：查询读快照，写入交给主库的 SQLiteRepository，写入后立即请求刷新
+    第一份快照完成前查询仍读主库；快照连接只在创建它的线程（UI 线程）里使用
+    """
+
+    def __init__(self, live, interval: float = DEFAULT_SNAPSHOT_INTERVAL, snapshot_dir=None):
+        self.live = live
+        self.db_path = live.db_path
+        self.snapshots = SnapshotManager(live.db_path, interval, snapshot_dir).start()
+        self._conn = None
+        self._generation = 0
+
+    @property
+    def interval(self) -> float:
+        return self.snapshots.interval
+
+    @interval.setter
+    def interval(self, seconds: float):
+        self.snapshots.interval = seconds
+        self.snapshots.request_refresh()
+
+    @property
+    def conn(self):
+        """当前采用的快照连接，还没有快照时为 None"""
+        path, generation = self.snapshots.latest()
+        if generation != self._generation:
+            # 先关掉旧连接，它所在的槽位随后会被下一轮刷新覆盖
+            self._close_conn()
+            self._conn = connect(str(path), readonly=True, check_same_thread=False)
+            self._generation = generation
+        return self._conn
+
+    def _close_conn(self):
+        if self._conn is not None:
+            forget_counts(self._conn)
+            self._conn.close()
+            self._conn = None
+
+    def _written(self, result):
+        self.snapshots.request_refresh()
+        return result
+
+    # ---- 读取：走快照 ----
+    def get_links_page(self, cursor=None, page_size=DEFAULT_PAGE_SIZE, keyword=None, link_contains=None,
+                       order_by=DEFAULT_ORDER_BY, descending=True):
+        conn = self.conn
+        if conn is None:
+            return self.live.get_links_page(cursor, page_size, keyword, link_contains, order_by, descending)
+        rows, next_cursor = get_links_page(conn, cursor, page_size, keyword, link_contains, order_by, descending)
+        return [row_to_dict(row) for row in rows], next_cursor
+
+    def count_links(self, keyword=None, link_contains=None) -> int:
+        conn = self.conn
+        if conn is None:
+            return self.live.count_links(keyword, link_contains)
+        return count_links(conn, keyword, link_contains)
+
+    def get_daily_stats(self, keyword=None, since=None, until=None) -> list:
+        conn = self.conn
+        if conn is None:
+            return self.live.get_daily_stats(keyword, since, until)
+        return get_daily_stats(conn, keyword, since, until)
+
+    def get_keyword_totals(self, since=None, until=None) -> list:
+        conn = self.conn
+        if conn is None:
+            return self.live.get_keyword_totals(since, until)
+        return get_keyword_totals(conn, since, until)
+
+    # ---- 写入与去重判断：走主库 ----
+    def link_exists(self, link: str) -> bool:
+        return self.live.link_exists(link)
+
+    def save_links(self, items: list) -> list:
+        return self._written(self.live.save_links(items))
+
+    def delete_links(self, ids) -> list:
+        return self._written(self.live.delete_links(ids))
+
+    def delete_links_where(self, keyword=None, link_contains=None, status=None, exact_keyword=False) -> list:
+        return self._written(self.live.delete_links_where(keyword, link_contains, status, exact_keyword))
+
+    def clear_database(self) -> int:
+        return self._written(self.live.clear_database())
+
+    def record_crawl_time(self, keyword: str, seconds: float):
+        return self._written(self.live.record_crawl_time(keyword, seconds))
+
+    def close(self):
+        """停止刷新并删除快照文件，主库的存储保持打开"""
+        self._close_conn()
+        self.snapshots.stop()
+
+
+# ---------------- CLI 调用 ----------------
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="用在线备份 API 生成数据库的只读快照")
+    parser.add_argument("db", nargs="?", default="telegram_links.db")
+    parser.add_argument("target", nargs="?", default="telegram_links_snapshot.db")
+    args = parser.parse_args()
+
+    seconds = take_snapshot(args.db, args.target)
+    print(f"[Snapshot] 已生成快照 {args.target}，耗时 {seconds:.2f} 秒", flush=True)
@@ -0,0 +1,112 @@
+# auto_collect/storage/sqlite_repository.py
+"""
+SQLite 后端：长连接 + WAL，查询走键集分页与 FTS5
+所有写操作交给本进程的单写线程组提交，调用方等待提交完成后返回
+"""
+from auto_collect.crawler.canonical import canonicalize_link
+from auto_collect.storage.connection import get_connection
+from auto_collect.storage.dedupe import get_link_filter
+from auto_collect.storage.lookups import LINKS_TABLE
+from auto_collect.storage.migrations import migrate
+from auto_collect.storage.mutations import delete_links_by_ids, delete_links_where
+from auto_collect.storage.queries import DEFAULT_ORDER_BY, DEFAULT_PAGE_SIZE, count_links, get_links_page
+from auto_collect.storage.repository import LinkRepository, row_to_dict
+from auto_collect.storage.stats import get_daily_stats, get_keyword_totals, record_crawl_seconds
+from auto_collect.storage.writer import get_writer
+
+# 热点语句，长连接上只编译一次
+LINK_EXISTS_SQL = "SELECT 1 FROM telegram_links WHERE link = ? LIMIT 1"
+
+
+class SQLiteRepository(LinkRepository):
+    def __init__(self, db_path: str = "telegram_links.db"):
+        self.db_path = db_path
+        self.init_database()
+
+    @property
+    def conn(self):
+        """当前线程的读连接"""
+        return get_connection(self.db_path)
+
+    @property
+    def writer(self):
+        return get_writer(self.db_path)
+
+    def _write(self, sql: str, params=()) -> int:
+        """通过写线程执行一条语句，返回影响的行数"""
+        return self.writer.execute(lambda conn: conn.execute(sql, params).rowcount).result()
+
+    def init_database(self):
+        """初始化数据库和表（按版本执行迁移）"""
+        migrate(self.conn)
+
+    def save_links(self, items: list) -> list:
+        sightings = self.canonical_items(items)
+        if not sightings:
+            return []
+        try:
+            return self.writer.submit_sightings(sightings).result()
+        except Exception as e:
+            print(f"[DB] 批量保存 {len(items)} 个链接时出错: {e}", flush=True)
+            return []
+
+    def link_exists(self, link: str) -> bool:
+        link = canonicalize_link(link) or link
+        conn = self.conn
+        link_filter = get_link_filter(self.db_path, conn)
+        # 过滤器判定不存在时，先补齐其他连接新写入的链接再确认一次，仍不存在就不用查询
+        if link_filter is not None and not link_filter.might_contain(link):
+            link_filter.catch_up(conn)
+            if not link_filter.might_contain(link):
+                return False
+        return conn.execute(LINK_EXISTS_SQL, (link,)).fetchone() is not None
+
+    def get_links_page(self, cursor=None, page_size=DEFAULT_PAGE_SIZE, keyword=None, link_contains=None,
+                       order_by=DEFAULT_ORDER_BY, descending=True):
+        rows, next_cursor = get_links_page(self.conn, cursor, page_size, keyword, link_contains, order_by, descending)
+        return [row_to_dict(row) for row in rows], next_cursor
+
+    def count_links(self, keyword=None, link_contains=None) -> int:
+        """匹配条件的总记录数（数据库未变化时直接返回缓存值）"""
+        return count_links(self.conn, keyword, link_contains)
+
+    def delete_links(self, ids) -> list:
+        """按 ID 列表删除，返回实际删除的 ID"""
+        ids = list(ids)
+        try:
+            return self.writer.execute(lambda conn: delete_links_by_ids(conn, ids), rows=len(ids)).result()
+        except Exception as e:
+            print(f"[DB] 批量删除链接时出错: {e}", flush=True)
+            return []
+
+    def delete_links_where(self, keyword=None, link_contains=None, status=None, exact_keyword=False) -> list:
+        """按条件删除，返回删除的 ID"""
+        try:
+            return self.writer.execute(
+                lambda conn: delete_links_where(conn, keyword, link_contains, status, exact_keyword)).result()
+        except ValueError:
+            # 没有任何条件属于调用错误，不能当作"删除了 0 条"吞掉
+            raise
+        except Exception as e:
+            print(f"[DB] 按条件删除链接时出错: {e}", flush=True)
+            return []
+
+    def clear_database(self) -> int:
+        """清空数据库"""
+        try:
+            return self._write(f"DELETE FROM {LINKS_TABLE}")
+        except Exception as e:
+            print(f"[DB] 清空数据库时出错: {e}", flush=True)
+            return 0
+
+    def record_crawl_time(self, keyword: str, seconds: float):
+        try:
+            self.writer.execute(lambda conn: record_crawl_seconds(conn, keyword, seconds)).result()
+        except Exception as e:
+            print(f"[DB] 记录抓取耗时时出错: {e}", flush=True)
+
+    def get_daily_stats(self, keyword=None, since=None, until=None) -> list:
+        return get_daily_stats(self.conn, keyword, since, until)
+
+    def get_keyword_totals(self, since=None, until=None) -> list:
+        return get_keyword_totals(self.conn, since, until)
@@ -0,0 +1,183 @@
+# auto_collect/storage/stats.py
+"""
+按关键词、按天的发现统计
+
+keyword_daily_stats 每个 (日期, 关键词) 一行：
+    new_links      当天首次发现的链接数
+    duplicates     当天重复出现（链接已存在）的次数
+    crawl_seconds  当天抓取该关键词花费的秒数
+写入出现记录时在同一事务内累加(record_sightings)，抓取结束时记入耗时，
+报表和 UI 只读这张表，代价与天数×关键词数成正比，与链接总数无关。
+统计是历史发现量，删除或归档链接不会回减；日期为 UTC 日期。
+"""
+from datetime import datetime, timezone
+
+STATS_TABLE = "keyword_daily_stats"
+
+STATS_FIELDS = ("day", "keyword", "new_links", "duplicates", "crawl_seconds")
+
+UPSERT_COUNTS_SQL = f'''
+    INSERT INTO {STATS_TABLE} (day, keyword, new_links, duplicates)
+    VALUES (?, ?, ?, ?)
+    ON CONFLICT(day, keyword) DO UPDATE SET
+        new_links = new_links + excluded.new_links,
+        duplicates = duplicates + excluded.duplicates
+'''
+UPSERT_CRAWL_SQL = f'''
+    INSERT INTO {STATS_TABLE} (day, keyword, crawl_seconds)
+    VALUES (?, ?, ?)
+    ON CONFLICT(day, keyword) DO UPDATE SET crawl_seconds = crawl_seconds + excluded.crawl_seconds
+'''
+
+
+def create_stats_schema(conn):
+    """建表并用现有链接、出现记录和抓取记录回填（迁移中调用）"""
+    conn.execute(f'''
+        CREATE TABLE IF NOT EXISTS {STATS_TABLE} (
+            day TEXT NOT NULL,
+            keyword TEXT NOT NULL,
+            new_links INTEGER NOT NULL DEFAULT 0,
+            duplicates INTEGER NOT NULL DEFAULT 0,
+            crawl_seconds REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (day, keyword)
+        ) WITHOUT ROWID
+    ''')
+    # 主键按日期范围取所有关键词；单个关键词的走势走这个索引
+    conn.execute(f"CREATE INDEX IF NOT EXISTS idx_daily_stats_keyword ON {STATS_TABLE}(keyword, day)")
+
+    # 新链接按首次发现日期计；出现记录是版本 5 才开始记的，重复次数 = 当天出现次数 - 当天新链接数
+    conn.execute(f'''
+        INSERT INTO {STATS_TABLE} (day, keyword, new_links, duplicates)
+        SELECT day, keyword, SUM(new_links), MAX(SUM(sightings) - SUM(new_links), 0)
+        FROM (
+            SELECT date(COALESCE(first_seen, created_at)) AS day, COALESCE(keyword, '') AS keyword,
+                   1 AS new_links, 0 AS sightings
+            FROM telegram_links
+            UNION ALL
+            SELECT date(seen_at), COALESCE(keyword, ''), 0, 1 FROM link_sightings
+        )
+        WHERE day IS NOT NULL
+        GROUP BY day, keyword
+    ''')
+    has_runs = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'keyword_runs'").fetchone()
+    if has_runs:
+        conn.execute(f'''
+            INSERT INTO {STATS_TABLE} (day, keyword, crawl_seconds)
+            SELECT date(started_at), keyword, SUM(crawl_seconds) FROM keyword_runs
+            WHERE started_at IS NOT NULL
+            GROUP BY date(started_at), keyword
+            ON CONFLICT(day, keyword) DO UPDATE SET crawl_seconds = crawl_seconds + excluded.crawl_seconds
+        ''')
+
+
+def day_of(timestamp: str) -> str:
+    """'YYYY-MM-DD HH:MM:SS' 形式的时间取日期部分"""
+    return timestamp[:10]
+
+
+def add_counts(conn, counts: dict):
+    """
+    累加一批计数，调用方负责事务（与写入链接的是同一个事务）
+    counts: {(day, keyword): [新链接数, 重复次数]}
+    """
+    conn.executemany(UPSERT_COUNTS_SQL, [
+        (day, keyword or "", new, duplicates) for (day, keyword), (new, duplicates) in counts.items()
+    ])
+
+
+def record_crawl_seconds(conn, keyword: str, seconds: float, day: str = None):
+    """记入一次抓取的耗时，day 默认当前 UTC 日期"""
+    if day is None:
+        day = datetime.now(timezone.utc).strftime("%Y-%m-%d")
+    conn.execute(UPSERT_CRAWL_SQL, (day, keyword or "", seconds))
+
+
+def links_per_minute(new_links: int, crawl_seconds: float):
+    """每分钟新链接数，没有抓取耗时记录时为 None"""
+    return round(new_links * 60 / crawl_seconds, 4) if crawl_seconds else None
+
+
+def _range_filter(since, until, keyword=None) -> tuple:
+    conditions, params = [], []
+    if keyword is not None:
+        conditions.append("keyword = ?")
+        params.append(keyword)
+    if since:
+        conditions.append("day >= ?")
+        params.append(since)
+    if until:
+        conditions.append("day <= ?")
+        params.append(until)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    return where, params
+
+
+def get_daily_stats(conn, keyword=None, since=None, until=None) -> list:
+    """
+    逐日统计，按日期倒序；keyword 为 None 时返回所有关键词
+    since / until 为闭区间的 'YYYY-MM-DD'，返回字典列表（字段见 STATS_FIELDS）
+    """
+    where, params = _range_filter(since, until, keyword)
+    rows = conn.execute(f'''
+        SELECT day, keyword, new_links, duplicates, crawl_seconds FROM {STATS_TABLE}
+        {where}
+        ORDER BY day DESC, keyword
+    ''', params).fetchall()
+    return [dict(zip(STATS_FIELDS, row)) for row in rows]
+
+
+def get_keyword_totals(conn, since=None, until=None) -> list:
+    """
+    各关键词在日期范围内的合计，按新链接数倒序
+    返回 [{'keyword', 'days', 'new_links', 'duplicates', 'crawl_seconds', 'links_per_minute'}]
+    days 为有新链接的天数
+    """
+    where, params = _range_filter(since, until)
+    rows = conn.execute(f'''
+        SELECT keyword, SUM(new_links > 0), SUM(new_links), SUM(duplicates), SUM(crawl_seconds)
+        FROM {STATS_TABLE}
+        {where}
+        GROUP BY keyword
+        ORDER BY SUM(new_links) DESC, keyword
+    ''', params).fetchall()
+    return [totals_row(*row) for row in rows]
+
+
+def _in_range(daily: dict, since, until):
+    for (day, keyword), values in daily.items():
+        if (since and day < since) or (until and day > until):
+            continue
+        yield day, keyword, values
+
+
+def daily_stats_rows(daily: dict, keyword=None, since=None, until=None) -> list:
+    """
+    不落在 SQLite 里的后端(内存、列式)用的 get_daily_stats
+    daily: {(day, keyword): [新链接数, 重复次数, 抓取秒数]}，排序与返回格式同 get_daily_stats
+    """
+    rows = [(day, kw, *values) for day, kw, values in _in_range(daily, since, until)
+            if keyword is None or kw == keyword]
+    rows.sort(key=lambda r: r[1])
+    rows.sort(key=lambda r: r[0], reverse=True)
+    return [dict(zip(STATS_FIELDS, row)) for row in rows]
+
+
+def keyword_totals_rows(daily: dict, since=None, until=None) -> list:
+    """daily 格式同 daily_stats_rows，排序与返回格式同 get_keyword_totals"""
+    totals = {}
+    for _, keyword, (new, duplicates, seconds) in _in_range(daily, since, until):
+        t = totals.setdefault(keyword, [0, 0, 0, 0.0])
+        t[0] += 1 if new else 0
+        t[1] += new
+        t[2] += duplicates
+        t[3] += seconds
+    rows = [totals_row(keyword, *t) for keyword, t in totals.items()]
+    rows.sort(key=lambda r: r["keyword"])
+    rows.sort(key=lambda r: r["new_links"], reverse=True)
+    return rows
+
+
+def totals_row(keyword, days, new_links, duplicates, crawl_seconds) -> dict:
+    return {"keyword": keyword, "days": days, "new_links": new_links, "duplicates": duplicates,
+            "crawl_seconds": crawl_seconds, "links_per_minute": links_per_minute(new_links, crawl_seconds)}
@@ -0,0 +1,32 @@
+# auto_collect/storage/status.py
+"""
+链接检测状态表 link_status（telegram_links 的附表）
+
+由 crawler/link_validator.py 写入，导出、批量删除等按检测状态过滤时读取。
+"""
+STATUS_TABLE = "link_status"
+
+STATUS_ALIVE = "alive"
+STATUS_DEAD = "dead"
+STATUS_ERROR = "error"
+# 过滤条件用的伪状态：link_status 中没有记录的链接
+STATUS_UNCHECKED = "unchecked"
+
+
+def create_status_schema(conn):
+    """建立检测状态表（迁移中调用）"""
+    conn.execute(f'''
+        CREATE TABLE IF NOT EXISTS {STATUS_TABLE} (
+            link_id INTEGER PRIMARY KEY,
+            status TEXT NOT NULL,
+            http_status INTEGER,
+            title TEXT,
+            description TEXT,
+            members INTEGER,
+            kind TEXT,
+            fail_count INTEGER DEFAULT 0,
+            checked_at TIMESTAMP,
+            next_check_at TIMESTAMP
+        )
+    ''')
+    conn.execute(f"CREATE INDEX IF NOT EXISTS idx_link_status_next_check ON {STATUS_TABLE}(next_check_at)")
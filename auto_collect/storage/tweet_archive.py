@@ -0,0 +1,210 @@
+# auto_collect/storage/tweet_archive.py
+"""
+原始推文归档与离线重新提取
+
+抓取时可选地把看到的推文原文（ID、作者、HTML/正文、发布时间）追加到归档目录，
+按块写成 gzip 压缩的 JSONL 文件：
+    <归档目录>/<YYYY-MM>/<时间>-<进程号>-<序号>.jsonl.gz
+每个块先写临时文件再改名，抓取进程中途退出不会留下半个文件。
+提取规则升级后（新域名、t.co 展开等），用 reextract 多进程并行重新扫描归档，
+重新提取的链接经仓库 save_links 写入：
+同一 (链接, 推文ID) 的出现已有唯一索引，重复扫描不会让计数膨胀，只补上新提取到的链接。
+
+python auto_collect/storage/tweet_archive.py tweet_archive --db telegram_links.db --workers 8
+"""
+import argparse
+import gzip
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timezone
+from pathlib import Path
+
+# 添加项目根目录到sys.path以确保可以导入（以脚本方式运行时）
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from auto_collect.crawler.canonical import extract_tg_links
+
+DEFAULT_ARCHIVE_DIR = "tweet_archive"
+CHUNK_SUFFIX = ".jsonl.gz"
+DEFAULT_CHUNK_TWEETS = 2000
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+SAVE_BATCH = 1000
+
+
+class TweetArchive:
+    """
+    推文归档写入器，append 只放进缓冲区，攒够 chunk_tweets 条或 flush/close 时写出一个块
+    同一进程内按推文 ID 去重（滚动时同一推文会反复出现）；没有推文 ID 的不归档，
+    否则重新提取时无法与已有的出现记录对应，会重复计数
+    """
+
+    def __init__(self, archive_dir: str = DEFAULT_ARCHIVE_DIR, chunk_tweets: int = DEFAULT_CHUNK_TWEETS):
+        self.archive_dir = Path(archive_dir)
+        self.chunk_tweets = chunk_tweets
+        self._pending = []
+        self._seen_ids = set()
+        self._seq = 0
+        self.tweets_written = 0
+        self.chunks_written = 0
+
+    def append(self, tweet_id, content: str, author=None, created_at=None, keyword=None, source=None,
+               content_type="html", urls=None) -> bool:
+        """记录一条推文，返回是否为新推文"""
+        if not tweet_id or not content:
+            return False
+        tweet_id = str(tweet_id)
+        if tweet_id in self._seen_ids:
+            return False
+        self._seen_ids.add(tweet_id)
+        record = {
+            "id": tweet_id,
+            "author": author,
+            "created_at": created_at,
+            "captured_at": datetime.now(timezone.utc).strftime(TIME_FORMAT),
+            "keyword": keyword,
+            "source": source,
+            "content_type": content_type,
+            "content": content,
+        }
+        if urls:
+            record["urls"] = list(urls)
+        self._pending.append(record)
+        if len(self._pending) >= self.chunk_tweets:
+            self.flush()
+        return True
+
+    def flush(self):
+        """把缓冲区写成一个压缩块"""
+        if not self._pending:
+            return None
+        records, self._pending = self._pending, []
+        now = datetime.now()
+        month_dir = self.archive_dir / now.strftime("%Y-%m")
+        month_dir.mkdir(parents=True, exist_ok=True)
+        self._seq += 1
+        path = month_dir / f"{now.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{self._seq:04d}{CHUNK_SUFFIX}"
+        tmp = path.with_name(path.name + ".tmp")
+        with gzip.open(tmp, "wt", encoding="utf-8") as f:
+            f.write("".join(json.dumps(r, ensure_ascii=False) + "\n" for r in records))
+        os.replace(tmp, path)
+        self.tweets_written += len(records)
+        self.chunks_written += 1
+        print(f"[TweetArchive] 归档 {len(records)} 条推文到 {path}", flush=True)
+        return path
+
+    def close(self):
+        self.flush()
+
+
+def chunk_files(archive_dir: str, months=None) -> list:
+    """列出归档块，months 为 ['2024-05', ...] 时只列出这些月份"""
+    root = Path(archive_dir)
+    if not root.is_dir():
+        return []
+    files = []
+    for month_dir in sorted(p for p in root.iterdir() if p.is_dir()):
+        if months and month_dir.name not in months:
+            continue
+        files.extend(sorted(month_dir.glob("*" + CHUNK_SUFFIX)))
+    return files
+
+
+def iter_chunk(path):
+    """逐条读取一个归档块，损坏的行跳过"""
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                continue
+
+
+def iter_tweets(archive_dir: str, months=None):
+    for path in chunk_files(archive_dir, months):
+        yield from iter_chunk(path)
+
+
+def extract_record(record: dict) -> list:
+    """用当前的提取规则从一条归档推文中提取出现记录"""
+    text = record.get("content") or ""
+    urls = record.get("urls")
+    if urls:
+        text += " " + " ".join(u for u in urls if u)
+    tweet_id = record.get("id")
+    source = record.get("source") or f"https://x.com/i/web/status/{tweet_id}"
+    return [{"link": link, "source": source, "keyword": record.get("keyword") or "", "tweet_id": tweet_id,
+             "seen_at": record.get("captured_at")}
+            for link in extract_tg_links(text)]
+
+
+def _extract_chunk(path) -> tuple:
+    """子进程中执行：返回 (推文数, 出现记录列表)"""
+    tweets = 0
+    sightings = []
+    for record in iter_chunk(path):
+        tweets += 1
+        sightings.extend(extract_record(record))
+    return tweets, sightings
+
+
+def reextract(archive_dir: str, db_path: str = "telegram_links.db", workers: int = None, months=None,
+              dry_run: bool = False) -> dict:
+    """
+    用多进程并行重新扫描归档，把提取到的链接写入数据库
+    子进程只负责解压和提取，写入在主进程经仓库(单写线程)完成
+    dry_run 为 True 时只统计不写入
+    返回 {'chunks', 'tweets', 'sightings', 'new_links'}
+    """
+    from auto_collect.storage import open_repository
+
+    files = chunk_files(archive_dir, months)
+    summary = {"chunks": len(files), "tweets": 0, "sightings": 0, "new_links": 0}
+    if not files:
+        print(f"[TweetArchive] {archive_dir} 中没有归档块", flush=True)
+        return summary
+
+    repo = None if dry_run else open_repository(db_path)
+    workers = workers or os.cpu_count() or 1
+    print(f"[TweetArchive] 开始重新提取: {len(files)} 个块，{workers} 个进程", flush=True)
+    pending = []
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_extract_chunk, path) for path in files]
+            for done, future in enumerate(as_completed(futures), 1):
+                tweets, sightings = future.result()
+                summary["tweets"] += tweets
+                summary["sightings"] += len(sightings)
+                if repo is not None:
+                    pending.extend(sightings)
+                    while len(pending) >= SAVE_BATCH:
+                        batch, pending = pending[:SAVE_BATCH], pending[SAVE_BATCH:]
+                        summary["new_links"] += len(repo.save_links(batch))
+                if done % 50 == 0:
+                    print(f"[TweetArchive] 已处理 {done}/{len(files)} 个块", flush=True)
+        if repo is not None and pending:
+            summary["new_links"] += len(repo.save_links(pending))
+    finally:
+        if repo is not None:
+            repo.close()
+    return summary
+
+
+# ---------------- CLI 调用 ----------------
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="用当前的提取规则重新扫描推文归档")
+    parser.add_argument("archive_dir", nargs="?", default=DEFAULT_ARCHIVE_DIR)
+    parser.add_argument("--db", default="telegram_links.db")
+    parser.add_argument("--workers", type=int, default=None, help="进程数，默认为 CPU 核数")
+    parser.add_argument("--month", action="append", help="只扫描指定月份(YYYY-MM)，可重复")
+    parser.add_argument("--dry-run", action="store_true", help="只统计能提取到的链接，不写入数据库")
+    args = parser.parse_args()
+
+    started = time.time()
+    summary = reextract(args.archive_dir, args.db, args.workers, args.month, args.dry_run)
+    elapsed = max(time.time() - started, 1e-6)
+    print(f"[TweetArchive] 重新提取完成: {summary['chunks']} 个块，推文 {summary['tweets']} 条，"
+          f"链接出现 {summary['sightings']} 次，新链接 {summary['new_links']} 个，"
+          f"耗时 {elapsed:.1f} 秒（{summary['tweets'] / elapsed:,.0f} 条/秒）", flush=True)
@@ -0,0 +1,309 @@
+# auto_collect/storage/writer.py
+"""
+单写线程
+
+进程内所有写操作都交给一个写线程，由它持有唯一的写连接：
+生产者（抓取循环、链接检测、导入）把写请求放入有界队列，队列满时阻塞，形成背压；
+写线程把队列中的请求攒成一批，达到批大小、延迟预算用完或队列空闲时在一个事务内提交（组提交），
+每个请求在事务内有自己的 SAVEPOINT，单个请求出错只回滚它自己。
+每个请求返回一个 Future，提交完成后才会得到结果。
+需要在事务之外执行的写操作（如要 ATTACH 源库的合并）用 run_exclusive 交给同一个写线程，
+在两批之间单独执行，结束后补齐写线程的已知链接过滤器并清空查找表缓存。
+"""
+import atexit
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from auto_collect.storage.connection import close_connection, get_connection, transaction
+from auto_collect.storage.dedupe import get_link_filter
+from auto_collect.storage.lookups import LookupCache
+from auto_collect.storage.sightings import record_sightings
+
+DEFAULT_QUEUE_SIZE = 1000
+DEFAULT_BATCH_ROWS = 500
+DEFAULT_MAX_LATENCY = 0.05   # 秒，一批从第一条请求开始最多攒这么久
+DEFAULT_IDLE_GAP = 0.0       # 秒，队列空时为等待后续请求最多停留多久，0 表示立即提交
+
+_STOP = object()
+
+
+class WriteRequest:
+    __slots__ = ("fn", "rows", "future", "exclusive")
+
+    def __init__(self, fn, rows, exclusive=False):
+        self.fn = fn
+        self.rows = rows
+        self.future = Future()
+        # True 时不并入批次、不包在事务里，由 fn 自己管理事务
+        self.exclusive = exclusive
+
+
+class LinkWriter:
+    def __init__(self, db_path: str, queue_size: int = DEFAULT_QUEUE_SIZE, batch_rows: int = DEFAULT_BATCH_ROWS,
+                 max_latency: float = DEFAULT_MAX_LATENCY, idle_gap: float = DEFAULT_IDLE_GAP,
+                 use_filter: bool = True):
+        self.db_path = db_path
+        # 已知链接过滤器，第一次提交出现记录时才在写线程内装载；
+        # 只做删除、检测结果、空间回收等写入的写线程不会为它扫描整张链接表
+        self.use_filter = use_filter
+        self.link_filter = None
+        self._filter_wanted = False
+        self._filter_loaded = False
+        # source / keyword -> 查找表 ID，只在写线程内使用
+        self.lookups = LookupCache()
+        self.batch_rows = batch_rows
+        self.max_latency = max_latency
+        self.idle_gap = idle_gap
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._held = None  # 攒批时遇到的独占请求，留到这一批提交之后执行
+        self._thread = None
+        self._stopped = False  # stop() 之后不再接受写请求，也不会重新启动
+        self._lock = threading.Lock()
+        # 统计
+        self.commits = 0
+        self.rows_committed = 0
+        self.requests_failed = 0
+        self.commit_seconds = 0.0
+        self.last_commit_ms = 0.0
+        self.max_commit_ms = 0.0
+
+    # ---------------- 生产者接口 ----------------
+    def start(self):
+        with self._lock:
+            self._start_locked()
+        return self
+
+    def _start_locked(self):
+        if self._stopped:
+            raise RuntimeError(f"写线程已停止: {self.db_path}")
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name=f"LinkWriter:{self.db_path}", daemon=True)
+            self._thread.start()
+
+    def execute(self, fn, rows: int = 1, timeout=None) -> Future:
+        """
+        提交一个写操作 fn(conn)，在写线程的事务内执行
+        队列已满时阻塞（最多 timeout 秒，超时抛出 queue.Full）；写线程已停止时抛出 RuntimeError
+        返回 Future，结果为 fn 的返回值
+        """
+        return self._submit(WriteRequest(fn, rows), timeout)
+
+    def run_exclusive(self, fn, timeout=None) -> Future:
+        """
+        在写线程上、任何事务之外执行 fn(conn)，此前排队的写请求先提交
+        用于 ATTACH 等不能在事务内执行的批量写入；fn 自己负责事务
+        """
+        return self._submit(WriteRequest(fn, 0, exclusive=True), timeout)
+
+    def submit_sightings(self, sightings: list, timeout=None) -> Future:
+        """提交一批已规范化的出现记录，Future 结果为新链接列表"""
+        # 先于入队设置，写线程取到这个请求时一定能看到
+        self._filter_wanted = True
+        return self.execute(lambda conn: record_sightings(conn, sightings, self.link_filter, self.lookups),
+                            rows=len(sightings), timeout=timeout)
+
+    def _submit(self, request, timeout):
+        # 入队与 stop() 的停止信号互斥：请求要么排在停止信号之前被处理，要么直接被拒绝
+        with self._lock:
+            self._start_locked()
+            self._queue.put(request, timeout=timeout)
+        return request.future
+
+    def stop(self, timeout=None):
+        """处理完队列中剩余的请求后停止写线程；之后提交的写请求抛出 RuntimeError"""
+        with self._lock:
+            self._stopped = True
+            thread, self._thread = self._thread, None
+        if thread is None:
+            return
+        self._queue.put(_STOP)
+        thread.join(timeout)
+        if self.link_filter is not None:
+            self.link_filter.save()
+        if self.commits:
+            m = self.metrics()
+            print(f"[Writer] 共提交 {m['commits']} 次，写入 {m['rows_committed']} 行，"
+                  f"平均每次 {m['rows_per_commit']:.1f} 行，平均耗时 {m['avg_commit_ms']:.1f} ms", flush=True)
+
+    def metrics(self) -> dict:
+        """队列深度、提交耗时与每次提交行数"""
+        return {
+            "queue_depth": self._queue.qsize(),
+            "commits": self.commits,
+            "rows_committed": self.rows_committed,
+            "requests_failed": self.requests_failed,
+            "rows_per_commit": self.rows_committed / self.commits if self.commits else 0.0,
+            "avg_commit_ms": self.commit_seconds * 1000 / self.commits if self.commits else 0.0,
+            "last_commit_ms": self.last_commit_ms,
+            "max_commit_ms": self.max_commit_ms,
+        }
+
+    # ---------------- 写线程 ----------------
+    def _collect_batch(self, first):
+        """
+        以 first 为首攒一批请求，返回 (批次, 是否收到停止信号)
+        队列中已有的请求一直攒到批大小或延迟预算用完；队列空了就提交（可用 idle_gap 稍作停留），
+        提交期间新到的请求自然组成下一批，等待结果的生产者不会白等整个延迟预算
+        """
+        batch = [first]
+        rows = first.rows
+        deadline = time.monotonic() + self.max_latency
+        while rows < self.batch_rows:
+            remaining = deadline - time.monotonic()
+            try:
+                request = self._queue.get_nowait()
+            except queue.Empty:
+                if remaining <= 0 or self.idle_gap <= 0:
+                    break
+                try:
+                    request = self._queue.get(timeout=min(self.idle_gap, remaining))
+                except queue.Empty:
+                    break
+            if request is _STOP:
+                return batch, True
+            if request.exclusive:
+                self._held = request
+                break
+            batch.append(request)
+            rows += request.rows
+        return batch, False
+
+    def _commit(self, conn, batch):
+        started = time.perf_counter()
+        results = []
+        rows = 0
+        try:
+            with transaction(conn):
+                for request in batch:
+                    conn.execute("SAVEPOINT write_request")
+                    try:
+                        result = request.fn(conn)
+                    except Exception as e:
+                        conn.execute("ROLLBACK TO write_request")
+                        conn.execute("RELEASE write_request")
+                        # 回滚可能撤销了刚插入的查找表行
+                        self.lookups.clear()
+                        results.append((request, None, e))
+                        continue
+                    conn.execute("RELEASE write_request")
+                    results.append((request, result, None))
+                    rows += request.rows
+        except Exception as e:
+            # 提交本身失败（如磁盘已满），整批失败
+            self.lookups.clear()
+            for request in batch:
+                request.future.set_exception(e)
+            self.requests_failed += len(batch)
+            print(f"[Writer] 提交 {len(batch)} 个写请求失败: {e}", flush=True)
+            return
+
+        elapsed = time.perf_counter() - started
+        self.commits += 1
+        self.rows_committed += rows
+        self.commit_seconds += elapsed
+        self.last_commit_ms = elapsed * 1000
+        self.max_commit_ms = max(self.max_commit_ms, self.last_commit_ms)
+        # 提交完成后才通知生产者
+        for request, result, error in results:
+            if error is None:
+                request.future.set_result(result)
+            else:
+                self.requests_failed += 1
+                request.future.set_exception(error)
+
+    def _run_exclusive(self, conn, request):
+        try:
+            result = request.fn(conn)
+        except Exception as e:
+            self.requests_failed += 1
+            request.future.set_exception(e)
+            return
+        finally:
+            # fn 可能在自己的事务里插入或回滚了查找表行，缓存一律作废
+            self.lookups.clear()
+        if self.link_filter is not None:
+            # fn 插入的链接没有经过过滤器，按水位补齐，否则之后会被当成新链接直接插入
+            self.link_filter.catch_up(conn)
+        request.future.set_result(result)
+
+    def _next_request(self, block=True):
+        if self._held is not None:
+            request, self._held = self._held, None
+            return request
+        return self._queue.get() if block else self._queue.get_nowait()
+
+    def _load_filter(self, conn):
+        """有出现记录要提交时装载已知链接过滤器（在事务之外，只装载一次）"""
+        if self._filter_loaded or not (self.use_filter and self._filter_wanted):
+            return
+        self._filter_loaded = True
+        try:
+            self.link_filter = get_link_filter(self.db_path, conn)
+        except Exception as e:
+            # 过滤器只是优化，装载失败时所有链接都走数据库查询
+            print(f"[Writer] 装载已知链接过滤器失败: {e}", flush=True)
+
+    def _run(self):
+        conn = get_connection(self.db_path)
+        stopping = False
+        try:
+            while not stopping:
+                first = self._next_request()
+                if first is _STOP:
+                    break
+                if first.exclusive:
+                    self._run_exclusive(conn, first)
+                    continue
+                batch, stopping = self._collect_batch(first)
+                self._load_filter(conn)
+                self._commit(conn, batch)
+            # 停止前把剩余请求处理完
+            while True:
+                try:
+                    request = self._next_request(block=False)
+                except queue.Empty:
+                    break
+                if request is _STOP:
+                    continue
+                if request.exclusive:
+                    self._run_exclusive(conn, request)
+                else:
+                    self._load_filter(conn)
+                    self._commit(conn, [request])
+        finally:
+            close_connection(self.db_path)
+
+
+_writers = {}
+_writers_lock = threading.Lock()
+
+
+def get_writer(db_path: str, use_filter: bool = True) -> LinkWriter:
+    """
+    获取该数据库文件在本进程内唯一的写线程，不存在时创建并启动
+    从不记录出现记录的调用方（链接检测、空间回收）传 use_filter=False；
+    写线程是共享的，之后有调用方需要过滤器时会重新打开
+    """
+    key = db_path if db_path == ":memory:" else os.path.abspath(db_path)
+    with _writers_lock:
+        writer = _writers.get(key)
+        if writer is None:
+            writer = _writers[key] = LinkWriter(db_path, use_filter=use_filter).start()
+        elif use_filter:
+            writer.use_filter = True
+    return writer
+
+
+def stop_all_writers():
+    """停止所有写线程（程序退出时调用，剩余请求会先提交）"""
+    with _writers_lock:
+        writers = list(_writers.values())
+        _writers.clear()
+    for writer in writers:
+        writer.stop()
+
+
+atexit.register(stop_all_writers)
@@ -0,0 +1,143 @@
+# auto_collect/ui/log_console.py
+"""
+抓取日志控制台
+
+爬虫每次滚动输出五行以上日志，逐行 appendPlainText 会让界面在长时间抓取中越来越慢、内存不断增长。
+这里的控制台：
+    - 新日志先放进待显示队列，定时器每 FLUSH_INTERVAL_MS 一次性追加一批，空闲时定时器停止
+    - 文本框只保留最近 max_lines 行(maximumBlockCount)，待显示队列同样有上限，来不及显示的旧行直接丢弃
+    - 每行按内容归入 DEBUG / INFO / WARNING / ERROR，可只显示某一级别以上；切换级别时从最近的历史重绘
+    - 可选把完整日志（不受显示行数和级别限制）追加写入文件
+"""
+import re
+from collections import deque
+from datetime import datetime
+
+from PyQt6.QtCore import QTimer
+from PyQt6.QtWidgets import QCheckBox, QComboBox, QHBoxLayout, QLabel, QPlainTextEdit, QVBoxLayout, QWidget
+
+DEBUG, INFO, WARNING, ERROR = range(4)
+LEVEL_NAMES = ("DEBUG", "INFO", "WARNING", "ERROR")
+
+DEFAULT_MAX_LINES = 5000
+FLUSH_INTERVAL_MS = 100
+DEFAULT_LOG_FILE = "auto_collect.log"
+
+ERROR_RE = re.compile(r"出错|失败|错误|异常|Traceback|Error", re.IGNORECASE)
+WARNING_RE = re.compile(r"⚠|警告|无法|跳过|超时|限制")
+# 每次滚动都会出现的进度行；新链接行(成功保存新链接)是抓取结果，按 INFO 显示
+DEBUG_RE = re.compile(r"本次滚动|当前本轮已发现|第 \d+ 次滚动")
+
+
+def classify(line: str) -> int:
+    """按日志内容判断级别"""
+    if ERROR_RE.search(line):
+        return ERROR
+    if WARNING_RE.search(line):
+        return WARNING
+    if DEBUG_RE.search(line):
+        return DEBUG
+    return INFO
+
+
+class LogConsole(QWidget):
+    """带级别过滤、批量刷新和行数上限的日志框"""
+
+    def __init__(self, max_lines: int = DEFAULT_MAX_LINES, min_level: int = INFO, parent=None):
+        super().__init__(parent)
+        self.max_lines = max_lines
+        self.min_level = min_level
+        self._history = deque(maxlen=max_lines)  # 最近的 (level, line)，切换级别时重绘
+        self._pending = deque(maxlen=max_lines)  # 尚未显示的行
+        self._log_file = None
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        controls = QHBoxLayout()
+        controls.addWidget(QLabel("日志级别:"))
+        self.level_combo = QComboBox()
+        self.level_combo.addItems(LEVEL_NAMES)
+        self.level_combo.setCurrentIndex(min_level)
+        self.level_combo.currentIndexChanged.connect(self.set_min_level)
+        controls.addWidget(self.level_combo)
+        self.save_checkbox = QCheckBox(f"保存完整日志到 {DEFAULT_LOG_FILE}")
+        self.save_checkbox.toggled.connect(lambda on: self.set_log_file(DEFAULT_LOG_FILE if on else None))
+        controls.addWidget(self.save_checkbox)
+        controls.addStretch()
+        layout.addLayout(controls)
+
+        self.text = QPlainTextEdit()
+        self.text.setReadOnly(True)
+        self.text.setMaximumBlockCount(max_lines)
+        layout.addWidget(self.text)
+
+        self._timer = QTimer(self)
+        self._timer.setInterval(FLUSH_INTERVAL_MS)
+        self._timer.timeout.connect(self.flush)
+
+    # ---- 写入 ----
+    def append(self, line: str, level=None):
+        self.append_lines([line], level)
+
+    def append_lines(self, lines, level=None):
+        """追加若干行，level 为 None 时按内容判断；只入队，由定时器批量显示"""
+        stamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        file_lines = []
+        for line in lines:
+            line_level = classify(line) if level is None else level
+            self._history.append((line_level, line))
+            if line_level >= self.min_level:
+                self._pending.append(line)
+            if self._log_file is not None:
+                file_lines.append(f"{stamp} {LEVEL_NAMES[line_level]:<7} {line}\n")
+        if file_lines:
+            self._write_file(file_lines)
+        if self._pending and not self._timer.isActive():
+            self._timer.start()
+
+    def flush(self):
+        """把待显示的行一次追加到文本框，没有待显示的行时停止定时器"""
+        if not self._pending:
+            self._timer.stop()
+            return
+        lines = list(self._pending)
+        self._pending.clear()
+        # 一次 appendPlainText 只触发一次排版；超出 maximumBlockCount 的旧行由文本框自己丢弃
+        self.text.appendPlainText("\n".join(lines))
+
+    def clear(self):
+        self._history.clear()
+        self._pending.clear()
+        self.text.clear()
+
+    # ---- 过滤与文件 ----
+    def set_min_level(self, level: int):
+        """只显示 level 及以上级别，已显示的内容按新级别从历史重绘"""
+        self.min_level = level
+        if self.level_combo.currentIndex() != level:
+            self.level_combo.setCurrentIndex(level)
+        self._pending.clear()
+        self.text.clear()
+        self._pending.extend(line for line_level, line in self._history if line_level >= level)
+        self.flush()
+
+    def set_log_file(self, path):
+        """开始（path 为 None 时停止）把完整日志追加写入文件"""
+        if self._log_file is not None:
+            self._log_file.close()
+            self._log_file = None
+        if path:
+            try:
+                self._log_file = open(path, "a", encoding="utf-8")
+            except OSError as e:
+                self.append(f"[Log] 无法打开日志文件 {path}: {e}", ERROR)
+
+    def _write_file(self, lines):
+        try:
+            self._log_file.writelines(lines)
+            self._log_file.flush()
+        except OSError as e:
+            print(f"[Log] 写入日志文件出错: {e}", flush=True)
+
+    def close_log_file(self):
+        self.set_log_file(None)
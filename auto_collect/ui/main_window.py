@@ -2,7 +2,7 @@ from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QPushButton, QLineEdit,
                              QTableWidget, QTableWidgetItem, QPlainTextEdit, 
                              QMessageBox, QDialog, QFormLayout, QDialogButtonBox,
                              QComboBox, QHBoxLayout, QLabel, QTabWidget, QTextEdit,
-                             QSplitter, QFrame, QSizePolicy, QAbstractItemView)
+                             QSplitter, QFrame, QSizePolicy, QAbstractItemView, QSpinBox, QTableView)
 from PyQt6.QtCore import Qt, QThread, pyqtSignal, QObject, pyqtSlot, QPropertyAnimation, QRect, QEasingCurve
 from PyQt6.QtGui import QIcon, QPalette, QCloseEvent
 from typing import Optional
@@ -10,11 +10,20 @@ import subprocess
 import json
 from pathlib import Path
 import sys
-import sqlite3
 import os
+import threading
 
 # 添加项目根目录到sys.path以确保可以导入
 sys.path.append(str(Path(__file__).parent.parent))
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from auto_collect.crawler.events import LINK_EVENT, parse_event
+from auto_collect.storage import open_repository
+from auto_collect.storage.archive import BackgroundVacuum
+from auto_collect.storage.snapshot import DEFAULT_SNAPSHOT_INTERVAL, SnapshotRepository
+from auto_collect.ui.log_console import LogConsole
+from auto_collect.ui.models import LinkTableModel, ResultsTableModel, attach_link_model
+from datetime import datetime, timedelta, timezone
 
 def get_resource_path(relative_path):
     """获取资源文件的绝对路径，处理打包后的情况"""
@@ -24,124 +33,6 @@ def get_resource_path(relative_path):
     # 开发环境中的路径
     return os.path.join(os.path.abspath("."), relative_path)
 
-class DatabaseManager:
-    def __init__(self, db_path: str = "telegram_links.db"):
-        self.db_path = db_path
-        self.init_database()
-    
-    def init_database(self):
-        """初始化数据库和表"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS telegram_links (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    link TEXT UNIQUE NOT NULL,
-                    source TEXT,
-                    keyword TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-            
-            # 创建索引提高查询性能
-            cursor.execute('''
-                CREATE INDEX IF NOT EXISTS idx_link ON telegram_links(link)
-            ''')
-            cursor.execute('''
-                CREATE INDEX IF NOT EXISTS idx_keyword ON telegram_links(keyword)
-            ''')
-            
-            conn.commit()
-    
-    def get_all_links(self) -> list:
-        """获取所有链接"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                SELECT id, link, source, keyword, created_at FROM telegram_links
-                ORDER BY created_at DESC
-            ''')
-            
-            rows = cursor.fetchall()
-            return [
-                {
-                    'id': row[0],
-                    'link': row[1],
-                    'source': row[2],
-                    'keyword': row[3],
-                    'created_at': row[4]
-                }
-                for row in rows
-            ]
-    
-    def search_links(self, keyword=None, link_contains=None) -> list:
-        """根据条件搜索链接"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            
-            query = "SELECT id, link, source, keyword, created_at FROM telegram_links WHERE 1=1"
-            params = []
-            
-            if keyword:
-                query += " AND keyword LIKE ?"
-                params.append(f"%{keyword}%")
-                
-            if link_contains:
-                query += " AND link LIKE ?"
-                params.append(f"%{link_contains}%")
-                
-            query += " ORDER BY created_at DESC"
-            
-            cursor.execute(query, params)
-            rows = cursor.fetchall()
-            return [
-                {
-                    'id': row[0],
-                    'link': row[1],
-                    'source': row[2],
-                    'keyword': row[3],
-                    'created_at': row[4]
-                }
-                for row in rows
-            ]
-    
-    def delete_link(self, link_id: int) -> bool:
-        """根据ID删除链接"""
-        try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute("DELETE FROM telegram_links WHERE id = ?", (link_id,))
-                conn.commit()
-                return cursor.rowcount > 0
-        except Exception as e:
-            print(f"[DB] 删除链接时出错: {e}")
-            return False
-    
-    def delete_links_by_keyword(self, keyword: str) -> int:
-        """根据关键词删除链接"""
-        try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute("DELETE FROM telegram_links WHERE keyword = ?", (keyword,))
-                conn.commit()
-                return cursor.rowcount
-        except Exception as e:
-            print(f"[DB] 根据关键词删除链接时出错: {e}")
-            return 0
-    
-    def clear_database(self) -> int:
-        """清空数据库"""
-        try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute("DELETE FROM telegram_links")
-                conn.commit()
-                return cursor.rowcount
-        except Exception as e:
-            print(f"[DB] 清空数据库时出错: {e}")
-            return 0
-
 class APIKeyDialog(QDialog):
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -192,11 +83,31 @@ class APIKeyDialog(QDialog):
         self.access_token_edit.setText(data.get("access_token", ""))
         self.access_token_secret_edit.setText(data.get("access_token_secret", ""))
 
+def selected_link_ids(view) -> list:
+    """链接表格视图中选中行的链接 ID"""
+    selection_model = view.selectionModel()
+    if selection_model is None:
+        return []
+    return view.model().ids_for_rows(index.row() for index in selection_model.selectedRows())
+
+def create_link_view(model) -> QTableView:
+    """只读、整行选择、表头可排序的链接表格视图"""
+    view = QTableView()
+    attach_link_model(view, model)
+    view.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)  # 禁止编辑
+    view.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)  # 选择整行
+    return view
+
 class SearchPanel(QWidget):
     """搜索面板组件"""
+    # 在搜索面板中删除的链接 ID，主窗口据此同步数据库视图
+    links_deleted = pyqtSignal(list)
+
     def __init__(self, db_manager, parent=None):
         super().__init__(parent)
         self.db_manager = db_manager
+        # 查询条件与已取回的行都在模型里，滚动到底部时自动取下一页
+        self.model = LinkTableModel(db_manager)
         self.setup_ui()
         
     def setup_ui(self):
@@ -235,13 +146,14 @@ class SearchPanel(QWidget):
         layout.addWidget(self.clear_btn)
         
         # 结果显示区域
-        self.result_table = QTableWidget()
-        self.result_table.setColumnCount(5)
-        self.result_table.setHorizontalHeaderLabels(["ID", "链接", "来源", "关键字", "创建时间"])
-        self.result_table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)  # 禁止编辑
-        self.result_table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)  # 选择整行
+        self.result_table = create_link_view(self.model)
         layout.addWidget(self.result_table)
         
+        # 分页
+        self.page_label = QLabel("")
+        self.model.rows_changed.connect(self.update_page_label)
+        layout.addWidget(self.page_label)
+        
         # 删除按钮
         delete_layout = QHBoxLayout()
         self.delete_selected_btn = QPushButton("删除选中项")
@@ -260,75 +172,56 @@ class SearchPanel(QWidget):
         # 初始加载所有数据 - 延迟加载以避免初始化问题
         # self.load_all_data()  # 暂时注释，等窗口显示后再加载
         
+    def set_db_manager(self, db_manager):
+        """切换存储（如开关快照模式），按当前条件重新加载"""
+        self.db_manager = db_manager
+        self.model.set_repository(db_manager)
+    
     def load_all_data(self):
-        """加载所有数据"""
+        """加载所有数据（第一页）"""
         try:
-            links = self.db_manager.get_all_links()
-            self.display_results(links)
+            self.model.set_filter()
+            self.result_table.resizeColumnsToContents()
         except Exception as e:
             QMessageBox.critical(self, "错误", f"加载数据时出错: {e}")
     
     def perform_search(self):
         """执行搜索"""
-        keyword = self.keyword_input.text().strip()
-        link_contains = self.link_input.text().strip()
-        
         try:
-            links = self.db_manager.search_links(keyword, link_contains)
-            self.display_results(links)
+            self.model.set_filter(self.keyword_input.text().strip(), self.link_input.text().strip())
+            self.result_table.resizeColumnsToContents()
         except Exception as e:
             QMessageBox.critical(self, "错误", f"搜索时出错: {e}")
     
+    def update_page_label(self):
+        self.page_label.setText(f"已显示 {self.model.rowCount()} / 共 {self.model.total_count()} 条")
+    
+    def remove_links(self, ids):
+        """其他视图删除了链接时，从结果表格中就地移除"""
+        self.model.remove_ids(ids)
+    
     def clear_search(self):
         """清空搜索条件"""
         self.keyword_input.clear()
         self.link_input.clear()
         self.load_all_data()
     
-    def display_results(self, links):
-        """显示搜索结果"""
-        self.result_table.setRowCount(len(links))
-        
-        for row, link_info in enumerate(links):
-            self.result_table.setItem(row, 0, QTableWidgetItem(str(link_info['id'])))
-            self.result_table.setItem(row, 1, QTableWidgetItem(link_info['link']))
-            self.result_table.setItem(row, 2, QTableWidgetItem(link_info['source']))
-            self.result_table.setItem(row, 3, QTableWidgetItem(link_info['keyword']))
-            self.result_table.setItem(row, 4, QTableWidgetItem(link_info['created_at']))
-        
-        # 调整列宽
-        self.result_table.resizeColumnsToContents()
-        self.result_table.resizeRowsToContents()
-    
     def delete_selected(self):
         """删除选中的行"""
-        selection_model = self.result_table.selectionModel()
-        if selection_model is None:
-            QMessageBox.information(self, "提示", "无法获取选择模型")
-            return
-            
-        selected_rows = selection_model.selectedRows()
-        if not selected_rows:
+        link_ids = selected_link_ids(self.result_table)
+        if not link_ids:
             QMessageBox.information(self, "提示", "请先选择要删除的行")
             return
         
-        reply = QMessageBox.question(self, "确认删除", f"确定要删除选中的 {len(selected_rows)} 条记录吗？",
+        reply = QMessageBox.question(self, "确认删除", f"确定要删除选中的 {len(link_ids)} 条记录吗？",
                                    QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
         if reply == QMessageBox.StandardButton.Yes:
             try:
-                deleted_count = 0
-                # 从后往前删除，避免索引变化
-                for index in reversed(selected_rows):
-                    row = index.row()
-                    id_item = self.result_table.item(row, 0)
-                    if id_item:
-                        link_id = int(id_item.text())
-                        if self.db_manager.delete_link(link_id):
-                            deleted_count += 1
-                
-                # 重新加载数据
-                self.load_all_data()
-                QMessageBox.information(self, "成功", f"成功删除 {deleted_count} 条记录")
+                # 一个事务批量删除，只移除实际删除的行，不重新加载
+                deleted_ids = self.db_manager.delete_links(link_ids)
+                self.remove_links(deleted_ids)
+                self.links_deleted.emit(deleted_ids)
+                QMessageBox.information(self, "成功", f"成功删除 {len(deleted_ids)} 条记录")
             except Exception as e:
                 QMessageBox.critical(self, "错误", f"删除记录时出错: {e}")
     
@@ -344,22 +237,48 @@ class SearchPanel(QWidget):
                                    QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
         if reply == QMessageBox.StandardButton.Yes:
             try:
-                deleted_count = self.db_manager.delete_links_by_keyword(keyword)
-                self.load_all_data()
-                QMessageBox.information(self, "成功", f"成功删除 {deleted_count} 条记录")
+                deleted_ids = self.db_manager.delete_links_where(keyword=keyword, exact_keyword=True)
+                self.remove_links(deleted_ids)
+                self.links_deleted.emit(deleted_ids)
+                QMessageBox.information(self, "成功", f"成功删除 {len(deleted_ids)} 条记录")
             except Exception as e:
                 QMessageBox.critical(self, "错误", f"删除记录时出错: {e}")
 
+# 爬虫实时上报的新链接和输出的日志攒多久交给界面一次（秒）
+RESULT_FLUSH_INTERVAL = 0.1
+
+
 class Worker(QObject):
     log_signal = pyqtSignal(str)
+    log_lines_signal = pyqtSignal(list)
     result_signal = pyqtSignal(list)
     finished_signal = pyqtSignal()
 
-    def __init__(self, args, use_api=False, api_keys=None):
+    def __init__(self, args, use_api=False, api_keys=None, flush_interval=RESULT_FLUSH_INTERVAL):
         super().__init__()
         self.args = args
         self.use_api = use_api
         self.api_keys = api_keys or {}
+        self.flush_interval = flush_interval
+        self._pending = []
+        self._pending_lines = []
+        self._pending_lock = threading.Lock()
+        self._streamed = set()  # 已通过实时事件发给界面的链接
+
+    def flush_results(self):
+        """把攒下的子进程输出和实时结果各作为一批发给界面"""
+        with self._pending_lock:
+            lines, self._pending_lines = self._pending_lines, []
+            batch, self._pending = self._pending, []
+        if lines:
+            self.log_lines_signal.emit(lines)
+        if batch:
+            self.result_signal.emit(batch)
+
+    def _flush_loop(self, done):
+        # 读输出的循环阻塞在 readline 上，定时发送放在单独的线程里，没有新输出时攒下的结果也能及时显示
+        while not done.wait(self.flush_interval):
+            self.flush_results()
 
     @pyqtSlot()
     def run(self):
@@ -388,23 +307,45 @@ class Worker(QObject):
                                     text=True)
             
             json_output = ""
-            if proc.stdout:
-                for line in proc.stdout:
-                    line = line.strip()
-                    if line:
-                        self.log_signal.emit(line)
-                        # 尝试解析 JSON 结果
+            done = threading.Event()
+            flusher = threading.Thread(target=self._flush_loop, args=(done,), name="WorkerResultFlusher", daemon=True)
+            flusher.start()
+            try:
+                if proc.stdout:
+                    for line in proc.stdout:
+                        line = line.strip()
+                        if not line:
+                            continue
+                        # 新链接事件：攒批后由定时线程发给界面，不显示在日志里
+                        event = parse_event(line)
+                        if event is not None:
+                            if event["type"] == LINK_EVENT:
+                                with self._pending_lock:
+                                    self._pending.append(event)
+                                self._streamed.add(event.get("link"))
+                            continue
+                        # 最后一行 JSON 结果在下面解析，不显示在日志里
                         if line.startswith('[') and line.endswith(']'):
                             json_output = line
-            
-            proc.wait()
+                            continue
+                        with self._pending_lock:
+                            self._pending_lines.append(line)
+
+                proc.wait()
+            finally:
+                done.set()
+                flusher.join()
+                self.flush_results()
             
             # 处理搜索结果
             if (self.args[0] == "search" or (self.use_api and self.args[0] == "search")) and json_output:
                 try:
                     results = json.loads(json_output)
-                    self.log_signal.emit(f"解析到 {len(results)} 个结果")
-                    self.result_signal.emit(results)
+                    # 实时事件已经显示过的链接不再重复发送；全部显示过时不再发送和记录
+                    results = [r for r in results if not (isinstance(r, dict) and r.get('link') in self._streamed)]
+                    if results or not self._streamed:
+                        self.log_signal.emit(f"解析到 {len(results)} 个结果")
+                        self.result_signal.emit(results)
                 except json.JSONDecodeError as e:
                     self.log_signal.emit(f"JSON 解析错误: {e}")
                 except Exception as e:
@@ -432,6 +373,8 @@ class MainWindow(QWidget):
         
         # 数据库管理器 - 延迟初始化
         self.db_manager = None
+        self.live_repository = None  # 主库存储；快照模式下 db_manager 是包在它外面的快照存储
+        self.background_vacuum = None
         
         # 设置窗口属性，确保显示
         self.setAttribute(Qt.WidgetAttribute.WA_ShowWithoutActivating, False)
@@ -496,6 +439,11 @@ class MainWindow(QWidget):
         self.database_tab = QWidget()
         self.setup_database_tab()
         self.tab_widget.addTab(self.database_tab, "数据库")
+        
+        # 创建发现统计标签页
+        self.stats_tab = QWidget()
+        self.setup_stats_tab()
+        self.tab_widget.addTab(self.stats_tab, "统计")
 
     def setup_search_tab(self):
         layout = QVBoxLayout(self.search_tab)
@@ -539,16 +487,17 @@ class MainWindow(QWidget):
         self.btn_search.clicked.connect(self.start_search)
         layout.addWidget(self.btn_search)
 
-        self.table = QTableWidget()
-        self.table.setColumnCount(3)
-        self.table.setHorizontalHeaderLabels(["关键字","t.me 链接","来源"])
+        # 本次抓取结果，按链接去重
+        self.results_model = ResultsTableModel()
+        self.table = QTableView()
+        self.table.setModel(self.results_model)
+        self.table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
         layout.addWidget(self.table)
 
-        self.log_area = QPlainTextEdit()
-        self.log_area.setReadOnly(True)
-        layout.addWidget(self.log_area)
+        # 日志：批量刷新、只保留最近的行，可按级别过滤
+        self.log_console = LogConsole()
+        layout.addWidget(self.log_console)
 
-        self.next_row = 0
 
     def setup_database_tab(self):
         layout = QVBoxLayout(self.database_tab)
@@ -565,16 +514,31 @@ class MainWindow(QWidget):
         db_buttons_layout.addWidget(self.btn_clear_db)
         
         db_buttons_layout.addStretch()
+        
+        # 快照模式：查询读定期刷新的只读副本，不与爬虫写入争锁
+        self.btn_snapshot_mode = QPushButton("快照读取")
+        self.btn_snapshot_mode.setCheckable(True)
+        self.btn_snapshot_mode.setEnabled(False)
+        self.btn_snapshot_mode.toggled.connect(self.toggle_snapshot_mode)
+        db_buttons_layout.addWidget(self.btn_snapshot_mode)
+        db_buttons_layout.addWidget(QLabel("刷新间隔(秒):"))
+        self.snapshot_interval_spin = QSpinBox()
+        self.snapshot_interval_spin.setRange(5, 3600)
+        self.snapshot_interval_spin.setValue(int(DEFAULT_SNAPSHOT_INTERVAL))
+        self.snapshot_interval_spin.valueChanged.connect(self.set_snapshot_interval)
+        db_buttons_layout.addWidget(self.snapshot_interval_spin)
         layout.addLayout(db_buttons_layout)
         
-        # 数据库内容显示
-        self.db_table = QTableWidget()
-        self.db_table.setColumnCount(5)
-        self.db_table.setHorizontalHeaderLabels(["ID", "链接", "来源", "关键字", "创建时间"])
-        self.db_table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)  # 禁止编辑
-        self.db_table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)  # 选择整行
+        # 数据库内容显示：滚动到底部时自动取下一页
+        self.db_model = LinkTableModel()
+        self.db_table = create_link_view(self.db_model)
         layout.addWidget(self.db_table)
         
+        # 分页
+        self.db_page_label = QLabel("")
+        self.db_model.rows_changed.connect(self.update_db_page_label)
+        layout.addWidget(self.db_page_label)
+        
         # 数据库删除操作按钮
         delete_layout = QHBoxLayout()
         self.btn_delete_selected = QPushButton("删除选中项")
@@ -587,20 +551,63 @@ class MainWindow(QWidget):
         self.btn_delete_by_keyword.setStyleSheet("background-color: #ff8800; color: white;")
         delete_layout.addWidget(self.btn_delete_by_keyword)
         
+        self.btn_delete_dead = QPushButton("删除失效链接")
+        self.btn_delete_dead.clicked.connect(self.delete_dead_links)
+        self.btn_delete_dead.setStyleSheet("background-color: #ff8800; color: white;")
+        delete_layout.addWidget(self.btn_delete_dead)
+        
         delete_layout.addStretch()
         layout.addLayout(delete_layout)
 
+    def setup_stats_tab(self):
+        layout = QVBoxLayout(self.stats_tab)
+        
+        range_layout = QHBoxLayout()
+        range_layout.addWidget(QLabel("时间范围:"))
+        self.stats_range_combo = QComboBox()
+        for label, days in (("最近 7 天", 7), ("最近 30 天", 30), ("最近 90 天", 90), ("全部", None)):
+            self.stats_range_combo.addItem(label, days)
+        self.stats_range_combo.currentIndexChanged.connect(self.refresh_stats_view)
+        range_layout.addWidget(self.stats_range_combo)
+        self.btn_refresh_stats = QPushButton("刷新统计")
+        self.btn_refresh_stats.clicked.connect(self.refresh_stats_view)
+        range_layout.addWidget(self.btn_refresh_stats)
+        range_layout.addStretch()
+        layout.addLayout(range_layout)
+        
+        # 各关键词合计，选中一行在下方显示它的逐日明细
+        self.stats_table = QTableWidget()
+        self.stats_table.setColumnCount(6)
+        self.stats_table.setHorizontalHeaderLabels(["关键字", "有产出天数", "新链接", "重复", "抓取分钟", "新链接/分钟"])
+        self.stats_table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.stats_table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.stats_table.itemSelectionChanged.connect(self.show_keyword_daily_stats)
+        layout.addWidget(self.stats_table)
+        
+        self.daily_stats_table = QTableWidget()
+        self.daily_stats_table.setColumnCount(4)
+        self.daily_stats_table.setHorizontalHeaderLabels(["日期", "新链接", "重复", "抓取分钟"])
+        self.daily_stats_table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        layout.addWidget(self.daily_stats_table)
+
     def delayed_init(self):
         """延迟初始化数据库相关组件"""
         try:
             print("开始延迟初始化")
             
             # 初始化数据库管理器
-            self.db_manager = DatabaseManager()
+            self.db_manager = self.live_repository = open_repository()
             print("数据库管理器初始化完成")
             
+            # 后台分小步回收删除/归档留下的空闲页（只有 SQLite 后端需要）
+            db_path = getattr(self.db_manager, "db_path", None)
+            if db_path:
+                self.background_vacuum = BackgroundVacuum(db_path).start()
+                self.btn_snapshot_mode.setEnabled(True)
+            
             # 创建搜索面板
             self.search_panel = SearchPanel(self.db_manager)
+            self.search_panel.links_deleted.connect(self.remove_links_from_db_view)
             self.search_panel.setMinimumWidth(400)
             self.search_panel.setMaximumWidth(600)
             self.splitter.insertWidget(1, self.search_panel)  # 插入到正确位置
@@ -615,6 +622,7 @@ class MainWindow(QWidget):
             
             # 加载初始数据
             self.refresh_database_view()
+            self.refresh_stats_view()
             if self.search_panel:
                 self.search_panel.load_all_data()
             
@@ -643,29 +651,25 @@ class MainWindow(QWidget):
                               else [self.splitter.width() - 450, 450])
 
     def log(self, msg):
-        self.log_area.appendPlainText(msg)
+        self.log_console.append(msg)
 
     def add_result_row(self, keyword, link, source):
-        # 检查是否已存在相同的链接
-        for row in range(self.table.rowCount()):
-            item = self.table.item(row, 1)
-            if item and item.text() == link:
-                return
-        
-        self.table.insertRow(self.next_row)
-        self.table.setItem(self.next_row, 0, QTableWidgetItem(keyword))
-        self.table.setItem(self.next_row, 1, QTableWidgetItem(link))
-        self.table.setItem(self.next_row, 2, QTableWidgetItem(source))
-        self.next_row += 1
+        """添加单个结果（已存在的链接跳过）"""
+        self.add_result_rows([(keyword, link, source)])
+
+    def add_result_rows(self, rows) -> int:
+        """批量添加 (keyword, link, source)，整批插入期间暂停重绘，返回新增的行数"""
+        self.table.setUpdatesEnabled(False)
+        try:
+            return self.results_model.add_results(rows)
+        finally:
+            self.table.setUpdatesEnabled(True)
 
     def process_results(self, results):
         try:
             keyword = self.input.text().strip()
-            for result in results:
-                link = result.get('link', '')
-                source = result.get('source', '')
-                if link:
-                    self.add_result_row(keyword, link, source)
+            self.add_result_rows((result.get('keyword') or keyword, result.get('link', ''), result.get('source', ''))
+                                 for result in results)
             
             if not results:
                 self.log("未找到任何 t.me 链接")
@@ -728,25 +732,59 @@ class MainWindow(QWidget):
 
     # ---------------- 数据库操作 ----------------
     def refresh_database_view(self):
-        """刷新数据库视图"""
+        """刷新数据库视图（重新加载第一页）"""
         try:
             if self.db_manager is None:
                 print("数据库管理器尚未初始化")
                 return
                 
-            links = self.db_manager.get_all_links()
-            self.db_table.setRowCount(len(links))
-            
-            for row, link_info in enumerate(links):
-                self.db_table.setItem(row, 0, QTableWidgetItem(str(link_info['id'])))
-                self.db_table.setItem(row, 1, QTableWidgetItem(link_info['link']))
-                self.db_table.setItem(row, 2, QTableWidgetItem(link_info['source']))
-                self.db_table.setItem(row, 3, QTableWidgetItem(link_info['keyword']))
-                self.db_table.setItem(row, 4, QTableWidgetItem(link_info['created_at']))
-                
-            self.log(f"数据库刷新完成，共 {len(links)} 条记录")
+            if self.db_model.repository is not self.db_manager:
+                self.db_model.set_repository(self.db_manager)
+            else:
+                self.db_model.reload()
+            total = self.update_db_page_label()
+            self.log(f"数据库刷新完成，共 {total} 条记录")
         except Exception as e:
             self.log(f"刷新数据库视图时出错: {e}")
+    
+    def update_db_page_label(self) -> int:
+        total = self.db_model.total_count()
+        text = f"已显示 {self.db_model.rowCount()} / 共 {total} 条"
+        if isinstance(self.db_manager, SnapshotRepository):
+            age = self.db_manager.snapshots.age()
+            text += "（快照生成中，暂读主库）" if age is None else f"（快照，{age:.0f} 秒前）"
+        self.db_page_label.setText(text)
+        return total
+    
+    def toggle_snapshot_mode(self, checked):
+        """切换查询读主库还是读快照；写入始终走主库"""
+        if self.live_repository is None:
+            return
+        if checked:
+            self.db_manager = SnapshotRepository(self.live_repository, self.snapshot_interval_spin.value())
+            self.log(f"已开启快照读取，每 {self.snapshot_interval_spin.value()} 秒刷新一次")
+        else:
+            if isinstance(self.db_manager, SnapshotRepository):
+                self.db_manager.close()
+            self.db_manager = self.live_repository
+            self.log("已关闭快照读取，查询直接读主库")
+        if self.search_panel is not None:
+            self.search_panel.set_db_manager(self.db_manager)
+        self.refresh_database_view()
+    
+    def set_snapshot_interval(self, seconds):
+        if isinstance(self.db_manager, SnapshotRepository):
+            self.db_manager.interval = seconds
+    
+    def remove_links_from_db_view(self, ids):
+        """从数据库表格中就地移除已删除的链接"""
+        self.db_model.remove_ids(ids)
+    
+    def on_links_deleted(self, ids):
+        """数据库标签页删除链接后同步两个视图"""
+        self.remove_links_from_db_view(ids)
+        if self.search_panel is not None:
+            self.search_panel.remove_links(ids)
 
     def clear_database(self):
         """清空数据库"""
@@ -773,36 +811,19 @@ class MainWindow(QWidget):
             QMessageBox.warning(self, "警告", "数据库管理器尚未初始化")
             return
             
-        selection_model = self.db_table.selectionModel()
-        if selection_model is None:
-            QMessageBox.warning(self, "警告", "无法获取选择模型")
-            return
-            
-        selected_rows = selection_model.selectedRows()
-        if not selected_rows:
+        link_ids = selected_link_ids(self.db_table)
+        if not link_ids:
             QMessageBox.information(self, "提示", "请先选择要删除的行")
             return
         
-        reply = QMessageBox.question(self, "确认删除", f"确定要删除选中的 {len(selected_rows)} 条记录吗？",
+        reply = QMessageBox.question(self, "确认删除", f"确定要删除选中的 {len(link_ids)} 条记录吗？",
                                    QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
         if reply == QMessageBox.StandardButton.Yes:
             try:
-                deleted_count = 0
-                # 从后往前删除，避免索引变化
-                for index in reversed(selected_rows):
-                    row = index.row()
-                    id_item = self.db_table.item(row, 0)
-                    if id_item:
-                        link_id = int(id_item.text())
-                        if self.db_manager.delete_link(link_id):
-                            deleted_count += 1
-                
-                # 重新加载数据
-                self.refresh_database_view()
-                # 同时刷新搜索面板
-                if self.search_panel is not None:
-                    self.search_panel.load_all_data()
-                self.log(f"成功删除 {deleted_count} 条记录")
+                # 一个事务批量删除，两个视图都只移除实际删除的行
+                deleted_ids = self.db_manager.delete_links(link_ids)
+                self.on_links_deleted(deleted_ids)
+                self.log(f"成功删除 {len(deleted_ids)} 条记录")
             except Exception as e:
                 self.log(f"删除记录时出错: {e}")
     
@@ -822,15 +843,77 @@ class MainWindow(QWidget):
                                    QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
         if reply == QMessageBox.StandardButton.Yes:
             try:
-                deleted_count = self.db_manager.delete_links_by_keyword(keyword)
-                self.refresh_database_view()
-                # 同时刷新搜索面板
-                if self.search_panel is not None:
-                    self.search_panel.load_all_data()
-                self.log(f"成功删除 {deleted_count} 条关键词为 '{keyword}' 的记录")
+                deleted_ids = self.db_manager.delete_links_where(keyword=keyword, exact_keyword=True)
+                self.on_links_deleted(deleted_ids)
+                self.log(f"成功删除 {len(deleted_ids)} 条关键词为 '{keyword}' 的记录")
+            except Exception as e:
+                self.log(f"删除记录时出错: {e}")
+
+    def delete_dead_links(self):
+        """删除链接检测判定为失效的记录"""
+        if self.db_manager is None:
+            QMessageBox.warning(self, "警告", "数据库管理器尚未初始化")
+            return
+        
+        reply = QMessageBox.question(self, "确认删除", "确定要删除所有检测为失效的链接吗？",
+                                   QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
+        if reply == QMessageBox.StandardButton.Yes:
+            try:
+                deleted_ids = self.db_manager.delete_links_by_status("dead")
+                self.on_links_deleted(deleted_ids)
+                self.log(f"成功删除 {len(deleted_ids)} 条失效链接")
             except Exception as e:
                 self.log(f"删除记录时出错: {e}")
 
+    # ---------------- 发现统计 ----------------
+    def stats_since(self):
+        """当前时间范围的起始日期（UTC），'全部' 时为 None"""
+        days = self.stats_range_combo.currentData()
+        if days is None:
+            return None
+        return (datetime.now(timezone.utc) - timedelta(days=days - 1)).strftime("%Y-%m-%d")
+    
+    def refresh_stats_view(self):
+        """重新读取各关键词合计（只读统计表，与链接总数无关）"""
+        try:
+            if self.db_manager is None:
+                return
+            totals = self.db_manager.get_keyword_totals(since=self.stats_since())
+        except Exception as e:
+            self.log(f"读取发现统计时出错: {e}")
+            return
+        
+        self.stats_table.setRowCount(len(totals))
+        for row, t in enumerate(totals):
+            rate = t['links_per_minute']
+            values = [t['keyword'] or "(无)", t['days'], t['new_links'], t['duplicates'],
+                      f"{t['crawl_seconds'] / 60:.1f}", "-" if rate is None else f"{rate:.2f}"]
+            for col, value in enumerate(values):
+                item = QTableWidgetItem(str(value))
+                if col == 0:
+                    item.setData(Qt.ItemDataRole.UserRole, t['keyword'])
+                self.stats_table.setItem(row, col, item)
+        self.daily_stats_table.setRowCount(0)
+    
+    def show_keyword_daily_stats(self):
+        """显示选中关键词的逐日明细"""
+        row = self.stats_table.currentRow()
+        item = self.stats_table.item(row, 0) if row >= 0 else None
+        if item is None or self.db_manager is None:
+            self.daily_stats_table.setRowCount(0)
+            return
+        try:
+            days = self.db_manager.get_daily_stats(keyword=item.data(Qt.ItemDataRole.UserRole),
+                                                   since=self.stats_since())
+        except Exception as e:
+            self.log(f"读取逐日统计时出错: {e}")
+            return
+        self.daily_stats_table.setRowCount(len(days))
+        for row, d in enumerate(days):
+            values = [d['day'], d['new_links'], d['duplicates'], f"{d['crawl_seconds'] / 60:.1f}"]
+            for col, value in enumerate(values):
+                self.daily_stats_table.setItem(row, col, QTableWidgetItem(str(value)))
+
     # ---------------- UI事件处理 ----------------
     def manage_api_keys(self):
         dialog = APIKeyDialog(self)
@@ -880,6 +963,7 @@ class MainWindow(QWidget):
         # 连接信号和槽
         self.worker_thread.started.connect(self.worker.run)
         self.worker.log_signal.connect(self.log)
+        self.worker.log_lines_signal.connect(self.log_console.append_lines)
         self.worker.result_signal.connect(self.process_results)
         self.worker.finished_signal.connect(self.worker_thread.quit)
         self.worker.finished_signal.connect(self.worker.deleteLater)
@@ -894,6 +978,7 @@ class MainWindow(QWidget):
         self.worker = None
         # 刷新数据库视图
         self.refresh_database_view()
+        self.refresh_stats_view()
         # 刷新搜索面板
         if self.search_panel is not None:
             self.search_panel.load_all_data()
@@ -915,9 +1000,8 @@ class MainWindow(QWidget):
         if not keyword:
             QMessageBox.warning(self,"提示","请输入关键字")
             return
-        self.table.setRowCount(0)
-        self.next_row=0
-        self.log_area.clear()
+        self.results_model.clear()
+        self.log_console.clear()
         self.run_worker(["search", keyword])
 
     def closeEvent(self, a0: Optional[QCloseEvent]):
@@ -926,6 +1010,11 @@ class MainWindow(QWidget):
         try:
             # 确保工作线程已完成
             self.cleanup_thread()
+            if self.background_vacuum is not None:
+                self.background_vacuum.stop()
+            if isinstance(self.db_manager, SnapshotRepository):
+                self.db_manager.close()
+            self.log_console.close_log_file()
             print("线程清理完成")
             
             # 接受关闭事件
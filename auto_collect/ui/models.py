@@ -0,0 +1,224 @@
+# auto_collect/ui/models.py
+"""
+表格视图的数据模型
+
+QTableWidget 为每个单元格创建一个 QTableWidgetItem，十万行就是五十万个对象，
+一次性填表会卡住界面几秒、占用数百 MB。这里的模型只保存已取回的行（元组），
+视图滚动到底部时通过 canFetchMore / fetchMore 向存储再要一页，
+排序交给数据库（键集分页，只支持有索引的列），打开任何大小的表都只读第一页。
+抓取结果表(ResultsTableModel)按链接建哈希索引去重，一批结果只通知视图一次。
+"""
+from PyQt6.QtCore import QAbstractTableModel, QModelIndex, Qt, pyqtSignal
+
+from auto_collect.storage.queries import DEFAULT_ORDER_BY, DEFAULT_PAGE_SIZE, SORT_KEYS
+from auto_collect.storage.repository import ROW_FIELDS
+
+LINK_HEADERS = ("ID", "链接", "来源", "关键字", "创建时间")
+RESULT_HEADERS = ("关键字", "t.me 链接", "来源")
+
+
+class LinkTableModel(QAbstractTableModel):
+    """按需分页加载的链接表：(id, link, source, keyword, created_at)"""
+
+    # 取回一页或移除行之后发出，视图据此更新"已显示 / 共"标签
+    rows_changed = pyqtSignal()
+    # 请求按没有索引的列排序时发出，视图据此把表头的排序标记恢复原样
+    sort_rejected = pyqtSignal()
+
+    def __init__(self, repository=None, page_size: int = DEFAULT_PAGE_SIZE, parent=None):
+        super().__init__(parent)
+        self.repository = repository
+        self.page_size = page_size
+        self.keyword = None
+        self.link_contains = None
+        self.order_by = DEFAULT_ORDER_BY
+        self.descending = True
+        self._rows = []
+        self._cursor = None
+        self._has_more = False
+
+    # ---- 查询条件 ----
+    def set_repository(self, repository):
+        self.repository = repository
+        self.reload()
+
+    def set_filter(self, keyword=None, link_contains=None):
+        self.keyword = keyword or None
+        self.link_contains = link_contains or None
+        self.reload()
+
+    def reload(self):
+        """丢弃已取回的行，按当前条件重新取第一页"""
+        self.beginResetModel()
+        self._rows = []
+        self._cursor = None
+        self._has_more = self.repository is not None
+        self.endResetModel()
+        self.fetchMore()
+
+    def total_count(self) -> int:
+        """匹配当前条件的总行数（存储端有缓存）"""
+        if self.repository is None:
+            return 0
+        return self.repository.count_links(self.keyword, self.link_contains)
+
+    # ---- 分页 ----
+    def canFetchMore(self, parent=QModelIndex()) -> bool:
+        return not parent.isValid() and self._has_more
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or not self._has_more:
+            return
+        links, self._cursor = self.repository.get_links_page(
+            self._cursor, self.page_size, self.keyword, self.link_contains, self.order_by, self.descending)
+        self._has_more = self._cursor is not None
+        if links:
+            start = len(self._rows)
+            self.beginInsertRows(QModelIndex(), start, start + len(links) - 1)
+            self._rows.extend(tuple(link[f] for f in ROW_FIELDS) for link in links)
+            self.endInsertRows()
+        self.rows_changed.emit()
+
+    # ---- 排序 ----
+    def can_sort(self, column: int) -> bool:
+        return 0 <= column < len(ROW_FIELDS) and ROW_FIELDS[column] in SORT_KEYS
+
+    def sort_column(self) -> int:
+        return ROW_FIELDS.index(self.order_by)
+
+    def sort_order(self) -> Qt.SortOrder:
+        return Qt.SortOrder.DescendingOrder if self.descending else Qt.SortOrder.AscendingOrder
+
+    def sort(self, column: int, order=Qt.SortOrder.AscendingOrder):
+        """由数据库排序后重新分页；没有索引的列不排序"""
+        if not self.can_sort(column):
+            self.sort_rejected.emit()
+            return
+        order_by = ROW_FIELDS[column]
+        descending = order == Qt.SortOrder.DescendingOrder
+        if (order_by, descending) == (self.order_by, self.descending):
+            return
+        self.order_by, self.descending = order_by, descending
+        self.reload()
+
+    # ---- 行访问 ----
+    def link_id(self, row: int) -> int:
+        return self._rows[row][0]
+
+    def ids_for_rows(self, rows) -> list:
+        return [self._rows[row][0] for row in rows if 0 <= row < len(self._rows)]
+
+    def remove_ids(self, ids) -> int:
+        """就地移除这些 ID 对应的行（连续的行一次移除），返回移除的行数"""
+        id_set = set(ids)
+        if not id_set:
+            return 0
+        removed = 0
+        row = len(self._rows) - 1
+        # 从后往前找连续的待删除区间，避免前面的删除改变后面的行号
+        while row >= 0:
+            if self._rows[row][0] not in id_set:
+                row -= 1
+                continue
+            last = row
+            while row >= 0 and self._rows[row][0] in id_set:
+                row -= 1
+            self.beginRemoveRows(QModelIndex(), row + 1, last)
+            del self._rows[row + 1:last + 1]
+            self.endRemoveRows()
+            removed += last - row
+        if removed:
+            self.rows_changed.emit()
+        return removed
+
+    # ---- QAbstractTableModel ----
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(ROW_FIELDS)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or role not in (Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.ToolTipRole):
+            return None
+        value = self._rows[index.row()][index.column()]
+        return "" if value is None else str(value)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+        if orientation == Qt.Orientation.Horizontal:
+            return LINK_HEADERS[section]
+        return str(section + 1)
+
+
+class ResultsTableModel(QAbstractTableModel):
+    """本次抓取的结果：(keyword, link, source)，同一链接只显示一次"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._rows = []
+        self._row_of = {}  # link -> 行号
+
+    def add_results(self, results) -> int:
+        """
+        追加一批 (keyword, link, source)，已显示过或本批内重复的链接跳过
+        整批只调用一次 beginInsertRows，返回新增的行数
+        """
+        fresh = []
+        start = len(self._rows)
+        for keyword, link, source in results:
+            if not link or link in self._row_of:
+                continue
+            self._row_of[link] = start + len(fresh)
+            fresh.append((keyword, link, source))
+        if fresh:
+            self.beginInsertRows(QModelIndex(), start, start + len(fresh) - 1)
+            self._rows.extend(fresh)
+            self.endInsertRows()
+        return len(fresh)
+
+    def contains(self, link: str) -> bool:
+        return link in self._row_of
+
+    def row_of(self, link: str):
+        """链接所在的行号，不存在时为 None"""
+        return self._row_of.get(link)
+
+    def clear(self):
+        self.beginResetModel()
+        self._rows = []
+        self._row_of = {}
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(RESULT_HEADERS)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or role not in (Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.ToolTipRole):
+            return None
+        value = self._rows[index.row()][index.column()]
+        return "" if value is None else str(value)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+        if orientation == Qt.Orientation.Horizontal:
+            return RESULT_HEADERS[section]
+        return str(section + 1)
+
+
+def attach_link_model(view, model: LinkTableModel):
+    """
+    把模型装到 QTableView 上并开启表头排序
+    点击没有索引的列时恢复原来的排序标记，不让表头显示与数据不符的排序
+    """
+    view.setModel(model)
+    header = view.horizontalHeader()
+    # 先设好当前排序再开启，开启时视图会立即按表头标记排序一次
+    header.setSortIndicator(model.sort_column(), model.sort_order())
+    view.setSortingEnabled(True)
+    model.sort_rejected.connect(lambda: header.setSortIndicator(model.sort_column(), model.sort_order()))
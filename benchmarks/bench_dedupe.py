@@ -0,0 +1,81 @@
+# benchmarks/bench_dedupe.py
+"""
+已知链接布隆过滤器的内存与速度
+
+python benchmarks/bench_dedupe.py [--links 10000000]
+报告装入速度、过滤器内存、查询速度、实测误判率、旁路文件的保存/读取耗时，
+并以 100 万个链接的 Python set 内存按比例折算作对照
+"""
+import argparse
+import os
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from auto_collect.storage.dedupe import BloomFilter, LinkFilter
+
+
+def link(i):
+    return f"https://t.me/channel_{i:09d}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="已知链接过滤器基准测试")
+    parser.add_argument("--links", type=int, default=10_000_000)
+    parser.add_argument("--probes", type=int, default=200_000)
+    args = parser.parse_args()
+    n = args.links
+
+    # 装入阶段不开 tracemalloc（会让千万次循环慢几倍），内存看位图大小和进程 RSS
+    bloom = BloomFilter(n)
+    started = time.perf_counter()
+    bloom.add_many(link(i) for i in range(n))
+    elapsed = time.perf_counter() - started
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"装入 {n:,} 个链接: {elapsed:.1f} 秒（{n / elapsed:,.0f} 个/秒），"
+          f"位图 {bloom.memory_bytes / 1024 / 1024:.1f} MB，进程 RSS 峰值 {rss:.0f} MB，"
+          f"哈希函数 {bloom.num_hashes} 个")
+
+    started = time.perf_counter()
+    hits = sum(1 for i in range(0, n, max(n // args.probes, 1)) if link(i) in bloom)
+    elapsed = time.perf_counter() - started
+    print(f"已知链接查询: {hits:,} 次 {hits / elapsed:,.0f} 次/秒（应全部命中）")
+
+    started = time.perf_counter()
+    false_hits = sum(1 for i in range(args.probes) if f"https://t.me/unseen_{i}" in bloom)
+    elapsed = time.perf_counter() - started
+    print(f"新链接查询: {args.probes / elapsed:,.0f} 次/秒，实测误判率 {false_hits / args.probes:.4%}，"
+          f"理论 {bloom.expected_error_rate():.4%}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        link_filter = LinkFilter(os.path.join(tmp, "bench.db"))
+        link_filter.bloom = bloom
+        link_filter.watermark = n
+        link_filter.dirty = True
+        started = time.perf_counter()
+        link_filter.save()
+        saved = time.perf_counter() - started
+        started = time.perf_counter()
+        loaded, watermark, _, _ = link_filter._read_sidecar()
+        read = time.perf_counter() - started
+        assert loaded is not None and watermark == n and link(0) in loaded
+        print(f"旁路文件 {os.path.getsize(link_filter.path) / 1024 / 1024:.1f} MB: "
+              f"保存 {saved * 1000:.0f} ms，读取 {read * 1000:.0f} ms")
+
+    sample = min(n, 1_000_000)
+    tracemalloc.start()
+    links = {link(i) for i in range(sample)}
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del links
+    print(f"对照: Python set 存 {sample:,} 个链接占 {current / 1024 / 1024:.0f} MB，"
+          f"折算 {n:,} 个约 {current / sample * n / 1024 / 1024 / 1024:.2f} GB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+# benchmarks/bench_export.py
+"""
+流式导出的吞吐与内存
+
+python benchmarks/bench_export.py [--rows 200000]
+对每种格式报告行/秒；再用 tracemalloc 对比导出一半行数与全部行数时的 Python 内存峰值，
+两者应基本相同（内存只取决于块大小）
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from auto_collect.storage import connect, migrate, transaction
+from auto_collect.storage.export import export_links
+
+TARGETS = ["links.csv", "links.csv.gz", "links.jsonl", "links.jsonl.gz"]
+try:
+    import pyarrow  # noqa: F401
+    TARGETS.append("links.parquet")
+except ImportError:
+    pass
+
+
+def fill(db_path, rows, batch=50000):
+    rng = random.Random(7)
+    conn = connect(db_path)
+    migrate(conn)
+    for start in range(0, rows, batch):
+        data = [(f"https://t.me/export_{i}", f"https://x.com/i/web/status/{rng.randrange(10 ** 18)}",
+                 rng.choice(["crypto", "airdrop", "nft", "空投"]),
+                 f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d} 12:00:00")
+                for i in range(start, min(start + batch, rows))]
+        with transaction(conn):
+            conn.executemany("INSERT INTO telegram_links (link, source, keyword, created_at, first_seen, last_seen, "
+                             "sighting_count) VALUES (?, ?, ?, ?, ?, ?, 1)",
+                             [d + (d[3], d[3]) for d in data])
+    conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="流式导出基准测试")
+    parser.add_argument("--rows", type=int, default=200_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.db")
+        fill(db_path, args.rows)
+
+        for name in TARGETS:
+            out = os.path.join(tmp, name)
+            started = time.perf_counter()
+            count = export_links(db_path, out)
+            elapsed = time.perf_counter() - started
+            size = os.path.getsize(out) / 1024 / 1024
+            print(f"{name:<16} {count:>9,} 行 {count / elapsed:>10,.0f} 行/秒 {size:>8.1f} MB")
+
+        # 按创建时间过滤出大约一半的行，对比内存峰值
+        for label, until in (("前半年", "2024-07-01"), ("全部", None)):
+            tracemalloc.start()
+            count = export_links(db_path, os.path.join(tmp, "mem.jsonl"), until=until)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(f"内存峰值({label}, {count:,} 行): {peak / 1024 / 1024:.2f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+# benchmarks/bench_fts_search.py
+"""
+对比 SearchPanel 子串搜索在 LIKE 全表扫描与 FTS5 三元组索引下的耗时
+
+python benchmarks/bench_fts_search.py [--rows 1000000] [--repeat 5]
+"""
+import argparse
+import os
+import random
+import string
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from auto_collect.storage import connect, migrate, search_links, transaction
+
+KEYWORDS = ["crypto", "airdrop", "nft", "trading signals", "telegram group", "defi", "web3", "memecoin",
+            "forex", "usdt", "电报群", "加密货币", "空投"]
+
+# (说明, keyword 条件, link 条件)
+QUERIES = [
+    ("关键词 'airdrop'", "airdrop", None),
+    ("链接含 'pump'", None, "pump"),
+    ("链接含 '+'(不足3字符,走LIKE)", None, "+"),
+    ("关键词 'signal' + 链接含 'vip'", "signal", "vip"),
+    ("链接含罕见串 'zqx9'", None, "zqx9"),
+]
+
+
+def random_link(rng):
+    name = "".join(rng.choices(string.ascii_lowercase + string.digits + "_", k=rng.randint(6, 20)))
+    if rng.random() < 0.02:
+        name = rng.choice(["pump", "vip", "signals", "airdrop"]) + "_" + name
+    if rng.random() < 0.2:
+        return "https://t.me/+" + "".join(rng.choices(string.ascii_letters + string.digits, k=16))
+    return "https://t.me/" + name
+
+
+def fill(conn, rows, rng, batch=50000):
+    for start in range(0, rows, batch):
+        data = [(random_link(rng), f"https://x.com/i/web/status/{rng.randrange(10 ** 18)}", rng.choice(KEYWORDS))
+                for _ in range(min(batch, rows - start))]
+        with transaction(conn):
+            conn.executemany("INSERT OR IGNORE INTO telegram_links (link, source, keyword) VALUES (?, ?, ?)", data)
+
+
+def best_of(fn, repeat):
+    best = None
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="FTS5 三元组搜索基准测试")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = connect(os.path.join(tmp, "bench.db"))
+        migrate(conn)
+        started = time.perf_counter()
+        fill(conn, args.rows, rng)
+        total = conn.execute("SELECT COUNT(*) FROM telegram_links").fetchone()[0]
+        print(f"写入 {total:,} 行（含 FTS 触发器）耗时 {time.perf_counter() - started:.1f}s")
+
+        print(f"{'查询':<30} {'LIKE':>10} {'FTS5':>10} {'命中':>8}")
+        for name, keyword, link in QUERIES:
+            like_time, like_rows = best_of(lambda: search_links(conn, keyword, link, use_fts=False), args.repeat)
+            fts_time, fts_rows = best_of(lambda: search_links(conn, keyword, link, use_fts=True), args.repeat)
+            assert sorted(like_rows) == sorted(fts_rows), name
+            print(f"{name:<30} {like_time * 1000:>8.1f}ms {fts_time * 1000:>8.1f}ms {len(fts_rows):>8,}")
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+# benchmarks/bench_lookups.py
+"""
+source / keyword 改存查找表前后的库文件大小与查询速度
+
+python benchmarks/bench_lookups.py [--rows 1000000]
+先按版本 5 的结构（source、keyword 为文本列）写入 --rows 个链接及各一条出现记录，
+VACUUM 后复制一份升级到版本 6，分别报告各表/索引占用（dbstat）、迁移耗时和常用查询的耗时
+"""
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from auto_collect.storage import connect, migrations, transaction
+from auto_collect.storage.fts import FTS_TABLE
+
+KEYWORDS = [f"{word}{i}" for i in range(50) for word in ("空投", "airdrop", "crypto", "交易所")]
+SOURCES = [f"https://x.com/search?q={kw}{suffix}" for kw in KEYWORDS for suffix in ("", "&f=live", "&f=live&f=live")]
+
+QUERIES = [
+    ("首页 50 条", "SELECT id, link, source, keyword, created_at FROM telegram_links "
+                 "ORDER BY created_at DESC, id DESC LIMIT 50", ()),
+    ("键集翻页", "SELECT id, link, source, keyword, created_at FROM telegram_links "
+              "WHERE (created_at, id) < (?, ?) ORDER BY created_at DESC, id DESC LIMIT 50",
+     ("2024-06-01 00:00:00", 10 ** 9)),
+    ("按关键词统计", "SELECT COUNT(*), COUNT(DISTINCT date(created_at)) FROM telegram_links WHERE keyword = ?",
+     (KEYWORDS[7],)),
+    ("全表导出扫描", "SELECT id, link, source, keyword, created_at FROM telegram_links", ()),
+]
+
+
+def build_v5(path, rows):
+    rng = random.Random(11)
+    conn = connect(path)
+    saved = migrations.MIGRATIONS
+    migrations.MIGRATIONS = saved[:5]
+    try:
+        migrations.migrate(conn)
+    finally:
+        migrations.MIGRATIONS = saved
+    batch = 50000
+    for start in range(0, rows, batch):
+        links, sightings = [], []
+        for i in range(start, min(start + batch, rows)):
+            keyword = rng.choice(KEYWORDS)
+            source = rng.choice(SOURCES)
+            created = f"2024-{1 + i * 12 // rows:02d}-{1 + i % 28:02d} {i % 24:02d}:{i % 60:02d}:00"
+            links.append((i + 1, f"https://t.me/channel_{i:08d}", source, keyword, created, created, created, 1))
+            sightings.append((i + 1, keyword, source, str(10 ** 18 + i), created))
+        with transaction(conn):
+            conn.executemany("INSERT INTO telegram_links (id, link, source, keyword, created_at, first_seen, "
+                             "last_seen, sighting_count) VALUES (?, ?, ?, ?, ?, ?, ?, ?)", links)
+            conn.executemany("INSERT INTO link_sightings (link_id, keyword, source, tweet_id, seen_at) "
+                             "VALUES (?, ?, ?, ?, ?)", sightings)
+    conn.execute("VACUUM")
+    conn.close()
+
+
+def table_sizes(conn) -> dict:
+    """按逻辑表汇总页面占用（索引算到所属的表，FTS 影子表合并为一项）"""
+    owners = {row[0]: row[1] for row in conn.execute("SELECT name, tbl_name FROM sqlite_master")}
+    sizes = {}
+    for name, size in conn.execute("SELECT name, SUM(pgsize) FROM dbstat GROUP BY name"):
+        owner = owners.get(name, name)
+        if owner.startswith(FTS_TABLE):
+            owner = FTS_TABLE
+        sizes[owner] = sizes.get(owner, 0) + size
+    return sizes
+
+
+def time_queries(conn, repeat=3) -> dict:
+    results = {}
+    for name, sql, params in QUERIES:
+        best = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            conn.execute(sql, params).fetchall()
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        results[name] = best
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="查找表规范化基准测试")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        v5 = os.path.join(tmp, "v5.db")
+        v6 = os.path.join(tmp, "v6.db")
+        started = time.perf_counter()
+        build_v5(v5, args.rows)
+        print(f"生成版本 5 数据库 {args.rows:,} 行: {time.perf_counter() - started:.0f} 秒")
+
+        shutil.copy(v5, v6)
+        conn = connect(v6)
+        started = time.perf_counter()
+        migrations.migrate(conn)
+        migrate_seconds = time.perf_counter() - started
+        conn.execute("VACUUM")
+        conn.close()
+        print(f"升级到版本 6: {migrate_seconds:.1f} 秒")
+
+        before_conn, after_conn = connect(v5, readonly=True), connect(v6, readonly=True)
+        before, after = table_sizes(before_conn), table_sizes(after_conn)
+        print(f"\n{'表(含索引)':<24}{'版本 5':>12}{'版本 6':>12}")
+        merged = [("telegram_links", ["telegram_links", "telegram_links_data", "link_sources", "link_keywords"]),
+                  ("link_sightings", ["link_sightings", "link_sightings_data"]),
+                  (FTS_TABLE, [FTS_TABLE]),
+                  ("link_keyword_stats", ["link_keyword_stats", "link_keyword_stats_data"])]
+        for label, names in merged:
+            b = sum(before.get(n, 0) for n in names)
+            a = sum(after.get(n, 0) for n in names)
+            print(f"{label:<24}{b / 1024 / 1024:>10.1f}MB{a / 1024 / 1024:>10.1f}MB")
+        b_total, a_total = os.path.getsize(v5), os.path.getsize(v6)
+        print(f"{'文件总大小':<24}{b_total / 1024 / 1024:>10.1f}MB{a_total / 1024 / 1024:>10.1f}MB"
+              f"  (-{1 - a_total / b_total:.0%})")
+
+        print(f"\n{'查询':<16}{'版本 5':>10}{'版本 6':>10}")
+        b_times, a_times = time_queries(before_conn), time_queries(after_conn)
+        for name, _, _ in QUERIES:
+            print(f"{name:<16}{b_times[name] * 1000:>8.1f}ms{a_times[name] * 1000:>8.1f}ms")
+        before_conn.close()
+        after_conn.close()
+
+
+if __name__ == "__main__":
+    main()
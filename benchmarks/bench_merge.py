@@ -0,0 +1,86 @@
+# benchmarks/bench_merge.py
+"""
+合并其他采集端数据库：ATTACH + 集合 UPSERT 与逐条 save_link 的对比
+
+python benchmarks/bench_merge.py [--rows 2000000] [--naive-rows 20000]
+源库为旧 storage.py 的 links 表(results.db 格式)，其中约 1/4 与主库重复、1% 无法识别
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from auto_collect.storage import SQLiteRepository, connect, migrate, stop_all_writers, transaction
+from auto_collect.storage.merge import merge_databases
+
+
+def make_source(path, rows):
+    rng = random.Random(3)
+    conn = sqlite3.connect(path)
+    conn.execute('''
+        CREATE TABLE links (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            keyword TEXT,
+            link TEXT UNIQUE,
+            source TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    data = []
+    for i in range(rows):
+        link = "not a link %d" % i if i % 100 == 0 else f"t.me/Merge_{i}"
+        data.append((rng.choice(["crypto", "airdrop", "nft"]), link, "https://x.com/i/web/status/%d" % i))
+    conn.executemany("INSERT INTO links (keyword, link, source) VALUES (?, ?, ?)", data)
+    conn.commit()
+    conn.close()
+
+
+def make_target(path, rows):
+    conn = connect(path)
+    migrate(conn)
+    with transaction(conn):
+        conn.executemany("INSERT INTO telegram_links (link, keyword, first_seen, last_seen, sighting_count) "
+                         "VALUES (?, 'old', CURRENT_TIMESTAMP, CURRENT_TIMESTAMP, 1)",
+                         [(f"https://t.me/merge_{i}",) for i in range(1, rows, 4)])
+    conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="数据库合并基准测试")
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--naive-rows", type=int, default=20_000, help="逐条 save_link 只测这么多行再折算")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, "results.db")
+        make_source(source, args.rows)
+
+        target = os.path.join(tmp, "bulk.db")
+        make_target(target, args.rows)
+        started = time.perf_counter()
+        summary = merge_databases(target, [source])[source]
+        elapsed = time.perf_counter() - started
+        print(f"ATTACH + UPSERT: {args.rows:,} 行耗时 {elapsed:.1f} 秒（{args.rows / elapsed:,.0f} 行/秒），{summary}")
+
+        naive = os.path.join(tmp, "naive.db")
+        make_target(naive, args.naive_rows)
+        repo = SQLiteRepository(naive)
+        rows = sqlite3.connect(source).execute(
+            "SELECT keyword, link, source FROM links WHERE link LIKE 't.me/%' LIMIT ?", (args.naive_rows,)).fetchall()
+        started = time.perf_counter()
+        for keyword, link, src in rows:
+            repo.save_link({"link": link, "source": src}, keyword)
+        elapsed = time.perf_counter() - started
+        stop_all_writers()
+        print(f"逐条 save_link: {len(rows) / elapsed:,.0f} 行/秒，折算 {args.rows:,} 行约 "
+              f"{args.rows / (len(rows) / elapsed):,.0f} 秒")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+# benchmarks/bench_results_table.py
+"""
+抓取结果表的填充耗时：逐行扫描去重的 QTableWidget vs 带链接索引的 ResultsTableModel
+
+python benchmarks/bench_results_table.py [--rows 5000] [--batch 20] [--dup-ratio 0.3]
+以 Worker 的方式每次送来 --batch 条结果（其中约 --dup-ratio 为已显示过的链接），
+报告两种方式填满 --rows 条结果的总耗时与单批最大耗时。无显示器时设置 QT_QPA_PLATFORM=offscreen
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from PyQt6.QtWidgets import QApplication, QTableView, QTableWidget, QTableWidgetItem
+
+from auto_collect.ui.models import RESULT_HEADERS, ResultsTableModel
+
+
+def make_batches(rows, batch, dup_ratio):
+    rng = random.Random(1)
+    batches, current, links = [], [], []
+    while len(links) < rows:
+        if links and rng.random() < dup_ratio:
+            link = rng.choice(links)
+        else:
+            link = f"https://t.me/channel_{len(links):08d}"
+            links.append(link)
+        current.append(("空投", link, "bench"))
+        if len(current) == batch:
+            batches.append(current)
+            current = []
+    if current:
+        batches.append(current)
+    return batches
+
+
+def fill_widget(batches):
+    """原来的做法：每条结果扫描全部已有行再 insertRow"""
+    table = QTableWidget()
+    table.setColumnCount(len(RESULT_HEADERS))
+    table.setHorizontalHeaderLabels(RESULT_HEADERS)
+    table.show()
+    next_row = 0
+    slowest = 0.0
+    started = time.perf_counter()
+    for batch in batches:
+        batch_started = time.perf_counter()
+        for keyword, link, source in batch:
+            if any(table.item(row, 1) and table.item(row, 1).text() == link for row in range(table.rowCount())):
+                continue
+            table.insertRow(next_row)
+            table.setItem(next_row, 0, QTableWidgetItem(keyword))
+            table.setItem(next_row, 1, QTableWidgetItem(link))
+            table.setItem(next_row, 2, QTableWidgetItem(source))
+            next_row += 1
+        QApplication.processEvents()
+        slowest = max(slowest, time.perf_counter() - batch_started)
+    return time.perf_counter() - started, slowest, table.rowCount()
+
+
+def fill_model(batches):
+    model = ResultsTableModel()
+    view = QTableView()
+    view.setModel(model)
+    view.show()
+    slowest = 0.0
+    started = time.perf_counter()
+    for batch in batches:
+        batch_started = time.perf_counter()
+        view.setUpdatesEnabled(False)
+        model.add_results(batch)
+        view.setUpdatesEnabled(True)
+        QApplication.processEvents()
+        slowest = max(slowest, time.perf_counter() - batch_started)
+    return time.perf_counter() - started, slowest, model.rowCount()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="抓取结果表基准测试")
+    parser.add_argument("--rows", type=int, default=5000, help="不重复的链接数")
+    parser.add_argument("--batch", type=int, default=20, help="每批结果数")
+    parser.add_argument("--dup-ratio", type=float, default=0.3, help="重复结果的比例")
+    args = parser.parse_args()
+
+    app = QApplication(sys.argv)
+    batches = make_batches(args.rows, args.batch, args.dup_ratio)
+    print(f"{'方式':<16}{'行数':>8}{'总耗时':>12}{'单批最大':>12}")
+    for name, fill in (("QTableWidget", fill_widget), ("ResultsModel", fill_model)):
+        total, slowest, rows = fill(batches)
+        print(f"{name:<16}{rows:>8}{total * 1000:>10.1f}ms{slowest * 1000:>10.1f}ms")
+    app.quit()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+# benchmarks/bench_snapshot.py
+"""
+爬虫持续写入时 UI 查询的延迟：直接读主库 vs 读快照
+
+python benchmarks/bench_snapshot.py [--rows 300000] [--seconds 10]
+先写入 --rows 个链接，然后后台线程以爬虫的方式不停地批量写入，
+前台反复执行数据库视图的"第一页 + 总数"和按链接搜索，分别报告两种模式下的 p50 / p99 / 最大延迟，
+以及每次刷新快照的耗时
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from auto_collect.storage import open_repository, stop_all_writers
+from auto_collect.storage.snapshot import SnapshotRepository
+
+
+def fill(repo, start, count, rng):
+    batch = []
+    for i in range(start, start + count):
+        batch.append({"link": f"https://t.me/channel_{i:08d}", "keyword": f"空投{rng.randrange(50)}",
+                      "source": "bench", "tweet_id": str(i)})
+        if len(batch) == 5000:
+            repo.save_links(batch)
+            batch = []
+    if batch:
+        repo.save_links(batch)
+
+
+def measure(repo, seconds) -> list:
+    latencies = []
+    deadline = time.perf_counter() + seconds
+    rng = random.Random(3)
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        repo.get_links_page()
+        repo.count_links()
+        repo.get_links_page(link_contains=f"{rng.randrange(10 ** 6):06d}")
+        latencies.append(time.perf_counter() - started)
+    return latencies
+
+
+def report(name, latencies):
+    latencies = sorted(latencies)
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    print(f"{name:<10}{len(latencies):>8}{statistics.median(latencies) * 1000:>10.1f}ms"
+          f"{p99 * 1000:>10.1f}ms{latencies[-1] * 1000:>10.1f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="快照读取基准测试")
+    parser.add_argument("--rows", type=int, default=300_000)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--interval", type=float, default=2.0, help="快照刷新间隔（秒）")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.db")
+        live = open_repository(db_path)
+        rng = random.Random(1)
+        fill(live, 0, args.rows, rng)
+
+        stop = threading.Event()
+        written = [args.rows]
+
+        def crawl():
+            writer_rng = random.Random(2)
+            while not stop.is_set():
+                fill(live, written[0], 200, writer_rng)
+                written[0] += 200
+
+        crawler = threading.Thread(target=crawl, daemon=True)
+        crawler.start()
+        print(f"{'模式':<10}{'查询次数':>8}{'p50':>12}{'p99':>12}{'最大':>12}")
+        report("主库", measure(live, args.seconds))
+        snapshot = SnapshotRepository(live, interval=args.interval, snapshot_dir=os.path.join(tmp, "snap"))
+        while snapshot.snapshots.generation == 0:
+            time.sleep(0.05)
+        report("快照", measure(snapshot, args.seconds))
+        print(f"\n快照刷新 {snapshot.snapshots.generation} 次，最近一次耗时 {snapshot.snapshots.last_duration:.2f} 秒，"
+              f"库文件 {os.path.getsize(db_path) / 1024 / 1024:.0f} MB")
+        stop.set()
+        crawler.join()
+        snapshot.close()
+        stop_all_writers()
+
+
+if __name__ == "__main__":
+    main()
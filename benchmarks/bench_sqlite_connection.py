@@ -0,0 +1,136 @@
+# benchmarks/bench_sqlite_connection.py
+"""
+对比旧的"每次操作新建连接 + 默认回滚日志"与新的长连接 WAL 连接层
+
+python benchmarks/bench_sqlite_connection.py [--rows 20000] [--lookups 5000]
+输出插入速度（逐条提交 / 批量事务）和 link_exists、最新链接查询的平均延迟
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from auto_collect.storage import connect, transaction
+
+SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS telegram_links (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        link TEXT UNIQUE NOT NULL,
+        source TEXT,
+        keyword TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+'''
+INSERT_SQL = "INSERT OR IGNORE INTO telegram_links (link, source, keyword) VALUES (?, ?, ?)"
+EXISTS_SQL = "SELECT 1 FROM telegram_links WHERE link = ? LIMIT 1"
+LATEST_SQL = "SELECT link, keyword FROM telegram_links ORDER BY created_at DESC LIMIT 50"
+
+
+def make_rows(n, offset=0):
+    return [(f"https://t.me/bench_{offset + i}", "https://x.com/i/web/status/1", f"kw{i % 20}") for i in range(n)]
+
+
+def timed(fn):
+    started = time.perf_counter()
+    fn()
+    return time.perf_counter() - started
+
+
+# ---------------- 旧方式：每次操作 sqlite3.connect() ----------------
+def legacy_insert(db, rows):
+    for row in rows:
+        conn = sqlite3.connect(db)
+        conn.execute(INSERT_SQL, row)
+        conn.commit()
+        conn.close()
+
+
+def legacy_lookup(db, links):
+    for link in links:
+        conn = sqlite3.connect(db)
+        conn.execute(EXISTS_SQL, (link,)).fetchone()
+        conn.close()
+
+
+def legacy_latest(db, times):
+    for _ in range(times):
+        conn = sqlite3.connect(db)
+        conn.execute(LATEST_SQL).fetchall()
+        conn.close()
+
+
+# ---------------- 新方式：长连接 + WAL ----------------
+def tuned_insert(conn, rows):
+    for row in rows:
+        conn.execute(INSERT_SQL, row)
+
+
+def tuned_insert_batch(conn, rows, batch=500):
+    for start in range(0, len(rows), batch):
+        with transaction(conn):
+            conn.executemany(INSERT_SQL, rows[start:start + batch])
+
+
+def tuned_lookup(conn, links):
+    for link in links:
+        conn.execute(EXISTS_SQL, (link,)).fetchone()
+
+
+def tuned_latest(conn, times):
+    for _ in range(times):
+        conn.execute(LATEST_SQL).fetchall()
+
+
+def report(name, seconds, count, unit):
+    if unit == "rows/s":
+        print(f"{name:<36} {count / seconds:>12,.0f} rows/s")
+    else:
+        print(f"{name:<36} {seconds / count * 1e6:>12,.1f} µs/op")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SQLite 连接层基准测试")
+    parser.add_argument("--rows", type=int, default=20000, help="批量插入的行数")
+    parser.add_argument("--single-rows", type=int, default=2000, help="逐条提交插入的行数")
+    parser.add_argument("--lookups", type=int, default=5000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy_db = os.path.join(tmp, "legacy.db")
+        tuned_db = os.path.join(tmp, "tuned.db")
+        with sqlite3.connect(legacy_db) as conn:
+            conn.execute(SCHEMA)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_keyword ON telegram_links(keyword)")
+        tuned = connect(tuned_db)
+        tuned.execute(SCHEMA)
+        tuned.execute("CREATE INDEX IF NOT EXISTS idx_keyword ON telegram_links(keyword)")
+
+        single = make_rows(args.single_rows)
+        report("legacy 逐条提交插入", timed(lambda: legacy_insert(legacy_db, single)), len(single), "rows/s")
+        report("tuned  逐条提交插入(WAL)", timed(lambda: tuned_insert(tuned, single)), len(single), "rows/s")
+
+        bulk = make_rows(args.rows, offset=args.single_rows)
+        report("tuned  批量事务插入", timed(lambda: tuned_insert_batch(tuned, bulk)), len(bulk), "rows/s")
+        with sqlite3.connect(legacy_db) as conn:
+            conn.executemany(INSERT_SQL, bulk)
+
+        total = args.single_rows + args.rows
+        links = [f"https://t.me/bench_{random.randrange(total * 2)}" for _ in range(args.lookups)]
+        report("legacy link_exists", timed(lambda: legacy_lookup(legacy_db, links)), len(links), "µs/op")
+        report("tuned  link_exists", timed(lambda: tuned_lookup(tuned, links)), len(links), "µs/op")
+
+        times = max(args.lookups // 50, 10)
+        report("legacy 最新 50 条", timed(lambda: legacy_latest(legacy_db, times)), times, "µs/op")
+        report("tuned  最新 50 条", timed(lambda: tuned_latest(tuned, times)), times, "µs/op")
+        tuned.close()
+
+
+if __name__ == "__main__":
+    main()
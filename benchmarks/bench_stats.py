@@ -0,0 +1,88 @@
+# benchmarks/bench_stats.py
+"""
+发现统计表与直接 GROUP BY 的报表耗时对比
+
+python benchmarks/bench_stats.py [--rows 500000] [--days 180]
+按 record_sightings 的写入路径生成 --rows 次出现（约 1/3 为重复），
+报告写入速度，以及"各关键词合计"和"单个关键词逐日走势"两种报表
+直接聚合 telegram_links / link_sightings 与读取 keyword_daily_stats 的耗时
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from auto_collect.storage import connect, migrate, record_sightings, transaction
+from auto_collect.storage.stats import get_daily_stats, get_keyword_totals
+
+KEYWORDS = [f"空投{i}" for i in range(100)]
+
+RAW_TOTALS_SQL = '''
+    SELECT keyword, COUNT(DISTINCT date(first_seen)), COUNT(*) FROM telegram_links
+    WHERE first_seen >= ? GROUP BY keyword ORDER BY COUNT(*) DESC
+'''
+RAW_DAILY_SQL = '''
+    SELECT date(seen_at), COUNT(*) FROM link_sightings
+    WHERE keyword = ? AND seen_at >= ? GROUP BY date(seen_at) ORDER BY 1 DESC
+'''
+
+
+def best_of(fn, repeat=3) -> float:
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="发现统计表基准测试")
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--days", type=int, default=180)
+    args = parser.parse_args()
+
+    rng = random.Random(5)
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = connect(os.path.join(tmp, "bench.db"))
+        migrate(conn)
+        batch_size = 1000
+        distinct = max(args.rows * 2 // 3, 1)
+        started = time.perf_counter()
+        for start in range(0, args.rows, batch_size):
+            batch = []
+            for i in range(start, min(start + batch_size, args.rows)):
+                day = 1 + i * args.days // args.rows
+                seen_at = time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(1704067200 + day * 86400 + i % 86400))
+                batch.append({"link": f"https://t.me/channel_{rng.randrange(distinct):08d}",
+                              "keyword": rng.choice(KEYWORDS), "source": "bench", "tweet_id": str(i),
+                              "seen_at": seen_at})
+            with transaction(conn):
+                record_sightings(conn, batch)
+        elapsed = time.perf_counter() - started
+        stats_rows = conn.execute("SELECT COUNT(*) FROM keyword_daily_stats").fetchone()[0]
+        print(f"写入 {args.rows:,} 次出现: {elapsed:.1f} 秒（{args.rows / elapsed:,.0f} 次/秒），"
+              f"统计表 {stats_rows:,} 行")
+
+        since = "2024-03-01"
+        keyword = KEYWORDS[3]
+        reports = [
+            ("各关键词合计", lambda: conn.execute(RAW_TOTALS_SQL, (since,)).fetchall(),
+             lambda: get_keyword_totals(conn, since=since)),
+            ("单个关键词逐日", lambda: conn.execute(RAW_DAILY_SQL, (keyword, since)).fetchall(),
+             lambda: get_daily_stats(conn, keyword=keyword, since=since)),
+        ]
+        print(f"\n{'报表':<16}{'直接聚合':>12}{'统计表':>12}")
+        for name, raw, table in reports:
+            print(f"{name:<16}{best_of(raw) * 1000:>10.1f}ms{best_of(table) * 1000:>10.2f}ms")
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
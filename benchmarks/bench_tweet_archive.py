@@ -0,0 +1,82 @@
+# benchmarks/bench_tweet_archive.py
+"""
+推文归档的压缩率与并行重新提取速度
+
+python benchmarks/bench_tweet_archive.py [--tweets 200000] [--workers 1 4]
+生成与 x.com 搜索页结构相近的推文 HTML，约 1/3 带 t.me 链接；
+报告归档体积与压缩比、单进程与多进程重新提取的速度，以及写入数据库的耗时
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from auto_collect.storage import stop_all_writers
+from auto_collect.storage.tweet_archive import TweetArchive, chunk_files, reextract
+
+TEMPLATE = ('<div class="css-175oi2r r-18u37iz"><div data-testid="User-Name"><a href="/{author}" role="link">'
+            '<span class="css-1jxf684 r-bcqeeo">{author}</span></a></div><a href="/{author}/status/{id}">'
+            '<time datetime="2024-05-{day:02d}T08:00:00.000Z">May {day}</time></a>'
+            '<div data-testid="tweetText" lang="zh"><span class="css-1jxf684">{text}</span>{link}</div>'
+            '<div role="group" aria-label="{likes} likes, {views} views"></div></div>')
+WORDS = ["空投", "社区", "加入", "频道", "免费", "领取", "crypto", "airdrop", "nft", "alpha", "早鸟", "白名单"]
+
+
+def make_tweet(rng, i):
+    link = ""
+    if i % 3 == 0:
+        name = f"group_{rng.randrange(i // 3 + 1)}"
+        link = f'<a href="https://t.co/{i:x}" rel="noopener" target="_blank">https://t.me/{name}</a>'
+    text = " ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 30)))
+    return TEMPLATE.format(author=f"user{rng.randrange(50000)}", id=10 ** 18 + i, day=rng.randint(1, 28),
+                           text=text, link=link, likes=rng.randrange(1000), views=rng.randrange(100000))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="推文归档基准测试")
+    parser.add_argument("--tweets", type=int, default=200_000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, os.cpu_count() or 1])
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    with tempfile.TemporaryDirectory() as tmp:
+        archive_dir = os.path.join(tmp, "archive")
+        archive = TweetArchive(archive_dir)
+        raw_bytes = 0
+        started = time.perf_counter()
+        for i in range(args.tweets):
+            html = make_tweet(rng, i)
+            raw_bytes += len(html.encode("utf-8"))
+            archive.append(str(10 ** 18 + i), html, author=f"user{i}", keyword="空投", source="bench")
+        archive.close()
+        elapsed = time.perf_counter() - started
+        files = chunk_files(archive_dir)
+        size = sum(p.stat().st_size for p in files)
+        print(f"归档 {args.tweets:,} 条推文: {elapsed:.1f} 秒，{len(files)} 个块，"
+              f"原文 {raw_bytes / 1024 / 1024:.1f} MB -> {size / 1024 / 1024:.1f} MB（压缩比 {raw_bytes / size:.1f}x）")
+
+        for workers in args.workers:
+            started = time.perf_counter()
+            summary = reextract(archive_dir, workers=workers, dry_run=True)
+            elapsed = time.perf_counter() - started
+            print(f"重新提取（只统计）{workers} 个进程: {elapsed:.1f} 秒，"
+                  f"{summary['tweets'] / elapsed:,.0f} 条/秒，链接出现 {summary['sightings']:,} 次")
+
+        db_path = os.path.join(tmp, "bench.db")
+        started = time.perf_counter()
+        summary = reextract(archive_dir, db_path, workers=max(args.workers))
+        elapsed = time.perf_counter() - started
+        print(f"重新提取并写库: {elapsed:.1f} 秒，新链接 {summary['new_links']:,} 个")
+        started = time.perf_counter()
+        again = reextract(archive_dir, db_path, workers=max(args.workers))
+        print(f"再次扫描同一归档: {time.perf_counter() - started:.1f} 秒，新链接 {again['new_links']} 个（应为 0）")
+        stop_all_writers()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+# benchmarks/bench_writer.py
+"""
+多个生产者线程同时写入时，对比"各自连接、逐条提交"与单写线程组提交
+
+python benchmarks/bench_writer.py [--producers 4] [--rows 2000]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from auto_collect.storage import LinkWriter, connect, migrate, record_sightings, transaction
+
+
+def run_producers(producers, rows, write_one):
+    errors = []
+
+    def produce(worker):
+        for i in range(rows):
+            try:
+                write_one({"link": f"https://t.me/w{worker}_{i}", "keyword": f"kw{worker}",
+                           "source": "bench", "tweet_id": str(i)})
+            except Exception as e:
+                errors.append(e)
+
+    threads = [threading.Thread(target=produce, args=(w,)) for w in range(producers)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return time.perf_counter() - started, errors
+
+
+def bench_direct(db_path, producers, rows):
+    """旧方式：每个线程自己的连接，每条记录一个事务，锁冲突靠 busy_timeout 等待"""
+    local = threading.local()
+
+    def write_one(item):
+        conn = getattr(local, "conn", None)
+        if conn is None:
+            conn = local.conn = connect(db_path)
+        with transaction(conn):
+            record_sightings(conn, [item])
+
+    return run_producers(producers, rows, write_one)
+
+
+def bench_writer(db_path, producers, rows, wait_each=True):
+    """wait_each 为 True 时每条记录都等待提交完成；否则只提交，最后统一等待"""
+    writer = LinkWriter(db_path).start()
+    futures = []
+
+    def write_one(item):
+        future = writer.submit_sightings([item])
+        if wait_each:
+            future.result()
+        else:
+            futures.append(future)
+
+    started = time.perf_counter()
+    elapsed, errors = run_producers(producers, rows, write_one)
+    for future in futures:
+        future.result()
+    elapsed = time.perf_counter() - started
+    metrics = writer.metrics()
+    writer.stop()
+    return elapsed, errors, metrics
+
+
+def main():
+    parser = argparse.ArgumentParser(description="单写线程组提交基准测试")
+    parser.add_argument("--producers", type=int, default=4)
+    parser.add_argument("--rows", type=int, default=2000, help="每个生产者写入的记录数")
+    args = parser.parse_args()
+    total = args.producers * args.rows
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in ("direct.db", "writer.db", "writer_async.db"):
+            with connect(os.path.join(tmp, name)) as conn:
+                migrate(conn)
+
+        elapsed, errors = bench_direct(os.path.join(tmp, "direct.db"), args.producers, args.rows)
+        print(f"各自连接逐条提交:   {total / elapsed:>10,.0f} rows/s，失败 {len(errors)} 条")
+
+        for name, wait_each in (("单写线程(逐条等待)", True), ("单写线程(不等待)", False)):
+            db_path = os.path.join(tmp, "writer.db" if wait_each else "writer_async.db")
+            elapsed, errors, m = bench_writer(db_path, args.producers, args.rows, wait_each)
+            print(f"{name}: {total / elapsed:>10,.0f} rows/s，失败 {len(errors)} 条，"
+                  f"提交 {m['commits']} 次，平均每次 {m['rows_per_commit']:.1f} 行，"
+                  f"平均提交耗时 {m['avg_commit_ms']:.2f} ms，最大 {m['max_commit_ms']:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+# tests/conftest.py
+"""测试公用的夹具：每个测试一个迁移到最新版本的临时数据库"""
+import sys
+from pathlib import Path
+
+import pytest
+
+# 添加项目根目录到sys.path以确保可以导入
+sys.path.append(str(Path(__file__).parent.parent))
+
+from auto_collect.storage import close_all, connect, migrate, record_sightings, stop_all_writers, transaction
+from auto_collect.storage.migrations import MIGRATIONS
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / "links.db")
+    yield path
+    # 单写线程和线程内长连接按路径复用，测试结束时全部释放
+    stop_all_writers()
+    close_all()
+
+
+@pytest.fixture
+def conn(db_path):
+    conn = connect(db_path)
+    migrate(conn)
+    yield conn
+    conn.close()
+
+
+def _add_links(conn, links, keyword="kw", source="test"):
+    with transaction(conn):
+        return record_sightings(conn, [{"link": link, "keyword": keyword, "source": source} for link in links])
+
+
+@pytest.fixture
+def add_links():
+    """add_links(conn, links, keyword, source)：直接记录一批出现，返回新插入的链接"""
+    return _add_links
+
+
+def _migrate_to(conn, version):
+    for number, _, fn in MIGRATIONS[:version]:
+        fn(conn)
+        conn.execute(f"PRAGMA user_version = {number}")
+
+
+@pytest.fixture
+def migrate_to():
+    """migrate_to(conn, version)：只执行到指定版本，用来构造旧版本的数据库"""
+    return _migrate_to
@@ -0,0 +1,136 @@
+# tests/test_archive.py
+from contextlib import contextmanager
+
+import pytest
+
+from auto_collect.storage import SQLiteRepository, archive, connect, get_writer, record_sightings, transaction
+from auto_collect.storage import writer as writer_module
+from auto_collect.storage.archive import (UNKNOWN_MONTH, BackgroundVacuum, archive_files, archive_old_links,
+                                          attach_archives, auto_vacuum_mode, search_archives)
+
+
+def test_vacuum_check_does_not_use_the_writer(db_path, conn, add_links):
+    add_links(conn, [f"https://t.me/group_{i}" for i in range(10)])
+    # 迁移中删除旧表留下的空闲页先回收掉
+    conn.execute("PRAGMA incremental_vacuum")
+    # 没有空闲页时只在只读连接上查看，不创建写线程
+    assert BackgroundVacuum(db_path, min_free_pages=1).run_once() == 0
+    assert writer_module._writers == {}
+
+
+def test_vacuum_reclaims_without_loading_the_filter(db_path, conn, add_links):
+    assert auto_vacuum_mode(conn) == 2
+    add_links(conn, [f"https://t.me/group_{i}_{'x' * 200}" for i in range(2000)])
+    conn.execute("DELETE FROM telegram_links_data")
+    assert conn.execute("PRAGMA freelist_count").fetchone()[0] > 0
+
+    vacuum = BackgroundVacuum(db_path, min_free_pages=1, step_pages=8)
+    assert vacuum.run_once() > 0
+    assert conn.execute("PRAGMA freelist_count").fetchone()[0] == 0
+    writer = get_writer(db_path, use_filter=False)
+    assert writer.link_filter is None
+
+
+def test_filter_loads_on_first_sightings(db_path, conn, add_links):
+    add_links(conn, ["https://t.me/known_one"])
+    writer = get_writer(db_path, use_filter=False)
+    writer.execute(lambda c: c.execute("PRAGMA freelist_count").fetchone()).result()
+    assert writer.link_filter is None
+
+    # 同一进程里记录出现的调用方需要过滤器，共享的写线程在第一次提交出现记录时装载
+    repo = SQLiteRepository(db_path)
+    assert repo.save_links([{"link": "https://t.me/known_one", "keyword": "kw", "source": "s"},
+                            {"link": "https://t.me/new_one", "keyword": "kw", "source": "s"}]) == \
+        ["https://t.me/new_one"]
+    assert writer.link_filter is not None
+    assert writer.link_filter.might_contain("https://t.me/known_one")
+
+
+OLD = "2024-01-15 10:00:00"
+RECENT_LINK = "https://t.me/still_active"
+
+
+def add_old(conn, links, seen_at=OLD, created_at=OLD):
+    """记录一批很久以前出现过的链接"""
+    with transaction(conn):
+        record_sightings(conn, [{"link": link, "keyword": "kw", "source": "s", "seen_at": seen_at} for link in links])
+        conn.executemany("UPDATE telegram_links_data SET created_at = ? WHERE link = ?",
+                         [(created_at, link) for link in links])
+
+
+def test_archive_round_trip(db_path, conn, add_links, tmp_path):
+    add_old(conn, ["https://t.me/old_one", "https://t.me/old_two"])
+    add_old(conn, ["https://t.me/no_created_at"], created_at=None)
+    add_links(conn, [RECENT_LINK])
+    archive_dir = tmp_path / "archive"
+
+    assert archive_old_links(db_path, 90, archive_dir) == {"2024-01": 2, UNKNOWN_MONTH: 1}
+    assert {row[0] for row in conn.execute("SELECT link FROM telegram_links")} == {RECENT_LINK}
+    assert conn.execute("SELECT COUNT(*) FROM link_sightings").fetchone()[0] == 1
+    # 创建时间为空的链接也在归档文件列表里，挂载和搜索都能看到
+    assert list(archive_files(archive_dir)) == [UNKNOWN_MONTH, "2024-01"]
+
+    reader = connect(db_path)
+    try:
+        assert attach_archives(reader, archive_dir) == ["arc_unknown", "arc_2024_01"]
+        assert {row[0] for row in reader.execute("SELECT link FROM all_telegram_links")} == \
+            {RECENT_LINK, "https://t.me/old_one", "https://t.me/old_two", "https://t.me/no_created_at"}
+        assert reader.execute("SELECT COUNT(*) FROM arc_2024_01.link_sightings").fetchone()[0] == 2
+    finally:
+        reader.close()
+    assert [(month, link) for month, _, link, *_ in search_archives(archive_dir, link_contains="old_")] == \
+        [("2024-01", "https://t.me/old_two"), ("2024-01", "https://t.me/old_one")]
+    assert [row[0] for row in search_archives(archive_dir, link_contains="no_created")] == [UNKNOWN_MONTH]
+
+    # 再跑一次没有可归档的链接
+    assert archive_old_links(db_path, 90, archive_dir) == {}
+
+
+def test_rerun_after_interrupted_archive(db_path, conn, tmp_path, monkeypatch):
+    add_old(conn, ["https://t.me/old_one", "https://t.me/old_two"])
+    archive_dir = tmp_path / "archive"
+
+    def interrupted(c, ids):
+        raise RuntimeError("中断")
+
+    # 复制已提交、删除前中断：链接留在主库，归档库里已有副本
+    monkeypatch.setattr(archive, "delete_links_by_ids", interrupted)
+    with pytest.raises(RuntimeError):
+        archive_old_links(db_path, 90, archive_dir)
+    assert conn.execute("SELECT COUNT(*) FROM telegram_links").fetchone()[0] == 2
+    monkeypatch.undo()
+
+    # 重跑覆盖副本，不会重复
+    assert archive_old_links(db_path, 90, archive_dir) == {"2024-01": 2}
+    assert conn.execute("SELECT COUNT(*) FROM telegram_links").fetchone()[0] == 0
+    assert len(search_archives(archive_dir)) == 2
+
+
+def test_link_seen_again_during_archive_stays(db_path, conn, tmp_path, monkeypatch):
+    add_old(conn, ["https://t.me/old_one", "https://t.me/old_two"])
+    archive_dir = tmp_path / "archive"
+    real_transaction = archive.transaction
+    entered = []
+
+    @contextmanager
+    def transaction_with_concurrent_write(c):
+        entered.append(c)
+        if len(entered) == 2:
+            # 复制已提交、删除之前，另一个进程又抓到了 old_one
+            other = connect(db_path)
+            try:
+                with real_transaction(other):
+                    record_sightings(other, [{"link": "https://t.me/old_one", "keyword": "kw", "source": "s",
+                                              "tweet_id": "1"}])
+            finally:
+                other.close()
+        with real_transaction(c):
+            yield c
+
+    monkeypatch.setattr(archive, "transaction", transaction_with_concurrent_write)
+    assert archive_old_links(db_path, 90, archive_dir) == {"2024-01": 1}
+
+    # 重新活跃的链接和它的新出现都留在主库
+    assert [row[0] for row in conn.execute("SELECT link FROM telegram_links")] == ["https://t.me/old_one"]
+    assert conn.execute("SELECT sighting_count FROM telegram_links").fetchone()[0] == 2
+    assert conn.execute("SELECT COUNT(*) FROM link_sightings").fetchone()[0] == 2
@@ -0,0 +1,67 @@
+# tests/test_author_frontier.py
+"""作者扩展队列：累计写入、优先级排序与访问后的降级"""
+import os
+from datetime import timedelta
+
+from auto_collect.crawler import layer3_selenium
+from auto_collect.crawler.author_frontier import AuthorFrontier, parse_handle
+
+
+def rows(conn) -> dict:
+    return {row[0]: row[1:] for row in conn.execute(
+        "SELECT handle, link_tweets, links_found, visits FROM author_frontier")}
+
+
+def test_parse_handle():
+    assert parse_handle("/Some_User") == "some_user"
+    assert parse_handle("some_user/") == "some_user"
+    assert parse_handle("/search") is None
+    assert parse_handle("/i") is None
+    assert parse_handle("/user/status/1") is None
+    assert parse_handle("/this_handle_is_too_long") is None
+    assert parse_handle(None) is None
+
+
+def test_push_accumulates_until_flush(db_path, conn):
+    frontier = AuthorFrontier(db_path)
+    frontier.push("alice")
+    frontier.push("alice")
+    frontier.push("bob")
+    frontier.push(None)
+    assert rows(conn) == {}
+
+    frontier.flush()
+    frontier.push("alice")
+    frontier.flush()
+    assert rows(conn) == {"alice": (3, 0, 0), "bob": (1, 0, 0)}
+
+
+def test_pop_batch_orders_by_priority_and_skips_recent_visits(db_path, conn):
+    frontier = AuthorFrontier(db_path)
+    for handle, tweets in [("alice", 3), ("bob", 2), ("carol", 1)]:
+        for _ in range(tweets):
+            frontier.push(handle)
+    # pop_batch 先写入内存中累计的作者
+    assert frontier.pop_batch(2) == ["alice", "bob"]
+
+    # 访问过的作者在 revisit_after 之内不会再被取出
+    frontier.record_visit("alice", 0)
+    assert frontier.pop_batch(3) == ["bob", "carol"]
+    assert rows(conn)["alice"] == (3, 0, 1)
+
+    # 过了重访间隔后重新排队，产出为零的作者优先级降到 (0 + 3 + 1) / 2 = 2
+    again = AuthorFrontier(db_path, revisit_after=timedelta(0))
+    again.record_visit("carol", 5)
+    assert again.pop_batch(3) == ["carol", "bob", "alice"]
+    priorities = dict(conn.execute("SELECT handle, priority FROM author_frontier"))
+    assert priorities == {"alice": 2.0, "bob": 3.0, "carol": 3.5}
+
+
+def test_search_without_login_opens_nothing(tmp_path):
+    db_path = tmp_path / "links.db"
+    archive_dir = tmp_path / "archive"
+    result = layer3_selenium.search_keyword("kw", storage_state=str(tmp_path / "missing.json"), expand=True,
+                                            db_path=str(db_path), archive_dir=str(archive_dir))
+    assert result == []
+    assert not os.path.exists(db_path)
+    assert not os.path.exists(archive_dir)
@@ -0,0 +1,51 @@
+# tests/test_canonical.py
+import pytest
+
+from auto_collect.crawler.canonical import canonicalize_link, extract_tg_links
+
+
+@pytest.mark.parametrize("link", [
+    "https://t.me/Foo_Bar",
+    "http://t.me/foo_bar/",
+    "t.me/foo_bar?start=x",
+    "https://t.me/s/foo_bar",
+    "https://telegram.me/foo_bar/123",
+    "www.telegram.dog/FOO_BAR",
+    "https://foo_bar.t.me",
+    "  https://www.t.me/foo_bar  ",
+])
+def test_username_spellings_collapse(link):
+    assert canonicalize_link(link) == "https://t.me/foo_bar"
+
+
+@pytest.mark.parametrize("link, expected", [
+    # 邀请哈希区分大小写，joinchat/ 统一为 +
+    ("https://t.me/joinchat/AbCdEf", "https://t.me/+AbCdEf"),
+    ("t.me/+AbCdEf", "https://t.me/+AbCdEf"),
+    ("https://telegram.me/JoinChat/AbCdEf", "https://t.me/+AbCdEf"),
+    # 前缀小写，第二段保持原样
+    ("https://t.me/AddStickers/MyPack", "https://t.me/addstickers/MyPack"),
+    ("https://t.me/addlist/XyZ", "https://t.me/addlist/XyZ"),
+    # 私有频道的消息链接只保留频道
+    ("https://t.me/c/12345/678", "https://t.me/c/12345"),
+    # 由参数决定身份的链接去掉跟踪参数，参数排序
+    ("https://t.me/share/url?url=x&utm_source=y&ref=z", "https://t.me/share/url?url=x"),
+    ("https://t.me/proxy?secret=s1&server=a&port=1", "https://t.me/proxy?port=1&secret=s1&server=a"),
+])
+def test_special_paths(link, expected):
+    assert canonicalize_link(link) == expected
+
+
+@pytest.mark.parametrize("link", [
+    None, "", "https://example.com/foo_bar", "https://t.me/", "https://t.me/s/", "https://t.me/ab",
+    "https://t.me/+", "https://t.me/joinchat", "https://t.me/addstickers", "https://t.me/c/abc",
+    "https://t.me/foo.bar", "http://[::1", "https://nott.me/foo_bar",
+])
+def test_unrecognized_links(link):
+    assert canonicalize_link(link) is None
+
+
+def test_extract_dedupes_spellings():
+    text = ("join https://t.me/Foo_Bar or t.me/s/foo_bar, invite https://t.me/joinchat/AbCdEf "
+            "and https://example.com/foo_bar")
+    assert extract_tg_links(text) == {"https://t.me/foo_bar", "https://t.me/+AbCdEf"}
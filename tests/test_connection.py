@@ -0,0 +1,79 @@
+# tests/test_connection.py
+"""WAL 连接层：PRAGMA、线程内长连接复用、只读连接与事务"""
+import sqlite3
+import threading
+
+import pytest
+
+from auto_collect.storage import close_connection, connect, get_connection, transaction
+
+
+def pragma(conn, name):
+    return conn.execute(f"PRAGMA {name}").fetchone()[0]
+
+
+def test_connections_are_tuned(db_path):
+    conn = connect(db_path)
+    assert pragma(conn, "journal_mode") == "wal"
+    assert pragma(conn, "auto_vacuum") == 2      # INCREMENTAL
+    assert pragma(conn, "synchronous") == 1      # NORMAL
+    assert pragma(conn, "busy_timeout") == 5000
+    assert pragma(conn, "temp_store") == 2       # MEMORY
+    assert conn.isolation_level is None
+    conn.close()
+
+
+def test_long_lived_connection_per_thread(db_path):
+    conn = get_connection(db_path)
+    assert get_connection(db_path) is conn
+    assert get_connection(db_path, readonly=True) is not conn
+
+    other = []
+    thread = threading.Thread(target=lambda: other.append(get_connection(db_path)))
+    thread.start()
+    thread.join()
+    assert other[0] is not conn
+
+    close_connection(db_path)
+    with pytest.raises(sqlite3.ProgrammingError):
+        conn.execute("SELECT 1")
+    assert get_connection(db_path) is not conn
+
+
+def test_readers_see_last_commit_while_writer_holds_the_lock(db_path):
+    writer = connect(db_path)
+    writer.execute("CREATE TABLE t (v INTEGER)")
+    writer.execute("INSERT INTO t VALUES (1)")
+    reader = connect(db_path, readonly=True)
+
+    with transaction(writer):
+        writer.execute("INSERT INTO t VALUES (2)")
+        # WAL：写事务未提交时读连接不阻塞，看到的是上次提交的内容
+        assert reader.execute("SELECT COUNT(*) FROM t").fetchone()[0] == 1
+    assert reader.execute("SELECT COUNT(*) FROM t").fetchone()[0] == 2
+
+    with pytest.raises(sqlite3.OperationalError):
+        reader.execute("INSERT INTO t VALUES (3)")
+    reader.close()
+    writer.close()
+
+
+def test_transaction_rolls_back_and_nests(db_path):
+    conn = connect(db_path)
+    conn.execute("CREATE TABLE t (v INTEGER)")
+    with pytest.raises(ValueError):
+        with transaction(conn):
+            conn.execute("INSERT INTO t VALUES (1)")
+            raise ValueError
+    assert not conn.in_transaction
+    assert conn.execute("SELECT COUNT(*) FROM t").fetchone()[0] == 0
+
+    # 内层并入外层事务，外层出错时一起回滚
+    with pytest.raises(ValueError):
+        with transaction(conn):
+            with transaction(conn):
+                conn.execute("INSERT INTO t VALUES (1)")
+            assert conn.in_transaction
+            raise ValueError
+    assert conn.execute("SELECT COUNT(*) FROM t").fetchone()[0] == 0
+    conn.close()
@@ -0,0 +1,85 @@
+# tests/test_dedupe.py
+import shutil
+
+from auto_collect.storage import connect, migrate
+from auto_collect.storage.dedupe import LinkFilter, read_generation
+
+
+def saved_filter(db_path, conn):
+    link_filter = LinkFilter(db_path).load(conn)
+    link_filter.save()
+    return link_filter
+
+
+def test_sidecar_reused_when_nothing_changed(db_path, conn, capsys, add_links):
+    add_links(conn, ["https://t.me/one", "https://t.me/two"])
+    saved_filter(db_path, conn)
+    add_links(conn, ["https://t.me/three"])
+    capsys.readouterr()
+
+    link_filter = LinkFilter(db_path).load(conn)
+    assert "从旁路文件装载" in capsys.readouterr().out
+    assert link_filter.might_contain("https://t.me/three")
+
+
+def test_rebuild_after_link_rewritten(db_path, conn, capsys, add_links):
+    add_links(conn, ["https://t.me/one", "https://t.me/two"])
+    saved_filter(db_path, conn)
+    generation = read_generation(conn)
+    # 原地改写不增加链接数也不推进最大 ID，只能靠写入代次发现
+    conn.execute("UPDATE telegram_links_data SET link = 'https://t.me/rewritten' WHERE link = 'https://t.me/one'")
+    assert read_generation(conn) == generation + 1
+    capsys.readouterr()
+
+    link_filter = LinkFilter(db_path).load(conn)
+    assert "从数据库装载" in capsys.readouterr().out
+    assert link_filter.might_contain("https://t.me/rewritten")
+
+
+def test_catch_up_rebuilds_after_rewrite(db_path, conn, add_links):
+    add_links(conn, ["https://t.me/one"])
+    link_filter = LinkFilter(db_path).load(conn)
+    conn.execute("UPDATE telegram_links_data SET link = 'https://t.me/rewritten' WHERE link = 'https://t.me/one'")
+    link_filter.catch_up(conn)
+    assert link_filter.might_contain("https://t.me/rewritten")
+    assert link_filter.generation == read_generation(conn)
+
+
+def test_rebuild_for_other_database_file(db_path, conn, tmp_path, capsys, add_links):
+    add_links(conn, ["https://t.me/one", "https://t.me/two"])
+    saved_filter(db_path, conn)
+
+    # 另一个库的 ID 与链接数都一样，只是链接不同
+    other = str(tmp_path / "other.db")
+    other_conn = connect(other)
+    migrate(other_conn)
+    add_links(other_conn, ["https://t.me/alpha", "https://t.me/beta"])
+    other_conn.close()
+    conn.close()
+    shutil.copy(other, db_path)
+    capsys.readouterr()
+
+    conn = connect(db_path)
+    link_filter = LinkFilter(db_path).load(conn)
+    conn.close()
+    assert "从数据库装载" in capsys.readouterr().out
+    assert link_filter.might_contain("https://t.me/alpha")
+
+
+def test_rebuild_after_restore_from_backup(db_path, conn, tmp_path, capsys, add_links):
+    add_links(conn, ["https://t.me/one"])
+    backup = str(tmp_path / "backup.db")
+    conn.execute("VACUUM INTO ?", (backup,))
+    add_links(conn, ["https://t.me/two"])
+    saved_filter(db_path, conn)
+    conn.close()
+
+    # 从备份恢复后 ID 2 分给了另一个链接，写入代次与最大 ID 都对得上，只有水位处的链接不同
+    shutil.copy(backup, db_path)
+    conn = connect(db_path)
+    add_links(conn, ["https://t.me/after_restore"])
+    capsys.readouterr()
+    link_filter = LinkFilter(db_path).load(conn)
+    conn.close()
+    assert "从数据库装载" in capsys.readouterr().out
+    assert link_filter.might_contain("https://t.me/after_restore")
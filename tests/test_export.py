@@ -0,0 +1,81 @@
+# tests/test_export.py
+import gzip
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from auto_collect.storage import transaction
+from auto_collect.storage.export import build_export_query, export_links
+
+
+EXPORT_SCRIPT = Path(__file__).parent.parent / "auto_collect" / "storage" / "export.py"
+
+
+def test_compression_aliases(db_path, conn, tmp_path, add_links):
+    add_links(conn, ["https://t.me/group_one", "https://t.me/group_two"])
+    out = tmp_path / "links.jsonl"
+    # 文件名没有 .gz，压缩方式只来自参数的简写
+    assert export_links(db_path, str(out), compression="gz") == 2
+    with gzip.open(out, "rt", encoding="utf-8") as f:
+        assert sorted(json.loads(line)["link"] for line in f) == ["https://t.me/group_one", "https://t.me/group_two"]
+
+    with pytest.raises(ValueError):
+        export_links(db_path, str(tmp_path / "links.csv"), compression="zst")
+
+
+def test_parquet_compression_alias(db_path, conn, tmp_path, add_links):
+    pq = pytest.importorskip("pyarrow.parquet")
+    add_links(conn, ["https://t.me/group_one"])
+    out = tmp_path / "links.parquet"
+    assert export_links(db_path, str(out), compression="zst") == 1
+    assert pq.ParquetFile(out).metadata.row_group(0).column(0).compression == "ZSTD"
+
+
+def test_cli_normalizes_compression(db_path, conn, tmp_path, add_links):
+    add_links(conn, ["https://t.me/group_one"])
+    out = tmp_path / "links.csv"
+    subprocess.run([sys.executable, str(EXPORT_SCRIPT), str(out), "--db", db_path, "--compression", "gz"],
+                   check=True, capture_output=True)
+    with gzip.open(out, "rt", encoding="utf-8") as f:
+        assert "https://t.me/group_one" in f.read()
+
+    bad = subprocess.run([sys.executable, str(EXPORT_SCRIPT), str(out), "--db", db_path, "--compression", "rar"],
+                         capture_output=True, text=True)
+    assert bad.returncode == 2 and "rar" in bad.stderr
+
+
+@pytest.mark.parametrize("filters", [
+    {},
+    {"since": "2024-01-01", "until": "2025-01-01"},
+    {"status": "alive"},
+    {"status": "unchecked"},
+    {"keyword": "airdrop"},
+    {"link_contains": "group", "status": "alive", "since": "2024-01-01"},
+])
+def test_export_streams_without_sorting(conn, filters):
+    # 过滤条件不会让导出先把命中行放进临时 B 树排序
+    sql, params = build_export_query(conn, **filters)
+    plan = [row[-1] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+    assert not [detail for detail in plan if "TEMP B-TREE" in detail]
+
+
+def test_filtered_export_order_and_status(db_path, conn, tmp_path, add_links):
+    add_links(conn, ["https://t.me/group_one", "https://t.me/group_two"], keyword="airdrop")
+    add_links(conn, ["https://t.me/other_one"], keyword="crypto")
+    add_links(conn, ["https://t.me/group_three"], keyword="airdrop")
+    with transaction(conn):
+        conn.execute("INSERT INTO link_status (link_id, status) "
+                     "SELECT id, 'alive' FROM telegram_links WHERE link = 'https://t.me/group_two'")
+
+    def exported(**filters):
+        out = tmp_path / "links.jsonl"
+        export_links(db_path, str(out), **filters)
+        return [json.loads(line)["link"] for line in out.read_text(encoding="utf-8-sig").splitlines()]
+
+    assert exported(keyword="airdrop") == ["https://t.me/group_one", "https://t.me/group_two",
+                                           "https://t.me/group_three"]
+    assert exported(link_contains="group", status="alive") == ["https://t.me/group_two"]
+    assert exported(keyword="airdrop", status="unchecked") == ["https://t.me/group_one", "https://t.me/group_three"]
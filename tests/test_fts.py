@@ -0,0 +1,54 @@
+# tests/test_fts.py
+"""三元组索引的搜索结果与 LIKE 一致，且随链接的写入、改写、删除保持同步"""
+import pytest
+
+from auto_collect.storage import search_links, transaction
+from auto_collect.storage.fts import build_filter, has_fts
+
+QUERIES = [
+    {"keyword": "airdrop"},
+    {"keyword": "AIRDROP"},
+    {"keyword": "空投"},
+    {"keyword": "ai"},                      # 短于 3 个字符，退回 LIKE
+    {"link_contains": "group"},
+    {"link_contains": "_0"},
+    {"link_contains": 'say"hi'},
+    {"keyword": "crypto", "link_contains": "news"},
+    {"keyword": "nothing_matches"},
+]
+
+
+@pytest.fixture
+def links(conn, add_links):
+    add_links(conn, ["https://t.me/group_01", "https://t.me/Group_News"], keyword="Airdrop 2024")
+    add_links(conn, ["https://t.me/crypto_news", "https://t.me/crypto_chat"], keyword="crypto")
+    add_links(conn, ["https://t.me/cn_group_02"], keyword="空投群")
+    add_links(conn, ['https://t.me/say"hi'], keyword="misc")
+    return conn
+
+
+def found(conn, use_fts, **query) -> set:
+    return {row[1] for row in search_links(conn, use_fts=use_fts, **query)}
+
+
+@pytest.mark.parametrize("query", QUERIES)
+def test_match_returns_the_same_rows_as_like(links, query):
+    assert has_fts(links)
+    assert found(links, True, **query) == found(links, False, **query)
+
+
+def test_short_terms_fall_back_to_like():
+    from_sql, where, params = build_filter(keyword="ai", link_contains="group")
+    assert from_sql.startswith("telegram_links_fts")
+    assert where == ["telegram_links_fts MATCH ?", "l.keyword LIKE ?"]
+    assert params == ['link : "group"', "%ai%"]
+
+
+def test_index_follows_rewrites_and_deletes(links):
+    with transaction(links):
+        links.execute("UPDATE telegram_links SET keyword = 'giveaway' WHERE link = 'https://t.me/crypto_chat'")
+        links.execute("DELETE FROM telegram_links WHERE link = 'https://t.me/crypto_news'")
+    for query in ({"keyword": "crypto"}, {"keyword": "giveaway"}, {"link_contains": "news"}):
+        assert found(links, True, **query) == found(links, False, **query)
+    assert found(links, True, keyword="giveaway") == {"https://t.me/crypto_chat"}
+    assert found(links, True, keyword="crypto") == set()
@@ -0,0 +1,120 @@
+# tests/test_link_validator.py
+"""用本地模拟的 t.me 预览页检测存活状态：存活、失效、429 限流、并发上限与下次检测时间"""
+import asyncio
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from auto_collect.crawler.link_validator import (ALIVE_TTL, DEAD_TTL, TIME_FORMAT, LinkValidator, RateLimiter,
+                                                 utcnow)
+
+ALIVE_PAGE = b'''<html><body><div class="tgme_page_title"><span>Alpha Channel</span></div>
+<div class="tgme_page_extra">1 234 subscribers</div></body></html>'''
+RETRY_AFTER = 7200  # 比第一次失败的重试间隔(1 小时)长
+
+
+class PreviewServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), PreviewHandler)
+        self.lock = threading.Lock()
+        self.active = 0
+        self.max_active = 0
+        self.requests = 0
+
+
+class PreviewHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.active += 1
+            server.requests += 1
+            server.max_active = max(server.max_active, server.active)
+        try:
+            time.sleep(0.05)
+            if self.path.startswith("/alive"):
+                self._reply(200, ALIVE_PAGE)
+            elif self.path.startswith("/limited"):
+                self._reply(429, b"", {"Retry-After": str(RETRY_AFTER)})
+            else:
+                self._reply(404, b"")
+        finally:
+            with server.lock:
+                server.active -= 1
+
+    def _reply(self, status, body, headers=None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def preview_server():
+    srv = PreviewServer()
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    yield srv
+    srv.shutdown()
+    srv.server_close()
+
+
+def parse_time(text):
+    return datetime.strptime(text, TIME_FORMAT)
+
+
+def test_statuses_and_next_check(conn, db_path, preview_server, add_links):
+    names = [f"{kind}_{i:04d}" for kind in ("alive", "dead", "limited") for i in range(4)]
+    add_links(conn, [f"https://t.me/{name}" for name in names])
+    validator = LinkValidator(db_path, base_url=f"http://127.0.0.1:{preview_server.server_port}",
+                              concurrency=3, rate=1000, batch_size=5)
+    started = utcnow()
+    counts = validator.run()
+
+    assert counts == {"alive": 4, "dead": 4, "error": 4}
+    assert preview_server.requests == 12
+    assert 1 < preview_server.max_active <= 3
+
+    rows = conn.execute('''
+        SELECT l.link, s.status, s.http_status, s.title, s.members, s.kind, s.fail_count, s.next_check_at
+        FROM link_status s JOIN telegram_links l ON l.id = s.link_id
+    ''').fetchall()
+    assert len(rows) == 12
+    slack = timedelta(minutes=1)
+    for link, status, http_status, title, members, kind, fail_count, next_check_at in rows:
+        delay = parse_time(next_check_at) - started
+        if "alive" in link:
+            assert (status, http_status, title, members, kind) == ("alive", 200, "Alpha Channel", 1234, "channel")
+            assert abs(delay - ALIVE_TTL) < slack
+        elif "dead" in link:
+            assert (status, http_status, fail_count) == ("dead", 404, 0)
+            assert abs(delay - DEAD_TTL) < slack
+        else:
+            # 429 按 Retry-After 推迟，而不是第一次失败的 1 小时
+            assert (status, http_status, fail_count) == ("error", 429, 1)
+            assert abs(delay - timedelta(seconds=RETRY_AFTER)) < slack
+
+    # 刚检测过的都没有过期，再运行一次不会发请求
+    assert LinkValidator(db_path, base_url=f"http://127.0.0.1:{preview_server.server_port}").run() == \
+        {"alive": 0, "dead": 0, "error": 0}
+    assert preview_server.requests == 12
+
+
+def test_rate_limiter_spaces_requests():
+    async def acquire_all(limiter, n):
+        started = time.monotonic()
+        for _ in range(n):
+            await limiter.acquire()
+        return time.monotonic() - started
+
+    # 桶里一开始有 2 个令牌，之后每 0.05 秒一个
+    elapsed = asyncio.run(acquire_all(RateLimiter(rate=20, burst=2), 12))
+    assert 0.45 <= elapsed < 1.5
@@ -0,0 +1,19 @@
+# tests/test_log_console.py
+import pytest
+
+pytest.importorskip("PyQt6")
+
+from auto_collect.ui.log_console import DEBUG, ERROR, INFO, WARNING, classify
+
+
+@pytest.mark.parametrize("line, level", [
+    ("[DB] 成功保存新链接: https://t.me/new_one", INFO),
+    ("[Worker] 本轮总共发现 12 个链接", INFO),
+    ("[Worker] 第 3 次滚动", DEBUG),
+    ("[Worker] 本次滚动记录 5 次链接出现，其中新链接 1 个", DEBUG),
+    ("[Worker] 当前本轮已发现 8 个链接，总共保存 2 个到数据库", DEBUG),
+    ("[Worker] ⚠ 连续 3 次没有新推文", WARNING),
+    ("[DB] 保存链接失败: database is locked", ERROR),
+])
+def test_classify(line, level):
+    assert classify(line) == level
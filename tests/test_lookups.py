@@ -0,0 +1,94 @@
+# tests/test_lookups.py
+"""source / keyword 查找表：同名视图、INSTEAD OF 触发器与旧数据的迁移"""
+from auto_collect.storage import connect, migrate, transaction
+from auto_collect.storage.lookups import KEYWORD_STATS_TABLE, KEYWORDS_TABLE, LINKS_TABLE, SOURCES_TABLE
+
+
+def lookup_values(conn, table) -> set:
+    column = "keyword" if table == KEYWORDS_TABLE else "source"
+    return {row[0] for row in conn.execute(f"SELECT {column} FROM {table}")}
+
+
+def test_old_rows_move_into_lookup_tables(db_path, migrate_to):
+    conn = connect(db_path)
+    migrate_to(conn, 5)
+    conn.executemany("INSERT INTO telegram_links (id, link, source, keyword, created_at) VALUES (?, ?, ?, ?, ?)", [
+        (3, "https://t.me/alpha", "https://x.com/search?q=a", "airdrop", "2024-01-01 00:00:00"),
+        (7, "https://t.me/beta", "https://x.com/search?q=a", None, "2024-01-02 00:00:00"),
+    ])
+    conn.execute("INSERT INTO link_sightings (link_id, keyword, source, tweet_id, seen_at) "
+                 "VALUES (3, 'crypto', 'https://x.com/search?q=c', '1', '2024-01-03 00:00:00')")
+    conn.executemany("INSERT INTO link_keyword_stats (link_id, keyword, sighting_count, first_seen, last_seen) "
+                     "VALUES (?, ?, ?, ?, ?)", [
+                         (3, "airdrop", 2, "2024-01-01 00:00:00", "2024-01-02 00:00:00"),
+                         (3, "nft", 1, "2024-01-03 00:00:00", "2024-01-03 00:00:00"),
+                     ])
+    links = conn.execute("SELECT id, link, source, keyword, created_at FROM telegram_links ORDER BY id").fetchall()
+    sightings = conn.execute("SELECT link_id, keyword, source, tweet_id, seen_at FROM link_sightings").fetchall()
+    stats = conn.execute("SELECT * FROM link_keyword_stats ORDER BY keyword").fetchall()
+
+    migrate(conn)
+    # 视图的列和内容与迁移前一致
+    assert conn.execute("SELECT id, link, source, keyword, created_at FROM telegram_links ORDER BY id").fetchall() \
+        == links
+    assert conn.execute("SELECT link_id, keyword, source, tweet_id, seen_at FROM link_sightings").fetchall() \
+        == sightings
+    assert conn.execute("SELECT * FROM link_keyword_stats ORDER BY keyword").fetchall() == stats
+    # 每个字符串只在查找表里存一次，数据表只存 ID
+    assert lookup_values(conn, KEYWORDS_TABLE) == {"airdrop", "crypto", "nft"}
+    assert lookup_values(conn, SOURCES_TABLE) == {"https://x.com/search?q=a", "https://x.com/search?q=c"}
+    assert [row[1] for row in conn.execute(f"PRAGMA table_info({KEYWORD_STATS_TABLE})")] == \
+        ["link_id", "keyword_id", "sighting_count", "first_seen", "last_seen"]
+    # 已用过的链接 ID 不会被新链接复用
+    with transaction(conn):
+        conn.execute("INSERT INTO telegram_links (link) VALUES ('https://t.me/gamma')")
+    assert conn.execute("SELECT id FROM telegram_links WHERE link = 'https://t.me/gamma'").fetchone()[0] == 8
+    conn.close()
+
+
+def test_write_links_through_the_view(conn):
+    with transaction(conn):
+        conn.execute("INSERT INTO telegram_links (link, source, keyword) VALUES ('https://t.me/alpha', 's1', 'kw1')")
+    link_id, keyword_id = conn.execute(f"SELECT id, keyword_id FROM {LINKS_TABLE}").fetchone()
+    assert conn.execute(f"SELECT keyword FROM {KEYWORDS_TABLE} WHERE id = ?", (keyword_id,)).fetchone() == ("kw1",)
+    assert conn.execute("SELECT sighting_count FROM telegram_links").fetchone() == (0,)
+
+    with transaction(conn):
+        conn.execute("UPDATE telegram_links SET keyword = 'kw2', source = NULL WHERE id = ?", (link_id,))
+    assert conn.execute("SELECT link, source, keyword FROM telegram_links").fetchall() == \
+        [("https://t.me/alpha", None, "kw2")]
+    # 查找表中的旧值保留，ID 不变
+    assert lookup_values(conn, KEYWORDS_TABLE) == {"kw1", "kw2"}
+
+    with transaction(conn):
+        conn.execute("INSERT INTO link_sightings (link_id, keyword, source, tweet_id, seen_at) "
+                     "VALUES (?, 'kw2', 's2', '9', '2024-01-01 00:00:00')", (link_id,))
+        conn.execute("INSERT INTO link_keyword_stats (link_id, keyword, sighting_count, first_seen, last_seen) "
+                     "VALUES (?, 'kw3', 1, '2024-01-01 00:00:00', '2024-01-01 00:00:00')", (link_id,))
+    assert conn.execute("SELECT keyword, source, tweet_id FROM link_sightings").fetchall() == [("kw2", "s2", "9")]
+
+    # 删除链接时出现记录和按关键词的聚合一并删除
+    with transaction(conn):
+        conn.execute("DELETE FROM telegram_links WHERE id = ?", (link_id,))
+    for table in ("telegram_links", "link_sightings", "link_keyword_stats"):
+        assert conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0] == 0
+
+
+def test_write_keyword_stats_through_the_view(conn, add_links):
+    add_links(conn, ["https://t.me/alpha"], keyword="kw1")
+    link_id = conn.execute("SELECT id FROM telegram_links").fetchone()[0]
+    with transaction(conn):
+        conn.execute("INSERT INTO link_keyword_stats (link_id, keyword, sighting_count, first_seen, last_seen) "
+                     "VALUES (?, 'kw2', 5, '2024-01-01 00:00:00', '2024-01-02 00:00:00')", (link_id,))
+        conn.execute("UPDATE link_keyword_stats SET keyword = 'kw3', sighting_count = 6 WHERE keyword = 'kw2'")
+    assert conn.execute("SELECT keyword, sighting_count FROM link_keyword_stats ORDER BY keyword").fetchall() == \
+        [("kw1", 1), ("kw3", 6)]
+    assert conn.execute(f"SELECT COUNT(*) FROM {KEYWORD_STATS_TABLE}").fetchone()[0] == 2
+
+    with transaction(conn):
+        conn.execute("DELETE FROM link_keyword_stats WHERE keyword = 'kw1'")
+    assert conn.execute("SELECT keyword FROM link_keyword_stats").fetchall() == [("kw3",)]
+    # 按关键词过滤先查查找表，再走 keyword_id 索引
+    plan = " ".join(row[-1] for row in conn.execute(
+        "EXPLAIN QUERY PLAN SELECT link_id FROM link_keyword_stats WHERE keyword = 'kw3'"))
+    assert "SCAN" not in plan
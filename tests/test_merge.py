@@ -0,0 +1,50 @@
+# tests/test_merge.py
+import sqlite3
+
+from auto_collect.storage import SQLiteRepository, get_writer
+from auto_collect.storage.merge import merge_databases
+
+
+def make_results_db(path, links):
+    """旧 storage.py 的 results.db"""
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE links (id INTEGER PRIMARY KEY, keyword TEXT, link TEXT, source TEXT)")
+    conn.executemany("INSERT INTO links (keyword, link, source) VALUES ('other', ?, 'src')", [(l,) for l in links])
+    conn.commit()
+    conn.close()
+
+
+def test_merge_goes_through_the_writer(db_path, tmp_path):
+    repo = SQLiteRepository(db_path)
+    repo.save_links([{"link": "https://t.me/local_one", "keyword": "kw", "source": "s"}])
+    writer = get_writer(db_path)
+    assert writer.link_filter is not None
+
+    source = str(tmp_path / "results.db")
+    make_results_db(source, ["t.me/Merged_One", "https://t.me/merged_two", "https://t.me/local_one", "bogus"])
+    summary = merge_databases(db_path, [source])[source]
+    assert summary == {"scanned": 4, "merged": 2, "duplicate": 1, "rejected": 1}
+
+    # 合并进来的链接已补进写线程的过滤器，再抓到时按已有链接处理
+    assert writer.link_filter.might_contain("https://t.me/merged_one")
+    assert writer.link_filter.watermark == repo.conn.execute("SELECT MAX(id) FROM telegram_links").fetchone()[0]
+    assert repo.save_links([{"link": "https://t.me/merged_one", "keyword": "kw", "source": "s"}]) == []
+    assert repo.count_links() == 3
+
+    # 合并后写线程照常工作，查找表缓存里没有失效的 ID
+    assert repo.save_links([{"link": "https://t.me/fresh_one", "keyword": "other", "source": "src"}]) == \
+        ["https://t.me/fresh_one"]
+    assert repo.conn.execute("SELECT keyword, source FROM telegram_links WHERE link = 'https://t.me/fresh_one'") \
+        .fetchone() == ("other", "src")
+
+
+def test_merge_waits_for_queued_writes(db_path, tmp_path):
+    repo = SQLiteRepository(db_path)
+    source = str(tmp_path / "results.db")
+    make_results_db(source, ["https://t.me/merged_one"])
+    writer = get_writer(db_path)
+    pending = writer.submit_sightings([{"link": "https://t.me/merged_one", "keyword": "kw", "source": "s"}])
+    summary = merge_databases(db_path, [source])[source]
+    # 排在前面的写入先提交，合并时链接已存在
+    assert pending.result() == ["https://t.me/merged_one"]
+    assert summary["merged"] == 0 and summary["duplicate"] == 1
@@ -0,0 +1,46 @@
+# tests/test_migrations.py
+import pytest
+
+from auto_collect.storage import check_query_plans, connect, migrate, schema_version
+from auto_collect.storage.migrations import HOT_QUERIES, LATEST_VERSION, MIGRATIONS
+
+
+def schema(conn) -> list:
+    return conn.execute("SELECT type, name, sql FROM sqlite_master ORDER BY type, name").fetchall()
+
+
+def test_fresh_database_reaches_latest_version(conn):
+    assert LATEST_VERSION == 11
+    assert [version for version, _, _ in MIGRATIONS] == list(range(1, LATEST_VERSION + 1))
+    assert schema_version(conn) == LATEST_VERSION
+    # 检测状态表和作者队列表也由迁移建立，各模块不再自己建表
+    tables = {row[1] for row in schema(conn) if row[0] == "table"}
+    assert {"link_status", "author_frontier", "keyword_daily_stats", "link_generation"} <= tables
+
+
+def test_migrate_twice_is_a_no_op(conn, add_links):
+    add_links(conn, ["https://t.me/alpha_one", "https://t.me/beta_one"])
+    before = schema(conn)
+    changes = conn.total_changes
+    assert migrate(conn) == LATEST_VERSION
+    assert schema(conn) == before
+    assert conn.total_changes == changes
+    assert conn.execute("SELECT COUNT(*) FROM telegram_links").fetchone()[0] == 2
+
+
+def test_upgrade_keeps_existing_links(db_path, migrate_to):
+    conn = connect(db_path)
+    migrate_to(conn, 1)
+    conn.execute("INSERT INTO telegram_links (link, source, keyword) VALUES ('https://t.me/Alpha_One', 's', 'kw')")
+    conn.execute("INSERT INTO telegram_links (link, source, keyword) VALUES ('t.me/alpha_one', 's', 'kw')")
+    assert migrate(conn) == LATEST_VERSION
+    # 版本 3 合并规范化后重复的链接
+    assert conn.execute("SELECT link, source, keyword FROM telegram_links").fetchall() == \
+        [("https://t.me/alpha_one", "s", "kw")]
+    conn.close()
+
+
+@pytest.mark.parametrize("name", [name for name, _, _ in HOT_QUERIES])
+def test_hot_query_uses_an_index(conn, name, add_links):
+    add_links(conn, [f"https://t.me/channel_{i:04d}" for i in range(50)])
+    assert [detail for query, detail in check_query_plans(conn) if query == name] == []
@@ -0,0 +1,162 @@
+# tests/test_models.py
+"""表格模型：链接表按需分页、由存储排序；抓取结果表按链接去重、一批只通知视图一次"""
+import pytest
+
+pytest.importorskip("PyQt6")
+
+from PyQt6.QtCore import QCoreApplication, QModelIndex, Qt
+
+from auto_collect.storage import MemoryRepository
+from auto_collect.ui.models import LinkTableModel, ResultsTableModel
+
+NAMES = [f"alpha_{i:02d}" for i in range(8)] + [f"beta_{i:02d}" for i in range(4)]
+
+
+class CountingRepository(MemoryRepository):
+    """记录取页次数，确认模型只在需要时才向存储要数据"""
+
+    def __init__(self):
+        super().__init__()
+        self.page_calls = 0
+
+    def get_links_page(self, *args, **kwargs):
+        self.page_calls += 1
+        return super().get_links_page(*args, **kwargs)
+
+
+@pytest.fixture
+def app():
+    return QCoreApplication.instance() or QCoreApplication([])
+
+
+@pytest.fixture
+def repo():
+    repo = CountingRepository()
+    for i, name in enumerate(NAMES):
+        repo.save_links([{"link": f"https://t.me/{name}", "source": "s", "keyword": name.split("_")[0],
+                          "seen_at": f"2024-05-01 08:00:{i:02d}"}])
+    return repo
+
+
+def links(model) -> list:
+    return [model.data(model.index(row, 1)) for row in range(model.rowCount())]
+
+
+def fetch_all(model) -> int:
+    pages = 0
+    while model.canFetchMore():
+        model.fetchMore()
+        pages += 1
+    return pages
+
+
+def test_only_first_page_is_read_until_fetch_more(app, repo):
+    model = LinkTableModel(page_size=5)
+    assert model.rowCount() == 0 and not model.canFetchMore()
+    changed = []
+    model.rows_changed.connect(lambda: changed.append(model.rowCount()))
+
+    model.set_repository(repo)
+    assert repo.page_calls == 1
+    assert model.rowCount() == 5 and model.canFetchMore()
+    # 默认按创建时间倒序
+    assert links(model) == [f"https://t.me/{name}" for name in reversed(NAMES)][:5]
+    assert model.total_count() == len(NAMES)
+
+    assert fetch_all(model) == 2
+    assert model.rowCount() == len(NAMES) and not model.canFetchMore()
+    assert changed == [5, 10, 12]
+    model.fetchMore()
+    assert repo.page_calls == 3
+    assert model.rowCount(model.index(0, 0)) == 0
+    assert model.data(model.index(0, 0)) == str(model.link_id(0))
+    assert model.headerData(1, Qt.Orientation.Horizontal) == "链接"
+
+
+def test_sort_goes_to_storage_and_rejects_unindexed_columns(app, repo):
+    model = LinkTableModel(repo, page_size=5)
+    model.reload()
+    rejected = []
+    model.sort_rejected.connect(lambda: rejected.append(True))
+    resets = []
+    model.modelReset.connect(lambda: resets.append(True))
+
+    model.sort(1, Qt.SortOrder.AscendingOrder)
+    assert (model.order_by, model.descending) == ("link", False)
+    assert len(resets) == 1 and model.rowCount() == 5
+    fetch_all(model)
+    assert links(model) == sorted(f"https://t.me/{name}" for name in NAMES)
+
+    # 同样的排序不重新加载；来源、关键字列没有索引，排序被拒绝且保持原样
+    model.sort(1, Qt.SortOrder.AscendingOrder)
+    for column in (2, 3):
+        model.sort(column, Qt.SortOrder.DescendingOrder)
+    assert len(resets) == 1 and len(rejected) == 2
+    assert model.sort_column() == 1 and model.sort_order() == Qt.SortOrder.AscendingOrder
+    assert model.rowCount() == len(NAMES)
+
+
+def test_filter_reloads_and_remove_ids_keeps_the_rest(app, repo):
+    model = LinkTableModel(repo, page_size=3)
+    model.set_filter(keyword="beta")
+    assert model.total_count() == 4
+    fetch_all(model)
+    assert links(model) == [f"https://t.me/beta_{i:02d}" for i in (3, 2, 1, 0)]
+
+    model.set_filter()
+    fetch_all(model)
+    assert model.rowCount() == len(NAMES)
+
+    removed = []
+    model.rowsRemoved.connect(lambda parent, first, last: removed.append((first, last)))
+    ids = model.ids_for_rows([0, 1, 2, 5, 99])
+    assert len(ids) == 4
+    assert model.remove_ids(ids) == 4
+    # 连续的行一次移除，从后往前
+    assert removed == [(5, 5), (0, 2)]
+    assert model.rowCount() == len(NAMES) - 4
+    assert not set(ids) & {model.link_id(row) for row in range(model.rowCount())}
+    assert model.remove_ids([]) == 0
+    assert model.rowCount(QModelIndex()) == len(NAMES) - 4
+
+
+def test_results_dedupe_within_and_across_batches(app):
+    model = ResultsTableModel()
+    inserted = []
+    model.rowsInserted.connect(lambda parent, first, last: inserted.append((first, last)))
+
+    assert model.add_results([
+        ("kw", "https://t.me/alpha_00", "https://x.com/a/status/1"),
+        ("kw", "https://t.me/alpha_01", "https://x.com/a/status/2"),
+        ("kw", "https://t.me/alpha_00", "https://x.com/a/status/3"),   # 本批内重复
+        ("kw", "", "https://x.com/a/status/4"),                          # 空链接
+    ]) == 2
+    assert model.add_results([
+        ("other", "https://t.me/alpha_01", "s"),                         # 已显示过
+        ("other", "https://t.me/beta_00", "s"),
+        ("other", "https://t.me/beta_01", "s"),
+    ]) == 2
+    # 全是重复的一批不通知视图
+    assert model.add_results([("kw", "https://t.me/beta_00", "s")]) == 0
+    assert model.add_results(iter(())) == 0
+
+    # 每批只发一次 rowsInserted
+    assert inserted == [(0, 1), (2, 3)]
+    assert model.rowCount() == 4 and model.columnCount() == 3
+    assert [model.data(model.index(row, 1)) for row in range(4)] == \
+        ["https://t.me/alpha_00", "https://t.me/alpha_01", "https://t.me/beta_00", "https://t.me/beta_01"]
+    # 先到的来源与关键字保留
+    assert model.data(model.index(0, 2)) == "https://x.com/a/status/1"
+    assert model.data(model.index(1, 0)) == "kw"
+    assert model.row_of("https://t.me/beta_01") == 3
+    assert model.row_of("https://t.me/missing") is None
+    assert model.contains("https://t.me/alpha_01")
+
+
+def test_results_clear_forgets_links(app):
+    model = ResultsTableModel()
+    model.add_results([("kw", "https://t.me/alpha_00", "s")])
+    model.clear()
+    assert model.rowCount() == 0 and not model.contains("https://t.me/alpha_00")
+    assert model.add_results([("kw", "https://t.me/alpha_00", "s")]) == 1
+    assert model.row_of("https://t.me/alpha_00") == 0
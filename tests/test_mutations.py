@@ -0,0 +1,72 @@
+# tests/test_mutations.py
+import pytest
+
+from auto_collect.storage import transaction
+from auto_collect.storage.mutations import delete_links_where
+
+
+def remaining(conn) -> set:
+    return {row[0] for row in conn.execute("SELECT link FROM telegram_links")}
+
+
+def link_id(conn, link) -> int:
+    return conn.execute("SELECT id FROM telegram_links WHERE link = ?", (link,)).fetchone()[0]
+
+
+@pytest.fixture
+def links(conn, add_links):
+    add_links(conn, ["https://t.me/alpha_one", "https://t.me/alpha_two"], keyword="airdrop")
+    add_links(conn, ["https://t.me/beta_one", "https://t.me/beta_two"], keyword="crypto")
+    return conn
+
+
+def mark(conn, statuses):
+    with transaction(conn):
+        conn.executemany("INSERT INTO link_status (link_id, status) VALUES (?, ?)",
+                         [(link_id(conn, link), status) for link, status in statuses.items()])
+
+
+def delete(conn, **kwargs) -> list:
+    with transaction(conn):
+        return delete_links_where(conn, **kwargs)
+
+
+def test_unchecked_before_any_check_deletes_everything(links):
+    deleted = delete(links, status="unchecked")
+    assert len(deleted) == 4
+    assert remaining(links) == set()
+
+
+def test_other_status_before_any_check_deletes_nothing(links):
+    assert delete(links, status="dead") == []
+    assert len(remaining(links)) == 4
+
+
+def test_keyword_only(links):
+    assert len(delete(links, keyword="airdrop", exact_keyword=True)) == 2
+    assert remaining(links) == {"https://t.me/beta_one", "https://t.me/beta_two"}
+
+
+def test_keyword_and_unchecked_before_any_check(links):
+    assert len(delete(links, keyword="crypto", status="unchecked")) == 2
+    assert remaining(links) == {"https://t.me/alpha_one", "https://t.me/alpha_two"}
+
+
+def test_status_only(links):
+    mark(links, {"https://t.me/alpha_one": "dead", "https://t.me/beta_one": "alive"})
+    assert len(delete(links, status="dead")) == 1
+    assert len(delete(links, status="unchecked")) == 2
+    assert remaining(links) == {"https://t.me/beta_one"}
+    # 附表中被删链接的状态一并清理
+    assert links.execute("SELECT COUNT(*) FROM link_status").fetchone()[0] == 1
+
+
+def test_keyword_and_status(links):
+    mark(links, {"https://t.me/alpha_one": "dead", "https://t.me/beta_one": "dead"})
+    assert len(delete(links, keyword="crypto", status="dead")) == 1
+    assert remaining(links) == {"https://t.me/alpha_one", "https://t.me/alpha_two", "https://t.me/beta_two"}
+
+
+def test_requires_a_condition(links):
+    with pytest.raises(ValueError):
+        delete(links)
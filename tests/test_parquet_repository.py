@@ -0,0 +1,97 @@
+# tests/test_parquet_repository.py
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from auto_collect.storage.parquet_repository import ParquetRepository
+
+
+def items(names, keyword="kw"):
+    return [{"link": f"https://t.me/{name}", "source": "test", "keyword": keyword} for name in names]
+
+
+def links(repo, **kwargs) -> set:
+    return {row["link"] for row in repo.iter_links(**kwargs)}
+
+
+@pytest.fixture
+def repo(tmp_path):
+    repo = ParquetRepository(str(tmp_path / "links.parquet"), flush_rows=3)
+    repo.save_links(items(["alpha_one", "alpha_two"], keyword="airdrop"))
+    repo.save_links(items(["beta_one", "beta_two"], keyword="crypto"))
+    return repo
+
+
+def test_delete_links_survives_reopen(repo):
+    ids = {row["link"]: row["id"] for row in repo.iter_links()}
+    assert repo.delete_links([ids["https://t.me/alpha_one"], 999]) == [ids["https://t.me/alpha_one"]]
+    assert repo.count_links() == 3
+    assert not repo.link_exists("https://t.me/alpha_one")
+    repo.close()
+
+    reopened = ParquetRepository(str(repo.directory))
+    assert links(reopened) == {"https://t.me/alpha_two", "https://t.me/beta_one", "https://t.me/beta_two"}
+    # 被删除的链接再次出现时是新链接，分到新的 ID
+    assert reopened.save_links(items(["alpha_one"])) == ["https://t.me/alpha_one"]
+    assert reopened.count_links() == 4
+    assert max(row["id"] for row in reopened.iter_links()) == 5
+
+
+def test_delete_links_where(repo):
+    with pytest.raises(ValueError):
+        repo.delete_links_where()
+    assert repo.delete_links_where(status="dead") == []
+    assert len(repo.delete_links_where(keyword="airdrop", exact_keyword=True)) == 2
+    assert len(repo.delete_links_where(keyword="CRY", link_contains="two")) == 1
+    assert links(repo) == {"https://t.me/beta_one"}
+    assert len(repo.delete_links_where(status="unchecked")) == 1
+    assert repo.count_links() == 0
+
+
+def test_deleted_sightings_are_hidden_and_compacted(repo):
+    repo.delete_links_where(keyword="crypto")
+    assert repo.to_table("sightings").num_rows == 2
+    repo.compact()
+    assert list((repo.directory / "deleted").glob("*.parquet")) == []
+    assert len(list((repo.directory / "links").glob("*.parquet"))) == 1
+    assert links(ParquetRepository(str(repo.directory))) == {"https://t.me/alpha_one", "https://t.me/alpha_two"}
+
+
+def test_clear_database_keeps_stats(repo):
+    repo.record_crawl_time("airdrop", 30)
+    assert repo.clear_database() == 4
+    assert repo.count_links() == 0
+    reopened = ParquetRepository(str(repo.directory))
+    assert reopened.count_links() == 0
+    totals = {t["keyword"]: t for t in reopened.get_keyword_totals()}
+    assert totals["airdrop"]["new_links"] == 2
+    assert totals["airdrop"]["links_per_minute"] == 4.0
+
+
+def test_daily_stats_count_duplicates(repo):
+    repo.save_links(items(["alpha_one", "gamma_one"], keyword="airdrop"))
+    repo.close()
+    rows = ParquetRepository(str(repo.directory)).get_daily_stats(keyword="airdrop")
+    assert len(rows) == 1
+    assert (rows[0]["new_links"], rows[0]["duplicates"]) == (3, 1)
+
+
+def test_same_tweet_is_not_counted_again_after_reopen(repo):
+    tweet = {"link": "https://t.me/alpha_one", "source": "test", "keyword": "airdrop", "tweet_id": 42}
+    repo.save_links([tweet, dict(tweet, link="https://t.me/beta_one", tweet_id="7")])
+    repo.close()
+
+    reopened = ParquetRepository(str(repo.directory))
+    # 推文 ID 不论传入整数还是字符串都按同一条推文去重
+    reopened.save_links([dict(tweet, tweet_id="42"), dict(tweet, tweet_id=43)])
+    sightings = reopened.to_table("sightings").to_pylist()
+    alpha_id = {row["link"]: row["id"] for row in reopened.iter_links()}["https://t.me/alpha_one"]
+    assert sorted(row["tweet_id"] for row in sightings if row["link_id"] == alpha_id and row["tweet_id"]) == \
+        ["42", "43"]
+
+    # 被删除后重新出现的链接分到新 ID，原来的推文记录不影响它
+    reopened.delete_links([alpha_id])
+    reopened.close()
+    again = ParquetRepository(str(repo.directory))
+    assert again.save_links([tweet]) == ["https://t.me/alpha_one"]
+    assert len([row for row in again.to_table("sightings").to_pylist() if row["tweet_id"] == "42"]) == 1
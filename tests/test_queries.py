@@ -0,0 +1,74 @@
+# tests/test_queries.py
+"""键集分页：按游标逐页取回的行与一次性排序的结果一致，各存储后端行为相同"""
+import pytest
+
+from auto_collect.storage import MemoryRepository, SQLiteRepository, transaction
+from auto_collect.storage.queries import SORT_KEYS, count_links
+
+NAMES = [f"{prefix}_{i:02d}" for prefix in ("alpha", "beta") for i in range(12)]
+
+
+@pytest.fixture(params=["sqlite", "memory", "parquet"])
+def repo(request, db_path, tmp_path):
+    if request.param == "sqlite":
+        repo = SQLiteRepository(db_path)
+    elif request.param == "memory":
+        repo = MemoryRepository()
+    else:
+        pytest.importorskip("pyarrow")
+        from auto_collect.storage.parquet_repository import ParquetRepository
+        repo = ParquetRepository(str(tmp_path / "links.parquet"))
+    # 分三批写入：同一批的创建时间可能相同，靠 id 决定先后
+    for start in range(0, len(NAMES), 8):
+        repo.save_links([{"link": f"https://t.me/{name}", "source": "s", "keyword": name.split("_")[0],
+                          "seen_at": f"2024-05-0{start // 8 + 1} 08:00:00"} for name in NAMES[start:start + 8]])
+    return repo
+
+
+def pages(repo, page_size, **kwargs) -> list:
+    rows, cursor, calls = [], None, 0
+    while True:
+        page, cursor = repo.get_links_page(cursor, page_size, **kwargs)
+        calls += 1
+        assert len(page) <= page_size
+        rows.extend(page)
+        if cursor is None:
+            return rows, calls
+
+
+@pytest.mark.parametrize("order_by", list(SORT_KEYS))
+@pytest.mark.parametrize("descending", [True, False])
+def test_cursor_round_trip(repo, order_by, descending):
+    everything, _ = repo.get_links_page(None, 1000, order_by=order_by, descending=descending)
+    keys = [tuple(row[k] for k in SORT_KEYS[order_by]) for row in everything]
+    assert keys == sorted(keys, reverse=descending)
+    assert len(set(keys)) == len(NAMES)
+
+    paged, calls = pages(repo, 5, order_by=order_by, descending=descending)
+    assert paged == everything
+    assert calls == 5
+
+
+def test_filtered_pages(repo):
+    paged, _ = pages(repo, 4, keyword="beta", order_by="link", descending=False)
+    assert [row["link"] for row in paged] == [f"https://t.me/beta_{i:02d}" for i in range(12)]
+    assert repo.count_links(keyword="beta") == 12
+    assert [row["link"] for row in repo.iter_links(page_size=7, link_contains="alpha_1")] == \
+        [f"https://t.me/alpha_{i}" for i in (11, 10)]
+
+
+def test_exact_page_size_has_no_next_cursor(repo):
+    rows, cursor = repo.get_links_page(None, len(NAMES))
+    assert len(rows) == len(NAMES) and cursor is None
+    with pytest.raises(ValueError):
+        repo.get_links_page(None, 10, order_by="keyword")
+
+
+def test_count_cache_sees_new_writes(conn, add_links):
+    add_links(conn, ["https://t.me/alpha_00"])
+    assert count_links(conn) == 1
+    add_links(conn, ["https://t.me/alpha_01"])
+    assert count_links(conn) == 2
+    with transaction(conn):
+        conn.execute("DELETE FROM telegram_links")
+    assert count_links(conn) == 0
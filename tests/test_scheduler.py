@@ -0,0 +1,86 @@
+# tests/test_scheduler.py
+import json
+import random
+
+import pytest
+
+from auto_collect.crawler.scheduler import (NOMINAL_RUN_MINUTES, allocate, count_keyword_links, load_keyword_stats,
+                                            plan, score_keywords, write_report)
+from auto_collect.storage import record_sightings, transaction
+from auto_collect.storage.stats import record_crawl_seconds
+
+
+@pytest.fixture
+def history(conn):
+    """fast: 两天 30 分钟 6 个新链接；slow: 60 分钟 1 个；legacy: 有链接但没有耗时记录"""
+    def sightings(keyword, count, day):
+        return [{"link": f"https://t.me/{keyword}_{day}_{i}", "keyword": keyword, "source": "s",
+                 "seen_at": f"{day} 08:00:00"} for i in range(count)]
+
+    with transaction(conn):
+        record_sightings(conn, sightings("fast", 4, "2024-05-01") + sightings("fast", 2, "2024-05-02"))
+        record_sightings(conn, sightings("slow", 1, "2024-05-01"))
+        record_sightings(conn, sightings("legacy", 3, "2024-04-01") + sightings("legacy", 1, "2024-04-03"))
+        record_crawl_seconds(conn, "fast", 900, day="2024-05-01")
+        record_crawl_seconds(conn, "fast", 900, day="2024-05-02")
+        record_crawl_seconds(conn, "slow", 3600, day="2024-05-01")
+    return conn
+
+
+def test_load_keyword_stats_from_daily_stats(db_path, history):
+    stats = load_keyword_stats(db_path, ["fast", "slow", "legacy", "new"])
+    assert stats == {
+        "fast": {"links": 6, "minutes": 30.0},
+        "slow": {"links": 1, "minutes": 60.0},
+        # 没有耗时记录：按有新链接的天数估算
+        "legacy": {"links": 4, "minutes": 2 * NOMINAL_RUN_MINUTES},
+        "new": {"links": 0, "minutes": 0.0},
+    }
+    assert count_keyword_links(db_path, "fast") == 6
+
+
+def test_ucb_prefers_yield_and_explores_new_keywords():
+    stats = {"fast": {"links": 60, "minutes": 30.0}, "slow": {"links": 1, "minutes": 60.0},
+             "new": {"links": 0, "minutes": 0.0}}
+    scores = score_keywords(stats, "ucb")
+    assert scores["fast"] > scores["slow"]
+    # 从未抓取过的关键词探索项最大，排在低产出关键词之前
+    assert scores["new"] > scores["slow"]
+
+
+def test_thompson_is_reproducible_with_seed():
+    stats = {"fast": {"links": 600, "minutes": 30.0}, "slow": {"links": 1, "minutes": 600.0}}
+    scores = score_keywords(stats, "thompson", rng=random.Random(7))
+    assert scores == score_keywords(stats, "thompson", rng=random.Random(7))
+    assert scores["fast"] > scores["slow"]
+    with pytest.raises(ValueError):
+        score_keywords(stats, "greedy")
+
+
+def test_allocate_floor_and_budget():
+    allocation = allocate({"a": 3.0, "b": 1.0, "c": 0.5}, budget_minutes=20, min_minutes=2)
+    assert sum(allocation.values()) == pytest.approx(20)
+    assert allocation["a"] == pytest.approx(2 + 14 * 3 / 4.5)
+    assert min(allocation.values()) >= 2
+    # 预算只够两个保底：只保留分数最高的两个，全部时间分给它们
+    allocation = allocate({"a": 3.0, "b": 1.0, "c": 0.5}, budget_minutes=5, min_minutes=2)
+    assert set(allocation) == {"a", "b"}
+    assert sum(allocation.values()) == pytest.approx(5)
+    assert allocate({"a": 1.0}, budget_minutes=1, min_minutes=2) == {}
+
+
+def test_plan_report(db_path, history, tmp_path):
+    report = plan(["fast", "slow", "new"], db_path, budget_minutes=30, policy="ucb", min_minutes=2)
+    assert report["policy"] == "ucb" and report["budget_minutes"] == 30
+    entries = {e["keyword"]: e for e in report["keywords"]}
+    assert entries["fast"]["history_links"] == 6
+    assert entries["fast"]["history_rate"] == pytest.approx(0.2)
+    assert entries["new"]["history_rate"] is None
+    assert sum(e["allocated_minutes"] for e in report["keywords"]) == pytest.approx(30, abs=0.05)
+    # 报告按分配时间倒序
+    minutes = [e["allocated_minutes"] for e in report["keywords"]]
+    assert minutes == sorted(minutes, reverse=True)
+
+    path = write_report(report, str(tmp_path / "reports"))
+    with open(path, encoding="utf-8") as f:
+        assert json.load(f) == report
@@ -0,0 +1,93 @@
+# tests/test_sightings.py
+"""出现记录的批量写入与聚合，以及迁移前链接的出现记录回填"""
+from auto_collect.storage import connect, migrate, record_sightings, transaction
+
+
+def sighting(link, keyword, tweet_id=None, seen_at="2024-05-01 08:00:00"):
+    return {"link": f"https://t.me/{link}", "keyword": keyword, "source": "s", "tweet_id": tweet_id,
+            "seen_at": seen_at}
+
+
+def record(conn, sightings) -> list:
+    with transaction(conn):
+        return record_sightings(conn, sightings)
+
+
+def aggregates(conn) -> dict:
+    return {row[0]: row[1:] for row in conn.execute(
+        "SELECT link, sighting_count, first_seen, last_seen FROM telegram_links")}
+
+
+def keyword_stats(conn) -> dict:
+    return {(row[0], row[1]): row[2:] for row in conn.execute('''
+        SELECT l.link, s.keyword, s.sighting_count, s.first_seen, s.last_seen
+        FROM link_keyword_stats s JOIN telegram_links l ON l.id = s.link_id
+    ''')}
+
+
+def test_batch_aggregates_per_link_and_keyword(conn):
+    new = record(conn, [
+        sighting("alpha", "kw1", "1", "2024-05-01 08:00:00"),
+        sighting("alpha", "kw1", "1", "2024-05-01 09:00:00"),   # 同一推文只记一次
+        sighting("alpha", "kw2", "2", "2024-05-02 08:00:00"),
+        sighting("beta", "kw1", None, "2024-05-01 10:00:00"),
+        sighting("beta", "kw1", None, "2024-05-01 11:00:00"),   # 没有推文 ID 的不去重
+    ])
+    assert new == ["https://t.me/alpha", "https://t.me/beta"]
+    assert conn.execute("SELECT COUNT(*) FROM link_sightings").fetchone()[0] == 4
+    assert aggregates(conn) == {
+        "https://t.me/alpha": (2, "2024-05-01 08:00:00", "2024-05-02 08:00:00"),
+        "https://t.me/beta": (2, "2024-05-01 10:00:00", "2024-05-01 11:00:00"),
+    }
+    assert keyword_stats(conn) == {
+        ("https://t.me/alpha", "kw1"): (1, "2024-05-01 08:00:00", "2024-05-01 08:00:00"),
+        ("https://t.me/alpha", "kw2"): (1, "2024-05-02 08:00:00", "2024-05-02 08:00:00"),
+        ("https://t.me/beta", "kw1"): (2, "2024-05-01 10:00:00", "2024-05-01 11:00:00"),
+    }
+
+
+def test_later_batches_upsert_into_existing_aggregates(conn):
+    record(conn, [sighting("alpha", "kw1", "1", "2024-05-02 08:00:00")])
+    # 重复滚动到的推文不计；更早的出现把 first_seen 往前推
+    new = record(conn, [
+        sighting("alpha", "kw1", "1", "2024-05-03 08:00:00"),
+        sighting("alpha", "kw1", "3", "2024-05-01 08:00:00"),
+        sighting("alpha", "", "4", "2024-05-04 08:00:00"),     # 没有关键词的不进按关键词的聚合
+    ])
+    assert new == []
+    assert aggregates(conn) == {"https://t.me/alpha": (3, "2024-05-01 08:00:00", "2024-05-04 08:00:00")}
+    assert keyword_stats(conn) == {
+        ("https://t.me/alpha", "kw1"): (2, "2024-05-01 08:00:00", "2024-05-02 08:00:00"),
+    }
+    # 第一次出现记为新链接，其余出现按出现的日期记为重复
+    assert conn.execute("SELECT day, keyword, new_links, duplicates FROM keyword_daily_stats "
+                        "ORDER BY day").fetchall() == [
+        ("2024-05-01", "kw1", 0, 1),
+        ("2024-05-02", "kw1", 1, 0),
+        ("2024-05-04", "", 0, 1),
+    ]
+
+
+def test_links_from_before_sightings_get_one_sighting(db_path, migrate_to):
+    conn = connect(db_path)
+    migrate_to(conn, 4)
+    conn.executemany("INSERT INTO telegram_links (link, source, keyword, created_at) VALUES (?, ?, ?, ?)", [
+        ("https://t.me/alpha", "s", "kw", "2024-01-01 00:00:00"),
+        ("https://t.me/beta", None, None, "2024-01-02 00:00:00"),
+    ])
+    migrate(conn)
+    # 版本 5 把已有链接记为出现过 1 次，出现记录与聚合列一致
+    assert conn.execute('''
+        SELECT l.link, l.sighting_count, COUNT(s.id), s.keyword, s.source, s.tweet_id, s.seen_at
+        FROM telegram_links l LEFT JOIN link_sightings s ON s.link_id = l.id
+        GROUP BY l.id ORDER BY l.id
+    ''').fetchall() == [
+        ("https://t.me/alpha", 1, 1, "kw", "s", None, "2024-01-01 00:00:00"),
+        ("https://t.me/beta", 1, 1, None, None, None, "2024-01-02 00:00:00"),
+    ]
+    # 之后再出现的链接照常累加
+    record(conn, [sighting("alpha", "kw", "1", "2024-06-01 00:00:00")])
+    assert conn.execute("SELECT sighting_count FROM telegram_links WHERE link = 'https://t.me/alpha'").fetchone() \
+        == (2,)
+    assert conn.execute("SELECT COUNT(*) FROM link_sightings").fetchone()[0] == 3
+    conn.close()
@@ -0,0 +1,86 @@
+# tests/test_snapshot.py
+"""A/B 快照槽位：刷新只写没有被采用的一份，读取方在下一次查询时切换"""
+import time
+
+from auto_collect.storage import SQLiteRepository, connect
+from auto_collect.storage.snapshot import SLOTS, SnapshotManager, SnapshotRepository, take_snapshot
+
+
+def count(path) -> int:
+    conn = connect(str(path), readonly=True)
+    try:
+        return conn.execute("SELECT COUNT(*) FROM telegram_links").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def wait_for(condition, timeout=10.0):
+    deadline = time.time() + timeout
+    while not condition():
+        assert time.time() < deadline, "等待超时"
+        time.sleep(0.02)
+
+
+def test_take_snapshot_is_a_standalone_copy(db_path, conn, add_links, tmp_path):
+    add_links(conn, ["https://t.me/alpha_one", "https://t.me/alpha_two"])
+    target = tmp_path / "copy.db"
+    take_snapshot(db_path, target)
+    assert count(target) == 2
+    copy = connect(str(target), readonly=True)
+    assert copy.execute("PRAGMA journal_mode").fetchone()[0] == "delete"
+    copy.close()
+    assert not (tmp_path / "copy.db-wal").exists()
+
+
+def test_slots_alternate_and_active_slot_is_never_overwritten(db_path, conn, add_links, tmp_path):
+    manager = SnapshotManager(db_path, snapshot_dir=tmp_path / "snap")
+    manager.snapshot_dir.mkdir()
+    assert manager.latest() == (None, 0)
+    assert manager.age() is None
+
+    add_links(conn, ["https://t.me/alpha_one"])
+    assert manager.refresh() == 1
+    path, generation = manager.latest()
+    assert (path.name, generation) == (SLOTS[0], 1)
+    reader = connect(str(path), readonly=True)
+
+    # 读取方还在用 a 时，连续刷新都只写 b
+    add_links(conn, ["https://t.me/alpha_two"])
+    manager.refresh()
+    add_links(conn, ["https://t.me/alpha_three"])
+    manager.refresh()
+    assert reader.execute("SELECT COUNT(*) FROM telegram_links").fetchone()[0] == 1
+    assert count(manager.snapshot_dir / SLOTS[1]) == 3
+
+    # 下一次查询采用最新完成的一份
+    path, generation = manager.latest()
+    assert (path.name, generation) == (SLOTS[1], 3)
+    assert manager.latest() == (path, 3)
+    reader.close()
+
+    manager.refresh()
+    assert manager.latest()[0].name == SLOTS[0]
+    manager.stop()
+    assert not manager.snapshot_dir.exists()
+
+
+def test_repository_reads_snapshot_and_refreshes_after_writes(db_path, tmp_path):
+    live = SQLiteRepository(db_path)
+    live.save_links([{"link": "https://t.me/alpha_one", "source": "s", "keyword": "kw"}])
+    repo = SnapshotRepository(live, interval=3600, snapshot_dir=tmp_path / "snap")
+    try:
+        wait_for(lambda: repo.snapshots.generation >= 1)
+        assert repo.count_links() == 1
+        snapshot_conn = repo.conn
+        assert snapshot_conn is not None
+
+        # 写入走主库并立即请求刷新，不用等一个刷新间隔
+        assert repo.save_links([{"link": "https://t.me/alpha_two", "source": "s", "keyword": "kw"}]) == \
+            ["https://t.me/alpha_two"]
+        assert repo.link_exists("https://t.me/alpha_two")
+        wait_for(lambda: repo.count_links() == 2)
+        assert repo.conn is not snapshot_conn
+        assert [row["link"] for row in repo.iter_links()] == ["https://t.me/alpha_two", "https://t.me/alpha_one"]
+    finally:
+        repo.close()
+    assert not (tmp_path / "snap").exists()
@@ -0,0 +1,77 @@
+# tests/test_stats.py
+"""按关键词按天的发现统计：各后端结果一致，日期范围与关键词过滤，以及旧库的回填"""
+import pytest
+
+from auto_collect.storage import MemoryRepository, SQLiteRepository, connect, migrate, transaction
+
+
+@pytest.fixture(params=["sqlite", "memory", "parquet"])
+def repo(request, db_path, tmp_path):
+    if request.param == "sqlite":
+        repo = SQLiteRepository(db_path)
+    elif request.param == "memory":
+        repo = MemoryRepository()
+    else:
+        pytest.importorskip("pyarrow")
+        from auto_collect.storage.parquet_repository import ParquetRepository
+        repo = ParquetRepository(str(tmp_path / "links.parquet"))
+
+    def save(keyword, day, names, tweet_id=None):
+        repo.save_links([{"link": f"https://t.me/{name}", "source": "s", "keyword": keyword, "tweet_id": tweet_id,
+                          "seen_at": f"{day} 08:00:00"} for name in names])
+
+    save("airdrop", "2024-05-01", ["alpha_one", "alpha_two", "alpha_one"])
+    save("airdrop", "2024-05-02", ["alpha_one", "alpha_three"])
+    save("crypto", "2024-05-02", ["alpha_two", "beta_one"], tweet_id="9")
+    save("crypto", "2024-05-02", ["beta_one"], tweet_id="9")    # 同一推文只计一次
+    save("crypto", "2024-05-03", ["beta_two"])
+    repo.record_crawl_time("airdrop", 120)
+    repo.record_crawl_time("airdrop", 60)
+    return repo
+
+
+def test_daily_rows(repo):
+    rows = repo.get_daily_stats(until="2024-12-31")
+    assert [(r["day"], r["keyword"], r["new_links"], r["duplicates"]) for r in rows] == [
+        ("2024-05-03", "crypto", 1, 0),
+        ("2024-05-02", "airdrop", 1, 1),
+        ("2024-05-02", "crypto", 1, 1),
+        ("2024-05-01", "airdrop", 2, 1),
+    ]
+    assert [r["day"] for r in repo.get_daily_stats(keyword="crypto", since="2024-05-02", until="2024-05-02")] == \
+        ["2024-05-02"]
+    # 抓取耗时记在当天
+    today = [r for r in repo.get_daily_stats(keyword="airdrop") if r["crawl_seconds"]]
+    assert len(today) == 1 and today[0]["crawl_seconds"] == 180
+
+
+def test_keyword_totals(repo):
+    totals = {t["keyword"]: t for t in repo.get_keyword_totals()}
+    assert [t["keyword"] for t in repo.get_keyword_totals()] == ["airdrop", "crypto"]
+    assert totals["airdrop"] == {"keyword": "airdrop", "days": 2, "new_links": 3, "duplicates": 2,
+                                 "crawl_seconds": 180, "links_per_minute": 1.0}
+    assert totals["crypto"] == {"keyword": "crypto", "days": 2, "new_links": 2, "duplicates": 1,
+                                "crawl_seconds": 0, "links_per_minute": None}
+    # 范围内没有耗时记录时每分钟新链接数为 None
+    assert [t["links_per_minute"] for t in repo.get_keyword_totals(until="2024-05-01")] == [None]
+
+
+def test_backfill_from_links_and_sightings(db_path, migrate_to):
+    conn = connect(db_path)
+    migrate_to(conn, 6)
+    with transaction(conn):
+        conn.execute("INSERT INTO telegram_links (id, link, keyword, first_seen) "
+                     "VALUES (1, 'https://t.me/alpha_one', 'airdrop', '2024-05-01 08:00:00')")
+        conn.executemany("INSERT INTO link_sightings (link_id, keyword, tweet_id, seen_at) VALUES (1, ?, ?, ?)", [
+            ("airdrop", "1", "2024-05-01 08:00:00"),
+            ("airdrop", "2", "2024-05-01 09:00:00"),
+            ("crypto", "3", "2024-05-02 08:00:00"),
+        ])
+    migrate(conn)
+    # 新链接按首次发现日期计，重复 = 当天出现次数 - 当天新链接数
+    assert conn.execute("SELECT day, keyword, new_links, duplicates FROM keyword_daily_stats "
+                        "ORDER BY day, keyword").fetchall() == [
+        ("2024-05-01", "airdrop", 1, 1),
+        ("2024-05-02", "crypto", 0, 1),
+    ]
+    conn.close()
@@ -0,0 +1,188 @@
+# tests/test_stream_ingest.py
+"""用本地分块(chunked) HTTP 服务模拟过滤流：断线、HTTP 错误、重连退避与批量写入"""
+import json
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from auto_collect.crawler import stream_ingest
+from auto_collect.crawler.TwitterAPIClient import TwitterAPIClient
+from auto_collect.storage import MemoryRepository
+from auto_collect.storage.tweet_archive import iter_tweets
+
+
+def tweet_line(n: int) -> bytes:
+    payload = {"data": {"id": str(1000 + n), "text": f"join https://t.me/channel_{n:04d} now"},
+               "matching_rules": [{"id": "1", "tag": "auto_collect:0"}]}
+    return json.dumps(payload).encode() + b"\r\n"
+
+
+class StreamServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, script):
+        # script: 每次连接流地址时的行为，("stream", 推文编号, 是否正常结束) 或 ("status", HTTP 状态码)
+        self.script = list(script)
+        self.connections = 0
+        super().__init__(("127.0.0.1", 0), StreamHandler)
+
+
+class StreamHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def _json(self, body):
+        data = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self._json({"data": body.get("add", [])})
+
+    def do_GET(self):
+        if self.path.startswith("/2/tweets/search/stream/rules"):
+            return self._json({"data": []})
+        server = self.server
+        action = server.script[server.connections]
+        server.connections += 1
+        if action[0] == "status":
+            self.send_response(action[1])
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        _, numbers, clean = action
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for chunk in [b"\r\n"] + [tweet_line(n) for n in numbers]:  # 空行是保活信号
+            self.wfile.write(b"%x\r\n%s\r\n" % (len(chunk), chunk))
+            self.wfile.flush()
+        if clean:
+            self.wfile.write(b"0\r\n\r\n")
+            self.wfile.flush()
+        else:
+            # 不发结束块直接断开，模拟网络中断
+            self.connection.shutdown(socket.SHUT_RDWR)
+        self.close_connection = True
+
+
+class RecordingEvent(threading.Event):
+    """记录重连前的等待时间，不真的等待"""
+
+    def __init__(self):
+        super().__init__()
+        self.waits = []
+
+    def wait(self, timeout=None):
+        self.waits.append(timeout)
+        return self.is_set()
+
+
+class BatchRecorder(MemoryRepository):
+    def __init__(self):
+        super().__init__()
+        self.batches = []
+
+    def save_links(self, items):
+        self.batches.append(len(items))
+        return super().save_links(items)
+
+
+@pytest.fixture
+def server():
+    servers = []
+
+    def start(script):
+        srv = StreamServer(script)
+        threading.Thread(target=srv.serve_forever, daemon=True).start()
+        servers.append(srv)
+        return srv
+
+    yield start
+    for srv in servers:
+        srv.shutdown()
+        srv.server_close()
+
+
+def test_reconnects_with_backoff_and_ingests_every_line_once(server):
+    srv = server([
+        ("stream", [1, 2, 3], False),   # 中途断线
+        ("status", 503),
+        ("status", 429),
+        ("stream", [4, 5, 6], True),    # 服务端正常关闭
+    ])
+    client = TwitterAPIClient(bearer_token="test", api_base=f"http://127.0.0.1:{srv.server_port}")
+    repo = BatchRecorder()
+    ingest = stream_ingest.StreamIngest(client, ["channel"], db_manager=repo, batch_size=2,
+                                        flush_interval=60, max_reconnects=3)
+    ingest._stop_event = RecordingEvent()
+    ingest.run()
+
+    assert srv.connections == 4
+    # 断线按网络退避；HTTP 错误按指数退避，429 单独计数，从更长的等待开始
+    assert ingest._stop_event.waits == [
+        stream_ingest.NETWORK_BACKOFF_STEP,
+        stream_ingest.HTTP_BACKOFF_START,
+        stream_ingest.RATE_LIMIT_BACKOFF_START,
+    ]
+    assert ingest.tweets_seen == 6
+    assert ingest.links_saved == 6
+    assert len(repo.sightings) == 6
+    assert {r["link"] for r in repo.iter_links()} == {f"https://t.me/channel_{n:04d}" for n in range(1, 7)}
+    # 满一批写一次，断线时写入剩余的
+    assert repo.batches == [2, 1, 2, 1]
+
+
+class LinesResponse:
+    def __init__(self, lines):
+        self.lines = lines
+
+    def iter_lines(self, chunk_size=None):
+        return iter(self.lines)
+
+
+def test_bad_payload_does_not_stop_the_stream():
+    repo = BatchRecorder()
+    ingest = stream_ingest.StreamIngest(None, ["channel"], db_manager=repo, flush_interval=60)
+    ingest._consume(LinesResponse([
+        b"not json",
+        json.dumps({"data": "not an object"}).encode(),
+        json.dumps({"data": {"id": "1", "entities": {"urls": None}}}).encode(),
+        tweet_line(7).strip(),
+    ]))
+    ingest.flush()
+    assert {r["link"] for r in repo.iter_links()} == {"https://t.me/channel_0007"}
+
+
+class InterruptedClient:
+    def get_stream_rules(self):
+        return []
+
+    def delete_stream_rules(self, ids):
+        pass
+
+    def add_stream_rules(self, rules):
+        pass
+
+    def open_filtered_stream(self):
+        raise KeyboardInterrupt
+
+
+def test_archive_closed_when_run_is_interrupted(tmp_path):
+    ingest = stream_ingest.StreamIngest(InterruptedClient(), ["channel"], db_manager=BatchRecorder(),
+                                        archive_dir=str(tmp_path))
+    ingest.handle_payload(json.loads(tweet_line(3)))
+    with pytest.raises(KeyboardInterrupt):
+        ingest.run()
+    # 缓冲中的推文在退出时写入了归档
+    assert [t["id"] for t in iter_tweets(str(tmp_path))] == ["1003"]
@@ -0,0 +1,89 @@
+# tests/test_tweet_archive.py
+"""推文归档：离线重新提取得到的出现记录与实时采集时写入的一致，重复执行不重复计数"""
+from pathlib import Path
+
+import pytest
+
+from auto_collect.crawler.stream_ingest import StreamIngest
+from auto_collect.storage import connect, open_repository
+from auto_collect.storage.tweet_archive import TweetArchive, chunk_files, iter_tweets, reextract
+
+PAYLOADS = [
+    {"data": {"id": "1", "text": "join https://t.me/Alpha_One and t.me/s/alpha_one"}},
+    {"data": {"id": "2", "text": "two links https://t.co/x https://t.me/beta_one",
+              "entities": {"urls": [{"expanded_url": "https://telegram.me/joinchat/AbCd"}]}}},
+    {"data": {"id": "3", "text": "no links here"}},
+    {"data": {"id": "1", "text": "join https://t.me/Alpha_One and t.me/s/alpha_one"}},   # 重复推送
+    {"data": {"id": "4", "text": "again https://t.me/beta_one"}},
+]
+
+
+def sightings(db_path) -> list:
+    conn = connect(db_path, readonly=True)
+    rows = conn.execute('''
+        SELECT l.link, s.keyword, s.source, s.tweet_id
+        FROM link_sightings s JOIN telegram_links l ON l.id = s.link_id
+        ORDER BY s.tweet_id, l.link
+    ''').fetchall()
+    conn.close()
+    return rows
+
+
+@pytest.fixture
+def live(tmp_path):
+    """用过滤流采集器边写库边归档，返回 (归档目录, 实时库路径)"""
+    archive_dir = str(tmp_path / "tweets")
+    db_path = str(tmp_path / "live.db")
+    ingest = StreamIngest(None, ["join"], db_manager=open_repository(db_path), archive_dir=archive_dir)
+    for payload in PAYLOADS:
+        ingest.handle_payload(dict(payload, matching_rules=[{"tag": "auto_collect:0"}]))
+    ingest.flush()
+    ingest.archive.close()
+    return archive_dir, db_path
+
+
+def test_archive_keeps_each_tweet_once(live):
+    archive_dir, _ = live
+    assert [t["id"] for t in iter_tweets(archive_dir)] == ["1", "2", "3", "4"]
+    assert len(chunk_files(archive_dir)) == 1
+    assert chunk_files(archive_dir, months=["1999-01"]) == []
+
+
+def test_reextract_reproduces_live_sightings(live, tmp_path, db_path):
+    archive_dir, live_db = live
+    expected = sightings(live_db)
+    assert [(link, tweet_id) for link, _, _, tweet_id in expected] == [
+        ("https://t.me/alpha_one", "1"),
+        ("https://t.me/+AbCd", "2"),
+        ("https://t.me/beta_one", "2"),
+        ("https://t.me/beta_one", "4"),
+    ]
+
+    summary = reextract(archive_dir, db_path, workers=2)
+    assert summary == {"chunks": 1, "tweets": 4, "sightings": 4, "new_links": 3}
+    assert sightings(db_path) == expected
+
+    # 对已有这些出现记录的库重新提取：推文 ID 去重，计数不变
+    again = reextract(archive_dir, live_db, workers=1)
+    assert again["new_links"] == 0
+    assert sightings(live_db) == expected
+    conn = connect(live_db, readonly=True)
+    assert conn.execute("SELECT SUM(sighting_count) FROM telegram_links").fetchone()[0] == 4
+    conn.close()
+
+
+def test_dry_run_writes_nothing(live, tmp_path):
+    archive_dir, _ = live
+    target = tmp_path / "untouched.db"
+    assert reextract(archive_dir, str(target), workers=1, dry_run=True)["sightings"] == 4
+    assert not Path(target).exists()
+
+
+def test_tweets_without_id_are_not_archived(tmp_path):
+    archive = TweetArchive(str(tmp_path))
+    assert not archive.append(None, "https://t.me/alpha_one")
+    assert not archive.append("5", "")
+    assert archive.append(5, "https://t.me/alpha_one")
+    assert not archive.append("5", "https://t.me/alpha_one")
+    archive.close()
+    assert [t["id"] for t in iter_tweets(str(tmp_path))] == ["5"]
@@ -0,0 +1,53 @@
+# tests/test_worker.py
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("PyQt6")
+
+from PyQt6.QtCore import QCoreApplication
+
+from auto_collect.ui.main_window import Worker
+
+# 代替爬虫子进程：两个新链接以事件输出，最后一行 JSON 里还有一个只出现过的已知链接
+CRAWLER_SCRIPT = r'''
+from auto_collect.crawler.events import LINK_EVENT, emit_event
+print("[Worker] 开始搜索", flush=True)
+emit_event(LINK_EVENT, link="https://t.me/new_one", source="https://x.com/a/status/1", keyword="kw")
+print("[DB] 成功保存新链接: https://t.me/new_one", flush=True)
+emit_event(LINK_EVENT, link="https://t.me/new_two", source="https://x.com/a/status/2", keyword="kw")
+print('[{"link": "https://t.me/new_one", "source": "unknown"}, '
+      '{"link": "https://t.me/new_two", "source": "unknown"}, '
+      '{"link": "https://t.me/known_one", "source": "unknown"}]', flush=True)
+'''
+
+
+@pytest.fixture
+def fake_crawler(monkeypatch):
+    real_popen = subprocess.Popen
+
+    def popen(cmd, **kwargs):
+        # 在项目根目录运行，脚本里可以直接导入 auto_collect
+        return real_popen([sys.executable, "-c", CRAWLER_SCRIPT], cwd=str(Path(__file__).parent.parent), **kwargs)
+
+    monkeypatch.setattr(subprocess, "Popen", popen)
+
+
+def test_final_result_only_sends_links_not_streamed(fake_crawler):
+    app = QCoreApplication.instance() or QCoreApplication([])  # noqa: F841 信号需要应用对象
+    worker = Worker(["search", "kw"], flush_interval=60)
+    lines, results, messages = [], [], []
+    worker.log_lines_signal.connect(lines.extend)
+    worker.result_signal.connect(results.append)
+    worker.log_signal.connect(messages.append)
+    worker.run()
+
+    # 日志里没有事件行和最后的 JSON 行
+    assert lines == ["[Worker] 开始搜索", "[DB] 成功保存新链接: https://t.me/new_one"]
+    # 实时事件一批，最后的结果只补上没有实时发送过的链接
+    assert [[r["link"] for r in batch] for batch in results] == \
+        [["https://t.me/new_one", "https://t.me/new_two"], ["https://t.me/known_one"]]
+    assert results[1][0]["source"] == "unknown"
+    assert messages == ["解析到 1 个结果"]
@@ -0,0 +1,58 @@
+# tests/test_writer.py
+import threading
+
+import pytest
+
+from auto_collect.storage import LinkWriter, get_writer, stop_all_writers
+
+
+def insert(conn, value):
+    conn.execute("CREATE TABLE IF NOT EXISTS t (v INTEGER)")
+    conn.execute("INSERT INTO t (v) VALUES (?)", (value,))
+    return value
+
+
+def test_execute_after_stop_is_rejected(db_path, conn):
+    writer = LinkWriter(db_path, use_filter=False)
+    futures = [writer.execute(lambda c, i=i: insert(c, i)) for i in range(5)]
+    writer.stop()
+    # 停止前排队的请求都已提交
+    assert [f.result() for f in futures] == list(range(5))
+
+    with pytest.raises(RuntimeError):
+        writer.execute(lambda c: insert(c, 99))
+    with pytest.raises(RuntimeError):
+        writer.run_exclusive(lambda c: None)
+    with pytest.raises(RuntimeError):
+        writer.start()
+    # 没有重新启动写线程
+    assert writer._thread is None
+    assert not any(t.name == f"LinkWriter:{db_path}" for t in threading.enumerate())
+    assert conn.execute("SELECT COUNT(*) FROM t").fetchone()[0] == 5
+
+
+def test_concurrent_submit_and_stop(db_path, conn):
+    conn.execute("CREATE TABLE t (v INTEGER)")
+    writer = get_writer(db_path, use_filter=False)
+    accepted, rejected = [], []
+
+    def produce(start):
+        for i in range(start, start + 200):
+            try:
+                accepted.append(writer.execute(lambda c, i=i: insert(c, i)))
+            except RuntimeError:
+                rejected.append(i)
+
+    producers = [threading.Thread(target=produce, args=(n * 1000,)) for n in range(4)]
+    for t in producers:
+        t.start()
+    stop_all_writers()
+    for t in producers:
+        t.join()
+
+    # 每个被接受的请求都完成了，没有悬空的 Future
+    assert all(f.result(timeout=5) is not None for f in accepted)
+    assert conn.execute("SELECT COUNT(*) FROM t").fetchone()[0] == len(accepted)
+    assert len(accepted) + len(rejected) == 800
+    # 停止后 get_writer 换一个新的写线程
+    assert get_writer(db_path, use_filter=False) is not writer